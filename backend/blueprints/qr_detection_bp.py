@@ -1,5 +1,12 @@
 from flask import Blueprint, request, jsonify
 from modules.technician.qr_detector import detect_qr_at_time, preprocess_video_qr, detect_qr_from_image
+from modules.technician.qr_detector_pool import detector_pool
+from modules.technician.detection_cache import get_detection_cache, make_cache_key
+from modules.technician.step4_preprocessing import (
+    COMBINED_PREPROCESSING_ENABLED,
+    start_step4_preprocessing,
+    ensure_baseline
+)
 from modules.technician.camera_health_baseline import capture_baseline_from_step4
 from modules.technician.camera_health_checker import (
     run_health_check,
@@ -15,47 +22,57 @@ import logging
 import sys
 import threading
 import time
-import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 
 qr_detection_bp = Blueprint('qr_detection', __name__)
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# In-memory cache for pre-processed QR detections (same pattern as hand detection)
-# Structure: {cache_key: {'detections': [...], 'metadata': {...}, 'expires_at': datetime}}
-qr_preprocessing_cache = {}
+# Persistent cache for pre-processed QR detections (same pattern as hand detection)
+# Entry: {'detections': [...], 'metadata': {...}, 'processed_at': datetime, 'expires_at': datetime}
+qr_preprocessing_cache = get_detection_cache("qr")
 qr_preprocessing_progress = {}  # Track progress for ongoing processing
 
 # Baseline capture cache - stores baseline metrics captured during QR preprocessing
-# Structure: {cache_key: {'baseline_success_rate_pct': float, 'detected_frames': int, 'total_frames': int, 'baseline_id': int, 'expires_at': datetime}}
-qr_baseline_cache = {}
+# Entry: {'baseline_success_rate_pct': float, 'detected_frames': int, 'total_frames': int, 'baseline_id': int, ...}
+qr_baseline_cache = get_detection_cache("qr_baseline")
 
 # ✅ FIXED: Use same path calculation as hand_detection_bp.py
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 BACKEND_DIR = os.path.join(BASE_DIR, "backend")
 CAMERA_ROI_DIR = os.path.join(BASE_DIR, "resources", "output_clips", "CameraROI")
 
-def generate_qr_cache_key(video_path: str, roi_config: dict) -> str:
-    """Generate unique cache key for video + ROI combination"""
-    roi_str = f"{roi_config['x']}_{roi_config['y']}_{roi_config['w']}_{roi_config['h']}"
-    cache_input = f"{video_path}_{roi_str}"
-    return hashlib.md5(cache_input.encode()).hexdigest()
+# Longest window /get-cached-qr-range returns in one request (seconds)
+MAX_RANGE_SECONDS = 60.0
+
+def generate_qr_cache_key(video_path: str, roi_config: dict, fps: int = 5) -> str:
+    """Generate unique cache key for video content (path, size, mtime) + ROI + fps"""
+    return make_cache_key(video_path, roi_config, fps)
 
 def cleanup_expired_qr_cache():
     """Remove expired QR cache entries"""
-    global qr_preprocessing_cache
-    
-    now = datetime.now()
-    expired_keys = [
-        key for key, cache_data in qr_preprocessing_cache.items()
-        if cache_data.get('expires_at', now) <= now
-    ]
-    
-    for key in expired_keys:
-        del qr_preprocessing_cache[key]
-        logger.info(f"Removed expired QR cache entry: {key}")
+    qr_preprocessing_cache.cleanup_expired()
+    qr_baseline_cache.cleanup_expired()
+
+def map_qr_detections_to_canvas(qr_detections: list, roi_config: dict, video_dims: dict, canvas_dims: dict):
+    """Map QR detections to canvas coordinates with LandmarkMapper; None if mapping fails"""
+    try:
+        from modules.technician.landmark_mapper import LandmarkMapper, ROIConfig, VideoDimensions, CanvasDimensions
+
+        roi = ROIConfig(x=roi_config['x'], y=roi_config['y'], w=roi_config['w'], h=roi_config['h'])
+        video_dimensions = VideoDimensions(width=video_dims['width'], height=video_dims['height'])
+        canvas_dimensions = CanvasDimensions(width=canvas_dims['width'], height=canvas_dims['height'])
+
+        qr_mapping_response = LandmarkMapper.create_canvas_qr_response(
+            qr_detections, roi, video_dimensions, canvas_dimensions
+        )
+        if qr_mapping_response['success']:
+            return qr_mapping_response
+        logger.warning(f"LandmarkMapper QR mapping failed: {qr_mapping_response.get('error')}")
+    except Exception as e:
+        logger.error(f"Error using LandmarkMapper for QR coordinate mapping: {e}")
+    return None
 
 @qr_detection_bp.route('/preprocess-video', methods=['POST'])
 def preprocess_qr_video():
@@ -69,9 +86,15 @@ def preprocess_qr_video():
         "roi_config": {
             "x": int, "y": int, "w": int, "h": int
         },
-        "fps": int (optional, default 5)
+        "fps": int (optional, default 5),
+        "camera_name": str (optional, enables baseline capture),
+        "packing_profile_id": int (optional),
+        "trigger_roi_config": {"x", "y", "w", "h"} (optional, decoded separately if outside roi_config)
     }
     
+    With VTRACK_COMBINED_PREPROCESSING (default on) this starts or joins the
+    single-pass Step 4 job that also fills the hand detection cache.
+    
     Response:
     {
         "success": bool,
@@ -103,6 +126,7 @@ def preprocess_qr_video():
         # Optional parameters for baseline capture
         camera_name = data.get('camera_name')
         packing_profile_id = data.get('packing_profile_id')
+        trigger_roi_config = data.get('trigger_roi_config')
 
         if camera_name:
             logger.info(f"[BASELINE] QR preprocessing will capture baseline for camera: {camera_name}")
@@ -151,21 +175,39 @@ def preprocess_qr_video():
             }), 400
         
         # Generate cache key
-        cache_key = generate_qr_cache_key(video_path, roi_config)
+        cache_key = generate_qr_cache_key(video_path, roi_config, fps)
         
-        # Check if already cached and not expired
-        if cache_key in qr_preprocessing_cache:
-            cache_data = qr_preprocessing_cache[cache_key]
-            if cache_data.get('expires_at', datetime.now()) > datetime.now():
-                logger.info(f"Returning cached QR results for {cache_key}")
-                return jsonify({
-                    "success": True,
-                    "cache_key": cache_key,
-                    "status": "completed",
-                    "progress": 100.0,
-                    "detections": cache_data['detections'],
-                    "metadata": cache_data['metadata']
-                }), 200
+        # Check if already cached (memory or disk) and not expired
+        cache_data = qr_preprocessing_cache.get(cache_key)
+        if cache_data is not None:
+            logger.info(f"Returning cached QR results for {cache_key}")
+            if COMBINED_PREPROCESSING_ENABLED and camera_name:
+                # Cached timeline (e.g. from a hand-initiated combined job) -> baseline without decoding
+                ensure_baseline(video_path, roi_config, fps, camera_name, packing_profile_id, trigger_roi_config)
+            return jsonify({
+                "success": True,
+                "cache_key": cache_key,
+                "status": "completed",
+                "progress": 100.0,
+                "detections": cache_data['detections'],
+                "metadata": cache_data['metadata']
+            }), 200
+        
+        # Single pass for hands + QR + baseline (joins a job the hand endpoint already started)
+        if COMBINED_PREPROCESSING_ENABLED:
+            job, started = start_step4_preprocessing(
+                video_path, roi_config, fps, camera_name=camera_name,
+                packing_profile_id=packing_profile_id, trigger_roi=trigger_roi_config
+            )
+            return jsonify({
+                "success": True,
+                "cache_key": cache_key,
+                "status": "started" if started else "in_progress",
+                "progress": job.get('progress', 0.0),
+                "combined": True,
+                "message": f"Combined hand + QR pre-processing started for video at {fps}fps" if started else None,
+                "estimated_completion": job.get('estimated_completion')
+            }), 202
         
         # Check if processing is already in progress
         if cache_key in qr_preprocessing_progress:
@@ -195,14 +237,13 @@ def preprocess_qr_video():
 
                 # Cache baseline immediately
                 if baseline_result.get('success'):
-                    qr_baseline_cache[cache_key] = {
+                    qr_baseline_cache.put(cache_key, {
                         'baseline_success_rate_pct': baseline_result.get('baseline_success_rate_pct', 0),
                         'detected_frames': baseline_result.get('detected_frames', 0),
                         'total_frames': baseline_result.get('total_frames', 0),
                         'baseline_id': baseline_result.get('baseline_id'),
-                        'first_timego_sec': baseline_result.get('first_timego_sec'),
-                        'expires_at': datetime.now() + timedelta(minutes=30)
-                    }
+                        'first_timego_sec': baseline_result.get('first_timego_sec')
+                    })
                     logger.info(f"[BASELINE] ✅ Baseline READY: {baseline_result.get('baseline_success_rate_pct', 0):.1f}% ({baseline_result.get('detected_frames', 0)}/{baseline_result.get('total_frames', 0)}) for {cache_key}")
                 else:
                     logger.warning(f"[BASELINE] Baseline capture failed: {baseline_result.get('error', 'Unknown error')}")
@@ -224,18 +265,16 @@ def preprocess_qr_video():
                     'roi_config': roi_config  # Store ROI config for baseline
                 }
 
-                # Initialize main cache entry for progressive accumulation
-                qr_preprocessing_cache[cache_key] = {
+                # Initialize main cache entry for progressive accumulation (memory only until completed)
+                qr_preprocessing_cache.put(cache_key, {
                     'detections': [],  # Start with empty list to accumulate
                     'metadata': {
                         'partial_results': True,
                         'progress': 0.0,
                         'processed_count': 0,
                         'total_frames': 0
-                    },
-                    'expires_at': datetime.now() + timedelta(minutes=30),
-                    'processed_at': datetime.now()
-                }
+                    }
+                }, persist=False)
 
                 # Progress callback function - simplified with skip-to-end logic
                 def update_qr_progress(progress, processed_count, total_frames, new_detections=None):
@@ -256,15 +295,13 @@ def preprocess_qr_video():
 
                     # Accumulate new detections into main cache (không overwrite)
                     if new_detections and len(new_detections) > 0:
-                        if cache_key in qr_preprocessing_cache:
-                            # Append new detections to existing list instead of replacing
-                            qr_preprocessing_cache[cache_key]['detections'].extend(new_detections)
-                            qr_preprocessing_cache[cache_key]['metadata'].update({
-                                'progress': progress,
-                                'processed_count': processed_count,
-                                'total_frames': total_frames
-                            })
-                            total_detections = len(qr_preprocessing_cache[cache_key]['detections'])
+                        # Append new detections to existing list instead of replacing
+                        total_detections = qr_preprocessing_cache.extend(cache_key, new_detections, {
+                            'progress': progress,
+                            'processed_count': processed_count,
+                            'total_frames': total_frames
+                        })
+                        if total_detections is not None:
                             logger.debug(f"QR: Accumulated {len(new_detections)} new detections. Total: {total_detections} for {cache_key}")
                         else:
                             logger.warning(f"QR: Cache key {cache_key} not found during update")
@@ -275,14 +312,11 @@ def preprocess_qr_video():
                 result = preprocess_video_qr(video_path, roi_config, fps, progress_callback=update_qr_progress)
 
                 if result.get('success'):
-                    # Cache the QR results for 30 minutes
-                    expires_at = datetime.now() + timedelta(minutes=30)
-                    qr_preprocessing_cache[cache_key] = {
+                    # Cache the QR results (memory LRU + disk)
+                    qr_preprocessing_cache.put(cache_key, {
                         'detections': result['detections'],
-                        'metadata': result['metadata'],
-                        'expires_at': expires_at,
-                        'processed_at': datetime.now()
-                    }
+                        'metadata': result['metadata']
+                    })
 
                     total_qr_detections = sum(d.get('qr_count', 0) for d in result['detections'])
                     logger.info(f"QR pre-processing completed for {cache_key}: {len(result['detections'])} timeline entries, {total_qr_detections} QR detections cached")
@@ -349,18 +383,17 @@ def qr_preprocess_status(cache_key: str):
         cleanup_expired_qr_cache()
         
         # Check if completed and cached
-        if cache_key in qr_preprocessing_cache:
-            cache_data = qr_preprocessing_cache[cache_key]
-            if cache_data.get('expires_at', datetime.now()) > datetime.now():
-                return jsonify({
-                    "success": True,
-                    "status": "completed",
-                    "progress": 100.0,
-                    "detections": cache_data['detections'],
-                    "metadata": cache_data['metadata'],
-                    "processed_at": cache_data['processed_at'].isoformat(),
-                    "expires_at": cache_data['expires_at'].isoformat()
-                }), 200
+        cache_data = qr_preprocessing_cache.get(cache_key)
+        if cache_data is not None:
+            return jsonify({
+                "success": True,
+                "status": "completed",
+                "progress": 100.0,
+                "detections": cache_data['detections'],
+                "metadata": cache_data['metadata'],
+                "processed_at": cache_data['processed_at'].isoformat(),
+                "expires_at": cache_data['expires_at'].isoformat()
+            }), 200
         
         # Check if still in progress
         if cache_key in qr_preprocessing_progress:
@@ -460,31 +493,16 @@ def get_cached_qr():
                 "error": "Invalid timestamp value"
             }), 400
         
-        # Check main cache
-        if cache_key not in qr_preprocessing_cache:
+        # Check main cache (expired entries are dropped by the cache itself)
+        timeline = qr_preprocessing_cache.timeline(cache_key)
+        if timeline is None:
             return jsonify({
                 "success": False,
                 "error": "QR cache key not found or expired"
             }), 404
         
-        cache_data = qr_preprocessing_cache[cache_key]
-        if cache_data.get('expires_at', datetime.now()) <= datetime.now():
-            del qr_preprocessing_cache[cache_key]
-            return jsonify({
-                "success": False,
-                "error": "QR cache expired"
-            }), 404
-        
-        # Find QR detections for timestamp (exact match within 0.15s tolerance)
-        detections = cache_data['detections']
-        closest_detection = None
-        min_time_diff = float('inf')
-        
-        for detection in detections:
-            time_diff = abs(detection['timestamp'] - timestamp)
-            if time_diff < 0.15 and time_diff < min_time_diff:  # 0.15s tolerance for 5fps (0.2s interval)
-                closest_detection = detection
-                min_time_diff = time_diff
+        # Find QR detections for timestamp (bisect, 0.15s tolerance for 5fps / 0.2s interval)
+        closest_detection, min_time_diff = timeline.closest(timestamp)
         
         if closest_detection:
             qr_detections = closest_detection.get('qr_detections', [])
@@ -500,45 +518,14 @@ def get_cached_qr():
             }
             
             # Add canvas_qr_detections using LandmarkMapper for consistent coordinate transformation
+            response['canvas_qr_detections'] = []
             if canvas_dims and video_dims and roi_config and qr_detections:
-                try:
-                    from modules.technician.landmark_mapper import LandmarkMapper, ROIConfig, VideoDimensions, CanvasDimensions
-                    
-                    # Create mapping objects
-                    roi = ROIConfig(
-                        x=roi_config['x'],
-                        y=roi_config['y'],
-                        w=roi_config['w'],
-                        h=roi_config['h']
-                    )
-                    video_dimensions = VideoDimensions(
-                        width=video_dims['width'],
-                        height=video_dims['height']
-                    )
-                    canvas_dimensions = CanvasDimensions(
-                        width=canvas_dims['width'],
-                        height=canvas_dims['height']
-                    )
-                    
-                    # Use LandmarkMapper for coordinate transformation
-                    qr_mapping_response = LandmarkMapper.create_canvas_qr_response(
-                        qr_detections, roi, video_dimensions, canvas_dimensions
-                    )
-                    
-                    if qr_mapping_response['success']:
-                        response['canvas_qr_detections'] = qr_mapping_response['canvas_qr_detections']
-                        response['mapping_algorithm'] = qr_mapping_response['mapping_algorithm']
-                        response['mapping_info'] = qr_mapping_response['mapping_info']
-                        logger.debug(f"LandmarkMapper: Mapped {len(qr_mapping_response['canvas_qr_detections'])} QR detections for timestamp {timestamp}")
-                    else:
-                        logger.warning(f"LandmarkMapper QR mapping failed: {qr_mapping_response.get('error')}")
-                        response['canvas_qr_detections'] = []
-                        
-                except Exception as e:
-                    logger.error(f"Error using LandmarkMapper for QR coordinate mapping: {e}")
-                    response['canvas_qr_detections'] = []
-            else:
-                response['canvas_qr_detections'] = []
+                qr_mapping_response = map_qr_detections_to_canvas(qr_detections, roi_config, video_dims, canvas_dims)
+                if qr_mapping_response:
+                    response['canvas_qr_detections'] = qr_mapping_response['canvas_qr_detections']
+                    response['mapping_algorithm'] = qr_mapping_response['mapping_algorithm']
+                    response['mapping_info'] = qr_mapping_response['mapping_info']
+                    logger.debug(f"LandmarkMapper: Mapped {len(qr_mapping_response['canvas_qr_detections'])} QR detections for timestamp {timestamp}")
             
             return jsonify(response), 200
         else:
@@ -637,11 +624,13 @@ def get_cached_trigger():
                 "error": "Invalid timestamp value"
             }), 400
         
-        # Remove "_trigger" suffix from cache key if present for main cache lookup
+        # Trigger-area timeline from the combined pass if the trigger ROI was decoded separately,
+        # otherwise the main QR cache (remove "_trigger" suffix from cache key for that lookup)
         main_cache_key = cache_key.replace('_trigger', '') if cache_key.endswith('_trigger') else cache_key
-        
-        # Check main QR cache (trigger detection uses same QR preprocessing)
-        if main_cache_key not in qr_preprocessing_cache:
+        timeline = qr_preprocessing_cache.timeline(cache_key) if cache_key != main_cache_key else None
+        if timeline is None:
+            timeline = qr_preprocessing_cache.timeline(main_cache_key)
+        if timeline is None:
             return jsonify({
                 "success": False,
                 "error": "QR cache key not found or expired",
@@ -649,26 +638,8 @@ def get_cached_trigger():
                 "trigger_text": None
             }), 404
         
-        cache_data = qr_preprocessing_cache[main_cache_key]
-        if cache_data.get('expires_at', datetime.now()) <= datetime.now():
-            del qr_preprocessing_cache[main_cache_key]
-            return jsonify({
-                "success": False,
-                "error": "QR cache expired",
-                "trigger_detected": False,
-                "trigger_text": None
-            }), 404
-        
-        # Find QR detections for timestamp (exact match within 0.15s tolerance)
-        detections = cache_data['detections']
-        closest_detection = None
-        min_time_diff = float('inf')
-        
-        for detection in detections:
-            time_diff = abs(detection['timestamp'] - timestamp)
-            if time_diff < 0.15 and time_diff < min_time_diff:  # 0.15s tolerance for 5fps
-                closest_detection = detection
-                min_time_diff = time_diff
+        # Find QR detections for timestamp (bisect, 0.15s tolerance for 5fps)
+        closest_detection, min_time_diff = timeline.closest(timestamp)
         
         if closest_detection:
             qr_detections = closest_detection.get('qr_detections', [])
@@ -723,45 +694,14 @@ def get_cached_trigger():
             }
             
             # Add canvas_qr_detections for trigger area QR codes
+            response['canvas_qr_detections'] = []
             if canvas_dims and video_dims and roi_config and trigger_qr_detections:
-                try:
-                    from modules.technician.landmark_mapper import LandmarkMapper, ROIConfig, VideoDimensions, CanvasDimensions
-                    
-                    # Create mapping objects for trigger ROI
-                    roi = ROIConfig(
-                        x=roi_config['x'],
-                        y=roi_config['y'],
-                        w=roi_config['w'],
-                        h=roi_config['h']
-                    )
-                    video_dimensions = VideoDimensions(
-                        width=video_dims['width'],
-                        height=video_dims['height']
-                    )
-                    canvas_dimensions = CanvasDimensions(
-                        width=canvas_dims['width'],
-                        height=canvas_dims['height']
-                    )
-                    
-                    # Use LandmarkMapper for coordinate transformation
-                    qr_mapping_response = LandmarkMapper.create_canvas_qr_response(
-                        trigger_qr_detections, roi, video_dimensions, canvas_dimensions
-                    )
-                    
-                    if qr_mapping_response['success']:
-                        response['canvas_qr_detections'] = qr_mapping_response['canvas_qr_detections']
-                        response['mapping_algorithm'] = qr_mapping_response['mapping_algorithm']
-                        response['mapping_info'] = qr_mapping_response['mapping_info']
-                        logger.debug(f"LandmarkMapper: Mapped {len(qr_mapping_response['canvas_qr_detections'])} trigger QR detections for timestamp {timestamp}")
-                    else:
-                        logger.warning(f"LandmarkMapper trigger QR mapping failed: {qr_mapping_response.get('error')}")
-                        response['canvas_qr_detections'] = []
-                        
-                except Exception as e:
-                    logger.error(f"Error using LandmarkMapper for trigger QR coordinate mapping: {e}")
-                    response['canvas_qr_detections'] = []
-            else:
-                response['canvas_qr_detections'] = []
+                qr_mapping_response = map_qr_detections_to_canvas(trigger_qr_detections, roi_config, video_dims, canvas_dims)
+                if qr_mapping_response:
+                    response['canvas_qr_detections'] = qr_mapping_response['canvas_qr_detections']
+                    response['mapping_algorithm'] = qr_mapping_response['mapping_algorithm']
+                    response['mapping_info'] = qr_mapping_response['mapping_info']
+                    logger.debug(f"LandmarkMapper: Mapped {len(qr_mapping_response['canvas_qr_detections'])} trigger QR detections for timestamp {timestamp}")
             
             return jsonify(response), 200
         else:
@@ -787,6 +727,111 @@ def get_cached_trigger():
             "trigger_text": None
         }), 500
 
+@qr_detection_bp.route('/get-cached-qr-range', methods=['POST'])
+def get_cached_qr_range():
+    """
+    Get all cached QR timeline entries in a time window, so the player can
+    prefetch a few seconds in one request instead of polling per frame
+    
+    Request body:
+    {
+        "cache_key": str,  # "_trigger" suffix is accepted
+        "start": float,
+        "end": float,      # at most MAX_RANGE_SECONDS after start
+        "canvas_dims": {"width": int, "height": int},  # optional - for display coordinate mapping
+        "video_dims": {"width": int, "height": int},   # optional - for display coordinate mapping
+        "roi_config": {"x": int, "y": int, "w": int, "h": int}  # optional - for display coordinate mapping
+    }
+    
+    Response:
+    {
+        "success": bool,
+        "start": float,
+        "end": float,
+        "detections": [{"timestamp": float, "qr_detections": list, "qr_count": int,
+                        "canvas_qr_detections": list}],
+        "count": int,
+        "partial_results": bool,  # preprocessing still running
+        "error": str (if error)
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "No JSON data provided"
+            }), 400
+        
+        cache_key = data.get('cache_key')
+        canvas_dims = data.get('canvas_dims')
+        video_dims = data.get('video_dims')
+        roi_config = data.get('roi_config')
+        
+        if not cache_key:
+            return jsonify({
+                "success": False,
+                "error": "Missing required parameter: cache_key"
+            }), 400
+        
+        try:
+            start = float(data.get('start'))
+            end = float(data.get('end'))
+        except (ValueError, TypeError):
+            return jsonify({
+                "success": False,
+                "error": "Invalid or missing start/end values"
+            }), 400
+        
+        if end < start or end - start > MAX_RANGE_SECONDS:
+            return jsonify({
+                "success": False,
+                "error": f"Invalid window: end must be >= start and at most {MAX_RANGE_SECONDS}s after it"
+            }), 400
+        
+        main_cache_key = cache_key.replace('_trigger', '') if cache_key.endswith('_trigger') else cache_key
+        if qr_preprocessing_cache.get(cache_key) is None:
+            cache_key = main_cache_key
+        timeline = qr_preprocessing_cache.timeline(cache_key)
+        if timeline is None:
+            return jsonify({
+                "success": False,
+                "error": "QR cache key not found or expired"
+            }), 404
+        
+        entries = []
+        for detection in timeline.window(start, end):
+            qr_detections = detection.get('qr_detections', [])
+            entry = {
+                "timestamp": detection['timestamp'],
+                "qr_detections": qr_detections,
+                "qr_count": detection.get('qr_count', 0),
+                "canvas_qr_detections": []
+            }
+            if canvas_dims and video_dims and roi_config and qr_detections:
+                qr_mapping_response = map_qr_detections_to_canvas(qr_detections, roi_config, video_dims, canvas_dims)
+                if qr_mapping_response:
+                    entry['canvas_qr_detections'] = qr_mapping_response['canvas_qr_detections']
+            entries.append(entry)
+        
+        metadata = (qr_preprocessing_cache.get(cache_key) or {}).get('metadata', {})
+        return jsonify({
+            "success": True,
+            "start": start,
+            "end": end,
+            "detections": entries,
+            "count": len(entries),
+            "partial_results": bool(metadata.get('partial_results', False))
+        }), 200
+        
+    except Exception as e:
+        error_msg = f"Error getting cached QR range: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            "success": False,
+            "error": error_msg
+        }), 500
+
 @qr_detection_bp.route('/detect-qr-image', methods=['POST'])
 def detect_qr_from_uploaded_image():
     """
@@ -867,18 +912,8 @@ def get_baseline_info(cache_key: str):
     """
     try:
         # Check if baseline is cached and not expired
-        if cache_key in qr_baseline_cache:
-            baseline_data = qr_baseline_cache[cache_key]
-
-            # Check expiration
-            if baseline_data.get('expires_at', datetime.now()) <= datetime.now():
-                del qr_baseline_cache[cache_key]
-                return jsonify({
-                    "success": False,
-                    "baseline_available": False,
-                    "error": "Baseline cache expired"
-                }), 404
-
+        baseline_data = qr_baseline_cache.get(cache_key)
+        if baseline_data is not None:
             # Return cached baseline
             return jsonify({
                 "success": True,
@@ -1167,21 +1202,26 @@ def qr_health_check():
                 "GET /preprocess-status/<cache_key> - Check preprocessing progress",
                 "POST /get-cached-qr - Get QR detections from cache by timestamp",
                 "POST /get-cached-trigger - Get QR trigger detections (search for 'TimeGo')",
+                "POST /get-cached-qr-range - Get cached QR detections in a time window",
                 "GET /get-baseline-info/<cache_key> - Get cached baseline info",
                 "POST /detect-qr-image - Detect QR codes from uploaded image",
                 "GET /test - Test QR detection with sample video",
                 "GET /health - Health check"
             ],
             "cache_status": {
-                "active_cache_entries": len(qr_preprocessing_cache),
+                "active_cache_entries": len(qr_preprocessing_cache.keys()),
                 "active_processing_jobs": len(qr_preprocessing_progress),
-                "active_baseline_cache_entries": len(qr_baseline_cache),
+                "active_baseline_cache_entries": len(qr_baseline_cache.keys()),
                 "total_cached_detections": sum(
                     len(cache_data.get('detections', []))
-                    for cache_data in qr_preprocessing_cache.values()
+                    for cache_data in qr_preprocessing_cache.memory_values()
                 ),
-                "cache_ttl_minutes": 30
+                "cache_ttl_minutes": qr_preprocessing_cache.ttl_seconds // 60,
+                "detection_cache": qr_preprocessing_cache.snapshot(),
+                "baseline_cache": qr_baseline_cache.snapshot()
             },
+            "detector_pool": detector_pool.stats(),
+            "combined_preprocessing": COMBINED_PREPROCESSING_ENABLED,
             "features": [
                 "5fps QR video preprocessing",
                 "Perfect timestamp synchronization",
@@ -1192,7 +1232,8 @@ def qr_health_check():
                 "Background processing",
                 "WeChat QR model integration",
                 "Baseline capture during preprocessing",
-                "Baseline success rate calculation"
+                "Baseline success rate calculation",
+                "Combined hand + QR single-pass preprocessing"
             ],
             "camera_roi_dir": CAMERA_ROI_DIR,
             "camera_roi_dir_exists": os.path.exists(CAMERA_ROI_DIR),
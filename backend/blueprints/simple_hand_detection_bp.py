@@ -6,17 +6,22 @@ Following the simple pattern from 2hand_detection.py
 
 from flask import Blueprint, request, jsonify
 from modules.technician.hand_detection import detect_hands_at_time, preprocess_video_hands
+from modules.technician.detection_cache import get_detection_cache, make_cache_key, cache_snapshots
+from modules.technician.step4_preprocessing import COMBINED_PREPROCESSING_ENABLED, start_step4_preprocessing
 from modules.config.logging_config import get_logger
 import time
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 
 simple_hand_detection_bp = Blueprint('simple_hand_detection', __name__)
 logger = get_logger(__name__)
 
-# In-memory cache for pre-processed video hand detections
-# Structure: {cache_key: {'detections': [...], 'metadata': {...}, 'expires_at': datetime}}
-preprocessing_cache = {}
+# Longest window /get-cached-landmarks-range returns in one request (seconds)
+MAX_RANGE_SECONDS = 60.0
+
+# Persistent cache for pre-processed video hand detections (memory LRU + disk)
+# Entry: {'detections': [...], 'metadata': {...}, 'processed_at': datetime, 'expires_at': datetime}
+preprocessing_cache = get_detection_cache("hand")
 preprocessing_progress = {}  # Track progress for ongoing processing
 
 @simple_hand_detection_bp.route('/process-frame', methods=['POST'])
@@ -150,25 +155,28 @@ def health_check():
                 "POST /preprocess-video - Pre-process entire video at 5fps",
                 "GET /preprocess-status/<cache_key> - Check preprocessing progress",
                 "POST /get-cached-landmarks - Get landmarks from cache by timestamp",
+                "POST /get-cached-landmarks-range - Get cached landmarks in a time window",
                 "DELETE /clear-cache/<cache_key> - Clear cached results",
                 "GET /cache-info - Cache statistics and memory usage",
                 "GET /health - Health check"
             ],
             "cache_status": {
-                "active_cache_entries": len(preprocessing_cache),
+                "active_cache_entries": len(preprocessing_cache.keys()),
                 "active_processing_jobs": len(preprocessing_progress),
                 "total_cached_detections": sum(
                     len(cache_data.get('detections', []))
-                    for cache_data in preprocessing_cache.values()
+                    for cache_data in preprocessing_cache.memory_values()
                 ),
-                "cache_ttl_minutes": 30
+                "cache_ttl_minutes": preprocessing_cache.ttl_seconds // 60
             },
+            "combined_preprocessing": COMBINED_PREPROCESSING_ENABLED,
             "features": [
                 "5fps video preprocessing",
                 "Perfect timestamp synchronization",
                 "Dynamic landmarks sizing",
                 "Automatic cache expiration",
-                "Background processing"
+                "Background processing",
+                "Combined hand + QR single-pass preprocessing"
             ],
             "description": "Advanced hand detection with preprocessing and caching for perfect video synchronization"
         }), 200
@@ -227,27 +235,33 @@ def test_endpoint():
             "error": error_msg
         }), 500
 
-def generate_cache_key(video_path: str, roi_config: dict) -> str:
-    """Generate unique cache key for video + ROI combination"""
-    import hashlib
-    
-    roi_str = f"{roi_config['x']}_{roi_config['y']}_{roi_config['w']}_{roi_config['h']}"
-    cache_input = f"{video_path}_{roi_str}"
-    return hashlib.md5(cache_input.encode()).hexdigest()
+def generate_cache_key(video_path: str, roi_config: dict, fps: int = 5) -> str:
+    """Generate unique cache key for video content (path, size, mtime) + ROI + fps"""
+    return make_cache_key(video_path, roi_config, fps)
 
 def cleanup_expired_cache():
     """Remove expired cache entries"""
-    global preprocessing_cache
-    
-    now = datetime.now()
-    expired_keys = [
-        key for key, cache_data in preprocessing_cache.items()
-        if cache_data.get('expires_at', now) <= now
-    ]
-    
-    for key in expired_keys:
-        del preprocessing_cache[key]
-        logger.info(f"Removed expired cache entry: {key}")
+    preprocessing_cache.cleanup_expired()
+
+def map_landmarks_to_canvas(landmarks: list, roi_config: dict, video_dims: dict, canvas_dims: dict):
+    """Map ROI landmarks to canvas coordinates with LandmarkMapper; None if mapping fails"""
+    try:
+        from modules.technician.landmark_mapper import LandmarkMapper, ROIConfig, VideoDimensions, CanvasDimensions
+
+        roi = ROIConfig(x=roi_config['x'], y=roi_config['y'], w=roi_config['w'], h=roi_config['h'])
+        video_dimensions = VideoDimensions(width=video_dims['width'], height=video_dims['height'])
+        canvas_dimensions = CanvasDimensions(width=canvas_dims['width'], height=canvas_dims['height'])
+
+        # Generate canvas landmarks with fixed sizing
+        canvas_response = LandmarkMapper.create_canvas_landmarks_response(
+            landmarks, roi, video_dimensions, canvas_dimensions
+        )
+        if canvas_response['success']:
+            return canvas_response
+        logger.warning(f"Canvas landmark mapping failed: {canvas_response.get('error')}")
+    except Exception as e:
+        logger.error(f"Error generating canvas landmarks: {e}")
+    return None
 
 @simple_hand_detection_bp.route('/preprocess-video', methods=['POST'])
 def preprocess_video():
@@ -334,21 +348,33 @@ def preprocess_video():
             }), 400
         
         # Generate cache key
-        cache_key = generate_cache_key(video_path, roi_config)
+        cache_key = generate_cache_key(video_path, roi_config, fps)
         
-        # Check if already cached and not expired
-        if cache_key in preprocessing_cache:
-            cache_data = preprocessing_cache[cache_key]
-            if cache_data.get('expires_at', datetime.now()) > datetime.now():
-                logger.info(f"Returning cached results for {cache_key}")
-                return jsonify({
-                    "success": True,
-                    "cache_key": cache_key,
-                    "status": "completed",
-                    "progress": 100.0,
-                    "detections": cache_data['detections'],
-                    "metadata": cache_data['metadata']
-                }), 200
+        # Check if already cached (memory or disk) and not expired
+        cache_data = preprocessing_cache.get(cache_key)
+        if cache_data is not None:
+            logger.info(f"Returning cached results for {cache_key}")
+            return jsonify({
+                "success": True,
+                "cache_key": cache_key,
+                "status": "completed",
+                "progress": 100.0,
+                "detections": cache_data['detections'],
+                "metadata": cache_data['metadata']
+            }), 200
+        
+        # Single pass for hands + QR (the QR endpoint joins this job instead of decoding again)
+        if COMBINED_PREPROCESSING_ENABLED:
+            job, started = start_step4_preprocessing(video_path, roi_config, fps)
+            return jsonify({
+                "success": True,
+                "cache_key": cache_key,
+                "status": "started" if started else "in_progress",
+                "progress": job.get('progress', 0.0),
+                "combined": True,
+                "message": f"Combined hand + QR pre-processing started for video at {fps}fps" if started else None,
+                "estimated_completion": job.get('estimated_completion')
+            }), 202
         
         # Check if processing is already in progress
         if cache_key in preprocessing_progress:
@@ -373,18 +399,16 @@ def preprocess_video():
                     'total_frames': 0
                 }
                 
-                # Initialize main cache entry for progressive accumulation
-                preprocessing_cache[cache_key] = {
+                # Initialize main cache entry for progressive accumulation (memory only until completed)
+                preprocessing_cache.put(cache_key, {
                     'detections': [],  # Start with empty list to accumulate
                     'metadata': {
                         'partial_results': True,
                         'progress': 0.0,
                         'processed_count': 0,
                         'total_frames': 0
-                    },
-                    'expires_at': datetime.now() + timedelta(minutes=30),
-                    'processed_at': datetime.now()
-                }
+                    }
+                }, persist=False)
                 
                 # Progress callback function to update real-time progress and accumulate detections
                 def update_progress(progress, processed_count, total_frames, new_detections=None):
@@ -396,15 +420,13 @@ def preprocess_video():
                     
                     # Accumulate new detections into main cache (không overwrite)
                     if new_detections and len(new_detections) > 0:
-                        if cache_key in preprocessing_cache:
-                            # Append new detections to existing list instead of replacing
-                            preprocessing_cache[cache_key]['detections'].extend(new_detections)
-                            preprocessing_cache[cache_key]['metadata'].update({
-                                'progress': progress,
-                                'processed_count': processed_count,
-                                'total_frames': total_frames
-                            })
-                            total_detections = len(preprocessing_cache[cache_key]['detections'])
+                        # Append new detections to existing list instead of replacing
+                        total_detections = preprocessing_cache.extend(cache_key, new_detections, {
+                            'progress': progress,
+                            'processed_count': processed_count,
+                            'total_frames': total_frames
+                        })
+                        if total_detections is not None:
                             logger.debug(f"Accumulated {len(new_detections)} new detections. Total: {total_detections} for {cache_key}")
                         else:
                             logger.warning(f"Cache key {cache_key} not found during update")
@@ -415,14 +437,11 @@ def preprocess_video():
                 result = preprocess_video_hands(video_path, roi_config, fps, progress_callback=update_progress)
                 
                 if result.get('success'):
-                    # Cache the results for 30 minutes
-                    expires_at = datetime.now() + timedelta(minutes=30)
-                    preprocessing_cache[cache_key] = {
+                    # Cache the results (memory LRU + disk)
+                    preprocessing_cache.put(cache_key, {
                         'detections': result['detections'],
-                        'metadata': result['metadata'],
-                        'expires_at': expires_at,
-                        'processed_at': datetime.now()
-                    }
+                        'metadata': result['metadata']
+                    })
                     
                     logger.info(f"Pre-processing completed for {cache_key}: {len(result['detections'])} detections cached")
                 else:
@@ -477,18 +496,17 @@ def preprocess_status(cache_key: str):
         cleanup_expired_cache()
         
         # Check if completed and cached
-        if cache_key in preprocessing_cache:
-            cache_data = preprocessing_cache[cache_key]
-            if cache_data.get('expires_at', datetime.now()) > datetime.now():
-                return jsonify({
-                    "success": True,
-                    "status": "completed",
-                    "progress": 100.0,
-                    "detections": cache_data['detections'],
-                    "metadata": cache_data['metadata'],
-                    "processed_at": cache_data['processed_at'].isoformat(),
-                    "expires_at": cache_data['expires_at'].isoformat()
-                }), 200
+        cache_data = preprocessing_cache.get(cache_key)
+        if cache_data is not None:
+            return jsonify({
+                "success": True,
+                "status": "completed",
+                "progress": 100.0,
+                "detections": cache_data['detections'],
+                "metadata": cache_data['metadata'],
+                "processed_at": cache_data['processed_at'].isoformat(),
+                "expires_at": cache_data['expires_at'].isoformat()
+            }), 200
         
         # Check if still in progress
         if cache_key in preprocessing_progress:
@@ -588,31 +606,16 @@ def get_cached_landmarks():
                 "error": "Invalid timestamp value"
             }), 400
         
-        # Check main cache (now contains progressive accumulation)
-        if cache_key not in preprocessing_cache:
+        # Check main cache (now contains progressive accumulation; expired entries are dropped by the cache)
+        timeline = preprocessing_cache.timeline(cache_key)
+        if timeline is None:
             return jsonify({
                 "success": False,
                 "error": "Cache key not found or expired"
             }), 404
         
-        cache_data = preprocessing_cache[cache_key]
-        if cache_data.get('expires_at', datetime.now()) <= datetime.now():
-            del preprocessing_cache[cache_key]
-            return jsonify({
-                "success": False,
-                "error": "Cache expired"
-            }), 404
-        
-        # Find landmarks for timestamp (exact match within 0.15s tolerance)
-        detections = cache_data['detections']
-        closest_detection = None
-        min_time_diff = float('inf')
-        
-        for detection in detections:
-            time_diff = abs(detection['timestamp'] - timestamp)
-            if time_diff < 0.15 and time_diff < min_time_diff:  # 0.15s tolerance for 5fps (0.2s interval)
-                closest_detection = detection
-                min_time_diff = time_diff
+        # Find landmarks for timestamp (bisect, 0.15s tolerance for 5fps / 0.2s interval)
+        closest_detection, min_time_diff = timeline.closest(timestamp)
         
         if closest_detection:
             response = {
@@ -625,45 +628,14 @@ def get_cached_landmarks():
             }
             
             # Add canvas_landmarks if mapping parameters provided
+            response['canvas_landmarks'] = None
             if canvas_dims and video_dims and roi_config and closest_detection['landmarks']:
-                try:
-                    from modules.technician.landmark_mapper import LandmarkMapper, ROIConfig, VideoDimensions, CanvasDimensions
-                    
-                    # Create mapping objects
-                    roi = ROIConfig(
-                        x=roi_config['x'],
-                        y=roi_config['y'],
-                        w=roi_config['w'],
-                        h=roi_config['h']
-                    )
-                    video_dimensions = VideoDimensions(
-                        width=video_dims['width'],
-                        height=video_dims['height']
-                    )
-                    canvas_dimensions = CanvasDimensions(
-                        width=canvas_dims['width'],
-                        height=canvas_dims['height']
-                    )
-                    
-                    # Generate canvas landmarks with fixed sizing
-                    canvas_response = LandmarkMapper.create_canvas_landmarks_response(
-                        closest_detection['landmarks'], roi, video_dimensions, canvas_dimensions
-                    )
-                    
-                    if canvas_response['success']:
-                        response['canvas_landmarks'] = canvas_response['canvas_landmarks']
-                        response['fixed_sizes'] = canvas_response['fixed_sizes']
-                        response['mapping_algorithm'] = 'fixed_size_mapping'
-                        logger.debug(f"Added canvas landmarks for timestamp {timestamp}")
-                    else:
-                        logger.warning(f"Canvas landmark mapping failed: {canvas_response.get('error')}")
-                        response['canvas_landmarks'] = None
-                        
-                except Exception as e:
-                    logger.error(f"Error generating canvas landmarks: {e}")
-                    response['canvas_landmarks'] = None
-            else:
-                response['canvas_landmarks'] = None
+                canvas_response = map_landmarks_to_canvas(closest_detection['landmarks'], roi_config, video_dims, canvas_dims)
+                if canvas_response:
+                    response['canvas_landmarks'] = canvas_response['canvas_landmarks']
+                    response['fixed_sizes'] = canvas_response['fixed_sizes']
+                    response['mapping_algorithm'] = 'fixed_size_mapping'
+                    logger.debug(f"Added canvas landmarks for timestamp {timestamp}")
             
             return jsonify(response), 200
         else:
@@ -684,6 +656,107 @@ def get_cached_landmarks():
             "error": error_msg
         }), 500
 
+@simple_hand_detection_bp.route('/get-cached-landmarks-range', methods=['POST'])
+def get_cached_landmarks_range():
+    """
+    Get all cached hand detections in a time window, so the player can
+    prefetch a few seconds in one request instead of polling per frame
+    
+    Request body:
+    {
+        "cache_key": str,
+        "start": float,
+        "end": float,      # at most MAX_RANGE_SECONDS after start
+        "canvas_dims": {"width": int, "height": int},  # optional - for display coordinate mapping
+        "video_dims": {"width": int, "height": int},   # optional - for display coordinate mapping
+        "roi_config": {"x": int, "y": int, "w": int, "h": int}  # optional - for display coordinate mapping
+    }
+    
+    Response:
+    {
+        "success": bool,
+        "start": float,
+        "end": float,
+        "detections": [{"timestamp": float, "landmarks": list | null, "confidence": float | null,
+                        "canvas_landmarks": list | null}],
+        "count": int,
+        "partial_results": bool,  # preprocessing still running
+        "error": str (if error)
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "No JSON data provided"
+            }), 400
+        
+        cache_key = data.get('cache_key')
+        canvas_dims = data.get('canvas_dims')
+        video_dims = data.get('video_dims')
+        roi_config = data.get('roi_config')
+        
+        if not cache_key:
+            return jsonify({
+                "success": False,
+                "error": "Missing required parameter: cache_key"
+            }), 400
+        
+        try:
+            start = float(data.get('start'))
+            end = float(data.get('end'))
+        except (ValueError, TypeError):
+            return jsonify({
+                "success": False,
+                "error": "Invalid or missing start/end values"
+            }), 400
+        
+        if end < start or end - start > MAX_RANGE_SECONDS:
+            return jsonify({
+                "success": False,
+                "error": f"Invalid window: end must be >= start and at most {MAX_RANGE_SECONDS}s after it"
+            }), 400
+        
+        timeline = preprocessing_cache.timeline(cache_key)
+        if timeline is None:
+            return jsonify({
+                "success": False,
+                "error": "Cache key not found or expired"
+            }), 404
+        
+        entries = []
+        for detection in timeline.window(start, end):
+            entry = {
+                "timestamp": detection['timestamp'],
+                "landmarks": detection.get('landmarks'),
+                "confidence": detection.get('confidence'),
+                "canvas_landmarks": None
+            }
+            if canvas_dims and video_dims and roi_config and entry['landmarks']:
+                canvas_response = map_landmarks_to_canvas(entry['landmarks'], roi_config, video_dims, canvas_dims)
+                if canvas_response:
+                    entry['canvas_landmarks'] = canvas_response['canvas_landmarks']
+            entries.append(entry)
+        
+        metadata = (preprocessing_cache.get(cache_key) or {}).get('metadata', {})
+        return jsonify({
+            "success": True,
+            "start": start,
+            "end": end,
+            "detections": entries,
+            "count": len(entries),
+            "partial_results": bool(metadata.get('partial_results', False))
+        }), 200
+        
+    except Exception as e:
+        error_msg = f"Error getting cached landmarks range: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            "success": False,
+            "error": error_msg
+        }), 500
+
 @simple_hand_detection_bp.route('/clear-cache/<cache_key>', methods=['DELETE'])
 def clear_cache(cache_key: str):
     """
@@ -698,14 +771,11 @@ def clear_cache(cache_key: str):
     }
     """
     try:
-        global preprocessing_cache, preprocessing_progress
-        
         cache_cleared = False
         progress_cleared = False
         
-        # Remove from cache
-        if cache_key in preprocessing_cache:
-            del preprocessing_cache[cache_key]
+        # Remove from cache (memory and disk)
+        if preprocessing_cache.delete(cache_key):
             cache_cleared = True
             logger.info(f"Cache cleared for key: {cache_key}")
         
@@ -749,21 +819,23 @@ def cache_info():
         "progress_count": int,
         "cache_keys": list,
         "progress_keys": list,
-        "memory_usage_estimate": str
+        "memory_usage_estimate": str,
+        "detection_caches": {namespace: {hits/misses/evictions, memory/disk sizes}}
     }
     """
     try:
         cleanup_expired_cache()
         
-        cache_keys = list(preprocessing_cache.keys())
+        cache_keys = preprocessing_cache.keys()
         progress_keys = list(preprocessing_progress.keys())
         
-        # Rough memory estimate
         total_detections = sum(
             len(cache_data.get('detections', []))
-            for cache_data in preprocessing_cache.values()
+            for cache_data in preprocessing_cache.memory_values()
         )
-        memory_estimate_kb = total_detections * 1.5  # ~1.5KB per detection estimate
+        # QR / baseline caches appear here once the QR blueprint has been imported
+        detection_caches = cache_snapshots()
+        memory_estimate_kb = detection_caches['hand']['memory_bytes'] / 1024
         
         return jsonify({
             "success": True,
@@ -773,7 +845,8 @@ def cache_info():
             "progress_keys": progress_keys,
             "total_cached_detections": total_detections,
             "memory_usage_estimate_kb": round(memory_estimate_kb, 1),
-            "memory_usage_estimate_mb": round(memory_estimate_kb / 1024, 2)
+            "memory_usage_estimate_mb": round(memory_estimate_kb / 1024, 2),
+            "detection_caches": detection_caches
         }), 200
         
     except Exception as e:
@@ -183,7 +183,8 @@ def update_database():
                     motion_threshold FLOAT DEFAULT 0.1,
                     stable_duration_sec FLOAT DEFAULT 1,
                     multiple_sources_enabled INTEGER DEFAULT 0,
-                    camera_paths TEXT DEFAULT '{}'
+                    camera_paths TEXT DEFAULT '{}',
+                    idle_motion_threshold FLOAT DEFAULT 0.02
                 )
             """)
 
@@ -199,6 +200,11 @@ def update_database():
             except sqlite3.OperationalError:
                 pass
 
+            try:
+                cursor.execute("ALTER TABLE processing_config ADD COLUMN idle_motion_threshold FLOAT DEFAULT 0.02")
+            except sqlite3.OperationalError:
+                pass
+
 
             cursor.execute("UPDATE processing_config SET db_path = ?, run_default_on_start = 0 WHERE db_path IS NULL OR run_default_on_start IS NULL", (DB_PATH,))
 
@@ -383,6 +389,51 @@ def update_database():
                 )
             """)
 
+            # 7.1. Timeline Store (typed sampler records, keyed like processed_logs.log_file)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS timeline_segments (
+                    log_file TEXT PRIMARY KEY,
+                    video_file TEXT,
+                    camera_name TEXT,
+                    start_second INTEGER NOT NULL,
+                    end_second INTEGER NOT NULL,
+                    start_time TEXT NOT NULL,  -- Local wall-clock time of start_second, '%Y-%m-%d %H:%M:%S'
+                    closed INTEGER DEFAULT 0,  -- 1 once the sampler's records are final
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            try:
+                cursor.execute("ALTER TABLE timeline_segments ADD COLUMN closed INTEGER DEFAULT 0")
+                # Segments stored before the flag existed were all final when closed
+                cursor.execute("UPDATE timeline_segments SET closed = 1")
+                print("✅ Added closed column to timeline_segments")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS timeline_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    log_file TEXT NOT NULL,
+                    second REAL NOT NULL,
+                    state TEXT NOT NULL,
+                    tracking_code TEXT DEFAULT '',
+                    bbox_x INTEGER,  -- NULL when the record carries no QR position
+                    bbox_y INTEGER,
+                    bbox_w INTEGER,
+                    bbox_h INTEGER,
+                    FOREIGN KEY (log_file) REFERENCES timeline_segments(log_file) ON DELETE CASCADE
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_timeline_records_log ON timeline_records(log_file, id)")
+            # Records of processed logs are deleted by the event detector; drop any left from older versions
+            cursor.execute("""
+                DELETE FROM timeline_records
+                WHERE log_file IN (SELECT log_file FROM processed_logs WHERE is_processed = 1)
+            """)
+            cursor.execute("""
+                DELETE FROM timeline_segments
+                WHERE log_file IN (SELECT log_file FROM processed_logs WHERE is_processed = 1)
+            """)
+
             # 8. Packing Profiles Table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS packing_profiles (
@@ -413,6 +464,14 @@ def update_database():
             except sqlite3.OperationalError:
                 pass  # Column already exists
 
+            # Per-camera adaptive sampling bounds in frames (NULL = frame_interval .. 4x frame_interval)
+            for col_name in ("adaptive_min_interval", "adaptive_max_interval"):
+                try:
+                    cursor.execute(f"ALTER TABLE packing_profiles ADD COLUMN {col_name} INTEGER DEFAULT NULL")
+                    print(f"✅ Added {col_name} column to packing_profiles")
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
+
             # 8.1. QR Detections Table (for Magnifying Glass feature)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS qr_detections (
@@ -419,8 +419,8 @@ def save_roi_configuration():
                 qr_cache_key = data.get('qr_cache_key')
                 if qr_cache_key:
                     try:
-                        if qr_cache_key in qr_baseline_cache:
-                            baseline_info = qr_baseline_cache[qr_cache_key]
+                        baseline_info = qr_baseline_cache.get(qr_cache_key)
+                        if baseline_info is not None:
                             baseline_captured = True
                             baseline_data = {
                                 'baseline_success_rate_pct': baseline_info.get('baseline_success_rate_pct', 0),
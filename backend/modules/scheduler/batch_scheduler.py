@@ -34,6 +34,7 @@ from modules.utils.simple_timezone import get_system_timezone_from_db
 from .db_sync import db_rwlock, frame_sampler_event, event_detector_event, system_idle_event, retry_in_progress_flag
 from .file_lister import run_file_scan
 from .program_runner import start_frame_sampler_thread, start_event_detector_thread, start_retry_processor
+from .sampler_worker_pool import SamplerWorkerPool
 from .config.scheduler_config import SchedulerConfig
 from modules.utils.cleanup import cleanup_service
 
@@ -179,7 +180,8 @@ class BatchScheduler:
     
     Architecture:
         - Runs two main background threads: file scanner and batch processor
-        - Manages a pool of frame sampler threads (size determined by SystemMonitor)
+        - Manages a pool of frame sampler worker processes, or threads in "thread"
+          mode (size determined by SystemMonitor)
         - Coordinates with a single event detector thread
         - Uses threading events for inter-thread communication
     
@@ -193,6 +195,7 @@ class BatchScheduler:
         running (bool): Flag indicating if scheduler is active
         pause_event (threading.Event): Event for pause/resume functionality
         sampler_threads (List[threading.Thread]): List of active frame sampler threads
+        sampler_pool (SamplerWorkerPool): Frame sampler worker processes (process mode)
         detector_thread (threading.Thread): Single event detector thread
     """
     def __init__(self) -> None:
@@ -212,6 +215,7 @@ class BatchScheduler:
         self.running = False
         self.queue_limit = SchedulerConfig.QUEUE_LIMIT
         self.sampler_threads = []
+        self.sampler_pool = None
         self.detector_thread = None
         self.retry_thread = None
         self.cleanup_thread = None
@@ -477,7 +481,13 @@ class BatchScheduler:
                 self.pause_event.wait()
                 self.batch_size = self.sys_monitor.get_batch_size(self.batch_size)
 
-                if not self.sampler_threads or len(self.sampler_threads) != self.batch_size:
+                if SchedulerConfig.SAMPLER_EXECUTION_MODE == "process":
+                    if self.sampler_pool is None:
+                        self.sampler_pool = SamplerWorkerPool()
+                        self.sampler_pool.start(self.batch_size)
+                    elif self.sampler_pool.target_size != self.batch_size:
+                        self.sampler_pool.resize(self.batch_size)
+                elif not self.sampler_threads or len(self.sampler_threads) != self.batch_size:
                     for thread in self.sampler_threads:
                         if thread.is_alive():
                             thread.join(timeout=SchedulerConfig.THREAD_JOIN_TIMEOUT)
@@ -562,6 +572,11 @@ class BatchScheduler:
                 except Exception as e:
                     logger.warning(f"Error stopping sampler thread {i}: {e}")
 
+        # Stop sampler worker processes (busy workers finish their current video)
+        if self.sampler_pool is not None:
+            self.sampler_pool.stop()
+            self.sampler_pool = None
+
         # Stop detector thread
         if self.detector_thread and self.detector_thread.is_alive():
             try:
@@ -6,6 +6,7 @@ including batch processing settings, system monitoring thresholds, and timing pa
 """
 
 import logging
+import os
 from typing import Dict, Any
 
 
@@ -35,6 +36,26 @@ class SchedulerConfig:
     DEFAULT_SCAN_DAYS = 7
     BUFFER_SECONDS = 360  # 6 minutes in seconds
     N_FILES_FOR_ESTIMATE = 3
+
+    # Frame sampler execution: "process" (supervised worker processes) or "thread".
+    # db_rwlock orders writes across processes through a lock file next to the database.
+    SAMPLER_EXECUTION_MODE = os.getenv('VTRACK_SAMPLER_MODE', 'process').lower()
+    SAMPLER_WORKER_MAX_RSS_MB = 3072  # Worker is restarted after its current video above this
+    SAMPLER_SUPERVISOR_INTERVAL = 2.0
+    SAMPLER_WORKER_STOP_TIMEOUT = 30.0
+
+    # Intra-video sharding (FrameSamplerTrigger only, see video_sharding.py)
+    SHARDED_SAMPLING_ENABLED = os.getenv('VTRACK_SHARDED_SAMPLING', 'false').lower() in ('1', 'true', 'yes')
+    SHARD_MIN_VIDEO_SECONDS = 1800  # Active (work block) seconds before a video is sharded
+    SHARD_SECONDS = 600
+    SHARD_OVERLAP_SECONDS = 10  # Warm-up before each shard, discarded at merge
+    SHARD_MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+    # Shard pool of each sampler worker process: all workers together stay within SHARD_MAX_WORKERS
+    SHARD_WORKERS_PER_SAMPLER_PROCESS = max(1, SHARD_MAX_WORKERS // BATCH_SIZE_MAX)
+
+    # Sampler -> event detector segment queue (see event_pipeline.py)
+    EVENT_QUEUE_SIZE = int(os.getenv('VTRACK_EVENT_QUEUE_SIZE', '32'))
+    EVENT_QUEUE_PUT_TIMEOUT = 60.0  # Longest back-pressure wait; the segment is then left to the rescan
     
     @classmethod
     def get_config_dict(cls) -> Dict[str, Any]:
@@ -59,6 +80,18 @@ class SchedulerConfig:
             'default_scan_days': cls.DEFAULT_SCAN_DAYS,
             'buffer_seconds': cls.BUFFER_SECONDS,
             'n_files_for_estimate': cls.N_FILES_FOR_ESTIMATE,
+            'sampler_execution_mode': cls.SAMPLER_EXECUTION_MODE,
+            'sampler_worker_max_rss_mb': cls.SAMPLER_WORKER_MAX_RSS_MB,
+            'sampler_supervisor_interval': cls.SAMPLER_SUPERVISOR_INTERVAL,
+            'sampler_worker_stop_timeout': cls.SAMPLER_WORKER_STOP_TIMEOUT,
+            'sharded_sampling_enabled': cls.SHARDED_SAMPLING_ENABLED,
+            'shard_min_video_seconds': cls.SHARD_MIN_VIDEO_SECONDS,
+            'shard_seconds': cls.SHARD_SECONDS,
+            'shard_overlap_seconds': cls.SHARD_OVERLAP_SECONDS,
+            'shard_max_workers': cls.SHARD_MAX_WORKERS,
+            'shard_workers_per_sampler_process': cls.SHARD_WORKERS_PER_SAMPLER_PROCESS,
+            'event_queue_size': cls.EVENT_QUEUE_SIZE,
+            'event_queue_put_timeout': cls.EVENT_QUEUE_PUT_TIMEOUT,
         }
     
     @classmethod
@@ -93,6 +126,21 @@ class SchedulerConfig:
             assert cls.DEFAULT_SCAN_DAYS > 0, "DEFAULT_SCAN_DAYS must be positive"
             assert cls.BUFFER_SECONDS >= 0, "BUFFER_SECONDS must be non-negative"
             assert cls.N_FILES_FOR_ESTIMATE > 0, "N_FILES_FOR_ESTIMATE must be positive"
+
+            # Validate sampler worker parameters
+            assert cls.SAMPLER_EXECUTION_MODE in ("process", "thread"), "SAMPLER_EXECUTION_MODE must be 'process' or 'thread'"
+            assert cls.SAMPLER_WORKER_MAX_RSS_MB > 0, "SAMPLER_WORKER_MAX_RSS_MB must be positive"
+            assert cls.SAMPLER_SUPERVISOR_INTERVAL > 0, "SAMPLER_SUPERVISOR_INTERVAL must be positive"
+
+            # Validate sharding parameters
+            assert cls.SHARD_SECONDS > 0, "SHARD_SECONDS must be positive"
+            assert 0 <= cls.SHARD_OVERLAP_SECONDS < cls.SHARD_SECONDS, "SHARD_OVERLAP_SECONDS must be in [0, SHARD_SECONDS)"
+            assert cls.SHARD_MAX_WORKERS > 0, "SHARD_MAX_WORKERS must be positive"
+            assert cls.SHARD_WORKERS_PER_SAMPLER_PROCESS > 0, "SHARD_WORKERS_PER_SAMPLER_PROCESS must be positive"
+
+            # Validate event pipeline parameters
+            assert cls.EVENT_QUEUE_SIZE > 0, "EVENT_QUEUE_SIZE must be positive"
+            assert cls.EVENT_QUEUE_PUT_TIMEOUT > 0, "EVENT_QUEUE_PUT_TIMEOUT must be positive"
             
             return True
             
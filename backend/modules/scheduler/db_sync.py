@@ -5,14 +5,18 @@ different components of the video processing pipeline. It ensures thread-safe
 database access and proper workflow coordination.
 
 Synchronization Objects:
-    db_rwlock: Reader-writer lock for database access synchronization
+    db_rwlock: Reader-writer lock for database access synchronization; writes
+        are also ordered across processes (sampler worker and shard processes)
     frame_sampler_event: Signals when video files are ready for processing
-    event_detector_event: Signals when logs are ready for event detection
-    event_detector_done: Signals when event detection is complete
+    event_detector_event: Signals the event detector to rescan for unprocessed logs
+    event_detector_done: Set while the event detector is idle
 
 Threading Model:
     - Multiple frame sampler threads can read from database concurrently (reader locks)
-    - Database writes require exclusive access (writer locks)
+    - Database writes require exclusive access (writer locks), across processes:
+      a writer also holds an exclusive lock on <DB_PATH>.lock. Readers only take
+      the in-process lock; the database runs in WAL mode, so they never block a
+      writer in another process
     - Events coordinate workflow between frame sampling and event detection stages
     - Fair reader-writer lock prevents starvation
 
@@ -21,18 +25,30 @@ Usage Patterns:
     - Database writes: Use gen_wlock() for exclusive access
     - Signal work available: Set events to wake up waiting threads
     - Wait for work: Call event.wait() to block until signaled
-    - Signal completion: Set event_detector_done to allow pipeline continuation
+    - Completed log segments: Queued through event_pipeline.py, not these events
 
 Event Flow:
     1. File scanner sets frame_sampler_event when new files are available
-    2. Frame samplers wait on frame_sampler_event, process videos, set event_detector_event
-    3. Event detector waits on event_detector_event, processes logs, sets event_detector_done
-    4. Frame samplers wait on event_detector_done before continuing to next video
+    2. Frame samplers wait on frame_sampler_event and process videos; each closed
+       log segment is queued for the event detector (event_pipeline)
+    3. Event detector drains the queue; event_detector_event makes it rescan
+       processed_logs for logs that never reached the queue
+    4. Frame samplers continue with the next video right away (they only block
+       while the segment queue is full)
 """
 
 from readerwriterlock import rwlock
+import os
 import threading
+import time
+from contextlib import contextmanager
 from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 # Import logger conditionally to avoid circular imports during initialization
 try:
     from modules.config.logging_config import get_logger
@@ -41,23 +57,99 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+
+class InterProcessRWLock:
+    """Fair reader-writer lock whose writers are also exclusive across processes.
+
+    Within a process this is RWLockFairD (prevents reader/writer starvation).
+    gen_wlock() additionally holds an exclusive OS file lock on <DB_PATH>.lock,
+    so read-modify-write sections of the scheduler process, sampler worker
+    processes and shard processes never interleave. The in-process writer lock
+    is taken first: one thread per process waits on the file lock at a time.
+    """
+
+    def __init__(self) -> None:
+        self._rwlock = rwlock.RWLockFairD()
+        self._lock_file = None  # (pid, path, fd) of this process's lock file
+        self._warned = False
+
+    def gen_rlock(self):
+        return self._rwlock.gen_rlock()
+
+    @contextmanager
+    def gen_wlock(self):
+        with self._rwlock.gen_wlock():
+            fd = self._lock_fd()
+            if fd is None:
+                yield
+                return
+            _lock_file_exclusive(fd)
+            try:
+                yield
+            finally:
+                _unlock_file(fd)
+
+    def _lock_fd(self) -> Optional[int]:
+        """Descriptor of the lock file next to the current database (caller holds the writer lock)."""
+        try:
+            from modules.path_utils import get_paths
+            path = get_paths()["DB_PATH"] + ".lock"
+            pid = os.getpid()
+            if self._lock_file is not None:
+                locked_pid, locked_path, fd = self._lock_file
+                if locked_pid == pid and locked_path == path:
+                    return fd
+                if locked_pid == pid:
+                    os.close(fd)
+                self._lock_file = None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_file = (pid, path, fd)
+            return fd
+        except OSError as e:
+            if not self._warned:
+                self._warned = True
+                logger.warning(f"Database lock file unavailable, writes are only ordered within this process: {e}")
+            return None
+
+
+def _lock_file_exclusive(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            # LK_LOCK itself gives up after 10 attempts; keep waiting like flock does
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+def _unlock_file(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
 # Reader-Writer Lock for database access synchronization
-# Uses RWLockFairD to prevent reader/writer starvation and avoid deadlocks
-db_rwlock = rwlock.RWLockFairD()
+db_rwlock = InterProcessRWLock()
 
 # Event signaling when video files are ready for frame sampling
 # Set by: File scanner when new videos are discovered
 # Waited on by: Frame sampler threads
 frame_sampler_event = threading.Event()
 
-# Event signaling when frame sampling logs are ready for event detection
-# Set by: Frame sampler threads after processing videos
-# Waited on by: Event detector thread
+# Event signaling the event detector to rescan processed_logs for unprocessed logs
+# Set by: Frame samplers / worker supervisor after processing videos, batch scheduler
+# Checked by: Event detector thread (completed segments arrive through event_pipeline)
 event_detector_event = threading.Event()
 
-# Event signaling when event detection is complete
-# Set by: Event detector thread after processing logs
-# Waited on by: Frame sampler threads before continuing to next video
+# Event signaling that the event detector is idle (segment queue empty)
+# Set/cleared by: Event detector thread
 event_detector_done = threading.Event()
 event_detector_done.set()  # Initially set to allow frame samplers to start
 
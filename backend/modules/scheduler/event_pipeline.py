@@ -0,0 +1,214 @@
+"""Sampler -> event detector segment pipeline.
+
+Frame samplers used to set event_detector_event after every video and then
+poll event_detector_done once a second, so every sampler thread idled behind
+the single event detector. The two stages are now connected by a bounded
+queue of completed log segments:
+
+    - A timeline store segment registers itself as open when the sampler
+      starts it and is submitted once its records are final (segment
+      boundary or end of the sampled range; end of the video's last work
+      block when several blocks can share a segment, and for the no-trigger
+      sampler), so the detector works on a video while it is still being
+      sampled.
+    - The event detector thread drains the queue in FIFO order into one lane
+      per camera. Segments of one camera are closed in timeline order by the
+      sampler handling that camera's video and each lane is serial, so the
+      pending event (te IS NULL) is carried over in order.
+    - submit() only blocks when the queue is full (back-pressure), for at
+      most EVENT_QUEUE_PUT_TIMEOUT seconds; a segment that could not be
+      queued stays is_processed = 0 in processed_logs and is picked up by the
+      detector's rescan (event_detector_event). Rescanned logs go straight
+      to the camera lanes, tracked with claim()/release() so they are not
+      picked up twice, and the detector thread keeps draining the queue.
+    - Sampler worker processes have no detector: their pipeline forwards
+      completed segments to the scheduler process over the worker result
+      queue (see sampler_worker_pool.py). In any other process without a
+      consumer, submit() is a no-op and the rescan covers the segment. The
+      rescan only sees segments marked final in timeline_segments.closed, so
+      segments still being written in another process are left alone.
+
+Usage:
+    from modules.scheduler.event_pipeline import event_pipeline
+
+    event_pipeline.segment_opened(log_file)
+    event_pipeline.submit(log_file, camera_name)     # segment complete
+
+    item = event_pipeline.get(timeout=1.0)          # detector thread
+    event_pipeline.task_done(item, ok=True)
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .config.scheduler_config import SchedulerConfig
+from .db_sync import event_detector_event
+# Imported by the timeline store inside the samplers: same conditional logger as db_sync
+try:
+    from modules.config.logging_config import get_logger
+    logger = get_logger(__name__, {"module": "event_pipeline"})
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+class EventPipeline:
+    """Bounded FIFO of completed log segments with queue depth and stage latency counters."""
+
+    def __init__(self, maxsize: int = SchedulerConfig.EVENT_QUEUE_SIZE,
+                 put_timeout: float = SchedulerConfig.EVENT_QUEUE_PUT_TIMEOUT):
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._open: Dict[str, float] = {}   # log_file -> opened_at, segments still being written
+        self._pending: Dict[str, Dict[str, Any]] = {}   # queued or being detected
+        self._consumer = False
+        self._forward: Optional[Callable[[str, Optional[str], float], None]] = None
+        self.counters = {
+            "submitted": 0, "duplicates": 0, "dropped": 0, "rescanned": 0, "rescan_failed": 0,
+            "processed": 0, "failed": 0,
+            "blocked_puts": 0, "blocked_seconds": 0.0, "max_depth": 0,
+            "queue_wait_seconds": 0.0, "detect_seconds": 0.0, "end_to_end_seconds": 0.0,
+        }
+
+    # ---- producers (frame samplers) ------------------------------------------
+    def attach_consumer(self) -> None:
+        """Mark this process as having a detector draining the queue."""
+        with self._lock:
+            self._consumer = True
+
+    def forward_to(self, callback: Optional[Callable[[str, Optional[str], float], None]]) -> None:
+        """Send completed segments to `callback(log_file, camera_name, closed_at)` instead of the queue."""
+        with self._lock:
+            self._forward = callback
+
+    def segment_opened(self, log_file: str) -> None:
+        """A sampler started writing log_file; the rescan leaves it alone until it is submitted."""
+        with self._lock:
+            self._open[log_file] = time.time()
+
+    def segment_discarded(self, log_file: str) -> None:
+        """A sampler dropped log_file without submitting it."""
+        with self._lock:
+            self._open.pop(log_file, None)
+
+    def submit(self, log_file: str, camera_name: Optional[str] = None, closed_at: Optional[float] = None) -> bool:
+        """
+        Queue a completed segment for the detector, blocking while the queue is full.
+
+        Returns:
+            bool: True if the segment was queued or forwarded
+        """
+        closed_at = closed_at or time.time()
+        with self._lock:
+            self._open.pop(log_file, None)
+            forward, consumer = self._forward, self._consumer
+            if forward is None and consumer:
+                if log_file in self._pending:
+                    self.counters["duplicates"] += 1
+                    return True
+                item = {"log_file": log_file, "camera_name": camera_name, "closed_at": closed_at}
+                self._pending[log_file] = item
+        if forward is not None:
+            try:
+                forward(log_file, camera_name, closed_at)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to forward segment {log_file}: {e}")
+                return False
+        if not consumer:
+            return False
+
+        put_start = item["queued_at"] = time.time()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.info(f"Event queue full ({self._queue.maxsize}), sampler waiting for the detector")
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                with self._lock:
+                    self._pending.pop(log_file, None)
+                    self.counters["dropped"] += 1
+                logger.warning(f"Event queue still full after {self.put_timeout}s, leaving {log_file} to the rescan")
+                event_detector_event.set()
+                return False
+            finally:
+                with self._lock:
+                    self.counters["blocked_puts"] += 1
+                    self.counters["blocked_seconds"] += time.time() - put_start
+        with self._lock:
+            self.counters["submitted"] += 1
+            self.counters["max_depth"] = max(self.counters["max_depth"], self._queue.qsize())
+        return True
+
+    # ---- consumer (event detector) ---------------------------------------
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next segment in FIFO order, or None after `timeout` seconds."""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        item["started_at"] = time.time()
+        return item
+
+    def task_done(self, item: Dict[str, Any], ok: bool = True) -> None:
+        """Record that the detector finished (or failed on) a segment returned by get()."""
+        done_at = time.time()
+        with self._lock:
+            self._pending.pop(item["log_file"], None)
+            self.counters["processed" if ok else "failed"] += 1
+            self.counters["queue_wait_seconds"] += item["started_at"] - item["queued_at"]
+            self.counters["detect_seconds"] += done_at - item["started_at"]
+            self.counters["end_to_end_seconds"] += done_at - item["closed_at"]
+        self._queue.task_done()
+
+    def claim(self, log_file: str, camera_name: Optional[str] = None) -> bool:
+        """
+        Track a log the detector rescan hands to the camera lanes itself, so
+        is_busy() covers it until release(). False if it is already open or pending.
+        """
+        with self._lock:
+            if log_file in self._open or log_file in self._pending:
+                return False
+            self._pending[log_file] = {"log_file": log_file, "camera_name": camera_name, "rescan": True}
+            self.counters["rescanned"] += 1
+            return True
+
+    def release(self, log_file: str, ok: bool = True) -> None:
+        """Record that the detector finished (or failed on) a log taken with claim()."""
+        with self._lock:
+            self._pending.pop(log_file, None)
+            if not ok:
+                self.counters["rescan_failed"] += 1
+
+    def is_busy(self, log_file: str) -> bool:
+        """True while log_file is being written, queued or detected."""
+        with self._lock:
+            return log_file in self._open or log_file in self._pending
+
+    # ---- status ----------------------------------------------------------
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, counters and average stage latencies, for logging and status endpoints."""
+        with self._lock:
+            counters = dict(self.counters)
+            open_segments = len(self._open)
+        finished = counters["processed"] + counters["failed"]
+        return {
+            "depth": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "open_segments": open_segments,
+            "counters": {key: round(value, 3) if isinstance(value, float) else value for key, value in counters.items()},
+            "avg_queue_wait_sec": round(counters["queue_wait_seconds"] / finished, 3) if finished else 0.0,
+            "avg_detect_sec": round(counters["detect_seconds"] / finished, 3) if finished else 0.0,
+            "avg_end_to_end_sec": round(counters["end_to_end_seconds"] / finished, 3) if finished else 0.0,
+        }
+
+
+# Process-wide pipeline between the frame samplers and the event detector thread
+event_pipeline = EventPipeline()
@@ -46,6 +46,8 @@ from modules.license.license_manager import LicenseManager
 from .file_lister import run_file_scan, get_db_path
 from .batch_scheduler import BatchScheduler
 from .db_sync import frame_sampler_event, event_detector_event
+from .event_pipeline import event_pipeline
+from modules.technician.event_detector import lock_stats
 
 program_bp = Blueprint('program', __name__)
 
@@ -468,6 +470,8 @@ def get_program_progress():
         JSON object containing:
         - files: List of files with their current processing status
           Each file object includes file_path and current status
+        - event_pipeline: Event detector queue depth and stage latencies
+        - event_detector_locks: Write lock wait/hold times per camera
     
     Used by frontend to display live progress updates during processing.
     """
@@ -479,7 +483,11 @@ def get_program_progress():
                 cursor.execute("SELECT file_path, status FROM file_list WHERE is_processed = 0 ORDER BY created_at DESC")
                 files_status = [{"file": row[0], "status": row[1]} for row in cursor.fetchall()]
         logger.info(f"Retrieved {len(files_status)} files for status")
-        return jsonify({"files": files_status}), 200
+        return jsonify({
+            "files": files_status,
+            "event_pipeline": event_pipeline.snapshot(),
+            "event_detector_locks": lock_stats.snapshot(),
+        }), 200
     except Exception as e:
         logger.error(f"Failed to retrieve program progress: {str(e)}")
         return jsonify({"error": f"Failed to retrieve program progress: {str(e)}"}), 500
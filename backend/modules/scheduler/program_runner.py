@@ -12,7 +12,11 @@ Key Components:
 
 Thread Architecture:
     - Multiple frame sampler threads run in parallel (batch processing)
-    - Single event detector thread processes logs sequentially
+    - Single event detector thread takes completed segments off the queue and
+      runs them per camera in parallel (camera lanes of event_detector.py)
+    - Completed log segments reach the detector through a bounded queue
+      (event_pipeline.py), so samplers never wait for the detector unless
+      the queue is full
     - Threads coordinate through threading.Event objects for workflow control
     - Video-level locking prevents concurrent processing of same file
 
@@ -37,10 +41,13 @@ from modules.db_utils.safe_connection import safe_db_connection
 from modules.technician.frame_sampler_trigger import FrameSamplerTrigger
 from modules.technician.frame_sampler_no_trigger import FrameSamplerNoTrigger
 from modules.technician.IdleMonitor import IdleMonitor
-from modules.technician.event_detector import process_single_log
+from modules.technician.event_detector import camera_detector, lock_stats
+from modules.technician.timeline_store import timeline_order
 from modules.technician.retry_empty_event import start_retry_processor
 from modules.utils.file_stability import validate_video_file
 from .db_sync import db_rwlock, frame_sampler_event, event_detector_event, event_detector_done
+from .event_pipeline import event_pipeline
+from .video_sharding import should_shard, run_sharded_sampling
 from .config.scheduler_config import SchedulerConfig
 import json
 from modules.config.logging_config import get_logger
@@ -206,6 +213,222 @@ def start_frame_sampler_thread(batch_size: int = 1) -> List[threading.Thread]:
         threads.append(frame_sampler_thread)
     return threads
 
+def process_video_file(video_file: str, camera_name: Optional[str]) -> Dict[str, Any]:
+    """Run the full pipeline for one video: profile, IdleMonitor, frame sampling, status.
+
+    Shared by the frame sampler threads and the sampler worker processes
+    (see sampler_worker_pool.py). Signalling the event detector is left to the
+    caller, since worker processes cannot set the scheduler's events. The
+    caller must also make sure no one else is processing the same video.
+
+    Args:
+        video_file (str): Path of the video to process
+        camera_name (Optional[str]): Camera of the video (CamTest profile if None)
+
+    Returns:
+        Dict[str, Any]: 'log_file' (last log written or None) and 'processed'
+        (True if frame sampling ran and the event detector should be awaited)
+    """
+    logger.info(f"Processing video: {video_file}")
+    
+    # STEP 1: Load camera profile configuration for processing parameters
+    with db_rwlock.gen_rlock():
+        with safe_db_connection() as conn:
+            cursor = conn.cursor()
+            search_name = camera_name if camera_name else "CamTest"
+            if not camera_name:
+                logger.warning(f"No camera_name for {video_file}, falling back to CamTest")
+            
+            # Query packing profiles for camera-specific configuration
+            cursor.execute("SELECT id, profile_name, qr_trigger_area, packing_area FROM packing_profiles WHERE profile_name LIKE ?", (f'%{search_name}%',))
+            profiles = cursor.fetchall()
+    
+    # Select the profile with the highest ID (most recent)
+    trigger = [0, 0, 0, 0]  # Default trigger area coordinates
+    packing_area = None      # Default packing area (no restriction)
+    selected_profile = None
+    
+    if profiles:
+        selected_profile = max(profiles, key=lambda x: x[0])  # Select highest ID
+        profile_id, profile_name, qr_trigger_area, packing_area_raw = selected_profile
+        # Parse QR trigger area coordinates [x, y, width, height]
+        try:
+            trigger = json.loads(qr_trigger_area) if qr_trigger_area else [0, 0, 0, 0]
+            if not isinstance(trigger, list) or len(trigger) != 4:
+                logger.error(f"Invalid qr_trigger_area for {profile_name}: {qr_trigger_area}, using default [0, 0, 0, 0]")
+                trigger = [0, 0, 0, 0]
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse qr_trigger_area for {profile_name}: {e}, using default [0, 0, 0, 0]")
+            trigger = [0, 0, 0, 0]
+        # Parse packing area coordinates for region-of-interest processing
+        try:
+            if packing_area_raw:
+                parsed = json.loads(packing_area_raw)
+                if isinstance(parsed, list) and len(parsed) == 4:
+                    packing_area = tuple(parsed)  # Convert to tuple for consistency
+                elif isinstance(parsed, dict) and all(key in parsed for key in ['x', 'y', 'w', 'h']):
+                    packing_area = (parsed['x'], parsed['y'], parsed['w'], parsed['h'])
+                else:
+                    logger.error(f"Invalid packing_area format for {profile_name}: {packing_area_raw}, using default None")
+                    packing_area = None
+            logger.info(f"Selected profile id={profile_id}, profile_name={profile_name}, qr_trigger_area={trigger}, packing_area={packing_area}")
+        except (ValueError, json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse packing_area for {profile_name}: {e}, using default None")
+            packing_area = None
+    else:
+        logger.warning(f"No profile found for camera {search_name}, using default qr_trigger_area=[0, 0, 0, 0], packing_area=None")
+    
+    # STEP 2: Run IdleMonitor to detect active periods in the video
+    # This optimization focuses processing on periods with actual activity
+    idle_monitor = IdleMonitor()
+    logger.info(f"Running IdleMonitor for {video_file}")
+
+    # ==================== VIDEO VALIDATION & ERROR HANDLING ====================
+    # Try to process video with IdleMonitor (may fail if file incomplete/corrupted)
+    try:
+        idle_monitor.process_video(video_file, camera_name, packing_area)
+        work_block_queue = idle_monitor.get_work_block_queue()
+    except Exception as e:
+        # IdleMonitor failed - validate video file to determine if retry needed
+        logger.error(f"IdleMonitor failed for {video_file}: {e}")
+
+        is_valid, reason = validate_video_file(video_file)
+
+        if not is_valid:
+            # Video file is incomplete/corrupted - mark for retry
+            logger.warning(f"Video validation failed: {reason}")
+            with db_rwlock.gen_wlock():
+                with safe_db_connection() as conn:
+                    mark_for_retry(conn, video_file, f"OpenCV error: {reason}")
+                    conn.commit()
+        else:
+            # Video file is valid but IdleMonitor failed for other reasons
+            # This shouldn't happen, but mark as Failed to avoid infinite loop
+            logger.error(f"Unexpected error: Video is valid but IdleMonitor failed: {e}")
+            with db_rwlock.gen_wlock():
+                with safe_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "UPDATE file_list SET status = ?, is_processed = 1 WHERE file_path = ?",
+                        ("Failed", video_file)
+                    )
+                    conn.commit()
+
+        return {'log_file': None, 'processed': False}  # Skip to next file
+
+    # Skip videos with no active periods to save processing time
+    if work_block_queue.empty():
+        logger.info(f"No work blocks found for {video_file}, skipping FrameSampler and log file creation")
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE file_list SET status = ?, is_processed = 1 WHERE file_path = ?", ("Done", video_file))
+        return {'log_file': None, 'processed': False}  # Skip frame sampling for inactive videos
+    # STEP 3: Select appropriate FrameSampler based on trigger configuration
+    if trigger != [0, 0, 0, 0]:
+        # Use trigger-based sampling when QR trigger area is defined
+        frame_sampler = FrameSamplerTrigger()
+        logger.info(f"Using FrameSamplerTrigger for {video_file}")
+    else:
+        # Use continuous sampling when no trigger area is defined
+        frame_sampler = FrameSamplerNoTrigger()
+        logger.info(f"Using FrameSamplerNoTrigger for {video_file}")
+
+    # STEP 4: Update database status to indicate processing has started
+    with db_rwlock.gen_wlock():
+        with safe_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Processing", video_file))
+        logger.debug(f"Updated status for {video_file} to 'Processing'")
+
+    # STEP 4.5: RUN HEALTH CHECK BEFORE ALL BLOCKS (NEW FIX)
+    # This ensures if health check is CRITICAL, ALL blocks are skipped
+    # Not just the first block
+    health_check_failed = False
+    from modules.technician.camera_health_checker import should_run_health_check, run_health_check
+
+    if should_run_health_check(camera_name):
+        logger.info(f"[HEALTH] Running health check BEFORE processing blocks for {camera_name}")
+        health_result = run_health_check(camera_name=camera_name, video_path=video_file)
+
+        if health_result.get('success') and health_result.get('status') == 'CRITICAL':
+            logger.error(f"[HEALTH] 🛑 Health check CRITICAL for {camera_name} - SKIPPING ALL BLOCKS")
+            health_check_failed = True
+
+            # Mark file as health check failed
+            with db_rwlock.gen_wlock():
+                with safe_db_connection() as conn:
+                    cursor = conn.cursor()
+                    health_metadata = json.dumps({
+                        "health_check_required": True,
+                        "health_check_done": True,
+                        "health_check_status": "CRITICAL"
+                    })
+                    cursor.execute("""
+                        UPDATE file_list
+                        SET health_check_failed = 1,
+                            health_check_message = ?,
+                            status = 'health_check_failed'
+                        WHERE file_path = ?
+                    """, (health_metadata, video_file))
+                    conn.commit()
+
+            # Clear all remaining blocks to prevent processing
+            while not work_block_queue.empty():
+                work_block_queue.get()
+            logger.error(f"[HEALTH] Cleared all work blocks for {video_file}")
+
+    # STEP 5: Process video blocks identified by IdleMonitor
+    log_file = None
+    if not health_check_failed:  # Only process if health check passed
+        work_blocks = []
+        while not work_block_queue.empty():
+            work_blocks.append(work_block_queue.get())
+
+        if isinstance(frame_sampler, FrameSamplerTrigger) and should_shard(work_blocks):
+            # Long recording: sample time shards in the process pool, merge logs
+            log_file = run_sharded_sampling(frame_sampler, video_file, work_blocks)
+            work_blocks = []
+
+        # Blocks can fall in the same 300s segment: its records are only final after the last block
+        frame_sampler.hold_segments()
+        try:
+            for work_block in work_blocks:
+                start_time = work_block['start_time']
+                end_time = work_block['end_time']
+                logger.info(f"Processing video block: start_time={start_time}, end_time={end_time}")
+
+                # ✅ Run frame sampling on the active video segment
+                # MUST be INSIDE loop to process ALL blocks, not just last one!
+                log_file = frame_sampler.process_video(
+                    video_file,
+                    video_lock=frame_sampler.video_lock,
+                    get_packing_area_func=frame_sampler.get_packing_area,
+                    process_frame_func=frame_sampler.process_frame,
+                    frame_interval=frame_sampler.frame_interval,
+                    start_time=start_time,
+                    end_time=end_time
+                )
+        finally:
+            frame_sampler.release_segments()
+    
+    # STEP 6: Update final processing status and trigger event detection
+    # ✅ IMPORTANT: Only update if health check passed!
+    # If health_check_failed, status already set to 'health_check_failed' in STEP 4.5
+    if not health_check_failed:
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                if log_file:
+                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Done", video_file))
+                    logger.info(f"Video {video_file} processed successfully, log file: {log_file}")
+                else:
+                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Error", video_file))
+                    logger.error(f"Failed to process video {video_file}")
+    
+
+    return {'log_file': log_file, 'processed': not health_check_failed}
+
 def run_frame_sampler() -> None:
     """Main frame sampler thread function for video processing.
     
@@ -217,7 +440,8 @@ def run_frame_sampler() -> None:
     2. Idle Monitoring: Analyzes video for active periods
     3. Frame Sampling: Processes frames for hand/QR detection
     4. Status Updates: Tracks processing progress in database
-    5. Event Coordination: Signals event detector when ready
+    5. Event Coordination: Completed log segments are queued for the event
+       detector as they are closed; the sampler moves straight on to the next video
     
     Video Processing Pipeline:
         IdleMonitor -> FrameSampler (Trigger/NoTrigger) -> Log Generation
@@ -225,7 +449,7 @@ def run_frame_sampler() -> None:
     Thread Lifecycle:
         - Waits on frame_sampler_event for work signals
         - Processes videos until queue is empty
-        - Coordinates with event detector for log processing
+        - Hands log segments to the event detector through event_pipeline
         - Handles timeouts and error conditions
     
     Thread Safety:
@@ -294,200 +518,13 @@ def run_frame_sampler() -> None:
                     continue
 
                 try:
-                    logger.info(f"Processing video: {video_file}")
-                    
-                    # STEP 1: Load camera profile configuration for processing parameters
-                    with db_rwlock.gen_rlock():
-                        with safe_db_connection() as conn:
-                            cursor = conn.cursor()
-                            search_name = camera_name if camera_name else "CamTest"
-                            if not camera_name:
-                                logger.warning(f"No camera_name for {video_file}, falling back to CamTest")
-                            
-                            # Query packing profiles for camera-specific configuration
-                            cursor.execute("SELECT id, profile_name, qr_trigger_area, packing_area FROM packing_profiles WHERE profile_name LIKE ?", (f'%{search_name}%',))
-                            profiles = cursor.fetchall()
-                    
-                    # Select the profile with the highest ID (most recent)
-                    trigger = [0, 0, 0, 0]  # Default trigger area coordinates
-                    packing_area = None      # Default packing area (no restriction)
-                    selected_profile = None
-                    
-                    if profiles:
-                        selected_profile = max(profiles, key=lambda x: x[0])  # Select highest ID
-                        profile_id, profile_name, qr_trigger_area, packing_area_raw = selected_profile
-                        # Parse QR trigger area coordinates [x, y, width, height]
-                        try:
-                            trigger = json.loads(qr_trigger_area) if qr_trigger_area else [0, 0, 0, 0]
-                            if not isinstance(trigger, list) or len(trigger) != 4:
-                                logger.error(f"Invalid qr_trigger_area for {profile_name}: {qr_trigger_area}, using default [0, 0, 0, 0]")
-                                trigger = [0, 0, 0, 0]
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse qr_trigger_area for {profile_name}: {e}, using default [0, 0, 0, 0]")
-                            trigger = [0, 0, 0, 0]
-                        # Parse packing area coordinates for region-of-interest processing
-                        try:
-                            if packing_area_raw:
-                                parsed = json.loads(packing_area_raw)
-                                if isinstance(parsed, list) and len(parsed) == 4:
-                                    packing_area = tuple(parsed)  # Convert to tuple for consistency
-                                elif isinstance(parsed, dict) and all(key in parsed for key in ['x', 'y', 'w', 'h']):
-                                    packing_area = (parsed['x'], parsed['y'], parsed['w'], parsed['h'])
-                                else:
-                                    logger.error(f"Invalid packing_area format for {profile_name}: {packing_area_raw}, using default None")
-                                    packing_area = None
-                            logger.info(f"Selected profile id={profile_id}, profile_name={profile_name}, qr_trigger_area={trigger}, packing_area={packing_area}")
-                        except (ValueError, json.JSONDecodeError, KeyError, TypeError) as e:
-                            logger.error(f"Failed to parse packing_area for {profile_name}: {e}, using default None")
-                            packing_area = None
-                    else:
-                        logger.warning(f"No profile found for camera {search_name}, using default qr_trigger_area=[0, 0, 0, 0], packing_area=None")
-                    
-                    # STEP 2: Run IdleMonitor to detect active periods in the video
-                    # This optimization focuses processing on periods with actual activity
-                    idle_monitor = IdleMonitor()
-                    logger.info(f"Running IdleMonitor for {video_file}")
-
-                    # ==================== VIDEO VALIDATION & ERROR HANDLING ====================
-                    # Try to process video with IdleMonitor (may fail if file incomplete/corrupted)
-                    try:
-                        idle_monitor.process_video(video_file, camera_name, packing_area)
-                        work_block_queue = idle_monitor.get_work_block_queue()
-                    except Exception as e:
-                        # IdleMonitor failed - validate video file to determine if retry needed
-                        logger.error(f"IdleMonitor failed for {video_file}: {e}")
-
-                        is_valid, reason = validate_video_file(video_file)
-
-                        if not is_valid:
-                            # Video file is incomplete/corrupted - mark for retry
-                            logger.warning(f"Video validation failed: {reason}")
-                            with db_rwlock.gen_wlock():
-                                with safe_db_connection() as conn:
-                                    mark_for_retry(conn, video_file, f"OpenCV error: {reason}")
-                                    conn.commit()
-                        else:
-                            # Video file is valid but IdleMonitor failed for other reasons
-                            # This shouldn't happen, but mark as Failed to avoid infinite loop
-                            logger.error(f"Unexpected error: Video is valid but IdleMonitor failed: {e}")
-                            with db_rwlock.gen_wlock():
-                                with safe_db_connection() as conn:
-                                    cursor = conn.cursor()
-                                    cursor.execute(
-                                        "UPDATE file_list SET status = ?, is_processed = 1 WHERE file_path = ?",
-                                        ("Failed", video_file)
-                                    )
-                                    conn.commit()
-
-                        continue  # Skip to next file
-
-                    # Skip videos with no active periods to save processing time
-                    if work_block_queue.empty():
-                        logger.info(f"No work blocks found for {video_file}, skipping FrameSampler and log file creation")
-                        with db_rwlock.gen_wlock():
-                            with safe_db_connection() as conn:
-                                cursor = conn.cursor()
-                                cursor.execute("UPDATE file_list SET status = ?, is_processed = 1 WHERE file_path = ?", ("Done", video_file))
-                        continue  # Skip frame sampling for inactive videos
-                    # STEP 3: Select appropriate FrameSampler based on trigger configuration
-                    if trigger != [0, 0, 0, 0]:
-                        # Use trigger-based sampling when QR trigger area is defined
-                        frame_sampler = FrameSamplerTrigger()
-                        logger.info(f"Using FrameSamplerTrigger for {video_file}")
-                    else:
-                        # Use continuous sampling when no trigger area is defined
-                        frame_sampler = FrameSamplerNoTrigger()
-                        logger.info(f"Using FrameSamplerNoTrigger for {video_file}")
-
-                    # STEP 4: Update database status to indicate processing has started
-                    with db_rwlock.gen_wlock():
-                        with safe_db_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Processing", video_file))
-                        logger.debug(f"Updated status for {video_file} to 'Processing'")
-
-                    # STEP 4.5: RUN HEALTH CHECK BEFORE ALL BLOCKS (NEW FIX)
-                    # This ensures if health check is CRITICAL, ALL blocks are skipped
-                    # Not just the first block
-                    health_check_failed = False
-                    from modules.technician.camera_health_checker import should_run_health_check, run_health_check
-
-                    if should_run_health_check(camera_name):
-                        logger.info(f"[HEALTH] Running health check BEFORE processing blocks for {camera_name}")
-                        health_result = run_health_check(camera_name=camera_name, video_path=video_file)
-
-                        if health_result.get('success') and health_result.get('status') == 'CRITICAL':
-                            logger.error(f"[HEALTH] 🛑 Health check CRITICAL for {camera_name} - SKIPPING ALL BLOCKS")
-                            health_check_failed = True
-
-                            # Mark file as health check failed
-                            with db_rwlock.gen_wlock():
-                                with safe_db_connection() as conn:
-                                    cursor = conn.cursor()
-                                    health_metadata = json.dumps({
-                                        "health_check_required": True,
-                                        "health_check_done": True,
-                                        "health_check_status": "CRITICAL"
-                                    })
-                                    cursor.execute("""
-                                        UPDATE file_list
-                                        SET health_check_failed = 1,
-                                            health_check_message = ?,
-                                            status = 'health_check_failed'
-                                        WHERE file_path = ?
-                                    """, (health_metadata, video_file))
-                                    conn.commit()
-
-                            # Clear all remaining blocks to prevent processing
-                            while not work_block_queue.empty():
-                                work_block_queue.get()
-                            logger.error(f"[HEALTH] Cleared all work blocks for {video_file}")
-
-                    # STEP 5: Process video blocks identified by IdleMonitor
-                    log_file = None
-                    if not health_check_failed:  # Only process if health check passed
-                        while not work_block_queue.empty():
-                            work_block = work_block_queue.get()
-                            start_time = work_block['start_time']
-                            end_time = work_block['end_time']
-                            logger.info(f"Processing video block: start_time={start_time}, end_time={end_time}")
-
-                            # ✅ Run frame sampling on the active video segment
-                            # MUST be INSIDE loop to process ALL blocks, not just last one!
-                            log_file = frame_sampler.process_video(
-                                video_file,
-                                video_lock=frame_sampler.video_lock,
-                                get_packing_area_func=frame_sampler.get_packing_area,
-                                process_frame_func=frame_sampler.process_frame,
-                                frame_interval=frame_sampler.frame_interval,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                    
-                    # STEP 6: Update final processing status and trigger event detection
-                    # ✅ IMPORTANT: Only update if health check passed!
-                    # If health_check_failed, status already set to 'health_check_failed' in STEP 4.5
-                    if not health_check_failed:
-                        with db_rwlock.gen_wlock():
-                            with safe_db_connection() as conn:
-                                cursor = conn.cursor()
-                                if log_file:
-                                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Done", video_file))
-                                    event_detector_event.set()  # Signal event detector that logs are ready
-                                    logger.info(f"Video {video_file} processed successfully, log file: {log_file}")
-                                else:
-                                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("Error", video_file))
-                                    logger.error(f"Failed to process video {video_file}")
-                    
-                    # STEP 7: Wait for event detector to process the generated logs
-                    # ✅ IMPORTANT: Only wait if processing happened (health check passed)
-                    # If health_check_failed, skip waiting to allow lock release
-                    if not health_check_failed:
-                        logger.info(f"Frame Sampler pausing after processing {video_file}, waiting for Event Detector...")
-                        while not event_detector_done.is_set():
-                            time.sleep(1)  # Wait for event detector to complete log analysis
-                    else:
-                        logger.info(f"Frame Sampler skipping Event Detector wait for {video_file} (health check failed)")
+                    result = process_video_file(video_file, camera_name)
+                    # STEP 7: Segments were queued for the event detector as they closed
+                    # (back-pressure only when its queue is full); the rescan signal
+                    # covers logs that could not be queued
+                    if result['log_file']:
+                        event_detector_event.set()
+                        logger.info(f"Frame Sampler finished {video_file}, event queue depth: {event_pipeline.depth()}")
 
                 finally:
                     # Clean up video lock and remove from global locks dictionary
@@ -514,8 +551,8 @@ def start_event_detector_thread() -> threading.Thread:
         threading.Thread: The started event detector thread
         
     Thread Coordination:
-        The event detector waits on event_detector_event and processes
-        logs generated by frame sampler threads.
+        The event detector drains the event_pipeline queue of log segments
+        completed by frame samplers; event_detector_event triggers a rescan.
     """
     logger.info("Starting event detector thread", extra={"thread_id": threading.current_thread().ident})
     event_detector_thread = threading.Thread(target=run_event_detector, name="EventDetector")
@@ -524,60 +561,91 @@ def start_event_detector_thread() -> threading.Thread:
 
 def run_event_detector() -> None:
     """Main event detector thread function for log analysis.
-    
+
     This function runs continuously to process frame sampling logs and
-    identify significant events. It coordinates with frame sampler threads
-    to ensure proper workflow sequencing.
-    
+    identify significant events. Completed log segments arrive through the
+    bounded event_pipeline queue while the frame samplers keep sampling.
+
     Event Detection Pipeline:
-        1. Wait for signal from frame samplers that logs are ready
-        2. Query database for unprocessed log files
-        3. Process each log file through event detection algorithms
-        4. Signal frame samplers that processing is complete
-    
+        1. Take the next completed segment from the queue (FIFO)
+        2. Hand it to the lane of its camera (camera_detector): cameras are
+           detected in parallel, the segments of one camera in queue order
+        3. On event_detector_event, rescan processed_logs for unprocessed logs
+           that never reached the queue (worker failures, full queue, older runs)
+        4. Keep event_detector_done set while the detector is idle
+
     Thread Coordination:
-        - Waits on event_detector_event for work signals
-        - Sets event_detector_done to signal frame samplers
-        - Ensures sequential processing of logs for consistency
-    
+        - Registers as the consumer of event_pipeline
+        - At most 2 x camera_detector.max_workers segments are taken off the
+          queue at a time, so a slow detector still fills the queue and
+          applies back-pressure to the samplers
+        - Waits on the queue, with event_detector_event as rescan signal
+
     Thread Safety:
-        Uses RWLocks for database access and event coordination
-        for proper workflow control.
+        Each log is processed in its own short write transaction; write lock
+        wait/hold times per camera are kept in event_detector.lock_stats.
     """
     logger.info("Event detector thread started", extra={"thread_id": threading.current_thread().ident})
-    
+    event_pipeline.attach_consumer()
+    in_flight = threading.BoundedSemaphore(camera_detector.max_workers * 2)
+
+    def finish(item):
+        def on_done(ok):
+            event_pipeline.task_done(item, ok=ok)
+            in_flight.release()
+            if event_pipeline.depth() == 0 and camera_detector.busy_cameras() == 0:
+                logger.info(f"Event queue drained: {event_pipeline.snapshot()}, write lock per camera: {lock_stats.snapshot()}")
+        return on_done
+
     # Main event detection loop - continues until thread termination
     while True:
-        # Wait for signal that logs are ready for processing
-        event_detector_event.wait()
-        logger.debug("Event detector event received")
         try:
-            # Get list of unprocessed log files from database
-            with db_rwlock.gen_rlock():
-                with safe_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT log_file FROM processed_logs WHERE is_processed = 0")
-                    log_files = [row[0] for row in cursor.fetchall()]
-                logger.info(f"Found {len(log_files)} unprocessed log files")
-
-            # If no logs to process, signal frame samplers to continue
-            if not log_files:
+            if event_detector_event.is_set():
                 event_detector_event.clear()
-                event_detector_done.set()  # Signal frame samplers they can continue
-                logger.info("No log files to process, clearing event and signaling done")
+                _rescan_unprocessed_logs()
+
+            if not in_flight.acquire(timeout=1.0):
+                continue  # All lanes busy: leave segments in the queue
+            item = event_pipeline.get(timeout=1.0)
+            if item is None:
+                in_flight.release()
+                if camera_detector.busy_cameras() == 0:
+                    event_detector_done.set()  # Idle: nothing queued or running
                 continue
 
-            # Process each log file through event detection algorithms
-            for log_file in log_files:
-                logger.info(f"Event Detector processing: {log_file}")
-                process_single_log(log_file)  # Analyze log for events and patterns
-                
-            # Signal completion to frame samplers after processing all logs
-            event_detector_event.clear()
-            event_detector_done.set()  # Allow frame samplers to continue with next video
-            logger.info("All log files processed, clearing event and signaling done")
-            
+            event_detector_done.clear()
+            logger.info(f"Event Detector queuing {item['log_file']} for camera {item['camera_name']} (queue depth {event_pipeline.depth()})")
+            camera_detector.submit(item['camera_name'], item['log_file'], finish(item))
+
         except Exception as e:
             logger.error(f"Error in Event Detector thread: {str(e)}")
-            event_detector_event.clear()
             event_detector_done.set()  # Still signal completion even on error to prevent deadlock
+
+def _rescan_unprocessed_logs() -> None:
+    """Hand unprocessed logs that are not open, queued or being detected to the camera lanes, in timeline order.
+
+    Returns without waiting: the claimed logs count as busy in event_pipeline
+    until their lane is done, so the detector thread keeps draining the queue.
+    """
+    with db_rwlock.gen_rlock():
+        with safe_db_connection() as conn:
+            cursor = conn.cursor()
+            # Store segments count only once final: samplers in worker processes open
+            # segments outside this process's event_pipeline (legacy text logs have no row)
+            cursor.execute("""
+                SELECT p.log_file, t.camera_name, t.start_time, t.start_second FROM processed_logs p
+                LEFT JOIN timeline_segments t ON t.log_file = p.log_file
+                WHERE p.is_processed = 0 AND (t.log_file IS NULL OR t.closed = 1)
+                ORDER BY p.rowid
+            """)
+            rows = cursor.fetchall()
+
+    claimed = [(log_file, camera_name) for log_file, camera_name in timeline_order(rows)
+               if event_pipeline.claim(log_file, camera_name)]
+    if not claimed:
+        return
+    logger.info(f"Rescan found {len(claimed)} unprocessed log files outside the event queue")
+    event_detector_done.clear()
+    for log_file, camera_name in claimed:
+        camera_detector.submit(camera_name, log_file,
+                               lambda ok, log_file=log_file: event_pipeline.release(log_file, ok))
@@ -0,0 +1,338 @@
+"""Supervised frame sampler worker processes.
+
+Process-based alternative to the frame sampler threads of program_runner. Each
+worker is a separate (spawned) Python process that runs process_video_file()
+for one video at a time, so QR decoding, MediaPipe and the per-frame Python
+logic no longer share the GIL and address space of the Flask process.
+
+Dispatcher model:
+    - The supervisor thread (in the scheduler process) selects pending videos
+      from file_list and hands each one to an idle worker through that
+      worker's task queue, so it always knows which video a worker holds.
+    - Workers report completion on a shared result queue; the supervisor sets
+      event_detector_event for them (events cannot cross processes). Log
+      segments closed by a worker are forwarded on the same queue and queued
+      for the event detector (event_pipeline) while the worker keeps sampling.
+    - A worker that dies while holding a video is replaced and the video is
+      rescheduled with mark_for_retry().
+    - A worker whose RSS exceeds SAMPLER_WORKER_MAX_RSS_MB is retired after its
+      current video and replaced by a fresh process.
+    - resize() follows SystemMonitor.get_batch_size(); surplus workers are
+      stopped gracefully, idle ones first, busy ones after their current video.
+    - Workers write to the database directly: db_rwlock orders their writes
+      with the scheduler process through the database lock file (db_sync).
+      Each worker's shard pool is limited to SHARD_WORKERS_PER_SAMPLER_PROCESS.
+"""
+
+import os
+import queue
+import threading
+import time
+import multiprocessing
+import psutil
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from modules.db_utils.safe_connection import safe_db_connection
+from modules.config.logging_config import get_logger
+from .db_sync import db_rwlock, frame_sampler_event, event_detector_event
+from .event_pipeline import event_pipeline
+from .config.scheduler_config import SchedulerConfig
+from .program_runner import mark_for_retry, should_retry_now
+
+logger = get_logger(__name__, {"module": "sampler_worker_pool"})
+
+
+def _sampler_worker_main(worker_id: int, task_queue, result_queue, stop_event) -> None:
+    """Worker process entry point: process videos from task_queue until stopped."""
+    from .program_runner import process_video_file
+    from .event_pipeline import event_pipeline
+    from .video_sharding import set_shard_pool_size
+
+    worker_logger = get_logger(__name__, {"module": "sampler_worker", "worker_id": worker_id})
+    # Every worker may shard a video at the same time: share the shard processes between them
+    set_shard_pool_size(SchedulerConfig.SHARD_WORKERS_PER_SAMPLER_PROCESS)
+    # No event detector in this process: completed segments go to the supervisor
+    event_pipeline.forward_to(lambda log_file, camera_name, closed_at: result_queue.put(
+        ("segment", worker_id, None, {"log_file": log_file, "camera_name": camera_name, "closed_at": closed_at})))
+    worker_logger.info(f"Sampler worker {worker_id} started (pid={os.getpid()})")
+    while not stop_event.is_set():
+        try:
+            task = task_queue.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        if task is None:
+            break
+
+        video_file, camera_name = task
+        try:
+            result = process_video_file(video_file, camera_name)
+            result_queue.put(("done", worker_id, video_file, result))
+        except Exception as e:
+            worker_logger.error(f"Sampler worker {worker_id} failed on {video_file}: {e}")
+            result_queue.put(("failed", worker_id, video_file, str(e)))
+    worker_logger.info(f"Sampler worker {worker_id} stopping")
+
+
+class SamplerWorkerPool:
+    """Supervisor for a resizable pool of frame sampler worker processes."""
+
+    def __init__(self, max_rss_mb: int = SchedulerConfig.SAMPLER_WORKER_MAX_RSS_MB,
+                 poll_interval: float = SchedulerConfig.SAMPLER_SUPERVISOR_INTERVAL):
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.poll_interval = poll_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._workers: Dict[int, Dict[str, Any]] = {}
+        self._next_worker_id = 0
+        self._target_size = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._supervisor: Optional[threading.Thread] = None
+        self.counters = {
+            "started": 0, "stopped": 0, "crashed": 0, "memory_restarts": 0,
+            "completed": 0, "failed": 0, "rescheduled": 0,
+        }
+
+    @property
+    def target_size(self) -> int:
+        return self._target_size
+
+    # ---- lifecycle -------------------------------------------------------
+    def start(self, size: int) -> None:
+        """Start `size` workers and the supervisor thread."""
+        if self._running:
+            self.resize(size)
+            return
+        self._running = True
+        self.resize(size)
+        self._supervisor = threading.Thread(target=self._supervise, name="SamplerSupervisor", daemon=True)
+        self._supervisor.start()
+        logger.info(f"Sampler worker pool started with {size} workers")
+
+    def resize(self, size: int) -> None:
+        """Grow or (gracefully) shrink the pool to `size` workers."""
+        with self._lock:
+            if size != self._target_size:
+                logger.info(f"Resizing sampler worker pool: {self._target_size} -> {size}")
+            self._target_size = max(0, size)
+            self._reconcile()
+
+    def stop(self, timeout: float = SchedulerConfig.SAMPLER_WORKER_STOP_TIMEOUT) -> None:
+        """Stop all workers; busy workers get `timeout` seconds to finish their video."""
+        self._running = False
+        with self._lock:
+            self._target_size = 0
+            for worker_id in list(self._workers):
+                self._retire(worker_id)
+            workers = list(self._workers.values())
+
+        deadline = time.time() + timeout
+        for worker in workers:
+            worker["process"].join(timeout=max(0.0, deadline - time.time()))
+            if worker["process"].is_alive():
+                logger.warning(f"Sampler worker {worker['id']} did not stop in time, terminating")
+                worker["process"].terminate()
+                worker["process"].join(timeout=SchedulerConfig.THREAD_JOIN_TIMEOUT)
+        with self._lock:
+            self._workers.clear()
+        if self._supervisor and self._supervisor.is_alive():
+            self._supervisor.join(timeout=SchedulerConfig.THREAD_JOIN_TIMEOUT)
+        logger.info(f"Sampler worker pool stopped: {self.counters}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current workers and counters, for logging and status endpoints."""
+        with self._lock:
+            workers = [{
+                "id": worker["id"],
+                "pid": worker["process"].pid,
+                "alive": worker["process"].is_alive(),
+                "video": worker["video"],
+                "retiring": worker["retiring"],
+                "rss_mb": round(worker["rss"] / (1024 * 1024), 1),
+            } for worker in self._workers.values()]
+        return {"target_size": self._target_size, "workers": workers, "counters": dict(self.counters)}
+
+    # ---- worker management (caller holds self._lock) ----------------------
+    def _spawn_worker(self) -> None:
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        task_queue = self._ctx.Queue()
+        stop_event = self._ctx.Event()
+        # Not daemonic: a worker may start its own shard pool (video_sharding)
+        process = self._ctx.Process(
+            target=_sampler_worker_main,
+            args=(worker_id, task_queue, self._result_queue, stop_event),
+            name=f"FrameSamplerWorker-{worker_id}",
+            daemon=False
+        )
+        process.start()
+        self._workers[worker_id] = {
+            "id": worker_id,
+            "process": process,
+            "tasks": task_queue,
+            "stop_event": stop_event,
+            "video": None,
+            "assigned_at": None,
+            "retiring": False,
+            "rss": 0,
+        }
+        self.counters["started"] += 1
+        logger.info(f"Started sampler worker {worker_id} (pid={process.pid})")
+
+    def _retire(self, worker_id: int) -> None:
+        """Ask a worker to exit after its current video (immediately if idle)."""
+        worker = self._workers[worker_id]
+        if worker["retiring"]:
+            return
+        worker["retiring"] = True
+        worker["stop_event"].set()
+        worker["tasks"].put(None)
+
+    def _reconcile(self) -> None:
+        """Spawn or retire workers until the active count matches the target."""
+        active = [w for w in self._workers.values() if not w["retiring"]]
+        for _ in range(self._target_size - len(active)):
+            self._spawn_worker()
+        surplus = len(active) - self._target_size
+        if surplus > 0:
+            # Idle workers first, then the most recently assigned busy ones
+            victims = sorted(active, key=lambda w: (w["video"] is not None, -(w["assigned_at"] or 0)))
+            for worker in victims[:surplus]:
+                logger.info(f"Retiring sampler worker {worker['id']} (pool shrinking)")
+                self._retire(worker["id"])
+
+    def _check_workers(self) -> None:
+        """Reap exited workers, reschedule videos of crashed ones, retire bloated ones."""
+        for worker_id, worker in list(self._workers.items()):
+            process = worker["process"]
+            if not process.is_alive():
+                process.join(timeout=0)
+                del self._workers[worker_id]
+                if worker["retiring"] and process.exitcode == 0:
+                    self.counters["stopped"] += 1
+                    continue
+                self.counters["crashed"] += 1
+                logger.error(f"Sampler worker {worker_id} exited unexpectedly (exit code {process.exitcode})")
+                if worker["video"]:
+                    self._reschedule(worker["video"], f"Sampler worker crashed (exit code {process.exitcode})")
+                continue
+
+            try:
+                worker["rss"] = psutil.Process(process.pid).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            if not worker["retiring"] and worker["rss"] > self.max_rss_bytes:
+                self.counters["memory_restarts"] += 1
+                logger.warning(
+                    f"Sampler worker {worker_id} RSS {worker['rss'] / (1024 * 1024):.0f}MB over limit, "
+                    f"restarting after current video"
+                )
+                self._retire(worker_id)
+
+    def _reschedule(self, video_file: str, reason: str) -> None:
+        self.counters["rescheduled"] += 1
+        try:
+            with db_rwlock.gen_wlock():
+                with safe_db_connection() as conn:
+                    mark_for_retry(conn, video_file, reason)
+                    conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to reschedule {video_file}: {e}")
+
+    # ---- supervisor --------------------------------------------------------
+    def _supervise(self) -> None:
+        logger.info("Sampler supervisor started")
+        while self._running:
+            try:
+                self._drain_results(self.poll_interval)
+                with self._lock:
+                    self._check_workers()
+                    if self._running:
+                        self._reconcile()
+                self._dispatch()
+            except Exception as e:
+                logger.error(f"Error in sampler supervisor: {e}")
+                time.sleep(self.poll_interval)
+
+    def _drain_results(self, timeout: float) -> None:
+        """Handle worker results, waiting up to `timeout` for the first one."""
+        block = True
+        while True:
+            try:
+                message = self._result_queue.get(timeout=timeout) if block else self._result_queue.get_nowait()
+            except queue.Empty:
+                return
+            block = False
+            self._handle_result(*message)
+
+    def _handle_result(self, kind: str, worker_id: int, video_file: str, payload: Any) -> None:
+        if kind == "segment":
+            # Blocks the supervisor (and so new dispatches) while the detector queue is full
+            if not event_pipeline.submit(payload["log_file"], payload["camera_name"], payload["closed_at"]):
+                event_detector_event.set()
+            return
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            if worker and worker["video"] == video_file:
+                worker["video"] = None
+                worker["assigned_at"] = None
+
+        if kind == "done":
+            self.counters["completed"] += 1
+            if payload.get("log_file"):
+                event_detector_event.set()  # Signal event detector that logs are ready
+            logger.info(f"Sampler worker {worker_id} finished {os.path.basename(video_file)}")
+        else:
+            self.counters["failed"] += 1
+            self._reschedule(video_file, f"Sampler worker error: {payload}")
+
+    def _dispatch(self) -> None:
+        """Hand pending videos to idle workers while frame_sampler_event is set."""
+        if not frame_sampler_event.is_set():
+            return
+        with self._lock:
+            idle = [w for w in self._workers.values()
+                    if w["video"] is None and not w["retiring"] and w["process"].is_alive()]
+            in_flight = {w["video"] for w in self._workers.values() if w["video"]}
+        if not idle:
+            return
+
+        videos = self._fetch_dispatchable(in_flight, len(idle))
+        if not videos:
+            if not in_flight:
+                logger.info("No video files to dispatch, clearing frame sampler event")
+                frame_sampler_event.clear()
+            return
+
+        with self._lock:
+            for worker, (video_file, camera_name) in zip(idle, videos):
+                if worker["id"] not in self._workers or worker["retiring"]:
+                    continue
+                worker["video"] = video_file
+                worker["assigned_at"] = time.time()
+                worker["tasks"].put((video_file, camera_name))
+                logger.info(f"Dispatched {os.path.basename(video_file)} to sampler worker {worker['id']}")
+
+    def _fetch_dispatchable(self, in_flight: Set[str], limit: int) -> List[Tuple[str, Optional[str]]]:
+        """Pending videos not held by a worker, in run_frame_sampler's order and with its skip rules."""
+        with db_rwlock.gen_rlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT file_path, camera_name, health_check_message, status "
+                    "FROM file_list "
+                    "WHERE is_processed = 0 "
+                    "ORDER BY priority DESC, created_at ASC"
+                )
+                rows = cursor.fetchall()
+
+        videos = []
+        for video_file, camera_name, health_check_message, status in rows:
+            if video_file in in_flight or status in ["Processing", "Done", "health_check_failed"]:
+                continue
+            if not should_retry_now(health_check_message):
+                continue
+            videos.append((video_file, camera_name))
+            if len(videos) >= limit:
+                break
+        return videos
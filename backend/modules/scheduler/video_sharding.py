@@ -0,0 +1,306 @@
+"""Intra-video sharding for long recordings.
+
+Splits the IdleMonitor work blocks of one video into time shards and samples
+them in parallel in a process pool, so a day-long recording uses every core
+instead of one sampler thread.
+
+Each worker runs FrameSamplerTrigger.sample_range() on its shard, starting
+SHARD_OVERLAP_SECONDS early so the 5-frame state window and last state are
+warmed up, and writes its segment logs into a private shard directory. The
+partial logs are then merged deterministically into the normal camera log
+directory before the event detector is signalled:
+
+    - lines outside a shard's own [start, end) are dropped (overlap warm-up)
+    - lines are ordered by (second, shard, line number)
+    - per work block, repeated states and repeated MVDs are dropped, matching
+      what a single sequential pass would have written
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.db_utils.safe_connection import safe_db_connection
+from modules.config.logging_config import get_logger
+from modules.technician.timeline_store import parse_header, parse_record, write_segment, TIMELINE_CONFIG
+from .db_sync import db_rwlock
+from .config.scheduler_config import SchedulerConfig
+
+logger = get_logger(__name__, {"module": "video_sharding"})
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Size of this process's pool; sampler worker processes each get a share (set_shard_pool_size)
+_max_workers = SchedulerConfig.SHARD_MAX_WORKERS
+
+# Sampler instance of a pool worker process (models loaded once per process)
+_worker_sampler = None
+
+
+def plan_shards(work_blocks: List[Dict[str, Any]], shard_seconds: int = SchedulerConfig.SHARD_SECONDS,
+                overlap_seconds: int = SchedulerConfig.SHARD_OVERLAP_SECONDS) -> List[Dict[str, Any]]:
+    """Split work blocks into time shards of about shard_seconds.
+
+    A trailing piece shorter than a quarter shard is folded into the previous
+    shard. Warm-up never reaches before the start of the work block.
+
+    Returns:
+        List of shard dicts: index, block, start, end, warmup_start, last_in_block
+    """
+    shards = []
+    min_tail = shard_seconds / 4
+    for block_index, block in enumerate(work_blocks):
+        block_start, block_end = block['start_time'], block['end_time']
+        shard_start = block_start
+        while shard_start < block_end:
+            shard_end = min(shard_start + shard_seconds, block_end)
+            if block_end - shard_end < min_tail:
+                shard_end = block_end
+            shards.append({
+                'index': len(shards),
+                'block': block_index,
+                'start': shard_start,
+                'end': shard_end,
+                'warmup_start': max(block_start, shard_start - overlap_seconds),
+                'last_in_block': shard_end >= block_end,
+            })
+            shard_start = shard_end
+    return shards
+
+
+def should_shard(work_blocks: List[Dict[str, Any]]) -> bool:
+    """True if sharding is enabled and the active time is long enough to pay off."""
+    if not SchedulerConfig.SHARDED_SAMPLING_ENABLED:
+        return False
+    active_seconds = sum(block['end_time'] - block['start_time'] for block in work_blocks)
+    return active_seconds >= SchedulerConfig.SHARD_MIN_VIDEO_SECONDS and len(plan_shards(work_blocks)) > 1
+
+
+def _init_shard_worker() -> None:
+    """Pool initializer: build one sampler (and load its models) per worker process."""
+    global _worker_sampler
+    from modules.technician.frame_sampler_trigger import FrameSamplerTrigger
+    _worker_sampler = FrameSamplerTrigger()
+
+
+def _sample_shard(video_file: str, camera_name: str, shard: Dict[str, Any], shard_dir: str,
+                  sampler=None) -> Dict[str, Any]:
+    """Sample one shard into shard_dir. Runs in a pool worker (or in-process as fallback)."""
+    sampler = sampler or _worker_sampler
+    if camera_name != sampler.current_camera:
+        sampler._load_qr_sizes(camera_name)
+        sampler.current_camera = camera_name
+    os.makedirs(shard_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    log_file = sampler.sample_range(
+        video_file, camera_name,
+        sampler.get_packing_area, sampler.process_frame, sampler.frame_interval,
+        start_time=shard['warmup_start'], end_time=shard['end'],
+        log_dir=shard_dir, register_logs=False
+    )
+    return {
+        'index': shard['index'],
+        'ok': log_file is not None,
+        'seconds': round(time.perf_counter() - started, 2),
+        'frame_stats': dict(sampler.last_frame_stats),
+        'pid': os.getpid(),
+    }
+
+
+def get_shard_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all frame sampler threads (created on first use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_shard_worker
+            )
+            logger.info(f"Started shard process pool with {_max_workers} workers")
+        return _executor
+
+
+def set_shard_pool_size(max_workers: int) -> None:
+    """Size of the process pool created by get_shard_executor() in this process."""
+    global _max_workers
+    with _executor_lock:
+        _max_workers = max(1, max_workers)
+
+
+def shutdown_shard_executor() -> None:
+    """Stop the shared process pool (a new one is created on next use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _shard_dir(shard_root: str, shard: Dict[str, Any]) -> str:
+    return os.path.join(shard_root, f"shard_{shard['index']:04d}")
+
+
+def _segment_start(header: str) -> int:
+    """Start second from a '# Start: N, End: M, ...' log header."""
+    try:
+        return int(header.split(',', 1)[0].split(':', 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def merge_shard_logs(shards: List[Dict[str, Any]], shard_root: str, output_dir: str,
+                     register_func: Optional[Callable[[str], None]] = None) -> List[str]:
+    """Merge per-shard segment logs into output_dir.
+
+    Args:
+        shards: Shards from plan_shards()
+        shard_root: Directory holding one sub-directory per shard
+        output_dir: Final log directory (camera or custom folder)
+        register_func: Called with each merged log path, in chronological order
+
+    Returns:
+        Merged log paths in chronological order
+    """
+    headers = {}
+    entries = []
+    for shard in shards:
+        shard_dir = _shard_dir(shard_root, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in sorted(os.listdir(shard_dir)):
+            if not name.endswith('.txt'):
+                continue
+            with open(os.path.join(shard_dir, name), 'r') as f:
+                header = f.readline()
+                headers.setdefault(name, header)
+                for line_no, line in enumerate(f):
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    try:
+                        second = int(line.split(',', 1)[0])
+                    except ValueError:
+                        continue
+                    # Keep only the shard's own range; the overlap was warm-up
+                    if second < shard['start']:
+                        continue
+                    if second > shard['end'] or (second == shard['end'] and not shard['last_in_block']):
+                        continue
+                    entries.append((second, shard['index'], line_no, shard['block'], name, line))
+
+    entries.sort()
+    merged_lines = {name: [] for name in headers}
+    last_state = {}
+    last_mvd = {}
+    for second, _, _, block, name, line in entries:
+        fields = line.split(',', 2)
+        state = fields[1] if len(fields) > 1 else ""
+        mvd = fields[2].split(',', 1)[0] if len(fields) > 2 else ""
+        if mvd:
+            if last_mvd.get(block) == mvd:
+                continue
+            last_mvd[block] = mvd
+        else:
+            if last_state.get(block) == state:
+                continue
+            last_state[block] = state
+        merged_lines[name].append(line)
+
+    merged_files = []
+    for name in sorted(headers, key=lambda n: (_segment_start(headers[n]), n)):
+        log_file = os.path.join(output_dir, name)
+        if TIMELINE_CONFIG['text_logs']:
+            with open(log_file, 'w') as f:
+                f.write(headers[name])
+                for line in merged_lines[name]:
+                    f.write(f"{line}\n")
+        records = [record for record in (parse_record(line) for line in merged_lines[name]) if record is not None]
+        if register_func:
+            # Registered first: closing the stored segment hands it to the event detector
+            register_func(log_file)
+        write_segment(log_file, parse_header(headers[name].strip()), records)
+        merged_files.append(log_file)
+    return merged_files
+
+
+def run_sharded_sampling(frame_sampler, video_file: str, work_blocks: List[Dict[str, Any]]) -> Optional[str]:
+    """Sample a video's work blocks in the shard pool and merge the logs.
+
+    Counterpart of calling frame_sampler.process_video() once per work block:
+    same status updates, same log directory, same processed_logs registration.
+
+    Returns:
+        str: Last merged log file, or None on failure
+    """
+    with frame_sampler.video_lock:
+        camera_name = frame_sampler.prepare_video(video_file)
+        if camera_name is None:
+            return None
+
+        shards = plan_shards(work_blocks)
+        output_dir = frame_sampler._get_log_directory(video_file, camera_name)
+        os.makedirs(output_dir, exist_ok=True)
+        shard_root = tempfile.mkdtemp(prefix="vtrack_shards_")
+        logger.info(f"Sharded sampling {os.path.basename(video_file)}: {len(work_blocks)} blocks -> {len(shards)} shards")
+
+        started = time.perf_counter()
+        try:
+            results = {}
+            try:
+                executor = get_shard_executor()
+                futures = {
+                    executor.submit(_sample_shard, video_file, camera_name, shard, _shard_dir(shard_root, shard)): shard
+                    for shard in shards
+                }
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    try:
+                        results[shard['index']] = future.result()
+                    except BrokenProcessPool as e:
+                        logger.error(f"Shard pool broken while sampling shard {shard['index']}: {e}")
+                        shutdown_shard_executor()
+                    except Exception as e:
+                        logger.error(f"Shard {shard['index']} ({shard['start']}-{shard['end']}s) failed: {e}")
+            except BrokenProcessPool as e:
+                logger.error(f"Shard pool unavailable: {e}")
+                shutdown_shard_executor()
+
+            # Failed shards are re-sampled in this thread so one bad worker does not lose the video
+            for shard in shards:
+                if not results.get(shard['index'], {}).get('ok'):
+                    logger.warning(f"Re-sampling shard {shard['index']} ({shard['start']}-{shard['end']}s) in-process")
+                    shutil.rmtree(_shard_dir(shard_root, shard), ignore_errors=True)
+                    results[shard['index']] = _sample_shard(video_file, camera_name, shard, _shard_dir(shard_root, shard), sampler=frame_sampler)
+                    if not results[shard['index']]['ok']:
+                        logger.error(f"Shard {shard['index']} of {video_file} could not be sampled")
+                        with db_rwlock.gen_wlock():
+                            with safe_db_connection() as conn:
+                                cursor = conn.cursor()
+                                cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("error", video_file))
+                        return None
+
+            merged_files = merge_shard_logs(shards, shard_root, output_dir, frame_sampler._register_log_file)
+        finally:
+            shutil.rmtree(shard_root, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        shard_seconds = sum(result['seconds'] for result in results.values())
+        logger.info(
+            f"Sharded sampling done for {os.path.basename(video_file)}: {len(shards)} shards in {elapsed:.1f}s "
+            f"(sum of shard times {shard_seconds:.1f}s, {len({r['pid'] for r in results.values()})} processes), "
+            f"{len(merged_files)} log files"
+        )
+
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE file_list SET is_processed = 1, status = ? WHERE file_path = ?", ("completed", video_file))
+        return merged_files[-1] if merged_files else None
@@ -6,10 +6,20 @@ import logging
 from datetime import datetime
 import uuid
 from modules.config.logging_config import get_logger
+from modules.technician.frame_source import create_frame_source, probe_keyframe_interval, DEFAULT_SEEK_THRESHOLD_SEC
+from modules.technician.motion_gate import MotionGate, DEFAULT_CHANGE_THRESHOLD
+from modules.db_utils.safe_connection import safe_db_connection
+from modules.scheduler.db_sync import db_rwlock
 
 class IdleMonitor:
-    def __init__(self, processing_config=None):
-        """Initialize IdleMonitor with queue and processing_config."""
+    def __init__(self, processing_config=None, scan_strategy="sequential"):
+        """Initialize IdleMonitor with queue and processing_config.
+
+        scan_strategy: "sequential" (walk forward, seek only past the keyframe
+        interval) or "seek" (legacy seek before every sampled second).
+        """
+        self.scan_strategy = scan_strategy
+        self.scan_stats = {}
         self.video_file = None
         self.logger = get_logger("app", {"video_id": None})
         self.logger.setLevel(logging.INFO)
@@ -32,31 +42,98 @@ class IdleMonitor:
         self.MIN_WORK_BLOCK = 10  # seconds
         self.MIN_PACKING_TIME = processing_config.get('min_packing_time', 5) if processing_config else 5  # seconds
         self.CHUNK_SIZE = int(self.MIN_PACKING_TIME * 0.8) # seconds
+        # Fraction of changed pixels (vs last confirmed idle frame) needed to run MediaPipe; <= 0 disables the gate
+        if processing_config and processing_config.get('idle_motion_threshold') is not None:
+            self.IDLE_MOTION_THRESHOLD = float(processing_config['idle_motion_threshold'])
+        else:
+            self.IDLE_MOTION_THRESHOLD = self._load_idle_motion_threshold()
+        self.motion_gate = MotionGate(self.IDLE_MOTION_THRESHOLD) if self.IDLE_MOTION_THRESHOLD > 0 else None
+        self.hand_inferences = 0
         self.video_id = str(uuid.uuid4())  # Unique identifier for video
 
+    def _load_idle_motion_threshold(self):
+        """Read idle_motion_threshold from processing_config (default when unset or unavailable)."""
+        try:
+            with db_rwlock.gen_rlock():
+                with safe_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT idle_motion_threshold FROM processing_config WHERE id = 1")
+                    result = cursor.fetchone()
+            if result and result[0] is not None:
+                return float(result[0])
+        except Exception as e:
+            self.logger.warning(f"Could not load idle_motion_threshold, using default: {e}")
+        return DEFAULT_CHANGE_THRESHOLD
+
     def process_video(self, video_file, camera_name, packing_area):
         """Process video, identify work blocks, save to queue, using packing_area from program_runner."""
         self.video_file = video_file
         self.logger = get_logger("app", {"video_id": os.path.basename(self.video_file)})
-        # Open video
-        cap = cv2.VideoCapture(video_file)
-        if not cap.isOpened():
+        # Open video. The sequential strategy walks the file forward and only seeks
+        # for jumps longer than the keyframe interval; "seek" repositions per sample.
+        if self.scan_strategy == "seek":
+            seek_threshold = 0
+        else:
+            keyframe_interval = probe_keyframe_interval(video_file)
+            seek_threshold = keyframe_interval if keyframe_interval else DEFAULT_SEEK_THRESHOLD_SEC
+        if not packing_area:
+            self.logger.warning(f"No packing_area for {camera_name}, using full frame")
+            packing_area = None
+        # The source returns frames already cropped to the packing area
+        source = create_frame_source(video_file, roi=packing_area, seek_threshold_sec=seek_threshold)
+        if not source.open():
             self.logger.error(f"Failed to open video: {video_file}")
             return
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        video_duration = int(total_frames / fps)
+        video_duration = int(source.frame_count / source.fps)
         self.logger.info(f"Processing video: {video_file}, Duration: {video_duration}s, Video ID: {self.video_id}")
 
-        # Check packing_area
-        roi = packing_area
-        if not roi:
-            self.logger.warning(f"No packing_area for {camera_name}, using full frame")
-            roi = None
+        self.hand_inferences = 0
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        try:
+            hand_timeline = self._scan_hand_timeline(source, video_duration)
+        finally:
+            self.scan_stats = dict(source.stats, backend=source.backend)
+            source.close()
+        self.logger.info(
+            f"IdleMonitor scan ({self.scan_strategy}, {source.backend}): {len(hand_timeline)} chunks, "
+            f"retrieved={self.scan_stats['retrieved']}, grabbed={self.scan_stats['grabbed']}, "
+            f"seeks={self.scan_stats['seeks']}, seek_threshold={seek_threshold}s"
+        )
+        if self.motion_gate is not None:
+            self.logger.info(
+                f"IdleMonitor motion gate: {self.hand_inferences} MediaPipe runs, "
+                f"{self.motion_gate.stats['unchanged']} skipped as static "
+                f"({self.motion_gate.skip_ratio:.1%}, threshold={self.IDLE_MOTION_THRESHOLD})"
+            )
 
-        hand_timeline = []
+        # Save work blocks to queue
         event_id = 0
+        for idx, block in enumerate(self._build_work_blocks(hand_timeline)):
+            duration = block['end'] - block['start']
+            event_id += 1
+            if duration < self.MIN_WORK_BLOCK:
+                self.logger.info(f"Skipping work block {idx+1}: duration {duration}s < {self.MIN_WORK_BLOCK}s")
+                continue
+            self.work_block_queue.put({
+                'video_id': self.video_id,
+                'event_id': f"evt_{event_id:03d}",
+                'file_path': video_file,
+                'start_time': block['start'],
+                'end_time': block['end']
+            })
+            self.logger.info(f"Work block {idx+1}: {block['start']}s --> {block['end']}s (duration: {duration}s), Video ID: {self.video_id}")
+
+        self.hands.close()
+
+    def _scan_hand_timeline(self, source, video_duration):
+        """
+        Return one hand/no-hand flag per CHUNK_SIZE chunk of the video.
+
+        Frames come from the source already cropped to the packing area.
+        """
+        hand_timeline = []
 
         # Scan video by chunks
         sec = 0
@@ -64,36 +141,35 @@ class IdleMonitor:
             chunk_end = min(sec + self.CHUNK_SIZE, video_duration)
             chunk_has_hand = False
             check_time = sec
-            # Scan entire chunk uniformly
+            # Scan chunk uniformly, stop at the first hand
             while check_time < chunk_end:
-                frame_id = int(check_time * fps)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id)
-                ret, frame = cap.read()
-                if not ret:
+                frame = source.read_at(check_time)
+                if frame is None:
                     break
 
-                # Apply ROI if available
-                if roi:
-                    x, y, w, h = roi
-                    frame_height, frame_width = frame.shape[:2]
-                    if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                        frame = frame[y:y+h, x:x+w]
-                    else:
-                        self.logger.warning(f"Invalid ROI for frame {frame_id}: {roi}")
-                        frame = frame
+                # Motion gate: nothing changed since the last confirmed idle frame -> still idle
+                if self.motion_gate is not None and not self.motion_gate.has_changed(frame):
+                    check_time += self.HAND_SAMPLE_INTERVAL
+                    continue
 
                 # Hand detection
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 results = self.hands.process(rgb_frame)
+                self.hand_inferences += 1
                 if results.multi_hand_landmarks is not None:
                     chunk_has_hand = True
                     break
+                if self.motion_gate is not None:
+                    self.motion_gate.set_reference()
                 check_time += self.HAND_SAMPLE_INTERVAL
 
             hand_timeline.append(chunk_has_hand)
-            #self.logger.info(f"[Chunk {sec:04d}-{chunk_end:04d}s] Hand: {chunk_has_hand}, Video ID: {self.video_id}")
             sec += self.CHUNK_SIZE
 
+        return hand_timeline
+
+    def _build_work_blocks(self, hand_timeline):
+        """Turn a chunk-level hand timeline into work blocks separated by idle gaps >= IDLE_GAP."""
         # Detect idle blocks
         idle_gap_list = []
         idle_candidate_start = None
@@ -122,27 +198,7 @@ class IdleMonitor:
             prev_end = idle['end']
         if prev_end < len(hand_timeline) * self.CHUNK_SIZE:
             work_blocks.append({'start': prev_end, 'end': len(hand_timeline) * self.CHUNK_SIZE})
-
-        # Save work blocks to queue
-        for idx, block in enumerate(work_blocks):
-            duration = block['end'] - block['start']
-            event_id += 1
-            if duration < self.MIN_WORK_BLOCK:
-                self.logger.info(f"Skipping work block {idx+1}: duration {duration}s < {self.MIN_WORK_BLOCK}s")
-                continue
-            self.work_block_queue.put({
-                'video_id': self.video_id,
-                'event_id': f"evt_{event_id:03d}",
-                'file_path': video_file,
-                'start_time': block['start'],
-                'end_time': block['end']
-            })
-            self.logger.info(f"Work block {idx+1}: {block['start']}s --> {block['end']}s (duration: {duration}s), Video ID: {self.video_id}")
-            if duration < self.MIN_WORK_BLOCK:
-                self.logger.warning(f"Block shorter than {self.MIN_WORK_BLOCK}s")
-
-        cap.release()
-        self.hands.close()
+        return work_blocks
 
     def get_work_block_queue(self):
         """Return queue containing work blocks."""
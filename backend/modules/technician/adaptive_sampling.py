@@ -0,0 +1,94 @@
+"""
+Adaptive, state-aware sampling schedule for FrameSamplerTrigger.
+
+The sampler used one fixed frame_interval for the whole video. An
+AdaptiveSchedule starts at that interval (the dense rate) and doubles its
+step, up to max_interval, after every `stable_samples` consecutive samples
+that agree with the voted state and show no new MVD. As soon as a sample
+disagrees (state change or new MVD suspected) the step drops back to the
+dense rate and, if the last step was sparse, the gap is backfilled: the
+suspicious sample is discarded and sampling resumes one dense step after the
+previous sample. Every frame the schedule analyses lies on the dense
+frame_interval grid, so the frames around a transition are exactly the ones
+the fixed-rate sampler analysed and Ts/Te resolution is unchanged.
+
+Usage:
+    schedule = AdaptiveSchedule(start_frame, end_frame, min_interval, max_interval)
+    for frame_count, frame in schedule.frames(video):
+        state, mvd, ... = process_frame(...)
+        if not schedule.observe(changed=state != last_state or (mvd and mvd != last_mvd)):
+            continue  # discarded, the gap before it is re-sampled densely
+"""
+
+import os
+
+ADAPTIVE_CONFIG = {
+    'enabled': os.getenv('VTRACK_ADAPTIVE_SAMPLING', 'true').lower() in ('1', 'true', 'yes'),
+    'max_interval_factor': 4,   # Default sparse bound: frame_interval * factor
+    'stable_samples': 5,        # One majority-vote window of agreeing samples before the step doubles
+}
+
+
+class AdaptiveSchedule:
+    """Frame indices to analyse, sparse in stable stretches and dense around changes."""
+
+    def __init__(self, start_frame, end_frame, min_interval, max_interval=None,
+                 stable_samples=ADAPTIVE_CONFIG['stable_samples']):
+        self.min_interval = max(1, int(min_interval))
+        max_interval = max_interval or self.min_interval * ADAPTIVE_CONFIG['max_interval_factor']
+        # Keep every step a multiple of the dense interval so samples stay on its grid
+        self.max_interval = max(self.min_interval, int(max_interval) // self.min_interval * self.min_interval)
+        self.stable_samples = max(1, int(stable_samples))
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.step = self.min_interval
+        self._stable = 0
+        self._current = None
+        self._previous = None
+        self._next = None
+        self.stats = {'sampled': 0, 'discarded': 0, 'backfills': 0, 'max_step': self.min_interval}
+
+    def frames(self, video):
+        """Yield (frame_number, frame) like FrameSource.iter_every_nth (1-based frame numbers)."""
+        # Same first frame as iter_every_nth(start_frame, end_frame, min_interval)
+        index = self.start_frame + (-(self.start_frame + 1)) % self.min_interval
+        while index < self.end_frame:
+            frame = video.read_frame(index)
+            if frame is None:
+                return
+            self._current, self._next = index, None
+            self.stats['sampled'] += 1
+            yield index + 1, frame
+            if self._next is None:
+                # Sample not observed (e.g. empty ROI): keep the current step
+                self._previous = index
+                self._next = index + self.step
+            index = self._next
+
+    def observe(self, changed):
+        """
+        Report whether the current sample suggests a change.
+
+        Returns:
+            bool: False if the sample is discarded because the sparse gap before it will be backfilled
+        """
+        if changed:
+            self._stable = 0
+            gap = self._current - self._previous if self._previous is not None else 0
+            self.step = self.min_interval
+            if gap > self.min_interval:
+                # The change happened somewhere in the sparse gap: re-sample it densely
+                self._next = self._previous + self.min_interval
+                self.stats['discarded'] += 1
+                self.stats['backfills'] += 1
+                return False
+        else:
+            self._stable += 1
+            if self._stable >= self.stable_samples:
+                self._stable = 0
+                self.step = min(self.step * 2, self.max_interval)
+                self.stats['max_step'] = max(self.stats['max_step'], self.step)
+
+        self._previous = self._current
+        self._next = self._current + self.step
+        return True
@@ -10,7 +10,6 @@ Purpose:
   - Save diagnostic metrics for root cause analysis
 """
 
-import cv2
 import numpy as np
 import json
 import logging
@@ -18,7 +17,7 @@ from datetime import datetime
 from typing import Dict, Optional, List
 
 from modules.db_utils.safe_connection import safe_db_connection
-from modules.technician.qr_detector import detect_qr_at_time
+from modules.technician.health_check_session import HealthCheckSession, find_text_bbox
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +35,8 @@ def find_first_timego_frame(
     video_path: str,
     trigger_roi: dict,
     start_search_sec: float = 0.0,
-    max_search_sec: float = 10.0
+    max_search_sec: float = 10.0,
+    session: Optional[HealthCheckSession] = None
 ) -> Optional[float]:
     """
     Scan video to find first frame where TimeGo QR is detected
@@ -46,43 +46,28 @@ def find_first_timego_frame(
         trigger_roi: ROI area {"x": 700, "y": 500, "w": 150, "h": 150}
         start_search_sec: Start scanning from this time
         max_search_sec: Maximum time to scan
+        session: Optional open session to reuse (video stays open for the 3s window)
 
     Returns:
         Timestamp (seconds) when first TimeGo detected, or None
     """
 
+    own_session = session is None
+    if own_session:
+        session = HealthCheckSession(video_path, trigger_roi, BASELINE_CONFIG['interval_fps'])
+
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        if not session.open():
             logger.error(f"[BASELINE] Cannot open video: {video_path}")
             return None
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps <= 0:
-            logger.error("[BASELINE] Cannot determine FPS")
-            cap.release()
-            return None
-
-        cap.release()
-
-        # Start searching using WeChat QR detection
-        frame_interval = 1.0 / BASELINE_CONFIG['interval_fps']  # 0.2s for 5fps
-        current_time = start_search_sec
-
+        # Scan forward through the trigger area using WeChat QR detection (one open, warm detector)
         logger.info(f"[BASELINE] Searching for TimeGo from {start_search_sec}s to {max_search_sec}s")
 
-        while current_time <= max_search_sec:
-            # Use existing detect_qr_at_time from qr_detector
-            result = detect_qr_at_time(video_path, current_time, trigger_roi)
-
-            if result.get('success') and result.get('qr_detections'):
-                # Check if any detection contains TimeGo
-                for qr_det in result['qr_detections']:
-                    if BASELINE_CONFIG['qr_target_text'] in qr_det.get('decoded_text', ''):
-                        logger.info(f"[BASELINE] ✅ TimeGo found at {current_time:.2f}s")
-                        return current_time
-
-            current_time += frame_interval
+        first_timego_time = session.find_first_text(BASELINE_CONFIG['qr_target_text'], start_search_sec, max_search_sec)
+        if first_timego_time is not None:
+            logger.info(f"[BASELINE] ✅ TimeGo found at {first_timego_time:.2f}s")
+            return first_timego_time
 
         logger.warning(f"[BASELINE] TimeGo not found in first {max_search_sec}s")
         return None
@@ -90,6 +75,9 @@ def find_first_timego_frame(
     except Exception as e:
         logger.error(f"[BASELINE] Error searching for TimeGo: {e}")
         return None
+    finally:
+        if own_session:
+            session.close()
 
 
 # ❌ REMOVED: collect_diagnostic_metrics() - No longer needed
@@ -97,6 +85,94 @@ def find_first_timego_frame(
 # Health check now focuses only on: QR Success Rate + Position
 
 
+def _save_baseline(camera_name: str, video_path: str, trigger_roi: dict, packing_profile_id: Optional[int],
+                   first_timego_time: float, detected_count: int, qr_bbox_list: List[dict]) -> Dict:
+    """Compute baseline success rate and average QR bbox, then upsert the active baseline row"""
+    # Step 4: Calculate success rate
+    total_frames = BASELINE_CONFIG['total_frames']
+    success_rate = detected_count / total_frames if total_frames > 0 else 0
+    success_rate_pct = success_rate * 100
+
+    logger.info(f"[BASELINE] Success rate: {detected_count}/{total_frames} = {success_rate_pct:.1f}%")
+
+    # ← Calculate average QR bbox (position & size)
+    avg_qr_bbox = None
+    if qr_bbox_list:
+        avg_qr_bbox = {
+            'x': int(np.mean([b['x'] for b in qr_bbox_list])),
+            'y': int(np.mean([b['y'] for b in qr_bbox_list])),
+            'w': int(np.mean([b['w'] for b in qr_bbox_list])),
+            'h': int(np.mean([b['h'] for b in qr_bbox_list]))
+        }
+        logger.info(f"[BASELINE] Average QR bbox: {avg_qr_bbox}")
+
+    # ❌ REMOVED: avg_metrics calculation for diagnostics
+
+    # Step 5: Save to database
+    baseline_data = {
+        'camera_name': camera_name,
+        'packing_profile_id': packing_profile_id,
+        'setup_video_path': video_path,
+        'baseline_sample_start_sec': first_timego_time,
+        'baseline_sample_duration_sec': BASELINE_CONFIG['sample_duration_sec'],
+        'total_frames': total_frames,
+        'qr_detected_count': detected_count,
+        'baseline_success_rate': success_rate,
+        'baseline_success_rate_pct': success_rate_pct,
+        'trigger_roi': json.dumps(trigger_roi),
+        'qr_trigger_bbox': json.dumps(avg_qr_bbox) if avg_qr_bbox else None,
+        'status': 'active'
+    }
+
+    with safe_db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Check if baseline already exists for this camera
+        cursor.execute(
+            "SELECT id FROM camera_baseline_samples WHERE camera_name = ? AND status = 'active'",
+            (camera_name,)
+        )
+        existing = cursor.fetchone()
+
+        if existing:
+            # UPDATE existing baseline (preserve baseline_id for foreign keys)
+            logger.info(f"[BASELINE] Updating existing baseline for {camera_name}")
+            baseline_id = existing[0]
+
+            # Build UPDATE statement dynamically
+            update_cols = ', '.join([f"{k} = ?" for k in baseline_data.keys()])
+            values = list(baseline_data.values()) + [baseline_id]
+
+            cursor.execute(
+                f"UPDATE camera_baseline_samples SET {update_cols} WHERE id = ?",
+                values
+            )
+        else:
+            # INSERT new baseline only if not exists (first time)
+            logger.info(f"[BASELINE] Creating new baseline for {camera_name}")
+            placeholders = ', '.join(['?'] * len(baseline_data))
+            columns = ', '.join(baseline_data.keys())
+            cursor.execute(
+                f"INSERT INTO camera_baseline_samples ({columns}) VALUES ({placeholders})",
+                tuple(baseline_data.values())
+            )
+            baseline_id = cursor.lastrowid
+
+        conn.commit()
+
+    logger.info(f"[BASELINE] ✅ Baseline saved: ID={baseline_id}, Rate={success_rate_pct:.1f}%")
+
+    return {
+        'success': True,
+        'baseline_id': baseline_id,
+        'baseline_success_rate': success_rate,
+        'baseline_success_rate_pct': success_rate_pct,
+        'detected_frames': detected_count,
+        'total_frames': total_frames,
+        'first_timego_sec': first_timego_time
+    }
+
+
 def capture_baseline_from_step4(
     camera_name: str,
     video_path: str,
@@ -135,9 +211,11 @@ def capture_baseline_from_step4(
 
     logger.info(f"[BASELINE] Starting capture for camera: {camera_name}")
 
+    session = HealthCheckSession(video_path, trigger_roi, BASELINE_CONFIG['interval_fps'])
+
     try:
         # Step 1: Find first TimeGo detection
-        first_timego_time = find_first_timego_frame(video_path, trigger_roi, sample_start_sec)
+        first_timego_time = find_first_timego_frame(video_path, trigger_roi, sample_start_sec, session=session)
 
         if first_timego_time is None:
             logger.warning(f"[BASELINE] TimeGo not found - skipping baseline capture")
@@ -153,148 +231,108 @@ def capture_baseline_from_step4(
 
         logger.info(f"[BASELINE] First TimeGo found at {first_timego_time:.2f}s")
 
-        # Step 2: Sample 3 seconds from first detection
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return {
-                'success': False,
-                'baseline_id': None,
-                'error': 'Cannot open video',
-                'baseline_success_rate': 0,
-                'baseline_success_rate_pct': 0,
-                'detected_frames': 0,
-                'total_frames': 0
-            }
+        # Step 2-3: Sample 3 seconds (15 frames @ 5fps) from first detection, reading forward
+        total_frames = BASELINE_CONFIG['total_frames']
+        logger.info(f"[BASELINE] Sampling {total_frames} frames from {first_timego_time:.2f}s")
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_interval = int(fps / BASELINE_CONFIG['interval_fps'])
+        detected_count = 0
+        qr_bbox_list = []  # ← List to store detected QR bboxes
 
-        # Baseline window: [first_timego, first_timego + 3]
-        baseline_start_frame = int(first_timego_time * fps)
-        baseline_duration_sec = BASELINE_CONFIG['sample_duration_sec']
-        total_frames = BASELINE_CONFIG['total_frames']
+        for result in session.collect_window(first_timego_time, total_frames):
+            # Detect TimeGo and extract bbox (position & size)
+            bbox = find_text_bbox(result, BASELINE_CONFIG['qr_target_text'])
+            if bbox is not None:
+                detected_count += 1
+                if bbox:
+                    qr_bbox_list.append(bbox)
+            elif not result.get('success'):
+                logger.error(f"[BASELINE] Error processing frame at {result.get('timestamp', 0):.2f}s: {result.get('error')}")
 
-        x, y, w, h = trigger_roi['x'], trigger_roi['y'], trigger_roi['w'], trigger_roi['h']
+        # Step 4-5: Success rate, average QR bbox, save
+        return _save_baseline(camera_name, video_path, trigger_roi, packing_profile_id,
+                              first_timego_time, detected_count, qr_bbox_list)
 
-        detected_count = 0
-        diagnostic_metrics_list = []
+    except Exception as e:
+        logger.error(f"[BASELINE] ❌ Error capturing baseline: {e}", exc_info=True)
+        return {
+            'success': False,
+            'baseline_id': None,
+            'error': str(e),
+            'baseline_success_rate': 0,
+            'baseline_success_rate_pct': 0,
+            'detected_frames': 0,
+            'total_frames': 0
+        }
+    finally:
+        session.close()
 
-        logger.info(f"[BASELINE] Sampling {total_frames} frames from {first_timego_time:.2f}s")
 
-        # Step 3: Process each frame using detect_qr_at_time
-        cap.release()  # Don't need manual frame reading anymore
+def capture_baseline_from_detections(
+    camera_name: str,
+    video_path: str,
+    trigger_roi: dict,
+    detections: List[dict],
+    packing_profile_id: Optional[int] = None,
+    max_search_sec: float = 10.0
+) -> Dict:
+    """
+    Capture baseline from an already computed QR preprocessing timeline
 
-        qr_bbox_list = []  # ← List to store detected QR bboxes
+    Same protocol as capture_baseline_from_step4(), but reads the 5fps
+    timeline entries ({'timestamp', 'qr_detections'}) instead of decoding the
+    video again, so a combined Step 4 preprocessing pass can produce it.
 
-        for i in range(total_frames):
-            frame_time = first_timego_time + i * (1.0 / BASELINE_CONFIG['interval_fps'])
-
-            try:
-                # Use detect_qr_at_time to detect QR at this timestamp
-                result = detect_qr_at_time(video_path, frame_time, trigger_roi)
-
-                # Detect TimeGo and extract bbox
-                qr_found = False
-                if result.get('success') and result.get('qr_detections'):
-                    for qr_det in result['qr_detections']:
-                        if BASELINE_CONFIG['qr_target_text'] in qr_det.get('decoded_text', ''):
-                            qr_found = True
-                            detected_count += 1
-
-                            # ← Extract QR bbox (position & size)
-                            bbox = qr_det.get('bbox')
-                            if bbox:
-                                qr_bbox_list.append(bbox)
-                            break
-
-                # ❌ REMOVED: diagnostic metrics collection
-                # Only track QR detection now, not blur/brightness/contrast/ink/edge
-
-            except Exception as e:
-                logger.error(f"[BASELINE] Error processing frame at {frame_time:.2f}s: {e}")
-
-        # Step 4: Calculate success rate
-        success_rate = detected_count / total_frames if total_frames > 0 else 0
-        success_rate_pct = success_rate * 100
-
-        logger.info(f"[BASELINE] Success rate: {detected_count}/{total_frames} = {success_rate_pct:.1f}%")
-
-        # ← Calculate average QR bbox (position & size)
-        avg_qr_bbox = None
-        if qr_bbox_list:
-            avg_qr_bbox = {
-                'x': int(np.mean([b['x'] for b in qr_bbox_list])),
-                'y': int(np.mean([b['y'] for b in qr_bbox_list])),
-                'w': int(np.mean([b['w'] for b in qr_bbox_list])),
-                'h': int(np.mean([b['h'] for b in qr_bbox_list]))
-            }
-            logger.info(f"[BASELINE] Average QR bbox: {avg_qr_bbox}")
-
-        # ❌ REMOVED: avg_metrics calculation for diagnostics
-
-        # Step 5: Save to database
-        baseline_data = {
-            'camera_name': camera_name,
-            'packing_profile_id': packing_profile_id,
-            'setup_video_path': video_path,
-            'baseline_sample_start_sec': first_timego_time,
-            'baseline_sample_duration_sec': baseline_duration_sec,
-            'total_frames': total_frames,
-            'qr_detected_count': detected_count,
-            'baseline_success_rate': success_rate,
-            'baseline_success_rate_pct': success_rate_pct,
-            'trigger_roi': json.dumps(trigger_roi),
-            'qr_trigger_bbox': json.dumps(avg_qr_bbox) if avg_qr_bbox else None,
-            'status': 'active'
-        }
+    Returns:
+        Same dict as capture_baseline_from_step4()
+    """
+    from modules.technician.detection_timeline import DetectionTimeline
 
-        with safe_db_connection() as conn:
-            cursor = conn.cursor()
+    target_text = BASELINE_CONFIG['qr_target_text']
+    interval = 1.0 / BASELINE_CONFIG['interval_fps']
 
-            # Check if baseline already exists for this camera
-            cursor.execute(
-                "SELECT id FROM camera_baseline_samples WHERE camera_name = ? AND status = 'active'",
-                (camera_name,)
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                # UPDATE existing baseline (preserve baseline_id for foreign keys)
-                logger.info(f"[BASELINE] Updating existing baseline for {camera_name}")
-                baseline_id = existing[0]
-
-                # Build UPDATE statement dynamically
-                update_cols = ', '.join([f"{k} = ?" for k in baseline_data.keys()])
-                values = list(baseline_data.values()) + [baseline_id]
-
-                cursor.execute(
-                    f"UPDATE camera_baseline_samples SET {update_cols} WHERE id = ?",
-                    values
-                )
-            else:
-                # INSERT new baseline only if not exists (first time)
-                logger.info(f"[BASELINE] Creating new baseline for {camera_name}")
-                placeholders = ', '.join(['?'] * len(baseline_data))
-                columns = ', '.join(baseline_data.keys())
-                cursor.execute(
-                    f"INSERT INTO camera_baseline_samples ({columns}) VALUES ({placeholders})",
-                    tuple(baseline_data.values())
-                )
-                baseline_id = cursor.lastrowid
-
-            conn.commit()
-
-        logger.info(f"[BASELINE] ✅ Baseline saved: ID={baseline_id}, Rate={success_rate_pct:.1f}%")
+    def timego_bbox(entry):
+        for qr_det in (entry or {}).get('qr_detections', []):
+            if target_text in qr_det.get('decoded_text', ''):
+                return qr_det.get('bbox') or {}
+        return None
 
-        return {
-            'success': True,
-            'baseline_id': baseline_id,
-            'baseline_success_rate': success_rate,
-            'baseline_success_rate_pct': success_rate_pct,
-            'detected_frames': detected_count,
-            'total_frames': total_frames,
-            'first_timego_sec': first_timego_time
-        }
+    try:
+        timeline = DetectionTimeline(detections)
+
+        # Step 1: First TimeGo detection within the search window
+        first_timego_time = None
+        for entry in timeline.window(0.0, max_search_sec):
+            if timego_bbox(entry) is not None:
+                first_timego_time = entry['timestamp']
+                break
+
+        if first_timego_time is None:
+            logger.warning(f"[BASELINE] TimeGo not found - skipping baseline capture")
+            return {
+                'success': False,
+                'baseline_id': None,
+                'error': 'TimeGo QR not found in video',
+                'baseline_success_rate': 0,
+                'baseline_success_rate_pct': 0,
+                'detected_frames': 0,
+                'total_frames': 0
+            }
+
+        logger.info(f"[BASELINE] First TimeGo found at {first_timego_time:.2f}s (from preprocessing timeline)")
+
+        # Step 2-3: Count TimeGo detections over the next 3 seconds of timeline entries
+        detected_count = 0
+        qr_bbox_list = []
+        for i in range(BASELINE_CONFIG['total_frames']):
+            entry, _ = timeline.closest(first_timego_time + i * interval, tolerance=interval / 2)
+            bbox = timego_bbox(entry)
+            if bbox is not None:
+                detected_count += 1
+                if bbox:
+                    qr_bbox_list.append(bbox)
+
+        return _save_baseline(camera_name, video_path, trigger_roi, packing_profile_id,
+                              first_timego_time, detected_count, qr_bbox_list)
 
     except Exception as e:
         logger.error(f"[BASELINE] ❌ Error capturing baseline: {e}", exc_info=True)
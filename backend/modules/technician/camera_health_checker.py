@@ -7,11 +7,12 @@ import cv2
 import numpy as np
 import json
 import logging
+import os
 from datetime import datetime
 from typing import Dict, Optional, List
 
 from modules.db_utils.safe_connection import safe_db_connection
-from modules.technician.qr_detector import detect_qr_at_time
+from modules.technician.health_check_session import HealthCheckSession, find_text_bbox
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,9 @@ HEALTH_CHECK_CONFIG = {
     'sample_duration_sec': 3.0,
     'interval_fps': 5,
     'total_frames': 15,
-    'qr_target_text': 'TimeGo'
+    'qr_target_text': 'TimeGo',
+    # Take the window frames from the frame sampler's first pass instead of decoding them again
+    'reuse_sampler_frames': os.getenv('VTRACK_HEALTH_CHECK_FROM_SAMPLER', 'false').lower() in ('1', 'true', 'yes')
 }
 
 # Status thresholds - FINAL CONFIRMED
@@ -116,9 +119,42 @@ def get_qr_trigger_area(camera_name: str) -> Optional[Dict]:
 # Health check now focuses only on: QR Success Rate + Position Offset
 
 
+def get_health_check_window(camera_name: str) -> Optional[Dict]:
+    """
+    Baseline and trigger ROI a health check for this camera samples
+
+    Returns:
+        {'baseline': dict, 'trigger_roi': dict, 'start_sec': float, 'total_frames': int},
+        or None if the camera has no baseline
+    """
+    baseline = get_baseline_by_camera(camera_name)
+    if not baseline:
+        return None
+
+    # ✅ Get actual QR trigger area from packing_profiles (matches runtime detection)
+    # This ensures health check uses the SAME ROI as the runtime process
+    actual_trigger_roi = get_qr_trigger_area(camera_name)
+    if actual_trigger_roi:
+        trigger_roi = actual_trigger_roi
+        logger.info(f"[HEALTH] Using actual qr_trigger_area from packing_profiles for {camera_name}")
+    else:
+        # Fallback to baseline trigger_roi if qr_trigger_area not found
+        trigger_roi = baseline['trigger_roi']
+        logger.warning(f"[HEALTH] Fallback to baseline trigger_roi for {camera_name}")
+
+    return {
+        'baseline': baseline,
+        'trigger_roi': trigger_roi,
+        'start_sec': baseline['baseline_sample_start_sec'],
+        'total_frames': HEALTH_CHECK_CONFIG['total_frames']
+    }
+
+
 def run_health_check(
     camera_name: str,
-    video_path: str
+    video_path: str,
+    session: Optional[HealthCheckSession] = None,
+    window: Optional[Dict] = None
 ) -> Dict:
     """
     Run health check against baseline with 2 metrics only:
@@ -126,15 +162,20 @@ def run_health_check(
     - Metric 2: Camera Position OK (QR bbox offset < 10% of ROI diagonal)
 
     Protocol: Same as baseline - use baseline_sample_start_sec + 3 seconds
+
+    Args:
+        session: Optional session already fed with window frames by the frame
+                 sampler; samples it is missing are decoded from video_path
+        window: Optional result of get_health_check_window() (looked up if None)
     """
 
     logger.info(f"[HEALTH] Starting health check for {camera_name}")
 
     try:
         # Get baseline
-        baseline = get_baseline_by_camera(camera_name)
+        window = window or get_health_check_window(camera_name)
 
-        if not baseline:
+        if not window:
             logger.warning(f"[HEALTH] No baseline found for {camera_name}")
             return {
                 'success': False,
@@ -143,53 +184,43 @@ def run_health_check(
                 'status': 'SKIPPED'
             }
 
+        baseline = window['baseline']
+        trigger_roi = window['trigger_roi']
         baseline_start = baseline['baseline_sample_start_sec']
         baseline_rate = baseline['baseline_success_rate']
         baseline_rate_pct = baseline['baseline_success_rate_pct']
         baseline_qr_bbox = baseline.get('qr_trigger_bbox')  # Baseline QR position
         baseline_id = baseline['id']
 
-        # ✅ Get actual QR trigger area from packing_profiles (matches runtime detection)
-        # This ensures health check uses the SAME ROI as the runtime process
-        actual_trigger_roi = get_qr_trigger_area(camera_name)
-        if actual_trigger_roi:
-            trigger_roi = actual_trigger_roi
-            logger.info(f"[HEALTH] Using actual qr_trigger_area from packing_profiles for {camera_name}")
-        else:
-            # Fallback to baseline trigger_roi if qr_trigger_area not found
-            trigger_roi = baseline['trigger_roi']
-            logger.warning(f"[HEALTH] Fallback to baseline trigger_roi for {camera_name}")
-
-        # Calculate frame parameters
-        frame_interval = 1.0 / HEALTH_CHECK_CONFIG['interval_fps']
-        total_frames = HEALTH_CHECK_CONFIG['total_frames']
+        total_frames = window['total_frames']
 
         detected_count = 0
         qr_bbox_list = []  # ← Collect QR bboxes for position tracking
 
         logger.info(f"[HEALTH] Sampling from baseline window: {baseline_start:.2f}s to {baseline_start + 3.0:.2f}s")
 
-        # Sample frames using SAME protocol as baseline
-        for i in range(total_frames):
-            frame_time = baseline_start + i * frame_interval
-
-            try:
-                # Detect QR at this time
-                result = detect_qr_at_time(video_path, frame_time, trigger_roi)
+        # Sample frames using SAME protocol as baseline (one open, sequential reads, warm detector)
+        own_session = session is None
+        if own_session:
+            session = HealthCheckSession(video_path, trigger_roi, HEALTH_CHECK_CONFIG['interval_fps'])
+        try:
+            results = session.collect_window(baseline_start, total_frames)
+        finally:
+            if own_session:
+                session.close()
 
-                if result.get('success') and result.get('qr_detections'):
-                    for qr_det in result['qr_detections']:
-                        if HEALTH_CHECK_CONFIG['qr_target_text'] in qr_det.get('decoded_text', ''):
-                            detected_count += 1
+        for result in results:
+            bbox = find_text_bbox(result, HEALTH_CHECK_CONFIG['qr_target_text'])
+            if bbox is not None:
+                detected_count += 1
 
-                            # ← Extract QR bbox (position & size)
-                            bbox = qr_det.get('bbox')
-                            if bbox:
-                                qr_bbox_list.append(bbox)
-                            break
+                # ← Extract QR bbox (position & size)
+                if bbox:
+                    qr_bbox_list.append(bbox)
+            elif not result.get('success'):
+                logger.error(f"[HEALTH] Error at {result.get('timestamp', 0):.2f}s: {result.get('error')}")
 
-            except Exception as e:
-                logger.error(f"[HEALTH] Error at {frame_time:.2f}s: {e}")
+        logger.info(f"[HEALTH] Window samples: {session.stats['fed']} from sampler, {session.stats['decoded']} decoded")
 
         # ===================== METRIC 1: QR READABLE =====================
         current_rate = detected_count / total_frames if total_frames > 0 else 0
@@ -474,12 +505,11 @@ def evaluate_camera_health_checklist(camera_name: str,
     detected_count = 0
     detected_qr_position = None
 
-    for i in range(total_frames):
-        frame_time = baseline_start + i * (1.0 / HEALTH_CHECK_CONFIG['interval_fps'])
+    with HealthCheckSession(video_path, trigger_roi, HEALTH_CHECK_CONFIG['interval_fps']) as session:
+        results = session.collect_window(baseline_start, total_frames)
 
+    for i, result in enumerate(results):
         try:
-            result = detect_qr_at_time(video_path, frame_time, trigger_roi)
-
             if result.get('success') and result.get('qr_detections'):
                 for qr_det in result['qr_detections']:
                     if HEALTH_CHECK_CONFIG['qr_target_text'] in qr_det.get('decoded_text', ''):
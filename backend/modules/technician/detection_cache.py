@@ -0,0 +1,400 @@
+"""
+Persistent, size-bounded cache for Step-4 preprocessing results.
+
+QR and hand preprocessing of a video+ROI takes tens of seconds and used to be
+kept in plain module-level dicts: lost on restart, unbounded in memory and
+recomputed every time the Step-4 page was opened. DetectionCache keeps:
+
+    - a memory LRU bounded by a byte budget (JSON size of the entries)
+    - a SQLite store (zlib-compressed JSON) under CACHE_DIR that survives
+      restarts and is bounded by its own byte budget
+
+Keys are derived from the video's content identity (absolute path, size and
+mtime) plus ROI and fps, so a replaced or re-encoded file never returns stale
+detections and entries can live much longer than the old 30 minutes.
+
+Entries that are still being filled (progressive accumulation during
+preprocessing) stay in memory only and are never evicted; put() with
+persist=True writes the final result through to disk.
+
+Usage:
+    from modules.technician.detection_cache import get_detection_cache, make_cache_key
+
+    cache = get_detection_cache("qr")
+    key = make_cache_key(video_path, roi_config, fps)
+    entry = cache.get(key)
+    if entry is None:
+        cache.put(key, {'detections': [...], 'metadata': {...}})
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from modules.technician.detection_timeline import DetectionTimeline
+
+logger = logging.getLogger(__name__)
+
+# Memory budget per namespace (MB)
+DEFAULT_MEMORY_BUDGET_MB = int(os.getenv("VTRACK_DETECTION_CACHE_MB", "128"))
+# On-disk budget per namespace (MB)
+DEFAULT_DISK_BUDGET_MB = int(os.getenv("VTRACK_DETECTION_CACHE_DISK_MB", "1024"))
+# Entries are keyed by file content identity, so they can outlive a session
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+# Partial (still accumulating) entries expire like the old in-memory cache did
+PARTIAL_TTL_SECONDS = 30 * 60
+DB_FILENAME = "detection_cache.db"
+
+
+def make_cache_key(video_path: str, roi_config: dict, fps=None) -> str:
+    """Cache key for a video (path, size, mtime) + ROI (+ fps) combination."""
+    try:
+        stat = os.stat(video_path)
+        identity = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        # Not reachable from here (e.g. container path): fall back to the path alone
+        identity = video_path
+    roi_str = f"{roi_config['x']}_{roi_config['y']}_{roi_config['w']}_{roi_config['h']}"
+    cache_input = f"{identity}_{roi_str}_{fps}" if fps is not None else f"{identity}_{roi_str}"
+    return hashlib.md5(cache_input.encode()).hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    if hasattr(value, "tolist"):  # numpy arrays
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _default_db_path() -> str:
+    from modules.path_utils import get_paths
+    return os.path.join(get_paths()["CACHE_DIR"], DB_FILENAME)
+
+
+class DetectionCache:
+    """Memory LRU with a byte budget, spilling to a SQLite store."""
+
+    def __init__(self, namespace, memory_budget_bytes=DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024,
+                 disk_budget_bytes=DEFAULT_DISK_BUDGET_MB * 1024 * 1024,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, db_path=None):
+        self.namespace = namespace
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.ttl_seconds = ttl_seconds
+        self._db_path = db_path
+        self._db_ready = False
+        self._entries = OrderedDict()  # key -> {'value', 'size', 'expires_at', 'persisted', 'timeline'}
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "memory_evictions": 0, "disk_evictions": 0, "expired": 0,
+            "disk_writes": 0, "disk_errors": 0,
+        }
+
+    # ---- public API -------------------------------------------------------
+    def get(self, key):
+        """Cached value for key, or None. Checks memory first, then disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] <= now:
+                    self._drop(key)
+                    self.stats["expired"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry["value"]
+
+        value = self._disk_load(key, now)
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._store(key, value, persisted=True)
+            return value
+
+    def timeline(self, key):
+        """DetectionTimeline over the entry's detections (built once per memory entry), or None."""
+        if self.get(key) is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["timeline"] is None:
+                entry["timeline"] = DetectionTimeline(entry["value"].get('detections', []))
+            return entry["timeline"]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def put(self, key, value, persist=True):
+        """Store value (a JSON-serialisable dict).
+
+        persist=False keeps a partial entry in memory only (and pins it) until
+        the final value is put with persist=True; it expires after
+        PARTIAL_TTL_SECONDS if that never happens.
+        """
+        ttl = self.ttl_seconds if persist else min(self.ttl_seconds, PARTIAL_TTL_SECONDS)
+        value.setdefault('processed_at', datetime.now())
+        value['expires_at'] = datetime.now() + timedelta(seconds=ttl)
+        with self._lock:
+            self._store(key, value, persisted=persist)
+        if persist:
+            self._disk_save(key, value)
+
+    def extend(self, key, detections, metadata=None):
+        """Append detections (and merge metadata) into a partial entry.
+
+        Returns:
+            int: Number of detections in the entry, or None if key is not cached in memory
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["value"].setdefault('detections', []).extend(detections)
+            if entry["timeline"] is not None:
+                entry["timeline"].extend(detections)
+            if metadata:
+                entry["value"].setdefault('metadata', {}).update(metadata)
+            added = len(json.dumps(detections, default=_encode))
+            entry["size"] += added
+            self._memory_bytes += added
+            self._evict_memory()
+            return len(entry["value"]['detections'])
+
+    def delete(self, key):
+        """Remove key from memory and disk. Returns True if it was cached."""
+        with self._lock:
+            found = key in self._entries
+            self._drop(key)
+        return self._disk_delete(key) or found
+
+    def keys(self):
+        """Keys cached in memory or on disk."""
+        with self._lock:
+            keys = list(self._entries)
+        for key in self._disk_keys():
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    def memory_values(self):
+        """Values currently held in memory (no disk access, no stats)."""
+        with self._lock:
+            return [entry["value"] for entry in self._entries.values()]
+
+    def cleanup_expired(self):
+        """Drop expired entries from memory and disk."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry["expires_at"] <= now]
+            for key in expired:
+                self._drop(key)
+            self.stats["expired"] += len(expired)
+        removed = self._disk_execute(
+            "DELETE FROM detection_cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+        )
+        if expired or removed:
+            logger.info(f"[{self.namespace}] Removed {len(expired)} expired memory and {removed or 0} expired disk cache entries")
+
+    def snapshot(self):
+        """Counters and sizes, for /cache-info and /health."""
+        with self._lock:
+            stats = dict(self.stats)
+            memory_entries = len(self._entries)
+            memory_bytes = self._memory_bytes
+        disk_entries, disk_bytes = 0, 0
+        row = self._disk_query(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM detection_cache WHERE namespace = ?", (self.namespace,)
+        )
+        if row:
+            disk_entries, disk_bytes = row[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats.update({
+            "hit_ratio": round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "memory_bytes": memory_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "disk_entries": disk_entries,
+            "disk_bytes": disk_bytes,
+            "disk_budget_bytes": self.disk_budget_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        })
+        return stats
+
+    # ---- memory LRU (caller holds self._lock) -------------------------------
+    def _store(self, key, value, persisted):
+        self._drop(key)
+        size = len(json.dumps(value, default=_encode))
+        expires_at = value['expires_at'].timestamp() if isinstance(value.get('expires_at'), datetime) else time.time() + self.ttl_seconds
+        self._entries[key] = {"value": value, "size": size, "expires_at": expires_at, "persisted": persisted,
+                              "timeline": None}
+        self._memory_bytes += size
+        self._evict_memory()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry["size"]
+
+    def _evict_memory(self):
+        """Evict least recently used persisted entries until under the memory budget."""
+        if self._memory_bytes <= self.memory_budget_bytes:
+            return
+        for key in [k for k, entry in self._entries.items() if entry["persisted"]]:
+            if self._memory_bytes <= self.memory_budget_bytes:
+                break
+            self._drop(key)
+            self.stats["memory_evictions"] += 1
+
+    # ---- SQLite store ----------------------------------------------------
+    def _connect(self):
+        if self._db_path is None:
+            self._db_path = _default_db_path()
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        if not self._db_ready:
+            os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS detection_cache (
+                    namespace TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, cache_key)
+                )
+            """)
+            conn.commit()
+            self._db_ready = True
+        return conn
+
+    def _disk_execute(self, sql, params):
+        try:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(sql, params)
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"[{self.namespace}] Detection cache store error: {e}")
+            return 0
+
+    def _disk_query(self, sql, params):
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"[{self.namespace}] Detection cache store error: {e}")
+            return []
+
+    def _disk_load(self, key, now):
+        rows = self._disk_query(
+            "SELECT payload, expires_at FROM detection_cache WHERE namespace = ? AND cache_key = ?",
+            (self.namespace, key)
+        )
+        if not rows:
+            return None
+        payload, expires_at = rows[0]
+        if expires_at <= now:
+            self._disk_delete(key)
+            self.stats["expired"] += 1
+            return None
+        self._disk_execute(
+            "UPDATE detection_cache SET last_access = ? WHERE namespace = ? AND cache_key = ?",
+            (now, self.namespace, key)
+        )
+        return json.loads(zlib.decompress(payload).decode("utf-8"), object_hook=_decode)
+
+    def _disk_save(self, key, value):
+        try:
+            raw = json.dumps(value, default=_encode).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"[{self.namespace}] Cannot persist cache entry {key}: {e}")
+            return
+        payload = zlib.compress(raw, 6)
+        now = time.time()
+        expires_at = value['expires_at'].timestamp()
+        self._disk_execute(
+            "INSERT OR REPLACE INTO detection_cache (namespace, cache_key, payload, size, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, sqlite3.Binary(payload), len(payload), expires_at, now)
+        )
+        self.stats["disk_writes"] += 1
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete least recently accessed rows until the namespace fits its disk budget."""
+        rows = self._disk_query(
+            "SELECT cache_key, size FROM detection_cache WHERE namespace = ? ORDER BY last_access DESC",
+            (self.namespace,)
+        )
+        total = 0
+        victims = []
+        for cache_key, size in rows:
+            total += size
+            if total > self.disk_budget_bytes:
+                victims.append(cache_key)
+        for cache_key in victims:
+            self._disk_delete(cache_key)
+            self.stats["disk_evictions"] += 1
+
+    def _disk_delete(self, key):
+        return self._disk_execute(
+            "DELETE FROM detection_cache WHERE namespace = ? AND cache_key = ?", (self.namespace, key)
+        ) > 0
+
+    def _disk_keys(self):
+        return [row[0] for row in self._disk_query(
+            "SELECT cache_key FROM detection_cache WHERE namespace = ? AND expires_at > ?",
+            (self.namespace, time.time())
+        )]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_detection_cache(namespace) -> DetectionCache:
+    """Process-wide cache for a namespace ("qr", "qr_baseline", "hand")."""
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = DetectionCache(namespace)
+        return _caches[namespace]
+
+
+def cache_snapshots():
+    """snapshot() of every cache created so far, by namespace."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {namespace: cache.snapshot() for namespace, cache in caches.items()}
@@ -0,0 +1,66 @@
+"""
+Sorted, array-backed timeline of cached preprocessing detections.
+
+The /get-cached-* endpoints are polled at the player's frame rate and used to
+scan every cached detection for the closest timestamp. DetectionTimeline
+keeps the timestamps in an array('d') in sorted order next to the detection
+dicts, so a point lookup is a bisect and a time window is a slice.
+
+Detections arrive in timestamp order during preprocessing, so extend() is an
+append in the common case; out-of-order entries are inserted in place.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Playback lookups match within this many seconds (5fps preprocessing -> 0.2s spacing)
+DEFAULT_TOLERANCE = 0.15
+
+
+class DetectionTimeline:
+    """Detections sorted by their 'timestamp' key, with bisect lookups."""
+
+    def __init__(self, detections=None):
+        self.timestamps = array('d')
+        self.detections = []
+        if detections:
+            self.extend(detections)
+
+    def __len__(self):
+        return len(self.detections)
+
+    def extend(self, detections):
+        """Add detections, keeping the timeline sorted (stable for equal timestamps)."""
+        ordered = sorted(detections, key=lambda detection: detection['timestamp'])
+        for detection in ordered:
+            timestamp = float(detection['timestamp'])
+            if not self.timestamps or timestamp >= self.timestamps[-1]:
+                self.timestamps.append(timestamp)
+                self.detections.append(detection)
+            else:
+                index = bisect_right(self.timestamps, timestamp)
+                self.timestamps.insert(index, timestamp)
+                self.detections.insert(index, detection)
+
+    def closest(self, timestamp, tolerance=DEFAULT_TOLERANCE):
+        """Detection closest to timestamp within tolerance.
+
+        Ties go to the earlier detection, like the previous linear scan.
+
+        Returns:
+            tuple: (detection, time_difference), or (None, None) if nothing is within tolerance
+        """
+        index = bisect_left(self.timestamps, timestamp)
+        best, best_diff = None, None
+        for candidate in (index - 1, index):
+            if 0 <= candidate < len(self.timestamps):
+                diff = abs(self.timestamps[candidate] - timestamp)
+                if diff < tolerance and (best_diff is None or diff < best_diff):
+                    best, best_diff = self.detections[candidate], diff
+        return best, best_diff
+
+    def window(self, start, end):
+        """Detections with start <= timestamp <= end, in timestamp order."""
+        if end < start:
+            return []
+        return self.detections[bisect_left(self.timestamps, start):bisect_right(self.timestamps, end)]
@@ -4,10 +4,16 @@ import sqlite3
 import logging
 import ast
 import re
+import bisect
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from modules.db_utils.safe_connection import safe_db_connection
 from modules.scheduler.db_sync import db_rwlock
 from modules.config.logging_config import get_logger
+from modules.technician.timeline_store import load_segment, read_text_segment, delete_segment, timeline_order
 from zoneinfo import ZoneInfo
 # Removed video_timezone_detector - using simple timezone operations
 
@@ -17,6 +23,105 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.pa
 
 event_detector_bp = Blueprint('event_detector', __name__)
 
+DETECTION_CONFIG = {
+    'max_workers': int(os.getenv('VTRACK_EVENT_DETECTOR_WORKERS', '4')),   # Cameras detected in parallel
+}
+
+
+class LockStats:
+    """Write lock wait/hold times of the event detector, per camera."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cameras = {}
+
+    def record(self, camera_name, wait_seconds, hold_seconds):
+        with self._lock:
+            bucket = self._cameras.setdefault(camera_name or "unknown", {
+                'logs': 0, 'wait_seconds': 0.0, 'hold_seconds': 0.0, 'max_wait_seconds': 0.0, 'max_hold_seconds': 0.0,
+            })
+            bucket['logs'] += 1
+            bucket['wait_seconds'] += wait_seconds
+            bucket['hold_seconds'] += hold_seconds
+            bucket['max_wait_seconds'] = max(bucket['max_wait_seconds'], wait_seconds)
+            bucket['max_hold_seconds'] = max(bucket['max_hold_seconds'], hold_seconds)
+
+    def snapshot(self):
+        """Per-camera counters with average hold time, for logs and status endpoints."""
+        with self._lock:
+            cameras = {camera: dict(bucket) for camera, bucket in self._cameras.items()}
+        for bucket in cameras.values():
+            bucket['avg_hold_seconds'] = bucket['hold_seconds'] / bucket['logs']
+            for key in list(bucket):
+                if isinstance(bucket[key], float):
+                    bucket[key] = round(bucket[key], 4)
+        return cameras
+
+
+lock_stats = LockStats()
+
+
+class CameraPartitionedDetector:
+    """
+    Runs process_single_log for several cameras in parallel, in submit order per camera.
+
+    Event state (the pending event with te IS NULL) is scoped by camera_name,
+    so logs of different cameras are independent while the logs of one camera
+    must be detected in timeline order. Each camera gets a lane: its logs wait
+    in a deque and at most one pool task drains it.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max(1, max_workers or DETECTION_CONFIG['max_workers'])
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="EventDetectorLane")
+        self._lock = threading.Lock()
+        self._lanes = {}
+        self._active = set()
+        self._idle = threading.Condition(self._lock)
+
+    def submit(self, camera_name, log_file, on_done=None):
+        """Queue log_file on the lane of camera_name; on_done(ok) is called after it is processed."""
+        camera = camera_name or ""
+        with self._lock:
+            self._lanes.setdefault(camera, deque()).append((log_file, on_done))
+            if camera in self._active:
+                return
+            self._active.add(camera)
+        self._executor.submit(self._drain, camera)
+
+    def _drain(self, camera):
+        logger = get_logger(__name__, {"camera_name": camera})
+        while True:
+            with self._lock:
+                lane = self._lanes.get(camera)
+                if not lane:
+                    self._lanes.pop(camera, None)
+                    self._active.discard(camera)
+                    self._idle.notify_all()
+                    return
+                log_file, on_done = lane.popleft()
+            ok = False
+            try:
+                process_single_log(log_file)
+                ok = True
+            except Exception as e:
+                logger.error(f"Event detection failed for {log_file}: {str(e)}")
+            finally:
+                if on_done:
+                    on_done(ok)
+
+    def busy_cameras(self):
+        with self._lock:
+            return len(self._active)
+
+    def wait_idle(self, timeout=None):
+        """Block until every lane is drained."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._active, timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
 def calculate_duration(ts, te):
     if ts is None or te is None:
         return None
@@ -87,105 +192,97 @@ def calculate_duration_with_cut(ts, te, tracking_codes, max_packing_time, min_pa
 
     return ts_cut, te_cut, duration
 
-def parse_qr_detections_from_log(log_file_path, event_ts):
+# Tracking codes accepted as QR detections (same as the former text log regex)
+TRACKING_CODE_PATTERN = re.compile(r'^[A-Z0-9]+$')
+
+def build_qr_index(records):
     """
-    Parse QR detections with bbox from log file.
+    Index the QR detections of a segment by second, once per log.
 
-    Supports two patterns:
-    1. Success: timestamp,state,TRACKING_CODE,bbox:[x,y,w,h]
-    2. Boundary: timestamp,state,,boundary:[x,y,w,h]
+    Records carrying a bbox are detections:
+    1. Success: tracking code + bbox (decode_success=1)
+    2. Boundary: empty code + bbox (decode_success=0)
 
     Args:
-        log_file_path: Path to log file
-        event_ts: Event start timestamp (relative seconds in video)
+        records: (second, state, code, bbox) tuples from the timeline store
+
+    Returns:
+        tuple: (seconds, detections) sorted by second; detections are
+        (second, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success)
+    """
+    detections = []
+    for second, _, code, bbox in records:
+        if bbox is None or (code and not TRACKING_CODE_PATTERN.match(code)):
+            continue
+        detections.append((int(second), code, bbox[0], bbox[1], bbox[2], bbox[3], 1 if code else 0))
+    detections.sort(key=lambda detection: detection[0])
+    return [detection[0] for detection in detections], detections
+
+def slice_qr_detections(qr_index, event_ts):
+    """
+    QR detections from event_ts on, with timestamps relative to event_ts.
 
     Returns:
         List of tuples: (relative_timestamp, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success)
-        decode_success: 1 for successful decode, 0 for boundary only
     """
-    qr_detections = []
-    # Pattern 1: Success - timestamp,state,TRACKING_CODE,bbox:[x,y,w,h]
-    success_pattern = r'^(\d+),\w+,([A-Z0-9]+),bbox:\[(\d+),(\d+),(\d+),(\d+)\]'
-    # Pattern 2: Boundary - timestamp,state,,boundary:[x,y,w,h]
-    boundary_pattern = r'^(\d+),\w+,,boundary:\[(\d+),(\d+),(\d+),(\d+)\]'
+    seconds, detections = qr_index
+    return [
+        (detection[0] - event_ts,) + detection[1:]
+        for detection in detections[bisect.bisect_left(seconds, event_ts):]
+    ]
+
+def qr_detections_from_records(records, event_ts):
+    """QR detections of `records` from event_ts on (see build_qr_index / slice_qr_detections)."""
+    return slice_qr_detections(build_qr_index(records), event_ts)
 
+def parse_qr_detections_from_log(log_file_path, event_ts):
+    """
+    Parse QR detections with bbox from a text log file (logs without a timeline store segment).
+
+    Returns:
+        Same as qr_detections_from_records(), empty list on error
+    """
     try:
-        with open(log_file_path, 'r') as f:
-            next(f)  # Skip header
-            for line in f:
-                line_stripped = line.strip()
-                if not line_stripped or line_stripped.startswith('#'):
-                    continue
-
-                # Try success pattern first
-                match = re.match(success_pattern, line_stripped)
-                if match:
-                    log_timestamp = int(match.group(1))
-                    tracking_code = match.group(2)
-                    bbox_x = int(match.group(3))
-                    bbox_y = int(match.group(4))
-                    bbox_w = int(match.group(5))
-                    bbox_h = int(match.group(6))
-                    decode_success = 1
-
-                    # Calculate relative timestamp from event start
-                    relative_timestamp = log_timestamp - event_ts
-
-                    # Skip negative timestamps (shouldn't happen)
-                    if relative_timestamp >= 0:
-                        qr_detections.append((
-                            relative_timestamp,
-                            tracking_code,
-                            bbox_x,
-                            bbox_y,
-                            bbox_w,
-                            bbox_h,
-                            decode_success
-                        ))
-                    continue
-
-                # Try boundary pattern
-                match = re.match(boundary_pattern, line_stripped)
-                if match:
-                    log_timestamp = int(match.group(1))
-                    tracking_code = ""  # Empty for boundary entries
-                    bbox_x = int(match.group(2))
-                    bbox_y = int(match.group(3))
-                    bbox_w = int(match.group(4))
-                    bbox_h = int(match.group(5))
-                    decode_success = 0
-
-                    # Calculate relative timestamp from event start
-                    relative_timestamp = log_timestamp - event_ts
-
-                    # Skip negative timestamps (shouldn't happen)
-                    if relative_timestamp >= 0:
-                        qr_detections.append((
-                            relative_timestamp,
-                            tracking_code,
-                            bbox_x,
-                            bbox_y,
-                            bbox_w,
-                            bbox_h,
-                            decode_success
-                        ))
-
-        return qr_detections
+        _, records = read_text_segment(log_file_path)
+        return qr_detections_from_records(records, event_ts)
     except Exception as e:
         return []
 
-def process_single_log_with_cursor(log_file_path, cursor, conn):
+def insert_qr_detections(cursor, rows, logger):
+    """Insert qr_detections rows with one executemany (row by row if one of them is rejected)."""
+    if not rows:
+        return
+    insert_sql = """
+        INSERT INTO qr_detections
+        (event_id, timestamp_seconds, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    cursor.execute("SAVEPOINT qr_detections_batch")
+    try:
+        cursor.executemany(insert_sql, rows)
+        cursor.execute("RELEASE SAVEPOINT qr_detections_batch")
+        return
+    except sqlite3.IntegrityError as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT qr_detections_batch")
+        cursor.execute("RELEASE SAVEPOINT qr_detections_batch")
+        logger.warning(f"Batch insert of {len(rows)} QR detections rejected ({e}), inserting row by row")
+    for row in rows:
+        try:
+            cursor.execute(insert_sql, row)
+        except sqlite3.IntegrityError as e:
+            logger.error(f"Error inserting QR detection for event {row[0]}: {e}")
+
+def process_single_log_with_cursor(log_file_path, cursor, conn, timeline=None):
     """
     FIXED: Xử lý single log với cursor và connection được truyền vào
     Tránh tạo nested locks và cursor escape issues
+
+    timeline: (meta, records) already loaded by load_log_timeline() outside the
+    write lock; loaded with `cursor` when None.
     """
     # Khởi tạo logger với context log_file
     logger = get_logger(__name__, {"log_file": log_file_path})
 
-    if not os.path.isfile(log_file_path):
-        logger.warning(f"Log file not found: {log_file_path}, skipping.")
-        return
-
     logger.info("Logging initialized for process_single_log_with_cursor")
 
     # NOTE: Không cần try-except ở đây vì được handle ở caller level
@@ -197,44 +294,45 @@ def process_single_log_with_cursor(log_file_path, cursor, conn):
         logger.info(f"Log file {log_file_path} already processed, skipping")
         return
 
-    with open(log_file_path, "r") as f:
-        header = f.readline().strip()
-        logger.info(f"Header: {header}")
-        start_time = int(header.split("Start: ")[1].split(",")[0])
-        end_time = int(header.split("End: ")[1].split(",")[0])
-        start_time_str = header.split("Start_Time: ")[1].split(",")[0].strip()
-        camera_name = header.split("Camera_Name: ")[1].split(",")[0].strip()
-        video_path = header.split("Video_File: ")[1].split(",")[0].strip()
-        # Parse start_time with timezone awareness
-        start_time_dt = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
-        # Get system timezone from config instead of hardcoding
-        from modules.utils.simple_timezone import get_system_timezone_from_db
-        system_tz_str = get_system_timezone_from_db()
-        user_timezone = ZoneInfo(system_tz_str)
-        start_time_dt = start_time_dt.replace(tzinfo=user_timezone)
-        # Convert to UTC for consistent storage
-        start_time_dt_utc = start_time_dt.astimezone(timezone.utc)
-        logger.info(f"Parsed header - Start: {start_time}, End: {end_time}, Start_Time: {start_time_str} (UTC: {start_time_dt_utc}), Camera_Name: {camera_name}, Video_File: {video_path}")
-
-        # Check if log file is empty
-        first_data_line = f.readline().strip()
-        if not first_data_line:
-            logger.info(f"Log file {log_file_path} is empty, skipping")
-            cursor.execute("UPDATE processed_logs SET is_processed = 1, processed_at = ? WHERE log_file = ?", (datetime.now(timezone.utc), log_file_path))
+    # Typed records from the timeline store; text logs written before it existed are parsed
+    if timeline is None:
+        timeline = load_segment(cursor, log_file_path)
+    if timeline is None:
+        if not os.path.isfile(log_file_path):
+            logger.warning(f"Log file not found: {log_file_path}, skipping.")
             return
+        timeline = read_text_segment(log_file_path)
+    meta, records = timeline
+
+    start_time = meta['start_second']
+    end_time = meta['end_second']
+    start_time_str = meta['start_time']
+    camera_name = meta['camera_name']
+    video_path = meta['video_file']
+    # Parse start_time with timezone awareness
+    start_time_dt = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+    # Get system timezone from config instead of hardcoding
+    from modules.utils.simple_timezone import get_system_timezone_from_db
+    system_tz_str = get_system_timezone_from_db()
+    user_timezone = ZoneInfo(system_tz_str)
+    start_time_dt = start_time_dt.replace(tzinfo=user_timezone)
+    # Convert to UTC for consistent storage
+    start_time_dt_utc = start_time_dt.astimezone(timezone.utc)
+    logger.info(f"Segment - Start: {start_time}, End: {end_time}, Start_Time: {start_time_str} (UTC: {start_time_dt_utc}), Camera_Name: {camera_name}, Video_File: {video_path}")
+
+    # Check if segment is empty
+    if not records:
+        logger.info(f"Log file {log_file_path} is empty, skipping")
+        cursor.execute("UPDATE processed_logs SET is_processed = 1, processed_at = ? WHERE log_file = ?", (datetime.now(timezone.utc), log_file_path))
+        delete_segment(cursor, log_file_path)
+        return
 
-        # If data exists, go back and process
-        f.seek(0)
-        next(f)
-        frame_sampler_data = []
-        for line in f:
-            parts = line.strip().split(",")
-            try:
-                second, state = parts[0], parts[1]
-                codes = [parts[2]] if len(parts) > 2 and parts[2] else []
-                frame_sampler_data.append({"second": float(second), "state": state, "tracking_codes": codes})
-            except Exception as e:
-                logger.info(f"Error parsing line '{line.strip()}': {str(e)}")
+    frame_sampler_data = [
+        {"second": float(second), "state": state, "tracking_codes": [code] if code else []}
+        for second, state, code, _ in records
+    ]
+    # QR detections indexed once per log, sliced per event below
+    qr_index = build_qr_index(records)
 
     # Get min_packing_time and max_packing_time from Processing_config
     cursor.execute("SELECT min_packing_time, max_packing_time FROM Processing_config LIMIT 1")
@@ -398,41 +496,28 @@ def process_single_log_with_cursor(log_file_path, cursor, conn):
 
         # Parse and insert QR detections for this event (if event is completed)
         if current_event_id and te is not None and ts is not None:
-            qr_detections = parse_qr_detections_from_log(log_file_path, int(ts))
+            qr_detections = slice_qr_detections(qr_index, int(ts))
 
             if qr_detections:
                 logger.info(f"Found {len(qr_detections)} QR detections for event {current_event_id}")
 
                 success_count = 0
                 boundary_count = 0
+                detection_rows = []
 
                 for rel_ts, code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success in qr_detections:
                     # Insert logic:
                     # - Success entries (decode_success=1): Only if code matches tracking_codes
                     # - Boundary entries (decode_success=0): Always insert (for empty events)
-                    should_insert = False
                     if decode_success == 1 and code in tracking_codes:
-                        should_insert = True
                         success_count += 1
                     elif decode_success == 0:
-                        should_insert = True
                         boundary_count += 1
+                    else:
+                        continue
+                    detection_rows.append((current_event_id, rel_ts, code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success))
 
-                    if should_insert:
-                        try:
-                            cursor.execute("""
-                                INSERT INTO qr_detections
-                                (event_id, timestamp_seconds, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (current_event_id, rel_ts, code, bbox_x, bbox_y, bbox_w, bbox_h, decode_success))
-
-                            if decode_success == 1:
-                                logger.debug(f"Inserted SUCCESS detection: event={current_event_id}, ts={rel_ts}s, code={code}, bbox=({bbox_x},{bbox_y},{bbox_w},{bbox_h})")
-                            else:
-                                logger.debug(f"Inserted BOUNDARY detection: event={current_event_id}, ts={rel_ts}s, bbox=({bbox_x},{bbox_y},{bbox_w},{bbox_h})")
-                        except sqlite3.IntegrityError as e:
-                            logger.error(f"Error inserting QR detection for event {current_event_id}: {e}")
-                            continue
+                insert_qr_detections(cursor, detection_rows, logger)
 
                 logger.info(f"Inserted {success_count} success detections and {boundary_count} boundary detections for event {current_event_id}")
 
@@ -473,73 +558,108 @@ def process_single_log_with_cursor(log_file_path, cursor, conn):
                         cursor.execute("DELETE FROM events WHERE event_id = ?", (current_event_id,))
 
     cursor.execute("UPDATE processed_logs SET is_processed = 1, processed_at = ? WHERE log_file = ?", (datetime.now(timezone.utc), log_file_path))
+    # Timeline records are only kept until their events are detected
+    delete_segment(cursor, log_file_path)
     logger.info("Database changes committed")
 
 
+def load_log_timeline(log_file_path):
+    """
+    (meta, records) of a log, read before the write lock is taken.
+
+    Store segments are read under the shared read lock; legacy text logs are
+    parsed without any lock.
+
+    Returns:
+        tuple or None: None if the log is already processed or does not exist
+    """
+    with db_rwlock.gen_rlock():
+        with safe_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT is_processed FROM processed_logs WHERE log_file = ?", (log_file_path,))
+            result = cursor.fetchone()
+            if result and result[0] == 1:
+                return None
+            timeline = load_segment(cursor, log_file_path)
+    if timeline is None and os.path.isfile(log_file_path):
+        timeline = read_text_segment(log_file_path)
+    return timeline
+
 def process_single_log(log_file_path):
     """
-    LEGACY: Wrapper function để maintain backward compatibility
-    Sử dụng riêng lock cho single file processing
+    Process one log in its own short write transaction.
+
+    The log is loaded and parsed first (load_log_timeline); the write lock is
+    only held for event detection and the inserts. Lock wait and hold times
+    are recorded in lock_stats.
     """
     # Khởi tạo logger với context log_file
     logger = get_logger(__name__, {"log_file": log_file_path})
 
-    if not os.path.isfile(log_file_path):
-        logger.warning(f"Log file not found: {log_file_path}, skipping.")
-        return
-
     logger.info("Logging initialized for process_single_log")
 
     try:
+        timeline = load_log_timeline(log_file_path)
+        camera_name = timeline[0]['camera_name'] if timeline else None
+        wait_start = time.time()
         with db_rwlock.gen_wlock():
-            with safe_db_connection() as conn:
-                cursor = conn.cursor()
-                # Delegate to the new function
-                process_single_log_with_cursor(log_file_path, cursor, conn)
+            hold_start = time.time()
+            try:
+                with safe_db_connection() as conn:
+                    cursor = conn.cursor()
+                    # Re-checks is_processed under the lock; loads the log itself if it was missing above
+                    process_single_log_with_cursor(log_file_path, cursor, conn, timeline=timeline)
+            finally:
+                hold_seconds = time.time() - hold_start
+        lock_stats.record(camera_name, hold_start - wait_start, hold_seconds)
+        logger.info(f"Write lock for {os.path.basename(log_file_path)}: waited {hold_start - wait_start:.3f}s, held {hold_seconds:.3f}s")
 
     except Exception as e:
         logger.error(f"Error in process_single_log: {str(e)}")
         raise
 
+# Process-wide camera lanes shared by the scheduler's detector thread and /process-events
+camera_detector = CameraPartitionedDetector()
+
 @event_detector_bp.route('/process-events', methods=['GET'])
 def process_events():
     logger = get_logger(__name__)
     try:
-        # FIXED: Sử dụng write lock cho toàn bộ operation để tránh cursor escape
-        with db_rwlock.gen_wlock():
+        # Only the log list is read under the lock; each log gets its own short write transaction
+        with db_rwlock.gen_rlock():
             with safe_db_connection() as conn:
                 cursor = conn.cursor()
 
-                # Lấy danh sách log files cần xử lý
+                # Lấy danh sách log files cần xử lý; text-only logs are ordered by their header Start
                 cursor.execute("""
-                    SELECT DISTINCT log_file_path, (
-                        SELECT CAST(SUBSTR(header, INSTR(header, 'Start: ') + 7, INSTR(SUBSTR(header, INSTR(header, 'Start: ') + 7), ',') - 1) AS INTEGER)
-                        FROM (
-                            SELECT SUBSTR(CAST(READFILE(log_file_path) AS TEXT), 1, INSTR(CAST(READFILE(log_file_path) AS TEXT), '\n') - 1) AS header
-                        )
-                    ) AS start_time
-                    FROM file_list
-                    WHERE is_processed = 1 AND log_file_path IS NOT NULL
-                    AND log_file_path IN (SELECT log_file FROM processed_logs WHERE is_processed = 0)
-                    ORDER BY start_time
+                    SELECT DISTINCT f.log_file_path, COALESCE(t.camera_name, f.camera_name), t.start_time, t.start_second
+                    FROM file_list f
+                    LEFT JOIN timeline_segments t ON t.log_file = f.log_file_path
+                    WHERE f.is_processed = 1 AND f.log_file_path IS NOT NULL
+                    AND f.log_file_path IN (SELECT log_file FROM processed_logs WHERE is_processed = 0)
                 """)
-                log_files = [row[0] for row in cursor.fetchall()]
-                logger.info(f"Log files to process: {log_files}")
-
-                # FIXED: Xử lý tất cả files trong cùng transaction/lock scope
-                for log_file in log_files:
-                    if not os.path.isfile(log_file):
-                        logger.warning(f"Log file not found, skipping: {log_file}")
-                        continue
-                    if os.path.exists(log_file):
-                        logger.info(f"Starting to process file: {log_file}")
-                        # FIXED: Gọi helper function với cursor hiện tại thay vì tạo mới
-                        process_single_log_with_cursor(log_file, cursor, conn)
-                        logger.info(f"Finished processing file: {log_file}")
-                    else:
-                        logger.info(f"File not found: {log_file}")
-
+                rows = cursor.fetchall()
+        log_files = timeline_order(rows)
+        logger.info(f"Log files to process: {[log_file for log_file, _ in log_files]}")
+
+        # Cameras in parallel, logs of one camera in segment order
+        results = []
+        finished = threading.Semaphore(0)
+
+        def on_done(ok):
+            results.append(ok)
+            finished.release()
+
+        for log_file, camera_name in log_files:
+            camera_detector.submit(camera_name, log_file, on_done)
+        for _ in log_files:
+            finished.acquire()
+
+        failed = results.count(False)
+        logger.info(f"Processed {len(log_files)} log files ({failed} failed), write lock per camera: {lock_stats.snapshot()}")
+        if failed:
+            return jsonify({"error": f"Event detection failed for {failed} of {len(log_files)} log files"}), 500
         return jsonify({"message": "Event detection completed successfully"}), 200
     except Exception as e:
         logger.error(f"Error in process_events: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -5,7 +5,7 @@ import sqlite3
 import threading
 import subprocess
 import json
-import queue
+import bisect
 import numpy as np
 import mediapipe as mp
 from datetime import datetime, timezone, timedelta
@@ -15,6 +15,11 @@ from zoneinfo import ZoneInfo
 # Removed video_timezone_detector - using simple timezone operations
 import math
 from modules.config.logging_config import get_logger
+from modules.technician.qr_detector_pool import detector_pool
+from modules.technician.tiered_qr_decoder import tiered_decoder
+from modules.technician.frame_source import create_frame_source
+from modules.technician.sampler_log_writer import log_writer
+from modules.technician.timeline_store import open_segment, finish_segment, format_header, TIMELINE_CONFIG
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -43,11 +48,13 @@ class FrameSamplerNoTrigger:
         except AttributeError as e:
             self.logger.error(f"MediaPipe import error: {e}")
             raise ImportError("MediaPipe modules not found. Please reinstall MediaPipe.")
-        # Initialize log queue and writer thread
-        self.log_queue = queue.Queue()
-        self.log_thread = threading.Thread(target=self._log_writer)
-        self.log_thread.daemon = True
-        self.log_thread.start()
+        # Timeline segment currently written by process_video (see timeline_store)
+        self.log_segment = None
+        # Segments of the current video by log_file -> (start_second, camera_name), handed
+        # to the event detector together once the Ts/Te pass has written its records
+        self.segment_logs = {}
+        # Set by hold_segments(): segments wait for release_segments() instead of the end of process_video
+        self.holding = False
 
     def setup_logging(self):
         self.logger = get_logger(__name__, {})
@@ -59,12 +66,21 @@ class FrameSamplerNoTrigger:
                 self.logger.error(f"Model file not found: {model_file}")
                 raise FileNotFoundError(f"Model file not found: {model_file}")
         try:
-            # Using pattern from qr_detector.py with proper error handling
-            self.qr_detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL)  # type: ignore
+            # Detectors come from the shared per-thread pool; warming here keeps
+            # the first processed frame free of model-load latency
+            detector_pool.warm()
+            self.qr_available = True
             self.logger.info("WeChat QRCode detector initialized")
         except Exception as e:
             self.logger.error(f"Failed to initialize WeChat QRCode: {str(e)}")
-            self.qr_detector = None
+            self.qr_available = False
+
+    @property
+    def qr_detector(self):
+        """WeChat detector bound to the calling thread (None if models failed to load)."""
+        if not self.qr_available:
+            return None
+        return detector_pool.thread_detector()
 
     def load_config(self):
         self.logger.info("Loading configuration from database")
@@ -177,7 +193,7 @@ class FrameSamplerNoTrigger:
                 frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
             if self.qr_detector is None:
                 return []
-            texts, _ = self.qr_detector.detectAndDecode(frame)
+            texts, _ = tiered_decoder.detect_and_decode(self.qr_detector, frame, region="no_trigger")
             for text in texts:
                 if text and text != "TimeGo":
                     self.logger.info(f"Second {round((frame_count - 1) / self.fps)}: QR texts={texts}, mvd={text}")
@@ -199,6 +215,26 @@ class FrameSamplerNoTrigger:
             self.logger.error(f"Error in hand detection: {str(e)}")
             return False
 
+    def _find_hand_frame(self, hand_frames, window_start, window_end, last_te, start_time, end_time):
+        """First sampled hand frame in (window_start, window_end] usable as Ts, or None.
+
+        Args:
+            hand_frames: Sorted frame numbers where detect_hand() was True during the main pass
+            window_start: Frame after which the search starts (end of stable segment or previous Te)
+            window_end: Last frame of the search window (current Te)
+            last_te: Frame of the previous Te; Ts must be min_packing_time after it
+            start_time, end_time: Processed range in seconds
+        """
+        for hand_frame_count in hand_frames[bisect.bisect_right(hand_frames, window_start):]:
+            if hand_frame_count > window_end:
+                break
+            if hand_frame_count > last_te + self.min_packing_time * self.fps:
+                second_ts = round((hand_frame_count - 1) / self.fps, 1)
+                if second_ts >= start_time and second_ts <= end_time:
+                    self.logger.info(f"Hand detected for Ts: frame={hand_frame_count}, time={second_ts}s")
+                    return hand_frame_count
+        return None
+
     def compute_motion_level(self, prev_frame, curr_frame):
         try:
             if len(prev_frame.shape) == 3:
@@ -263,17 +299,23 @@ class FrameSamplerNoTrigger:
                     self.logger.info(f"Video start time from ctime (last resort): {local_time}")
                     return local_time
 
-    def _log_writer(self):
-        while True:
-            log_file, entry, timestamp = self.log_queue.get()
-            with threading.Lock():
-                mode = 'w' if not os.path.exists(log_file) else 'a'
-                with open(log_file, mode) as f:
-                    if mode == 'w':
-                        f.write(f"# Start: {timestamp['start']}, End: {timestamp['end']}, Start_Time: {timestamp['start_time']}, Camera_Name: {timestamp['camera']}, Video_File: {timestamp['video']}\n")
-                    f.write(f"{entry}\n")
-                    f.flush()
-            self.log_queue.task_done()
+    def _close_log_segment(self):
+        if self.log_segment is not None:
+            self.log_segment.close()
+            self.log_segment = None
+
+    def hold_segments(self):
+        """Keep the segments of the following process_video() calls (work blocks of one video,
+        which can share a segment) from the event detector until release_segments()."""
+        self.holding = True
+        self.segment_logs = {}
+
+    def release_segments(self):
+        """Hand every segment written since the last release to the event detector, in timeline order."""
+        self.holding = False
+        segment_logs, self.segment_logs = self.segment_logs, {}
+        for segment_log in sorted(segment_logs, key=lambda log_file: segment_logs[log_file][0]):
+            finish_segment(segment_log, segment_logs[segment_log][1])
 
     def _get_log_directory(self, video_file, camera_name):
         """Get log directory based on program type from database.
@@ -300,20 +342,28 @@ class FrameSamplerNoTrigger:
             return os.path.join(self.log_dir, camera_name)
 
     def _update_log_file(self, log_file, start_second, end_second, start_time, camera_name, video_file):
-        timestamp = {
-            'start': start_second,
-            'end': end_second,
+        meta = {
+            'start_second': start_second,
+            'end_second': end_second,
             'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'camera': camera_name,
-            'video': video_file
+            'camera_name': camera_name,
+            'video_file': video_file,
         }
+        # One open segment at a time; its text export is created (with header) on the first entry.
+        # Segments are reopened by the Ts/Te pass, so closing one does not make it final.
+        self._close_log_segment()
+        text_log = log_writer.open(log_file, format_header(meta), append=True, lazy=True) if TIMELINE_CONFIG['text_logs'] else None
+        segment = open_segment(log_file, meta, text_log=text_log, append=True, submit=False)
+        self.log_segment = segment
+        self.segment_logs[log_file] = (start_second, camera_name)
         with db_rwlock.gen_wlock():
             with safe_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT 1 FROM processed_logs WHERE log_file = ?", (log_file,))
                 if not cursor.fetchone():
                     cursor.execute("INSERT INTO processed_logs (log_file, is_processed) VALUES (?, 0)", (log_file,))
-        return lambda entry, ts: self.log_queue.put((log_file, f"{ts},{entry}", timestamp))
+        # entry is "state,code" as in the text log
+        return lambda entry, ts: segment.record(ts, *entry.split(",", 1))
 
     def run(self):
         while True:
@@ -334,6 +384,8 @@ class FrameSamplerNoTrigger:
     def process_video(self, video_file, video_lock, get_packing_area_func, process_frame_func, frame_interval, start_time=0, end_time=None):
         with video_lock:
             self.logger.info(f"Processing video: {video_file} from {start_time}s to {end_time}s")
+            if not self.holding:
+                self.segment_logs = {}
             if not os.path.exists(video_file):
                 self.logger.error(f"File '{video_file}' does not exist")
                 with db_rwlock.gen_wlock():
@@ -348,8 +400,10 @@ class FrameSamplerNoTrigger:
                     cursor.execute("SELECT camera_name FROM file_list WHERE file_path = ?", (video_file,))
                     result = cursor.fetchone()
                     camera_name = result[0] if result and result[0] else "CamTest"
-            video = cv2.VideoCapture(video_file)
-            if not video.isOpened():
+            roi = get_packing_area_func(camera_name)
+            # Frames come back already cropped to the packing area (full frame if the ROI is invalid)
+            video = create_frame_source(video_file, roi=roi)
+            if not video.open():
                 self.logger.error(f"Failed to open video '{video_file}'")
                 with db_rwlock.gen_wlock():
                     with safe_db_connection() as conn:
@@ -357,7 +411,6 @@ class FrameSamplerNoTrigger:
                         cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("lỗi", video_file))
                 return None
             start_time_obj = self._get_video_start_time(video_file, camera_name)
-            roi = get_packing_area_func(camera_name)
             total_seconds = self.get_video_duration(video_file)
             if total_seconds is None:
                 self.logger.error(f"Failed to get duration of video {video_file}")
@@ -384,7 +437,6 @@ class FrameSamplerNoTrigger:
             # Bắt đầu từ khung hình tại start_time
             start_frame = int(start_time * self.fps)
             end_frame = int(end_time * self.fps)
-            video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
             frame_count = start_frame
             prev_frame = None
             stable_segments = []
@@ -392,21 +444,10 @@ class FrameSamplerNoTrigger:
             stable_start = None
             last_te = -self.min_packing_time * self.fps
             is_stable = False
-            while video.isOpened() and frame_count < end_frame:
-                ret, frame = video.read()
-                if not ret:
-                    break
-                if roi:
-                    x, y, w, h = roi
-                    frame_height, frame_width = frame.shape[:2]
-                    if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                        frame = frame[y:y + h, x:x + w]
-                    else:
-                        self.logger.warning(f"Invalid ROI for frame {frame_count}: {roi}, frame_size: {frame_width}x{frame_height}")
-                        frame = frame
-                frame_count += 1
-                if frame_count % frame_interval != 0:
-                    continue
+            # Sampled frames with a hand in view: the Ts search below reads these
+            # instead of decoding the block a second time
+            hand_frames = []
+            for frame_count, frame in video.iter_every_nth(start_frame, end_frame, frame_interval):
                 if frame.size == 0 or frame.shape[0] == 0 or frame.shape[1] == 0:
                     self.logger.warning(f"Empty frame {frame_count}, skipping")
                     continue
@@ -414,6 +455,9 @@ class FrameSamplerNoTrigger:
                 mvd = process_frame_func(frame, frame_count)
                 if mvd:
                     qr_events.append((frame_count, mvd))
+                # Hand detection
+                if self.detect_hand(frame):
+                    hand_frames.append(frame_count)
                 # Motion detection
                 if prev_frame is not None:
                     motion_level = self.compute_motion_level(prev_frame, frame)
@@ -442,6 +486,8 @@ class FrameSamplerNoTrigger:
                     os.makedirs(camera_log_dir, exist_ok=True)
                     log_file = os.path.join(camera_log_dir, f"log_{video_name}_{current_start_second:04d}_{current_end_second:04d}.txt")
                     log_file_handle = self._update_log_file(log_file, current_start_second, current_end_second, start_time_obj + timedelta(seconds=current_start_second), camera_name, video_file)
+            # The trailing segment runs to the last frame read, not the last sampled one
+            frame_count = max(frame_count, min(end_frame, video.frame_count or end_frame))
             if is_stable and stable_start is not None and (frame_count - stable_start) >= min_stable_frames * frame_interval:
                 start_second = round((stable_start - 1) / self.fps, 1)
                 end_second = round((frame_count - 1) / self.fps, 1)
@@ -471,7 +517,6 @@ class FrameSamplerNoTrigger:
                 if last_qr_second >= start_time and last_qr_second <= end_time:
                     self.logger.info(f"Last QR event: Te={last_qr_second}s, QR={last_qr_code}")
             # Find Ts/Te
-            video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
             frame_count = start_frame
             last_te = -self.min_packing_time * self.fps
             prev_te_frame = None
@@ -513,51 +558,11 @@ class FrameSamplerNoTrigger:
                             closest_stable = (start, end)
                 if closest_stable:
                     # Tìm tay sau vùng ổn định
-                    video.set(cv2.CAP_PROP_POS_FRAMES, closest_stable[1])
-                    hand_frame_count = closest_stable[1]
-                    while hand_frame_count < te_frame and hand_frame_count < end_frame:
-                        ret, frame = video.read()
-                        if not ret:
-                            break
-                        if roi:
-                            x, y, w, h = roi
-                            frame_height, frame_width = frame.shape[:2]
-                            if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                                frame = frame[y:y + h, x:x + w]
-                        hand_frame_count += 1
-                        if hand_frame_count % self.frame_interval != 0:
-                            continue
-                        if self.detect_hand(frame) and hand_frame_count > last_te + self.min_packing_time * self.fps:
-                            ts_frame = hand_frame_count
-                            second_ts = round((ts_frame - 1) / self.fps, 1)
-                            if second_ts >= start_time and second_ts <= end_time:
-                                self.logger.info(f"Hand detected for Ts: frame={ts_frame}, time={second_ts}s")
-                                break
-                            ts_frame = None
+                    ts_frame = self._find_hand_frame(hand_frames, closest_stable[1], min(te_frame, end_frame), last_te, start_time, end_time)
                 else:
                     # Không có vùng ổn định, tìm tay ngay sau Te phía trước
                     if prev_te_frame is not None:
-                        video.set(cv2.CAP_PROP_POS_FRAMES, max(prev_te_frame, start_frame))
-                        hand_frame_count = max(prev_te_frame, start_frame)
-                        while hand_frame_count < te_frame and hand_frame_count < end_frame:
-                            ret, frame = video.read()
-                            if not ret:
-                                break
-                            if roi:
-                                x, y, w, h = roi
-                                frame_height, frame_width = frame.shape[:2]
-                                if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                                    frame = frame[y:y + h, x:x + w]
-                            hand_frame_count += 1
-                            if hand_frame_count % self.frame_interval != 0:
-                                continue
-                            if self.detect_hand(frame) and hand_frame_count > last_te + self.min_packing_time * self.fps:
-                                ts_frame = hand_frame_count
-                                second_ts = round((ts_frame - 1) / self.fps, 1)
-                                if second_ts >= start_time and second_ts <= end_time:
-                                    self.logger.info(f"Hand detected for Ts: frame={ts_frame}, time={second_ts}s")
-                                    break
-                                ts_frame = None
+                        ts_frame = self._find_hand_frame(hand_frames, max(prev_te_frame, start_frame), min(te_frame, end_frame), last_te, start_time, end_time)
                 # Ghi log
                 if ts_frame:
                     second_ts = round((ts_frame - 1) / self.fps)
@@ -604,7 +609,12 @@ class FrameSamplerNoTrigger:
                         self.logger.info(f"Logged only Te for QR {qr_code} at second {second_te}: assumed Ts={second_ts} invalid (out of range or too close to last_te)")
                 last_te = te_frame
                 prev_te_frame = te_frame
-            video.release()
+            self._close_log_segment()
+            video.close()
+            if not self.holding:
+                # Every record is written: hand the segments to the event detector
+                self.release_segments()
+            self.logger.info(f"Log writer stats: {log_writer.stats()}")
             with db_rwlock.gen_wlock():
                 with safe_db_connection() as conn:
                     cursor = conn.cursor()
@@ -13,12 +13,25 @@ from zoneinfo import ZoneInfo
 # Removed video_timezone_detector - using simple timezone operations
 import math
 from modules.config.logging_config import get_logger
+from modules.technician.qr_detector_pool import detector_pool, fast_detector_pool
+from modules.technician.tiered_qr_decoder import tiered_decoder
+from modules.technician.size_aware_decoder import size_aware_decoder, SIZE_AWARE_CONFIG
+from modules.technician.qr_tracker import MVDTracker
+from modules.technician.roi_change_gate import ROIChangeGate
+from modules.technician.trigger_presence import TriggerPresenceCheck
+from modules.technician.adaptive_sampling import AdaptiveSchedule, ADAPTIVE_CONFIG
+from modules.technician.frame_source import create_frame_source, union_roi
+from modules.technician.sampler_log_writer import log_writer
+from modules.technician.timeline_store import open_segment, finish_segment, discard_segment, format_header, TIMELINE_CONFIG
 
 # Health check imports
 from modules.technician.camera_health_checker import (
     should_run_health_check,
-    run_health_check
+    run_health_check,
+    get_health_check_window,
+    HEALTH_CHECK_CONFIG
 )
+from modules.technician.health_check_session import HealthCheckSession
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -39,6 +52,20 @@ class FrameSamplerTrigger:
         self.expected_mvd_qr_size = None      # {"width": 57, "height": 58}
         self.expected_trigger_qr_size = None  # {"width": 176, "height": 181}
         self.current_camera = None
+        # Decoded vs analysed frame counters of the last processed video
+        self.last_frame_stats = {}
+        # Health check waiting for its window frames from sample_range (reuse_sampler_frames)
+        self.pending_health_check = None
+        # Reuses the last decoded MVD while its label stays in place (skips WeChat decodes)
+        self.mvd_tracker = MVDTracker(self.fps)
+        # Reuses the previous detection result of an ROI whose crop has not changed
+        self.roi_gate = ROIChangeGate(self.fps)
+        # TimeGo On/Off from a template match; decodes the trigger crop only on suspected transitions
+        self.trigger_presence = TriggerPresenceCheck(self.fps)
+        # Set by hold_segments(): segments of the video's work blocks, by log_file ->
+        # (start_second, camera_name), wait for release_segments() instead of their close()
+        self.holding = False
+        self.segment_logs = {}
 
     def setup_logging(self):
         self.logger = get_logger(__name__, {})
@@ -50,12 +77,23 @@ class FrameSamplerTrigger:
                 self.logger.error(f"Model file not found: {model_file}")
                 raise FileNotFoundError(f"Model file not found: {model_file}")
         try:
-            # Using pattern from qr_detector.py with proper error handling
-            self.qr_detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL)  # type: ignore
+            # Detectors come from the shared per-thread pool; warming here keeps
+            # the first processed frame free of model-load latency
+            detector_pool.warm()
+            if SIZE_AWARE_CONFIG['enabled']:
+                fast_detector_pool.warm()
+            self.qr_available = True
             self.logger.info("WeChat QRCode detector initialized")
         except Exception as e:
             self.logger.error(f"Failed to initialize WeChat QRCode: {str(e)}")
-            self.qr_detector = None
+            self.qr_available = False
+
+    @property
+    def qr_detector(self):
+        """WeChat detector bound to the calling thread (None if models failed to load)."""
+        if not self.qr_available:
+            return None
+        return detector_pool.thread_detector()
 
     def load_config(self):
         self.logger.info("Loading configuration from database")
@@ -156,6 +194,31 @@ class FrameSamplerTrigger:
             self.logger.error(f"Error parsing {field_name} for {camera_name}: {str(e)}")
             return None
 
+    def _load_sampling_bounds(self, camera_name, frame_interval):
+        """Adaptive sampling bounds (min_interval, max_interval) in frames for a camera profile.
+
+        Falls back to (frame_interval, frame_interval * max_interval_factor) when the
+        profile does not set adaptive_min_interval / adaptive_max_interval.
+        """
+        min_interval, max_interval = frame_interval, None
+        try:
+            with db_rwlock.gen_rlock():
+                with safe_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        SELECT adaptive_min_interval, adaptive_max_interval
+                        FROM packing_profiles WHERE profile_name = ?
+                    """, (camera_name,))
+                    result = cursor.fetchone()
+            if result:
+                min_interval = result[0] or frame_interval
+                max_interval = result[1]
+        except Exception as e:
+            # Database created before the adaptive_* columns were added
+            self.logger.debug(f"Adaptive sampling bounds unavailable for {camera_name}: {e}")
+        max_interval = max_interval or min_interval * ADAPTIVE_CONFIG['max_interval_factor']
+        return int(min_interval), int(max(max_interval, min_interval))
+
     def _load_qr_sizes(self, camera_name):
         """Load expected QR sizes from database for size-based filtering.
 
@@ -312,23 +375,46 @@ class FrameSamplerTrigger:
             mvd_bbox = None
             boundary_points = None
 
-            # Detect TimeGo in trigger area (if provided)
-            if frame_trigger is not None and frame_trigger.size > 0:
-                if len(frame_trigger.shape) == 2:
-                    frame_trigger = cv2.cvtColor(frame_trigger, cv2.COLOR_GRAY2BGR)
+            # Static ROI since its last decode -> reuse that result (see roi_change_gate)
+            trigger_crop, packing_crop = frame_trigger, frame_packing
+            cached_state = self.roi_gate.reuse("trigger", trigger_crop, frame_count)
+            cached_packing = self.roi_gate.reuse("packing", packing_crop, frame_count)
 
-                trigger_texts, _ = self.qr_detector.detectAndDecode(frame_trigger)
-                for text in trigger_texts:
-                    if text == "TimeGo":
-                        state = "On"
-                        break
+            # Detect TimeGo in trigger area (if provided)
+            if cached_state is not None:
+                state = cached_state
+            elif frame_trigger is not None and frame_trigger.size > 0:
+                predicted_state = self.trigger_presence.predict(frame_trigger, frame_count)
+                if predicted_state is not None:
+                    state = predicted_state
+                else:
+                    if len(frame_trigger.shape) == 2:
+                        frame_trigger = cv2.cvtColor(frame_trigger, cv2.COLOR_GRAY2BGR)
+
+                    trigger_texts, trigger_points = size_aware_decoder.detect_and_decode(frame_trigger, self.expected_trigger_qr_size, region="trigger")
+                    timego_points = None
+                    for text, points in zip(trigger_texts, trigger_points):
+                        if text == "TimeGo":
+                            state = "On"
+                            timego_points = points
+                            break
+                    self.trigger_presence.update(frame_trigger, frame_count, state, timego_points)
+                self.roi_gate.store("trigger", trigger_crop, frame_count, state)
 
             # Detect MVD in packing area (if provided)
-            if frame_packing is not None and frame_packing.size > 0:
+            if cached_packing is not None:
+                mvd, mvd_bbox, boundary_points = cached_packing
+            elif frame_packing is not None and frame_packing.size > 0:
                 if len(frame_packing.shape) == 2:
                     frame_packing = cv2.cvtColor(frame_packing, cv2.COLOR_GRAY2BGR)
 
-                packing_texts, packing_points = self.qr_detector.detectAndDecode(frame_packing)
+                # Label of the last decoded MVD still in place -> reuse it instead of decoding again
+                tracked = self.mvd_tracker.match(frame_packing, frame_count)
+                if tracked is not None:
+                    tracked_mvd, _, tracked_points = tracked
+                    packing_texts, packing_points = (tracked_mvd,), (tracked_points,)
+                else:
+                    packing_texts, packing_points = size_aware_decoder.detect_and_decode(frame_packing, self.expected_mvd_qr_size, region="packing")
 
                 # Track MVD index for boundary points
                 mvd_index = None
@@ -380,6 +466,12 @@ class FrameSamplerTrigger:
                                                 f"offset=({offset_x},{offset_y}), full={mvd_bbox}")
                         break  # Found decoded MVD, stop searching
 
+                if tracked is None:
+                    if mvd_index is not None and mvd_index < len(packing_points):
+                        self.mvd_tracker.update(frame_packing, frame_count, mvd, packing_points[mvd_index])
+                    else:
+                        self.mvd_tracker.reset()
+
                 # Return boundary points for empty event processing
                 # Priority: MVD decoded > MVD detected but not decoded
                 # PERFORMANCE OPTIMIZATION: Size filtering moved to _log_boundary()
@@ -396,6 +488,8 @@ class FrameSamplerTrigger:
                         self.logger.debug(f"Frame {frame_count}: Only TimeGo detected, skipping boundary")
                     # else: Only TimeGo detected → boundary_points stays None (skip)
 
+                self.roi_gate.store("packing", packing_crop, frame_count, (mvd, mvd_bbox, boundary_points))
+
             return state, mvd, mvd_bbox, boundary_points
 
         except Exception as e:
@@ -477,17 +571,73 @@ class FrameSamplerTrigger:
             # First Run & Default: Use camera name folder
             return os.path.join(self.log_dir, camera_name)
 
-    def _update_log_file(self, log_file, start_second, end_second, start_time, camera_name, video_file):
-        log_file_handle = open(log_file, 'w')
-        log_file_handle.write(f"# Start: {start_second}, End: {end_second}, Start_Time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}, Camera_Name: {camera_name}, Video_File: {video_file}\n")
-        log_file_handle.flush()
+    def _update_log_file(self, log_file, start_second, end_second, start_time, camera_name, video_file, register=True, deferred=None):
+        """Open the segment for log_file.
+
+        deferred: list collecting segments that must not reach the event detector yet
+            (health check still pending); see _release_segments()
+        """
+        meta = {
+            'start_second': start_second,
+            'end_second': end_second,
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'camera_name': camera_name,
+            'video_file': video_file,
+        }
+        held = register and self.holding
+        # A later work block of the same video continues a held segment instead of replacing it
+        append = held and log_file in self.segment_logs
+        # Unregistered (shard) logs are merged from their text files, so they always keep one;
+        # the buffered text handle reaches the file in batches, always on close()
+        text_log = log_writer.open(log_file, format_header(meta), append=append) if TIMELINE_CONFIG['text_logs'] or not register else None
+        log_file_handle = open_segment(log_file, meta, text_log=text_log, append=append, store=register,
+                                       submit=deferred is None and not held)
+        if held:
+            self.segment_logs[log_file] = (start_second, camera_name)
+        if deferred is not None:
+            deferred.append(log_file_handle)
+        elif register:
+            self._register_log_file(log_file)
+        return log_file_handle
+
+    def _release_segments(self, deferred, camera_name, accepted):
+        """Hand segments held back during the health check to the event detector, or drop them."""
+        for segment in deferred:
+            if not accepted:
+                segment.close()
+                discard_segment(segment.log_file)
+                self.segment_logs.pop(segment.log_file, None)
+                continue
+            self._register_log_file(segment.log_file)
+            if self.holding:
+                continue  # Handed over by release_segments()
+            if segment.closed:
+                finish_segment(segment.log_file, camera_name)
+            else:
+                segment.submit = True  # Handed over when the sampler closes it
+        deferred.clear()
+
+    def hold_segments(self):
+        """Keep the segments of the following process_video() calls (work blocks of one video,
+        which can share a segment) from the event detector until release_segments()."""
+        self.holding = True
+        self.segment_logs = {}
+
+    def release_segments(self):
+        """Hand every segment held since hold_segments() to the event detector, in timeline order."""
+        self.holding = False
+        segment_logs, self.segment_logs = self.segment_logs, {}
+        for log_file in sorted(segment_logs, key=lambda segment_log: segment_logs[segment_log][0]):
+            finish_segment(log_file, segment_logs[log_file][1])
+
+    def _register_log_file(self, log_file):
+        """Queue a log file for the event detector (idempotent)."""
         with db_rwlock.gen_wlock():
             with safe_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT 1 FROM processed_logs WHERE log_file = ?", (log_file,))
                 if not cursor.fetchone():
                     cursor.execute("INSERT INTO processed_logs (log_file, is_processed) VALUES (?, 0)", (log_file,))
-        return log_file_handle
 
     # ============== EMPTY EVENT PROCESSING METHODS ==============
 
@@ -521,313 +671,451 @@ class FrameSamplerTrigger:
     def process_video(self, video_file, video_lock, get_packing_area_func, process_frame_func, frame_interval, start_time=0, end_time=None):
         with video_lock:
             self.logger.info(f"Processing video: {video_file} from {start_time}s to {end_time}s")
+            camera_name = self.prepare_video(video_file, defer_health_check=HEALTH_CHECK_CONFIG['reuse_sampler_frames'])
+            if camera_name is None:
+                return None
 
-            # Safety check: Skip if this file already failed health check
-            with db_rwlock.gen_rlock():
-                with safe_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT health_check_failed, status FROM file_list WHERE file_path = ?", (video_file,))
-                    result = cursor.fetchone()
-                    if result:
-                        health_check_failed, status = result
-                        if health_check_failed == 1 or status == 'health_check_failed':
-                            self.logger.error(f"[HEALTH] Skipping {video_file} - already marked as health_check_failed")
-                            return None
-
-            if not os.path.exists(video_file):
-                self.logger.error(f"File '{video_file}' does not exist")
+            health_check, self.pending_health_check = self.pending_health_check, None
+            log_file = self.sample_range(video_file, camera_name, get_packing_area_func, process_frame_func, frame_interval, start_time, end_time,
+                                         health_check=health_check)
+            if health_check and not health_check.get('done'):
+                # Window outside the sampled range: missing samples are decoded by the session
+                self._finish_health_check(video_file, camera_name, health_check)
+            if health_check and health_check['blocked']:
+                return None
+            if log_file is None:
                 with db_rwlock.gen_wlock():
                     with safe_db_connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("error", video_file))
                 return None
+
             with db_rwlock.gen_wlock():
                 with safe_db_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("frame sampling...", video_file))
-                    cursor.execute("SELECT camera_name FROM file_list WHERE file_path = ?", (video_file,))
-                    result = cursor.fetchone()
-                    camera_name = result[0] if result and result[0] else "CamTest"
+                    cursor.execute("UPDATE file_list SET is_processed = 1, status = ? WHERE file_path = ?", ("completed", video_file))
+            self.logger.info(f"Completed processing video: {video_file}")
+            return log_file
 
-            # Load QR sizes if camera changed (for size-based filtering)
-            if camera_name != self.current_camera:
-                self._load_qr_sizes(camera_name)
-                self.current_camera = camera_name
+    def prepare_video(self, video_file, defer_health_check=False):
+        """Check the video can be sampled, mark it as in progress and run a pending health check.
 
-            # ========== HEALTH CHECK AT START OF PROCESS_VIDEO ==========
-            # Read health check metadata (set by file_lister)
-            with db_rwlock.gen_rlock():
+        Args:
+            defer_health_check: Leave the health check in self.pending_health_check so
+                sample_range() can feed it the window frames of its first pass
+
+        Returns:
+            str: Camera name of the video, or None if it must not be sampled
+        """
+
+        # Safety check: Skip if this file already failed health check
+        with db_rwlock.gen_rlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT health_check_failed, status FROM file_list WHERE file_path = ?", (video_file,))
+                result = cursor.fetchone()
+                if result:
+                    health_check_failed, status = result
+                    if health_check_failed == 1 or status == 'health_check_failed':
+                        self.logger.error(f"[HEALTH] Skipping {video_file} - already marked as health_check_failed")
+                        return None
+
+        if not os.path.exists(video_file):
+            self.logger.error(f"File '{video_file}' does not exist")
+            with db_rwlock.gen_wlock():
                 with safe_db_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("SELECT health_check_message, health_check_failed FROM file_list WHERE file_path = ?", (video_file,))
-                    result = cursor.fetchone()
-                    health_metadata_json = result[0] if result else '{}'
-                    health_check_failed = result[1] if result else 0
+                    cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("error", video_file))
+            return None
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("frame sampling...", video_file))
+                cursor.execute("SELECT camera_name FROM file_list WHERE file_path = ?", (video_file,))
+                result = cursor.fetchone()
+                camera_name = result[0] if result and result[0] else "CamTest"
 
-            # Parse health metadata
-            try:
-                health_metadata = json.loads(health_metadata_json) if health_metadata_json else {}
-            except json.JSONDecodeError:
-                health_metadata = {}
-
-            # If health check is required and not yet done, execute it now
-            if health_metadata.get('health_check_required') and not health_metadata.get('health_check_done'):
-                self.logger.info(f"[HEALTH] Executing health check for {camera_name}")
-
-                # Run health check (new function handles baseline lookup, first TimeGo detection, and UPDATE logic)
-                health_result = run_health_check(
-                    camera_name=camera_name,
-                    video_path=video_file
-                )
-
-                if health_result.get('success'):
-                    # Update health metadata with result
-                    health_metadata.update({
-                        "health_check_done": True,
-                        "health_check_status": health_result.get('status'),
-                        "health_check_metrics": health_result.get('metrics'),
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    })
-                else:
-                    # Health check failed or skipped (no baseline)
-                    self.logger.warning(f"[HEALTH] ⚠️ Health check skipped for {camera_name}: {health_result.get('error')}")
-                    health_metadata.update({
-                        "health_check_done": False,
-                        "health_check_error": health_result.get('error'),
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    })
-
-                if health_result.get('success'):
-
-                    # Handle health check result
-                    if health_result.get('status') == 'CRITICAL':
-                        # CRITICAL (<70%) → PAUSE processing
-                        self.logger.error(f"[HEALTH] 🛑 CRITICAL - Pausing processing for {camera_name}")
-                        metrics = health_result.get('metrics', {})
-                        self.logger.error(f"[HEALTH] QR degradation: {metrics.get('qr_readable', {}).get('degradation_pct', 'N/A')}%")
-
-                        # Update file_list with health_check_failed=1 and mark as blocked (health_check_failed)
-                        # Mark as is_processed=1 to prevent re-queueing, but use special status to indicate health failure
-                        with db_rwlock.gen_wlock():
-                            with safe_db_connection() as conn:
-                                cursor = conn.cursor()
-                                cursor.execute("""
-                                    UPDATE file_list
-                                    SET health_check_failed = 1,
-                                        health_check_message = ?,
-                                        is_processed = 0,
-                                        status = 'health_check_failed'
-                                    WHERE file_path = ?
-                                """, (json.dumps(health_metadata), video_file))
-                                conn.commit()
-
-                        # STOP processing this video
-                        self.logger.error(f"[HEALTH] Skipping video {video_file} due to CRITICAL health check")
-                        return None
+        # Load QR sizes if camera changed (for size-based filtering)
+        if camera_name != self.current_camera:
+            self._load_qr_sizes(camera_name)
+            self.current_camera = camera_name
 
-                    elif health_result.get('status') == 'CAUTION':
-                        # CAUTION (70-84%) → Warning + Continue
-                        metrics = health_result.get('metrics', {})
-                        self.logger.warning(f"[HEALTH] ⚠️ CAUTION - QR degradation: {metrics.get('qr_readable', {}).get('degradation_pct', 'N/A')}%")
-
-                        # Mark health check done but keep health_check_failed=0
-                        with db_rwlock.gen_wlock():
-                            with safe_db_connection() as conn:
-                                cursor = conn.cursor()
-                                cursor.execute("""
-                                    UPDATE file_list
-                                    SET health_check_failed = 0,
-                                        health_check_message = ?
-                                    WHERE file_path = ?
-                                """, (json.dumps(health_metadata), video_file))
-                                conn.commit()
-
-                    elif health_result.get('status') == 'OK':
-                        # OK (≥85%) → Continue normally
-                        self.logger.info(f"[HEALTH] ✅ Camera health OK - no degradation detected")
-
-                        # Mark health check done, health_check_failed=0
-                        with db_rwlock.gen_wlock():
-                            with safe_db_connection() as conn:
-                                cursor = conn.cursor()
-                                cursor.execute("""
-                                    UPDATE file_list
-                                    SET health_check_failed = 0,
-                                        health_check_message = ?
-                                    WHERE file_path = ?
-                                """, (json.dumps(health_metadata), video_file))
-                                conn.commit()
+        # ========== HEALTH CHECK AT START OF PROCESS_VIDEO ==========
+        # Read health check metadata (set by file_lister)
+        with db_rwlock.gen_rlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT health_check_message, health_check_failed FROM file_list WHERE file_path = ?", (video_file,))
+                result = cursor.fetchone()
+                health_metadata_json = result[0] if result else '{}'
+                health_check_failed = result[1] if result else 0
 
-                else:
-                    # No TimeGo found - skip health check, continue processing
-                    self.logger.warning(f"[HEALTH] No TimeGo found - skipping health check, continuing processing")
-                    health_metadata["health_check_done"] = True
-                    health_metadata["health_check_status"] = "SKIPPED"
-                    health_metadata["health_check_message"] = "No TimeGo detected"
-
-                    with db_rwlock.gen_wlock():
-                        with safe_db_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute("""
-                                UPDATE file_list
-                                SET health_check_failed = 0,
-                                    health_check_message = ?
-                                WHERE file_path = ?
-                            """, (json.dumps(health_metadata), video_file))
-                            conn.commit()
-
-            # ========== END HEALTH CHECK ==========
-
-            video = cv2.VideoCapture(video_file)
-            if not video.isOpened():
-                self.logger.error(f"Failed to open video '{video_file}'")
+        # Parse health metadata
+        try:
+            health_metadata = json.loads(health_metadata_json) if health_metadata_json else {}
+        except json.JSONDecodeError:
+            health_metadata = {}
+
+        # If health check is required and not yet done, execute it now
+        if health_metadata.get('health_check_required') and not health_metadata.get('health_check_done'):
+            if defer_health_check:
+                window = get_health_check_window(camera_name)
+                if window:
+                    # Window frames come from the first sampling pass (see sample_range)
+                    session = HealthCheckSession(video_file, window['trigger_roi'], HEALTH_CHECK_CONFIG['interval_fps'])
+                    session.expect_window(window['start_sec'], window['total_frames'])
+                    self.pending_health_check = {
+                        'session': session,
+                        'window': window,
+                        'metadata': health_metadata,
+                        'blocked': False
+                    }
+                    self.logger.info(f"[HEALTH] Health check for {camera_name} deferred to the sampling pass "
+                                     f"({window['start_sec']:.2f}s + {window['total_frames']} frames)")
+                    return camera_name
+
+            self.logger.info(f"[HEALTH] Executing health check for {camera_name}")
+
+            # Run health check (new function handles baseline lookup, first TimeGo detection, and UPDATE logic)
+            health_result = run_health_check(
+                camera_name=camera_name,
+                video_path=video_file
+            )
+
+            if not self._apply_health_result(video_file, camera_name, health_metadata, health_result):
+                return None
+
+        # ========== END HEALTH CHECK ==========
+
+        return camera_name
+
+    def _apply_health_result(self, video_file, camera_name, health_metadata, health_result):
+        """Record a health check result in file_list.
+
+        Returns:
+            bool: False if the video must not be sampled (CRITICAL), else True
+        """
+        if health_result.get('success'):
+            # Update health metadata with result
+            health_metadata.update({
+                "health_check_done": True,
+                "health_check_status": health_result.get('status'),
+                "health_check_metrics": health_result.get('metrics'),
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+        else:
+            # Health check failed or skipped (no baseline)
+            self.logger.warning(f"[HEALTH] ⚠️ Health check skipped for {camera_name}: {health_result.get('error')}")
+            health_metadata.update({
+                "health_check_done": False,
+                "health_check_error": health_result.get('error'),
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+
+        if health_result.get('success'):
+
+            # Handle health check result
+            if health_result.get('status') == 'CRITICAL':
+                # CRITICAL (<70%) → PAUSE processing
+                self.logger.error(f"[HEALTH] 🛑 CRITICAL - Pausing processing for {camera_name}")
+                metrics = health_result.get('metrics', {})
+                self.logger.error(f"[HEALTH] QR degradation: {metrics.get('qr_readable', {}).get('degradation_pct', 'N/A')}%")
+
+                # Update file_list with health_check_failed=1 and mark as blocked (health_check_failed)
+                # Mark as is_processed=1 to prevent re-queueing, but use special status to indicate health failure
                 with db_rwlock.gen_wlock():
                     with safe_db_connection() as conn:
                         cursor = conn.cursor()
-                        cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("error", video_file))
-            start_time_obj = self._get_video_start_time(video_file, camera_name)
-            packing_area, qr_trigger_area = get_packing_area_func(camera_name)
-            total_seconds = self.get_video_duration(video_file)
-            if total_seconds is None:
-                self.logger.error(f"Failed to get duration of video {video_file}")
+                        cursor.execute("""
+                            UPDATE file_list
+                            SET health_check_failed = 1,
+                                health_check_message = ?,
+                                is_processed = 0,
+                                status = 'health_check_failed'
+                            WHERE file_path = ?
+                        """, (json.dumps(health_metadata), video_file))
+                        conn.commit()
+
+                # STOP processing this video
+                self.logger.error(f"[HEALTH] Skipping video {video_file} due to CRITICAL health check")
+                return False
+
+            elif health_result.get('status') == 'CAUTION':
+                # CAUTION (70-84%) → Warning + Continue
+                metrics = health_result.get('metrics', {})
+                self.logger.warning(f"[HEALTH] ⚠️ CAUTION - QR degradation: {metrics.get('qr_readable', {}).get('degradation_pct', 'N/A')}%")
+
+                # Mark health check done but keep health_check_failed=0
                 with db_rwlock.gen_wlock():
                     with safe_db_connection() as conn:
                         cursor = conn.cursor()
-                        cursor.execute("UPDATE file_list SET status = ? WHERE file_path = ?", ("error", video_file))
-                return None
-            self.logger.info(f"Video duration {video_file}: {total_seconds} seconds")
-            video_name = os.path.splitext(os.path.basename(video_file))[0]
-            segment_duration = 300
-            # Determine 300s segments containing [start_time, end_time]
-            end_time = total_seconds if end_time is None else min(end_time, total_seconds)
-            start_segment = math.floor(start_time / segment_duration) * segment_duration
-            end_segment = math.ceil(end_time / segment_duration) * segment_duration
-            current_start_second = start_segment
-            current_end_second = min(current_start_second + segment_duration, end_segment)
-
-            # Get log directory based on program type
-            camera_log_dir = self._get_log_directory(video_file, camera_name)
-            os.makedirs(camera_log_dir, exist_ok=True)
-            log_file = os.path.join(camera_log_dir, f"log_{video_name}_{current_start_second:04d}_{current_end_second:04d}.txt")
-            log_file_handle = self._update_log_file(log_file, current_start_second, current_end_second, start_time_obj + timedelta(seconds=current_start_second), camera_name, video_file)
-            # Start from frame at start_time
-            start_frame = int(start_time * self.fps)
-            end_frame = int(end_time * self.fps)
-            video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-            frame_count = start_frame
-            frame_states = []
-            mvd_list = []
-            last_state = None
-            last_mvd = ""
-            # Jump logic removed - no longer needed
-            while video.isOpened() and frame_count < end_frame:
-                ret, frame = video.read()
-                if not ret:
-                    break
-
-                # Store original frame for dual cropping
-                original_frame = frame.copy()
-
-                # Crop 2 separate regions
-                frame_packing = None
-                frame_trigger = None
-                packing_offset = None
-
-                # Crop packing area (for MVD detection)
-                if packing_area:
-                    x, y, w, h = packing_area
-                    frame_height, frame_width = original_frame.shape[:2]
-                    if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                        frame_packing = original_frame[y:y + h, x:x + w]
-                        packing_offset = (x, y)  # Store offset for bbox calculation
-                    else:
-                        self.logger.warning(f"Invalid packing_area for frame {frame_count}: {packing_area}, frame size: {frame_width}x{frame_height}")
-
-                # Crop trigger area (for TimeGo detection)
-                if qr_trigger_area:
-                    x, y, w, h = qr_trigger_area
-                    frame_height, frame_width = original_frame.shape[:2]
-                    if w > 0 and h > 0 and y + h <= frame_height and x + w <= frame_width:
-                        frame_trigger = original_frame[y:y + h, x:x + w]
-                    else:
-                        self.logger.warning(f"Invalid qr_trigger_area for frame {frame_count}: {qr_trigger_area}, frame size: {frame_width}x{frame_height}")
-
-                frame_count += 1
-                if frame_count % frame_interval != 0:
-                    continue
-                if (frame_packing is None or frame_packing.size == 0) and (frame_trigger is None or frame_trigger.size == 0):
-                    self.logger.warning(f"Both ROI frames empty for frame {frame_count}, skipping")
-                    continue
-
-                # Process both ROIs separately (with packing_offset for bbox calculation)
-                state, mvd, mvd_bbox, boundary_points = process_frame_func(frame_packing, frame_trigger, frame_count, packing_offset)
-                second_in_video = (frame_count - 1) / self.fps
-                second = round(second_in_video)
-
-                # Cache successful bbox and update QR size
-                if mvd and mvd_bbox:
-                    self._update_mvd_qr_size(mvd_bbox)  # Auto-update QR size from successful decode
-                if second >= current_end_second and second < end_time:
-                    log_file_handle.close()
-                    current_start_second = current_end_second
-                    current_end_second = min(current_start_second + segment_duration, end_segment)
-
-                    # Get log directory based on program type
-                    camera_log_dir = self._get_log_directory(video_file, camera_name)
-                    os.makedirs(camera_log_dir, exist_ok=True)
-                    log_file = os.path.join(camera_log_dir, f"log_{video_name}_{current_start_second:04d}_{current_end_second:04d}.txt")
-                    log_file_handle = self._update_log_file(log_file, current_start_second, current_end_second, start_time_obj + timedelta(seconds=current_start_second), camera_name, video_file)
-                if second >= start_time and second <= end_time:
-                    # Ghi MVD ngay nếu có và khác last_mvd
-                    if mvd and mvd != last_mvd:
-                        # Format log line with bbox if available
-                        if mvd_bbox is not None:
-                            bbox_x, bbox_y, bbox_w, bbox_h = mvd_bbox
-                            log_line = f"{second},{state},{mvd},bbox:[{bbox_x},{bbox_y},{bbox_w},{bbox_h}]\n"
-                            self.logger.info(f"Log second {second}: state={state}, mvd={mvd}, bbox={mvd_bbox}")
-                        else:
-                            log_line = f"{second},{state},{mvd}\n"
-                            self.logger.info(f"Log second {second}: state={state}, mvd={mvd}")
-
-                        log_file_handle.write(log_line)
-                        log_file_handle.flush()
-                        last_mvd = mvd
-                    # Tiếp tục thu thập trạng thái cho final_state
-                    frame_states.append(state)
-                    mvd_list.append(mvd)
-                    if len(frame_states) == 5:
-                        on_count = sum(1 for s in frame_states if s == "On")
-                        off_count = sum(1 for s in frame_states if s == "Off")
-                        frame_states_str = " ".join(frame_states).lower()
-                        final_state = None
-                        if on_count >= 3:
-                            final_state = "On"
-                        elif off_count == 5:
-                            final_state = "Off"
-                        if final_state:
-                            if final_state != last_state:
-                                # Detect Ts and Te transitions (kept for future use)
-                                if final_state == "Off":
-                                    self.logger.debug(f"Event transition: Ts at second {second}")
-                                elif final_state == "On":
-                                    self.logger.debug(f"Event transition: Te at second {second}")
-
-                                log_line = f"{second},{final_state},\n"
-                                log_file_handle.write(log_line)
-                                self.logger.info(f"Log second {second}: {frame_states_str}: {final_state}")
-                                log_file_handle.flush()
-                                # Jump logic removed for safety - scan all frames sequentially
-                                last_state = final_state
-                        else:
-                            self.logger.info(f"Skipped second {second}: {frame_states_str}, on_count={on_count}, off_count={off_count}")
-                            log_file_handle.flush()
-                        frame_states = []
-                        mvd_list = []
-            log_file_handle.close()
-            video.release()
+                        cursor.execute("""
+                            UPDATE file_list
+                            SET health_check_failed = 0,
+                                health_check_message = ?
+                            WHERE file_path = ?
+                        """, (json.dumps(health_metadata), video_file))
+                        conn.commit()
+
+            elif health_result.get('status') == 'OK':
+                # OK (≥85%) → Continue normally
+                self.logger.info(f"[HEALTH] ✅ Camera health OK - no degradation detected")
+
+                # Mark health check done, health_check_failed=0
+                with db_rwlock.gen_wlock():
+                    with safe_db_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            UPDATE file_list
+                            SET health_check_failed = 0,
+                                health_check_message = ?
+                            WHERE file_path = ?
+                        """, (json.dumps(health_metadata), video_file))
+                        conn.commit()
+
+        else:
+            # No TimeGo found - skip health check, continue processing
+            self.logger.warning(f"[HEALTH] No TimeGo found - skipping health check, continuing processing")
+            health_metadata["health_check_done"] = True
+            health_metadata["health_check_status"] = "SKIPPED"
+            health_metadata["health_check_message"] = "No TimeGo detected"
+
             with db_rwlock.gen_wlock():
                 with safe_db_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("UPDATE file_list SET is_processed = 1, status = ? WHERE file_path = ?", ("completed", video_file))
-            self.logger.info(f"Completed processing video: {video_file}")
-            return log_file
+                    cursor.execute("""
+                        UPDATE file_list
+                        SET health_check_failed = 0,
+                            health_check_message = ?
+                        WHERE file_path = ?
+                    """, (json.dumps(health_metadata), video_file))
+                    conn.commit()
+
+        return True
+
+    def _finish_health_check(self, video_file, camera_name, health_check):
+        """Run a deferred health check on its (partly) fed session and record the result."""
+        health_check['done'] = True
+        try:
+            health_result = run_health_check(camera_name, video_file, session=health_check['session'],
+                                              window=health_check['window'])
+        finally:
+            health_check['session'].close()
+        health_check['blocked'] = not self._apply_health_result(video_file, camera_name, health_check['metadata'], health_result)
+        return not health_check['blocked']
+
+    def sample_range(self, video_file, camera_name, get_packing_area_func, process_frame_func, frame_interval,
+                     start_time=0, end_time=None, log_dir=None, register_logs=True, health_check=None):
+        """Sample [start_time, end_time] of a video and write its 300s segment logs.
+
+        Does not touch file_list status; the caller reports the result.
+
+        Args:
+            log_dir: Directory for the segment logs (default: camera/custom log directory)
+            register_logs: Register written logs in processed_logs for the event detector
+            health_check: Deferred health check from prepare_video(); trigger-area frames in
+                its window are fed to it, segments reach the event detector only once it
+                passed, and sampling stops (its segments are dropped) if the result is CRITICAL
+
+        Returns:
+            str: Path of the last segment log written, or None if the video could not be read
+        """
+        packing_area, qr_trigger_area = get_packing_area_func(camera_name)
+        # Decode only the bounding box of both ROIs; each ROI is then a view into it
+        video = create_frame_source(video_file, roi=union_roi(packing_area, qr_trigger_area))
+        if not video.open():
+            self.logger.error(f"Failed to open video '{video_file}'")
+            return None
+        origin_x, origin_y = video.origin
+        self.mvd_tracker.reset()
+        self.roi_gate.reset()
+        self.roi_gate.reset_stats()
+        self.trigger_presence.reset()
+        self.trigger_presence.reset_stats()
+        # The sampler's trigger crop can stand in for the health check's own decode only if it is the same ROI
+        health_session = None
+        if health_check and qr_trigger_area:
+            roi = health_check['window']['trigger_roi']
+            if tuple(qr_trigger_area) == (roi['x'], roi['y'], roi['w'], roi['h']):
+                health_session = health_check['session']
+        start_time_obj = self._get_video_start_time(video_file, camera_name)
+        total_seconds = self.get_video_duration(video_file)
+        if total_seconds is None:
+            self.logger.error(f"Failed to get duration of video {video_file}")
+            video.close()
+            return None
+        self.logger.info(f"Video duration {video_file}: {total_seconds} seconds")
+        video_name = os.path.splitext(os.path.basename(video_file))[0]
+        segment_duration = 300
+        # Determine 300s segments containing [start_time, end_time]
+        end_time = total_seconds if end_time is None else min(end_time, total_seconds)
+        start_segment = math.floor(start_time / segment_duration) * segment_duration
+        end_segment = math.ceil(end_time / segment_duration) * segment_duration
+        current_start_second = start_segment
+        current_end_second = min(current_start_second + segment_duration, end_segment)
+
+        # Get log directory based on program type
+        camera_log_dir = log_dir or self._get_log_directory(video_file, camera_name)
+        os.makedirs(camera_log_dir, exist_ok=True)
+        log_file = os.path.join(camera_log_dir, f"log_{video_name}_{current_start_second:04d}_{current_end_second:04d}.txt")
+        # Until a deferred health check is decided its segments are held back, so a
+        # CRITICAL result leaves nothing for the event detector (as when it ran first)
+        deferred = [] if register_logs and health_check and not health_check.get('done') else None
+        log_file_handle = self._update_log_file(log_file, current_start_second, current_end_second, start_time_obj + timedelta(seconds=current_start_second), camera_name, video_file, register=register_logs, deferred=deferred)
+        # Start from frame at start_time
+        start_frame = int(start_time * self.fps)
+        end_frame = int(end_time * self.fps)
+        frame_states = []
+        mvd_list = []
+        last_state = None
+        last_mvd = ""
+        analysed_frames = 0
+        # Only every frame_interval-th frame is retrieved; frames in between are
+        # skipped by the frame source and never converted or copied. The adaptive
+        # schedule stretches that step while the voted state is stable.
+        schedule = None
+        if ADAPTIVE_CONFIG['enabled']:
+            min_interval, max_interval = self._load_sampling_bounds(camera_name, frame_interval)
+            schedule = AdaptiveSchedule(start_frame, end_frame, min_interval, max_interval)
+            frames = schedule.frames(video)
+        else:
+            frames = video.iter_every_nth(start_frame, end_frame, frame_interval)
+        for frame_count, frame in frames:
+            # Crop 2 separate regions (numpy views, no copy), relative to the decoded ROI
+            frame_packing = None
+            frame_trigger = None
+            packing_offset = None
+            frame_height, frame_width = frame.shape[:2]
+
+            # Crop packing area (for MVD detection)
+            if packing_area:
+                x, y, w, h = packing_area
+                x, y = x - origin_x, y - origin_y
+                if w > 0 and h > 0 and x >= 0 and y >= 0 and y + h <= frame_height and x + w <= frame_width:
+                    frame_packing = frame[y:y + h, x:x + w]
+                    packing_offset = (packing_area[0], packing_area[1])  # Full-frame offset for bbox calculation
+                else:
+                    self.logger.warning(f"Invalid packing_area for frame {frame_count}: {packing_area}, frame size: {frame_width}x{frame_height}")
+
+            # Crop trigger area (for TimeGo detection)
+            if qr_trigger_area:
+                x, y, w, h = qr_trigger_area
+                x, y = x - origin_x, y - origin_y
+                if w > 0 and h > 0 and x >= 0 and y >= 0 and y + h <= frame_height and x + w <= frame_width:
+                    frame_trigger = frame[y:y + h, x:x + w]
+                else:
+                    self.logger.warning(f"Invalid qr_trigger_area for frame {frame_count}: {qr_trigger_area}, frame size: {frame_width}x{frame_height}")
+
+            if (frame_packing is None or frame_packing.size == 0) and (frame_trigger is None or frame_trigger.size == 0):
+                self.logger.warning(f"Both ROI frames empty for frame {frame_count}, skipping")
+                continue
+
+            analysed_frames += 1
+            # Process both ROIs separately (with packing_offset for bbox calculation)
+            state, mvd, mvd_bbox, boundary_points = process_frame_func(frame_packing, frame_trigger, frame_count, packing_offset)
+            second_in_video = (frame_count - 1) / self.fps
+
+            if schedule is not None and not schedule.observe(state != last_state or bool(mvd and mvd != last_mvd)):
+                # Sparse gap before this sample is re-sampled densely; restart the vote window there
+                frame_states = []
+                mvd_list = []
+                continue
+
+            if health_session is not None and not health_check.get('done'):
+                if frame_trigger is not None:
+                    health_session.feed(second_in_video, frame_trigger)
+                if health_session.window_complete or second_in_video > health_session.window_end:
+                    healthy = self._finish_health_check(video_file, camera_name, health_check)
+                    if deferred is not None:
+                        self._release_segments(deferred, camera_name, healthy)
+                        deferred = None
+                    if not healthy:
+                        self.logger.error(f"[HEALTH] Stopping sampling of {video_file} due to CRITICAL health check")
+                        log_file_handle.close()
+                        video.close()
+                        return None
+            second = round(second_in_video)
+
+            # Cache successful bbox and update QR size
+            if mvd and mvd_bbox:
+                self._update_mvd_qr_size(mvd_bbox)  # Auto-update QR size from successful decode
+            if second >= current_end_second and second < end_time:
+                log_file_handle.close()
+                current_start_second = current_end_second
+                current_end_second = min(current_start_second + segment_duration, end_segment)
+
+                # Get log directory based on program type
+                camera_log_dir = log_dir or self._get_log_directory(video_file, camera_name)
+                os.makedirs(camera_log_dir, exist_ok=True)
+                log_file = os.path.join(camera_log_dir, f"log_{video_name}_{current_start_second:04d}_{current_end_second:04d}.txt")
+                log_file_handle = self._update_log_file(log_file, current_start_second, current_end_second, start_time_obj + timedelta(seconds=current_start_second), camera_name, video_file, register=register_logs, deferred=deferred)
+            if second >= start_time and second <= end_time:
+                # Ghi MVD ngay nếu có và khác last_mvd
+                if mvd and mvd != last_mvd:
+                    # Record MVD with its bbox if available
+                    if mvd_bbox is not None:
+                        self.logger.info(f"Log second {second}: state={state}, mvd={mvd}, bbox={mvd_bbox}")
+                    else:
+                        self.logger.info(f"Log second {second}: state={state}, mvd={mvd}")
+
+                    log_file_handle.record(second, state, mvd, mvd_bbox)
+                    last_mvd = mvd
+                # Tiếp tục thu thập trạng thái cho final_state
+                frame_states.append(state)
+                mvd_list.append(mvd)
+                if len(frame_states) == 5:
+                    on_count = sum(1 for s in frame_states if s == "On")
+                    off_count = sum(1 for s in frame_states if s == "Off")
+                    frame_states_str = " ".join(frame_states).lower()
+                    final_state = None
+                    if on_count >= 3:
+                        final_state = "On"
+                    elif off_count == 5:
+                        final_state = "Off"
+                    if final_state:
+                        if final_state != last_state:
+                            # Detect Ts and Te transitions (kept for future use)
+                            if final_state == "Off":
+                                self.logger.debug(f"Event transition: Ts at second {second}")
+                            elif final_state == "On":
+                                self.logger.debug(f"Event transition: Te at second {second}")
+
+                            log_file_handle.record(second, final_state)
+                            self.logger.info(f"Log second {second}: {frame_states_str}: {final_state}")
+                            # Jump logic removed for safety - scan all frames sequentially
+                            last_state = final_state
+                    else:
+                        self.logger.info(f"Skipped second {second}: {frame_states_str}, on_count={on_count}, off_count={off_count}")
+                    frame_states = []
+                    mvd_list = []
+        log_file_handle.close()
+        if deferred is not None:
+            # Window outside the sampled range: missing samples are decoded by the session
+            healthy = self._finish_health_check(video_file, camera_name, health_check)
+            self._release_segments(deferred, camera_name, healthy)
+            if not healthy:
+                self.logger.error(f"[HEALTH] Discarding sampled logs of {video_file} due to CRITICAL health check")
+                video.close()
+                return None
+        self.last_frame_stats = {
+            "decoded": video.stats["grabbed"] + video.stats["retrieved"],
+            "retrieved": video.stats["retrieved"],
+            "analysed": analysed_frames,
+            "seeks": video.stats["seeks"],
+            "backend": video.backend,
+            "roi_skip_ratio": self.roi_gate.skip_ratio(),
+            "adaptive": dict(schedule.stats) if schedule is not None else None,
+        }
+        video.close()
+        self.logger.info(
+            f"Frame stats for {video_file}: decoded={self.last_frame_stats['decoded']}, "
+            f"retrieved={self.last_frame_stats['retrieved']}, analysed={analysed_frames}, backend={video.backend}, "
+            f"roi_skip_ratio={self.last_frame_stats['roi_skip_ratio']}, adaptive={self.last_frame_stats['adaptive']}"
+        )
+        if tiered_decoder.mode != "off":
+            self.logger.info(f"Tiered QR decoder stats: {tiered_decoder.stats()}")
+        self.logger.info(f"MVD tracker stats: {self.mvd_tracker.stats}")
+        self.logger.info(f"Size-aware decode stats: {size_aware_decoder.stats()}")
+        self.logger.info(f"Trigger presence stats: {self.trigger_presence.stats}")
+        self.logger.info(f"Log writer stats: {log_writer.stats()}")
+        return log_file
@@ -0,0 +1,490 @@
+"""
+Frame sources for V_Track video analysis.
+
+A frame source walks a video forward at the caller's sampling rate without
+re-opening the file or seeking for every sample, and optionally returns only a
+region of interest, scaled and/or in grayscale. Two backends share the same
+interface so they can be swapped and benchmarked against each other:
+
+- OpenCVFrameSource: cv2.VideoCapture. Stepped-over frames are only grab()'ed,
+  sampled frames are retrieve()'d; the ROI is a numpy view of the full frame.
+- FFmpegFrameSource: an ffmpeg subprocess with `-ss` and `-vf crop/scale/select`
+  writing fixed-size rawvideo (`-pix_fmt gray|bgr24`) to a pipe, read into
+  preallocated numpy buffers. Cropping happens in the decoder process, so only
+  ROI-sized frames ever cross into Python.
+
+Both backends reposition (seek / restart ffmpeg) only when the requested frame
+lies behind the read position or further ahead than the seek threshold.
+
+Usage:
+    source = create_frame_source(video_path, roi=(x, y, w, h))
+    if source.open():
+        for frame_number, frame in source.iter_every_nth(start_frame, end_frame, 5):
+            ...
+        source.close()
+
+The backend defaults to VTRACK_FRAME_SOURCE ("opencv" | "ffmpeg"), else opencv.
+"""
+
+import cv2
+import os
+import json
+import logging
+import subprocess
+import numpy as np
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+# Forward gaps shorter than this are walked with grab(); longer ones are seeked.
+# Matches a typical 1-2s GOP of the IP cameras we ingest.
+DEFAULT_SEEK_THRESHOLD_SEC = 2.0
+DEFAULT_FPS = 30
+DEFAULT_BACKEND = "opencv"
+SUPPORTED_PIX_FMTS = ("bgr24", "gray")
+
+
+def probe_keyframe_interval(video_path, probe_seconds=60):
+    """
+    Estimate the keyframe (GOP) interval of a video in seconds using ffprobe.
+
+    Only the first `probe_seconds` of keyframes are inspected. Returns None if
+    ffprobe is unavailable or the stream exposes fewer than two keyframes.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time", "-read_intervals", f"%+{probe_seconds}",
+        "-of", "csv=p=0", video_path
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+        times = []
+        for line in result.stdout.splitlines():
+            value = line.strip().rstrip(',')
+            if value and value != "N/A":
+                times.append(float(value))
+    except Exception as e:
+        logger.warning(f"[FRAME-SOURCE] Keyframe probe failed for {video_path}: {e}")
+        return None
+
+    gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+    if not gaps:
+        return None
+    return gaps[len(gaps) // 2]
+
+
+def _parse_rate(rate):
+    """Parse an ffprobe rate such as '30000/1001' into a float (0.0 if unknown)."""
+    try:
+        num, _, den = str(rate).partition('/')
+        return float(num) / float(den) if den else float(num)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+class FrameSource(ABC):
+    """
+    Common interface of the frame source backends.
+
+    Args:
+        video_path: Video file to read
+        roi: Optional (x, y, w, h) in full-frame coordinates; frames are cropped to it.
+             An ROI outside the frame is ignored (full frame) with a warning.
+        scale: Optional (width, height) the (cropped) frame is resized to
+        pix_fmt: "bgr24" (default) or "gray"
+        seek_threshold_sec: Forward gap above which the source repositions instead of reading through
+    """
+
+    backend = "base"
+
+    def __init__(self, video_path, roi=None, scale=None, pix_fmt="bgr24",
+                 seek_threshold_sec=DEFAULT_SEEK_THRESHOLD_SEC):
+        if pix_fmt not in SUPPORTED_PIX_FMTS:
+            raise ValueError(f"Unsupported pix_fmt: {pix_fmt}")
+        self.video_path = video_path
+        self.roi = tuple(int(v) for v in roi) if roi else None
+        self.scale = tuple(int(v) for v in scale) if scale else None
+        self.pix_fmt = pix_fmt
+        self.seek_threshold_sec = seek_threshold_sec
+        self._position = 0          # index of the next frame the decoder will return
+        self._last_index = None
+        self._last_frame = None
+        self.fps = DEFAULT_FPS
+        self.frame_count = 0
+        self.duration = 0.0
+        self.width = 0
+        self.height = 0
+        self.stats = {"grabbed": 0, "retrieved": 0, "seeks": 0}
+
+    # ---- backend hooks -------------------------------------------------
+    @abstractmethod
+    def open(self):
+        """Open the video and fill fps / frame_count / size. Returns False if it cannot be read."""
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Release the decoder."""
+        pass
+
+    @abstractmethod
+    def read_frame(self, frame_index):
+        """Return the frame at frame_index, or None past the end of the video."""
+        pass
+
+    # ---- shared behaviour ----------------------------------------------
+    def __enter__(self):
+        if not self.is_open and not self.open():
+            raise IOError(f"Cannot open video: {self.video_path}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    @property
+    def is_open(self):
+        return False
+
+    @property
+    def seek_threshold_frames(self):
+        return max(1, int(self.seek_threshold_sec * self.fps))
+
+    @property
+    def origin(self):
+        """Top-left (x, y) of returned frames in full-frame coordinates."""
+        return (self.roi[0], self.roi[1]) if self.roi else (0, 0)
+
+    def _validate_roi(self):
+        if not self.roi:
+            return
+        x, y, w, h = self.roi
+        if w <= 0 or h <= 0 or x < 0 or y < 0 or (self.width and x + w > self.width) or (self.height and y + h > self.height):
+            logger.warning(f"[FRAME-SOURCE] ROI {self.roi} outside frame {self.width}x{self.height}, using full frame")
+            self.roi = None
+
+    def frame_index_at(self, seconds):
+        """Frame index for a timestamp, same mapping as the seek-based helpers."""
+        return int(seconds * self.fps)
+
+    def read_at(self, seconds):
+        """Return the frame shown at `seconds`, or None."""
+        return self.read_frame(self.frame_index_at(seconds))
+
+    def iter_every_nth(self, start_frame, end_frame, interval):
+        """
+        Yield (frame_number, frame) for every interval-th frame in [start_frame, end_frame).
+
+        frame_number is 1-based (index + 1), matching the `frame_count % interval`
+        convention of the frame samplers. Frames in between are never converted.
+        """
+        interval = max(1, int(interval))
+        first_index = start_frame + (-(start_frame + 1)) % interval
+        for index in range(first_index, end_frame, interval):
+            frame = self.read_frame(index)
+            if frame is None:
+                return
+            yield index + 1, frame
+
+    def iter_timestamps(self, timestamps):
+        """Yield (timestamp, frame) for each timestamp; frame is None when unreadable."""
+        for timestamp in timestamps:
+            yield timestamp, self.read_at(timestamp)
+
+
+class OpenCVFrameSource(FrameSource):
+    """Forward-reading frame source backed by cv2.VideoCapture."""
+
+    backend = "opencv"
+
+    def __init__(self, video_path, roi=None, scale=None, pix_fmt="bgr24",
+                 seek_threshold_sec=DEFAULT_SEEK_THRESHOLD_SEC):
+        super().__init__(video_path, roi, scale, pix_fmt, seek_threshold_sec)
+        self._cap = None
+
+    @property
+    def is_open(self):
+        return self._cap is not None
+
+    def open(self):
+        """Open the video. Returns False if OpenCV cannot read it."""
+        self._cap = cv2.VideoCapture(self.video_path)
+        if not self._cap.isOpened():
+            logger.error(f"[FRAME-SOURCE] Cannot open video: {self.video_path}")
+            self._cap = None
+            return False
+
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else DEFAULT_FPS
+        self.frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.duration = self.frame_count / self.fps if self.frame_count > 0 else 0.0
+        self.width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        self.height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        self._validate_roi()
+        self._position = 0
+        return True
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self._last_index = None
+        self._last_frame = None
+
+    def _shape(self, frame):
+        """Apply ROI (as a view), scale and pixel format to a decoded frame."""
+        if self.roi:
+            x, y, w, h = self.roi
+            frame = frame[y:y + h, x:x + w]
+        if self.scale:
+            frame = cv2.resize(frame, self.scale, interpolation=cv2.INTER_AREA)
+        if self.pix_fmt == "gray":
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def read_frame(self, frame_index):
+        """Return the frame at frame_index, or None past the end of the video."""
+        if self._cap is None:
+            raise RuntimeError("Frame source is not open")
+        if frame_index < 0:
+            frame_index = 0
+
+        # Same frame requested twice (e.g. rounded timestamps colliding)
+        if frame_index == self._last_index:
+            return self._last_frame
+
+        gap = frame_index - self._position
+        if gap < 0 or gap > self.seek_threshold_frames:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            self._position = frame_index
+            self.stats["seeks"] += 1
+
+        while self._position < frame_index:
+            if not self._cap.grab():
+                return None
+            self._position += 1
+            self.stats["grabbed"] += 1
+
+        if not self._cap.grab():
+            return None
+        self._position += 1
+        ret, frame = self._cap.retrieve()
+        if not ret:
+            return None
+        self.stats["retrieved"] += 1
+
+        frame = self._shape(frame)
+        self._last_index = frame_index
+        self._last_frame = frame
+        return frame
+
+
+class FFmpegFrameSource(FrameSource):
+    """
+    Frame source backed by an ffmpeg rawvideo pipe with decoder-side crop/scale.
+
+    Returned frames live in a small ring of preallocated buffers and are
+    overwritten two reads later; copy a frame to keep it longer.
+    """
+
+    backend = "ffmpeg"
+    RING_SIZE = 2
+
+    def __init__(self, video_path, roi=None, scale=None, pix_fmt="bgr24",
+                 seek_threshold_sec=DEFAULT_SEEK_THRESHOLD_SEC):
+        super().__init__(video_path, roi, scale, pix_fmt, seek_threshold_sec)
+        self._proc = None
+        self._opened = False
+        self._select_interval = None
+        self._buffers = []
+        self._ring_index = 0
+        self._scratch = None
+        self._frame_shape = None
+        self._frame_bytes = 0
+
+    @property
+    def is_open(self):
+        return self._opened
+
+    def open(self):
+        """Probe the video with ffprobe and allocate frame buffers. Returns False on failure."""
+        cmd = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,r_frame_rate,avg_frame_rate,nb_frames:format=duration",
+            "-of", "json", self.video_path
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+            info = json.loads(result.stdout or "{}")
+            stream = info["streams"][0]
+        except Exception as e:
+            logger.error(f"[FRAME-SOURCE] Cannot probe video {self.video_path}: {e}")
+            return False
+
+        self.width = int(stream.get("width") or 0)
+        self.height = int(stream.get("height") or 0)
+        fps = _parse_rate(stream.get("r_frame_rate")) or _parse_rate(stream.get("avg_frame_rate"))
+        self.fps = fps if fps > 0 else DEFAULT_FPS
+        duration = float(info.get("format", {}).get("duration") or 0.0)
+        nb_frames = int(stream.get("nb_frames") or 0) if str(stream.get("nb_frames", "")).isdigit() else 0
+        self.frame_count = nb_frames or int(duration * self.fps)
+        self.duration = self.frame_count / self.fps if self.frame_count > 0 else duration
+        if not self.width or not self.height:
+            logger.error(f"[FRAME-SOURCE] Video has no decodable stream: {self.video_path}")
+            return False
+
+        self._validate_roi()
+        out_w, out_h = self.scale if self.scale else (self.roi[2], self.roi[3]) if self.roi else (self.width, self.height)
+        channels = 1 if self.pix_fmt == "gray" else 3
+        self._frame_shape = (out_h, out_w) if channels == 1 else (out_h, out_w, channels)
+        self._frame_bytes = out_w * out_h * channels
+        self._buffers = [np.empty(self._frame_shape, dtype=np.uint8) for _ in range(self.RING_SIZE)]
+        self._scratch = np.empty(self._frame_shape, dtype=np.uint8)
+        self._opened = True
+        self._position = 0
+        return True
+
+    def close(self):
+        self._stop_process()
+        self._opened = False
+        self._last_index = None
+        self._last_frame = None
+
+    def _filters(self, select_offset=None, select_interval=None):
+        filters = []
+        if self.roi:
+            x, y, w, h = self.roi
+            filters.append(f"crop={w}:{h}:{x}:{y}")
+        if self.scale:
+            filters.append(f"scale={self.scale[0]}:{self.scale[1]}")
+        if select_interval:
+            filters.append(f"select=not(mod(n+{select_offset}\\,{select_interval}))")
+        return filters
+
+    def _start_process(self, frame_index, select_offset=None, select_interval=None):
+        self._stop_process()
+        # Half a frame early so frame_index itself is the first frame out of the decoder
+        seek_seconds = max(0.0, (frame_index - 0.5) / self.fps)
+        cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+        if seek_seconds > 0:
+            cmd += ["-ss", f"{seek_seconds:.6f}"]
+        cmd += ["-i", self.video_path, "-map", "0:v:0", "-an", "-sn"]
+        filters = self._filters(select_offset, select_interval)
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        cmd += ["-vsync", "0", "-pix_fmt", self.pix_fmt, "-f", "rawvideo", "pipe:1"]
+
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                      bufsize=self._frame_bytes * 4)
+        self._position = frame_index
+        self._select_interval = select_interval
+        self.stats["seeks"] += 1
+
+    def _stop_process(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdout.close()
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+            except Exception as e:
+                logger.debug(f"[FRAME-SOURCE] Error stopping ffmpeg: {e}")
+            self._proc = None
+        self._select_interval = None
+
+    def _read_into(self, buffer):
+        """Fill buffer with the next frame from the pipe. False at end of stream."""
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < self._frame_bytes:
+            count = self._proc.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def _next_buffer(self):
+        buffer = self._buffers[self._ring_index]
+        self._ring_index = (self._ring_index + 1) % self.RING_SIZE
+        return buffer
+
+    def read_frame(self, frame_index):
+        """Return the frame at frame_index, or None past the end of the video."""
+        if not self._opened:
+            raise RuntimeError("Frame source is not open")
+        if frame_index < 0:
+            frame_index = 0
+
+        if frame_index == self._last_index:
+            return self._last_frame
+
+        gap = frame_index - self._position
+        if self._proc is None or self._select_interval or gap < 0 or gap > self.seek_threshold_frames:
+            self._start_process(frame_index)
+
+        # Frames in between are decoded by ffmpeg but only drained (ROI-sized) from the pipe
+        while self._position < frame_index:
+            if not self._read_into(self._scratch):
+                return None
+            self._position += 1
+            self.stats["grabbed"] += 1
+
+        buffer = self._next_buffer()
+        if not self._read_into(buffer):
+            return None
+        self._position += 1
+        self.stats["retrieved"] += 1
+
+        self._last_index = frame_index
+        self._last_frame = buffer
+        return buffer
+
+    def iter_every_nth(self, start_frame, end_frame, interval):
+        """Same contract as FrameSource.iter_every_nth; skipped frames are dropped inside ffmpeg."""
+        if not self._opened:
+            raise RuntimeError("Frame source is not open")
+        interval = max(1, int(interval))
+        first_index = start_frame + (-(start_frame + 1)) % interval
+        if first_index >= end_frame:
+            return
+        # Decoder frame n (counted from start_frame) is kept when (start_frame + n + 1) % interval == 0
+        self._start_process(start_frame, (start_frame + 1) % interval, interval)
+
+        index = first_index
+        while index < end_frame:
+            buffer = self._next_buffer()
+            if not self._read_into(buffer):
+                break
+            self.stats["retrieved"] += 1
+            self.stats["grabbed"] += interval - 1
+            self._last_index = index
+            self._last_frame = buffer
+            yield index + 1, buffer
+            index += interval
+        self._stop_process()
+
+
+def create_frame_source(video_path, roi=None, scale=None, pix_fmt="bgr24",
+                        seek_threshold_sec=DEFAULT_SEEK_THRESHOLD_SEC, backend=None):
+    """
+    Build a frame source for video_path (not yet opened).
+
+    backend: "opencv" or "ffmpeg"; defaults to the VTRACK_FRAME_SOURCE environment variable.
+    """
+    backend = (backend or os.getenv('VTRACK_FRAME_SOURCE', DEFAULT_BACKEND)).lower()
+    if backend == "ffmpeg":
+        return FFmpegFrameSource(video_path, roi, scale, pix_fmt, seek_threshold_sec)
+    if backend != "opencv":
+        logger.warning(f"[FRAME-SOURCE] Unknown backend '{backend}', using opencv")
+    return OpenCVFrameSource(video_path, roi, scale, pix_fmt, seek_threshold_sec)
+
+
+def union_roi(*rois):
+    """Bounding box (x, y, w, h) of all given ROIs, ignoring empty ones; None if there are none."""
+    boxes = [tuple(int(v) for v in roi) for roi in rois if roi and roi[2] > 0 and roi[3] > 0]
+    if not boxes:
+        return None
+    x1 = min(b[0] for b in boxes)
+    y1 = min(b[1] for b in boxes)
+    x2 = max(b[0] + b[2] for b in boxes)
+    y2 = max(b[1] + b[3] for b in boxes)
+    return (x1, y1, x2 - x1, y2 - y1)
@@ -469,6 +469,72 @@ def detect_hands_at_time(video_path: str, time_seconds: float, roi_config: Optio
             "error": error_msg
         }
 
+def clamp_roi_to_frame(roi_config: Dict[str, Any], frame_width: int, frame_height: int) -> tuple:
+    """Clamp an ROI config to the frame; returns (x, y, w, h) with w, h >= 1"""
+    x_safe = max(0, min(roi_config["x"], frame_width - 1))
+    y_safe = max(0, min(roi_config["y"], frame_height - 1))
+    w_safe = max(1, min(roi_config["w"], frame_width - x_safe))
+    h_safe = max(1, min(roi_config["h"], frame_height - y_safe))
+    return x_safe, y_safe, w_safe, h_safe
+
+def build_hand_detection(results, timestamp: float, roi_box: tuple, frame_width: int, frame_height: int) -> Optional[Dict[str, Any]]:
+    """
+    Convert MediaPipe Hands results on an ROI crop into a preprocessing timeline entry
+
+    Args:
+        results: hands.process() output for the ROI crop
+        timestamp (float): Video time of the frame
+        roi_box (tuple): Clamped ROI (x, y, w, h) the crop was taken from
+        frame_width (int), frame_height (int): Original frame size
+
+    Returns:
+        dict: {'timestamp', 'landmarks', 'confidence', 'hands_detected'} or None if no hands
+    """
+    if not results.multi_hand_landmarks:
+        return None
+
+    x_safe, y_safe, w_safe, h_safe = roi_box
+    landmarks_list = []
+    confidence_scores = []
+
+    for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
+        hand_points = []
+
+        # Extract landmarks with TC Gốc coordinate transformation
+        for landmark in hand_landmarks.landmark:
+            # ✅ CLAMP MEDIAPIPE COORDINATES - Prevent landmarks outside ROI from causing invalid coordinates
+            landmark_x_clamped = max(0.0, min(1.0, landmark.x))
+            landmark_y_clamped = max(0.0, min(1.0, landmark.y))
+
+            # MediaPipe runs on ROI - transform to TC Gốc (pixel thực), kept inside the video frame
+            x_orig = max(0, min(frame_width - 1, x_safe + landmark_x_clamped * w_safe))
+            y_orig = max(0, min(frame_height - 1, y_safe + landmark_y_clamped * h_safe))
+
+            hand_points.append({
+                'x': landmark.x,      # ROI-relative coordinates [0,1]
+                'y': landmark.y,
+                'z': landmark.z,
+                'x_orig': x_orig,     # TC Gốc - pixel thực trong video gốc
+                'y_orig': y_orig,     # TC Gốc - pixel thực trong video gốc
+                'x_norm': x_orig / frame_width,   # Reference normalized coordinates
+                'y_norm': y_orig / frame_height   # Reference normalized coordinates
+            })
+
+        landmarks_list.append(hand_points)
+
+        # Get confidence from handedness if available
+        if results.multi_handedness and idx < len(results.multi_handedness):
+            confidence_scores.append(results.multi_handedness[idx].classification[0].score)
+        else:
+            confidence_scores.append(0.85)  # Default confidence
+
+    return {
+        'timestamp': round(timestamp, 2),  # Round to 0.01s precision
+        'landmarks': landmarks_list,
+        'confidence': float(sum(confidence_scores) / len(confidence_scores)),
+        'hands_detected': len(landmarks_list)
+    }
+
 def preprocess_video_hands(video_path: str, roi_config: Dict[str, Any], fps: int = 5, progress_callback=None) -> Dict[str, Any]:
     """
     Pre-process entire video for hand detection at specified fps
@@ -540,12 +606,9 @@ def preprocess_video_hands(video_path: str, roi_config: Dict[str, Any], fps: int
                         # ✅ CHECK CANCELLATION DIRECTLY - NO DEPENDENCY ON PROGRESS CALLBACK
                         # Check if this processing job has been cancelled
                         try:
-                            from blueprints.simple_hand_detection_bp import preprocessing_progress
+                            from blueprints.simple_hand_detection_bp import preprocessing_progress, generate_cache_key
                             # Generate cache key to check status (same logic as in blueprint)
-                            import hashlib
-                            roi_str = f"{roi_config['x']}_{roi_config['y']}_{roi_config['w']}_{roi_config['h']}"
-                            cache_input = f"{video_path}_{roi_str}"
-                            cache_key = hashlib.md5(cache_input.encode()).hexdigest()
+                            cache_key = generate_cache_key(video_path, roi_config, fps)
                             
                             if (cache_key in preprocessing_progress and 
                                 preprocessing_progress[cache_key].get('cancelled', False)):
@@ -619,11 +682,8 @@ def preprocess_video_hands(video_path: str, roi_config: Dict[str, Any], fps: int
                             
                         # Apply ROI
                         frame_height, frame_width = frame.shape[:2]
-                        x_safe = max(0, min(x, frame_width - 1))
-                        y_safe = max(0, min(y, frame_height - 1))
-                        w_safe = max(1, min(w, frame_width - x_safe))
-                        h_safe = max(1, min(h, frame_height - y_safe))
-                        
+                        roi_box = clamp_roi_to_frame(roi_config, frame_width, frame_height)
+                        x_safe, y_safe, w_safe, h_safe = roi_box
                         roi_frame = frame[y_safe:y_safe+h_safe, x_safe:x_safe+w_safe]
                         
                         # Convert to RGB for MediaPipe
@@ -632,74 +692,11 @@ def preprocess_video_hands(video_path: str, roi_config: Dict[str, Any], fps: int
                         # Process frame
                         results = hands.process(rgb_frame)
                         
-                        # Extract landmarks if hands detected
-                        if results.multi_hand_landmarks and len(results.multi_hand_landmarks) > 0:
-                            landmarks_list = []
-                            confidence_scores = []
-                            
-                            for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                                hand_points = []
-                                
-                                # Extract landmarks with TC Gốc coordinate transformation
-                                for landmark_idx, landmark in enumerate(hand_landmarks.landmark):
-                                    # ✅ CLAMP MEDIAPIPE COORDINATES - Prevent landmarks outside ROI from causing invalid coordinates
-                                    landmark_x_clamped = max(0.0, min(1.0, landmark.x))
-                                    landmark_y_clamped = max(0.0, min(1.0, landmark.y))
-                                    
-                                    # Step 2: MediaPipe runs on ROI - transform to TC Gốc (pixel thực)
-                                    x_orig = x_safe + landmark_x_clamped * w_safe  # Pixel thực trong video gốc
-                                    y_orig = y_safe + landmark_y_clamped * h_safe  # Pixel thực trong video gốc
-                                    
-                                    # ✅ FINAL BOUNDARY CHECK - Ensure coordinates stay within video frame
-                                    x_orig = max(0, min(frame_width - 1, x_orig))
-                                    y_orig = max(0, min(frame_height - 1, y_orig))
-                                    
-                                    # Calculate normalized coordinates for reference/debugging
-                                    full_x_norm = x_orig / frame_width
-                                    full_y_norm = y_orig / frame_height
-                                    
-                                    # Debug logging for first landmark of first hand
-                                    if idx == 0 and landmark_idx == 0:
-                                        logging.info(f"TC Gốc Backend Transform - Timestamp: {timestamp:.2f}s")
-                                        logging.info(f"ROI_orig: x={x_safe}, y={y_safe}, w={w_safe}, h={h_safe}")
-                                        logging.info(f"MediaPipe ROI coords: x={landmark.x:.3f}, y={landmark.y:.3f}")
-                                        if landmark.x != landmark_x_clamped or landmark.y != landmark_y_clamped:
-                                            logging.info(f"✅ CLAMPED MediaPipe coords: x={landmark_x_clamped:.3f}, y={landmark_y_clamped:.3f}")
-                                        logging.info(f"TC Gốc pixel: x={x_orig:.1f}, y={y_orig:.1f}")
-                                        logging.info(f"Video size: {frame_width}x{frame_height}")
-                                        logging.info(f"Normalized reference: x={full_x_norm:.3f}, y={full_y_norm:.3f}")
-                                    
-                                    hand_points.append({
-                                        'x': landmark.x,      # ROI-relative coordinates [0,1]
-                                        'y': landmark.y,
-                                        'z': landmark.z,
-                                        'x_orig': x_orig,     # TC Gốc - pixel thực trong video gốc
-                                        'y_orig': y_orig,     # TC Gốc - pixel thực trong video gốc
-                                        'x_norm': full_x_norm,  # Reference normalized coordinates
-                                        'y_norm': full_y_norm   # Reference normalized coordinates
-                                    })
-                                
-                                landmarks_list.append(hand_points)
-                                
-                                # Get confidence from handedness if available
-                                if results.multi_handedness and idx < len(results.multi_handedness):
-                                    confidence = results.multi_handedness[idx].classification[0].score
-                                    confidence_scores.append(confidence)
-                                else:
-                                    confidence_scores.append(0.85)  # Default confidence
-                            
-                            # Calculate overall confidence
-                            overall_confidence = float(sum(confidence_scores) / len(confidence_scores))
-                            
-                            # Only add to detections if hands found
-                            detections.append({
-                                'timestamp': round(timestamp, 2),  # Round to 0.01s precision
-                                'landmarks': landmarks_list,
-                                'confidence': overall_confidence,
-                                'hands_detected': len(landmarks_list)
-                            })
-                            
-                            logging.debug(f"Timestamp {timestamp:.2f}s: {len(landmarks_list)} hands detected")
+                        # Extract landmarks if hands detected (only frames with hands are added)
+                        detection = build_hand_detection(results, timestamp, roi_box, frame_width, frame_height)
+                        if detection:
+                            detections.append(detection)
+                            logging.debug(f"Timestamp {timestamp:.2f}s: {detection['hands_detected']} hands detected")
                         
                         processed_count += 1
                         
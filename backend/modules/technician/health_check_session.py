@@ -0,0 +1,183 @@
+"""
+Health Check Session Module
+One video open + one warm detector for the camera health check and baseline capture
+
+The health check and the Step 4 baseline sample a 3-second window of the
+trigger area at 5fps. Doing that with detect_qr_at_time() meant a new
+VideoCapture, a seek and a detector borrow per sample. A HealthCheckSession
+opens the video once (decoding only the trigger ROI), reads the window
+forward and keeps the calling thread's WeChat detector.
+
+Window frames can also be fed by the frame sampler's first pass
+(expect_window() + feed()); samples that were not fed are decoded on demand.
+
+Usage:
+    with HealthCheckSession(video_path, trigger_roi) as session:
+        results = session.collect_window(start_sec, total_frames=15)
+"""
+
+import cv2
+import logging
+from typing import Dict, List, Optional
+
+from modules.technician.frame_source import OpenCVFrameSource
+from modules.technician.qr_detector import _build_qr_detections
+from modules.technician.qr_detector_pool import detector_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_FPS = 5
+
+
+class HealthCheckSession:
+    """
+    Sequential trigger-area QR sampling for one video.
+
+    Args:
+        video_path: Video file to sample
+        trigger_roi: {"x", "y", "w", "h"} in full-frame coordinates
+        interval_fps: Samples per second of a window (5fps = 0.2s spacing)
+    """
+
+    def __init__(self, video_path: str, trigger_roi: dict, interval_fps: int = DEFAULT_INTERVAL_FPS):
+        self.video_path = video_path
+        self.trigger_roi = trigger_roi
+        self.interval = 1.0 / interval_fps
+        self.source = None
+        self.window_times = []
+        self.window_results = {}
+        self.stats = {"decoded": 0, "fed": 0, "detections": 0}
+
+    # ---- lifecycle -----------------------------------------------------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def open(self) -> bool:
+        """Open the video on first use. Returns False if it cannot be read."""
+        if self.source is not None:
+            return True
+        roi = self.trigger_roi
+        source = OpenCVFrameSource(self.video_path, roi=(roi['x'], roi['y'], roi['w'], roi['h']))
+        if not source.open():
+            return False
+        self.source = source
+        return True
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    # ---- detection -----------------------------------------------------
+    def detect_frame(self, frame_trigger, time_seconds: float) -> dict:
+        """
+        Detect QR codes in an already decoded trigger-area frame
+
+        Returns:
+            dict: Same shape as detect_qr_at_time()
+        """
+        if frame_trigger is None or frame_trigger.size == 0:
+            return {"success": False, "error": "Empty ROI frame", "timestamp": time_seconds}
+        if len(frame_trigger.shape) == 2:
+            frame_trigger = cv2.cvtColor(frame_trigger, cv2.COLOR_GRAY2BGR)
+
+        # Detector bound to this thread: warm after the first sample, no borrow per frame
+        texts, points = detector_pool.thread_detector().detectAndDecode(frame_trigger)
+        self.stats["detections"] += 1
+        qr_detections = _build_qr_detections(texts, points, self.trigger_roi['x'], self.trigger_roi['y'])
+        return {
+            'success': True,
+            'qr_detections': qr_detections,
+            'timestamp': time_seconds,
+            'qr_count': len(qr_detections)
+        }
+
+    def detect_at(self, time_seconds: float) -> dict:
+        """Decode the frame at time_seconds (forward read, no reopen) and detect QR codes"""
+        try:
+            if not self.open():
+                return {"success": False, "error": f"Cannot open video: {self.video_path}", "timestamp": time_seconds}
+            if self.source.roi is None:
+                roi = self.trigger_roi
+                return {
+                    "success": False,
+                    "error": f"ROI out of bounds: ROI({roi['x']},{roi['y']},{roi['w']},{roi['h']}) vs Frame({self.source.width},{self.source.height})",
+                    "timestamp": time_seconds
+                }
+
+            frame = self.source.read_at(time_seconds)
+            if frame is None:
+                return {"success": False, "error": f"Cannot read frame at time {time_seconds}s", "timestamp": time_seconds}
+            self.stats["decoded"] += 1
+            return self.detect_frame(frame, time_seconds)
+        except Exception as e:
+            logger.error(f"[HEALTH-SESSION] Error at {time_seconds:.2f}s: {e}")
+            return {"success": False, "error": f"Detection error: {str(e)}", "timestamp": time_seconds}
+
+    def find_first_text(self, text: str, start_sec: float, end_sec: float) -> Optional[float]:
+        """First sample time in [start_sec, end_sec] whose trigger area decodes `text`, or None"""
+        steps = int(round((end_sec - start_sec) / self.interval))
+        for i in range(steps + 1):
+            time_seconds = start_sec + i * self.interval
+            result = self.detect_at(time_seconds)
+            if find_text_bbox(result, text) is not None:
+                return time_seconds
+        return None
+
+    # ---- 3-second window -----------------------------------------------
+    def expect_window(self, start_sec: float, total_frames: int):
+        """Declare the window that feed() should fill (sample times start_sec + i * interval)."""
+        self.window_times = [start_sec + i * self.interval for i in range(total_frames)]
+        self.window_results = {}
+
+    @property
+    def window_end(self) -> float:
+        return self.window_times[-1] if self.window_times else 0.0
+
+    @property
+    def window_complete(self) -> bool:
+        return bool(self.window_times) and len(self.window_results) == len(self.window_times)
+
+    def feed(self, time_seconds: float, frame_trigger) -> bool:
+        """
+        Offer a frame the sampler already decoded. It is used for the nearest
+        pending window sample within half a sample interval.
+
+        Returns:
+            bool: True if the frame was used
+        """
+        if not self.window_times or time_seconds < self.window_times[0] - self.interval / 2 or time_seconds > self.window_end + self.interval / 2:
+            return False
+        index = min(range(len(self.window_times)), key=lambda i: abs(self.window_times[i] - time_seconds))
+        if index in self.window_results or abs(self.window_times[index] - time_seconds) > self.interval / 2:
+            return False
+        self.window_results[index] = self.detect_frame(frame_trigger, self.window_times[index])
+        self.stats["fed"] += 1
+        return True
+
+    def collect_window(self, start_sec: Optional[float] = None, total_frames: Optional[int] = None) -> List[dict]:
+        """
+        Detection results for every window sample, in order. Samples not fed
+        by the sampler are decoded here, reading the video forward once.
+        """
+        if start_sec is not None and total_frames is not None:
+            if not self.window_times or abs(self.window_times[0] - start_sec) > 1e-6 or len(self.window_times) != total_frames:
+                self.expect_window(start_sec, total_frames)
+        for index, time_seconds in enumerate(self.window_times):
+            if index not in self.window_results:
+                self.window_results[index] = self.detect_at(time_seconds)
+        logger.debug(f"[HEALTH-SESSION] Window {self.window_times[0] if self.window_times else 0:.2f}s: {self.stats}")
+        return [self.window_results[index] for index in range(len(self.window_times))]
+
+
+def find_text_bbox(result: Dict, text: str) -> Optional[dict]:
+    """bbox of the first detection decoding `text` ({} if it has none), or None if not found"""
+    if result.get('success') and result.get('qr_detections'):
+        for qr_det in result['qr_detections']:
+            if text in qr_det.get('decoded_text', ''):
+                return qr_det.get('bbox') or {}
+    return None
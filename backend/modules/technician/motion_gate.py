@@ -0,0 +1,70 @@
+"""
+Cheap frame-difference gate for V_Track video analysis.
+
+Compares a downscaled grayscale version of a crop against a reference crop
+and reports whether enough pixels changed to be worth running an expensive
+model (MediaPipe, WeChat QR) on it. The caller decides what the reference is,
+e.g. the last frame a model confirmed as idle.
+"""
+
+import cv2
+import numpy as np
+
+# Width crops are downscaled to before comparison
+DEFAULT_GATE_WIDTH = 160
+# Per-pixel grey level difference that counts as "changed" (filters sensor noise)
+DEFAULT_PIXEL_DELTA = 25
+# Default fraction of changed pixels above which the crop is considered changed
+DEFAULT_CHANGE_THRESHOLD = 0.02
+
+
+class MotionGate:
+    """Frame-difference gate on a downscaled grayscale crop."""
+
+    def __init__(self, threshold=DEFAULT_CHANGE_THRESHOLD, gate_width=DEFAULT_GATE_WIDTH,
+                 pixel_delta=DEFAULT_PIXEL_DELTA):
+        self.threshold = threshold
+        self.gate_width = gate_width
+        self.pixel_delta = pixel_delta
+        self._reference = None
+        self._last_prepared = None
+        self.stats = {"checks": 0, "changed": 0, "unchanged": 0}
+
+    def prepare(self, frame):
+        """Downscaled, blurred grayscale copy of a BGR or gray crop."""
+        if frame is None or frame.size == 0:
+            return None
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
+        height, width = gray.shape[:2]
+        if width > self.gate_width:
+            scaled_height = max(1, int(height * self.gate_width / width))
+            gray = cv2.resize(gray, (self.gate_width, scaled_height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def change_ratio(self, prepared):
+        """Fraction of pixels that differ from the reference (1.0 without a reference)."""
+        if self._reference is None or prepared is None or prepared.shape != self._reference.shape:
+            return 1.0
+        diff = cv2.absdiff(prepared, self._reference)
+        return float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+
+    def has_changed(self, frame):
+        """True if the crop differs from the reference by more than the threshold."""
+        self.stats["checks"] += 1
+        self._last_prepared = self.prepare(frame)
+        changed = self.change_ratio(self._last_prepared) > self.threshold
+        self.stats["changed" if changed else "unchanged"] += 1
+        return changed
+
+    def set_reference(self, frame=None):
+        """Use frame (default: the crop last passed to has_changed) as the new reference."""
+        self._reference = self.prepare(frame) if frame is not None else self._last_prepared
+
+    def reset(self):
+        self._reference = None
+        self._last_prepared = None
+
+    @property
+    def skip_ratio(self):
+        checks = self.stats["checks"]
+        return self.stats["unchanged"] / checks if checks else 0.0
@@ -10,6 +10,9 @@ import traceback
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from modules.technician.frame_source import OpenCVFrameSource
+from modules.technician.qr_detector_pool import detector_pool
+
 # Use var/logs for application logs
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from modules.path_utils import get_logs_dir
@@ -182,9 +185,9 @@ def select_qr_roi(video_path, camera_id, roi_frame_path, step="mvd"):
         def process_roi(video_file, roi_index, x, y, w, h, interval=5):
             nonlocal qr_detected, qr_detected_roi1, qr_detected_roi2, qr_content, trigger_detected
             try:
-                logger.debug(f"[MVD] Initializing WeChatQRCode for ROI {roi_index + 1}")
-                local_detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL)  # type: ignore
-                logger.debug(f"[MVD] WeChatQRCode initialized successfully for ROI {roi_index + 1}")
+                logger.debug(f"[MVD] Acquiring WeChatQRCode for ROI {roi_index + 1}")
+                local_detector = detector_pool.thread_detector()
+                logger.debug(f"[MVD] WeChatQRCode ready for ROI {roi_index + 1}")
             except Exception as e:
                 logger.error(f"[MVD] OpenCV WeChatQRCode error in ROI {roi_index + 1}: {str(e)}\n{traceback.format_exc()}")
                 return
@@ -339,6 +342,85 @@ def select_qr_roi(video_path, camera_id, roi_frame_path, step="mvd"):
         cv2.destroyAllWindows()
         return {"success": False, "error": f"System error: {str(e)}"}
 
+def _build_qr_detections(texts, points, offset_x: int, offset_y: int) -> list:
+    """
+    Convert WeChat detectAndDecode output into detection dicts in full-frame coordinates
+
+    Args:
+        texts: Decoded texts returned by detectAndDecode
+        points: Corner points returned by detectAndDecode (ROI coordinates)
+        offset_x (int): ROI x offset in the original frame
+        offset_y (int): ROI y offset in the original frame
+
+    Returns:
+        list: [{'bbox': {'x', 'y', 'w', 'h'}, 'decoded_text': str, 'confidence': float}]
+    """
+    qr_detections = []
+    if texts and points is not None:
+        for text, box in zip(texts, points):
+            if text and len(box) >= 4:  # Only include non-empty decoded text
+                # Get bounding rectangle from QR corners
+                x_coords = [int(pt[0]) for pt in box]
+                y_coords = [int(pt[1]) for pt in box]
+
+                bbox_x = min(x_coords)
+                bbox_y = min(y_coords)
+                bbox_w = max(x_coords) - bbox_x
+                bbox_h = max(y_coords) - bbox_y
+
+                qr_detections.append({
+                    'bbox': {
+                        'x': bbox_x + offset_x,  # Add ROI offset
+                        'y': bbox_y + offset_y,  # Add ROI offset
+                        'w': bbox_w,
+                        'h': bbox_h
+                    },
+                    'decoded_text': text,
+                    'confidence': 0.95  # WeChat QR detector doesn't provide confidence, use fixed value
+                })
+
+                logger.debug(f"[QR-DETECT] Found QR: '{text}' at bbox({bbox_x + offset_x}, {bbox_y + offset_y}, {bbox_w}, {bbox_h})")
+    return qr_detections
+
+def _detect_qr_in_frame(qr_detector, frame, roi_config: dict) -> dict:
+    """
+    Run WeChat QR detection on the ROI of an already decoded frame
+
+    Returns:
+        dict: {'success': bool, 'qr_detections': list, 'qr_count': int, 'error': str (if error)}
+    """
+    x, y, w, h = roi_config['x'], roi_config['y'], roi_config['w'], roi_config['h']
+
+    frame_h, frame_w = frame.shape[:2]
+    if x < 0 or y < 0 or x + w > frame_w or y + h > frame_h:
+        return {
+            "success": False,
+            "error": f"ROI out of bounds: ROI({x},{y},{w},{h}) vs Frame({frame_w},{frame_h})"
+        }
+
+    roi_frame = frame[y:y+h, x:x+w]
+    if roi_frame.size == 0:
+        return {"success": False, "error": "Empty ROI frame"}
+
+    texts, points = qr_detector.detectAndDecode(roi_frame)
+    qr_detections = _build_qr_detections(texts, points, x, y)
+    return {'success': True, 'qr_detections': qr_detections, 'qr_count': len(qr_detections)}
+
+def _is_preprocessing_cancelled(video_path: str, roi_config: dict, fps: int = 5) -> bool:
+    """Check the QR blueprint's progress registry for a cancellation request"""
+    try:
+        from blueprints.qr_detection_bp import qr_preprocessing_progress, generate_qr_cache_key
+    except ImportError:
+        # Blueprint not available, continue normally
+        return False
+
+    try:
+        cache_key = generate_qr_cache_key(video_path, roi_config, fps)
+        return bool(qr_preprocessing_progress.get(cache_key, {}).get('cancelled', False))
+    except Exception as e:
+        logger.warning(f"[QR-PREPROCESS] Error checking cancellation: {str(e)}")
+        return False
+
 def detect_qr_at_time(video_path: str, time_seconds: float, roi_config: dict, cancellation_flag=None) -> dict:
     """
     Detect QR codes at specific timestamp in video for preprocessing pipeline
@@ -383,9 +465,9 @@ def detect_qr_at_time(video_path: str, time_seconds: float, roi_config: dict, ca
             logger.debug(f"[QR-DETECT] Detection cancelled before model init at {time_seconds}s")
             return {"success": False, "error": f"Detection cancelled at {time_seconds}s"}
         
-        # Initialize QR detector
+        # Make sure a warm QR detector is available (no model load on warm calls)
         try:
-            qr_detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL)  # type: ignore
+            detector_pool.warm()
         except Exception as e:
             return {"success": False, "error": f"Failed to initialize QR detector: {str(e)}"}
         
@@ -453,7 +535,8 @@ def detect_qr_at_time(video_path: str, time_seconds: float, roi_config: dict, ca
             # NOTE: This is the critical blocking operation that cannot be directly cancelled
             # WeChat QR detector - no way to interrupt this once started
             logger.debug(f"[QR-DETECT] Starting WeChat QR detectAndDecode at {time_seconds}s")
-            texts, points = qr_detector.detectAndDecode(roi_frame)
+            with detector_pool.borrow() as qr_detector:
+                texts, points = qr_detector.detectAndDecode(roi_frame)
             logger.debug(f"[QR-DETECT] Completed WeChat QR detectAndDecode at {time_seconds}s")
             
             # Check cancellation after detection
@@ -461,34 +544,7 @@ def detect_qr_at_time(video_path: str, time_seconds: float, roi_config: dict, ca
                 logger.debug(f"[QR-DETECT] Detection cancelled after WeChat QR detection at {time_seconds}s")
                 return {"success": False, "error": f"Detection cancelled at {time_seconds}s"}
             
-            qr_detections = []
-            if texts and points is not None:
-                for i, (text, box) in enumerate(zip(texts, points)):
-                    if text:  # Only include non-empty decoded text
-                        # Calculate bounding box from points
-                        if len(box) >= 4:
-                            # Get bounding rectangle from QR corners
-                            x_coords = [int(pt[0]) for pt in box]
-                            y_coords = [int(pt[1]) for pt in box]
-                            
-                            bbox_x = min(x_coords)
-                            bbox_y = min(y_coords)
-                            bbox_w = max(x_coords) - bbox_x
-                            bbox_h = max(y_coords) - bbox_y
-                            
-                            # Add ROI offset to convert to original frame coordinates
-                            qr_detections.append({
-                                'bbox': {
-                                    'x': bbox_x + x,  # Add ROI offset
-                                    'y': bbox_y + y,  # Add ROI offset
-                                    'w': bbox_w,
-                                    'h': bbox_h
-                                },
-                                'decoded_text': text,
-                                'confidence': 0.95  # WeChat QR detector doesn't provide confidence, use fixed value
-                            })
-                            
-                            logger.debug(f"[QR-DETECT] Found QR: '{text}' at bbox({bbox_x + x}, {bbox_y + y}, {bbox_w}, {bbox_h})")
+            qr_detections = _build_qr_detections(texts, points, x, y)
             
             result = {
                 'success': True,
@@ -541,52 +597,68 @@ def preprocess_video_qr(video_path: str, roi_config: dict, fps: int = 5, progres
         if not roi_config or not all(k in roi_config for k in ['x', 'y', 'w', 'h']):
             return {"success": False, "error": "Invalid ROI configuration"}
         
-        # Get video properties
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        if not fps or fps <= 0:
+            return {"success": False, "error": f"Invalid detection fps: {fps}"}
+        
+        # Check model files exist
+        for model_file in [DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL]:
+            if not os.path.exists(model_file):
+                return {"success": False, "error": f"Model file not found: {model_file}"}
+        
+        # Open the video once and walk it forward for the whole run
+        source = OpenCVFrameSource(video_path)
+        if not source.open():
             return {"success": False, "error": f"Cannot open video: {video_path}"}
         
         try:
-            video_fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / video_fps if video_fps > 0 else 0
-            
-            logger.debug(f"[QR-PREPROCESS] Video info: {total_frames} frames, {video_fps} fps, {duration:.1f}s duration")
+            duration = source.duration
+            logger.debug(f"[QR-PREPROCESS] Video info: {source.frame_count} frames, {source.fps} fps, {duration:.1f}s duration")
             
-        finally:
-            cap.release()
-        
-        # Calculate processing timestamps (5fps = every 0.2s)
-        interval = 1.0 / fps  # 0.2s for 5fps
-        timestamps = []
-        current_time = 0.0
-        
-        while current_time <= duration:
-            timestamps.append(round(current_time, 1))  # Round to avoid floating point issues
-            current_time += interval
-        
-        total_timestamps = len(timestamps)
-        logger.info(f"[QR-PREPROCESS] Processing {total_timestamps} timestamps at {fps}fps")
-        
-        # Initialize results
-        detections = []
-        processed_count = 0
-        start_time = time.time()
-        
-        # Process each timestamp
-        for i, timestamp in enumerate(timestamps):
+            # One detector for the whole run instead of one per timestamp
             try:
-                # Check cancellation via progress callback
+                qr_detector = detector_pool.thread_detector()
+            except Exception as e:
+                return {"success": False, "error": f"Failed to initialize QR detector: {str(e)}"}
+            
+            # Calculate processing timestamps (5fps = every 0.2s)
+            interval = 1.0 / fps  # 0.2s for 5fps
+            timestamps = []
+            current_time = 0.0
+            
+            while current_time <= duration:
+                timestamps.append(round(current_time, 1))  # Round to avoid floating point issues
+                current_time += interval
+            
+            total_timestamps = len(timestamps)
+            logger.info(f"[QR-PREPROCESS] Processing {total_timestamps} timestamps at {fps}fps")
+            
+            # Initialize results
+            detections = []
+            processed_count = 0
+            start_time = time.time()
+            
+            def detect_entry(timestamp):
+                """Decode the frame at timestamp (sequentially) and build its timeline entry"""
+                frame = source.read_at(timestamp)
+                if frame is None:
+                    result = {"success": False, "error": f"Cannot read frame at time {timestamp}s"}
+                else:
+                    result = _detect_qr_in_frame(qr_detector, frame, roi_config)
+                
+                if not result['success']:
+                    logger.warning(f"[QR-PREPROCESS] Failed at {timestamp}s - {result.get('error')}")
+                    # Still add entry with empty detections for timeline consistency
+                    return {'timestamp': timestamp, 'qr_detections': [], 'qr_count': 0}
+                return {
+                    'timestamp': timestamp,
+                    'qr_detections': result['qr_detections'],
+                    'qr_count': result['qr_count']
+                }
+            
+            # Process each timestamp
+            for i, timestamp in enumerate(timestamps):
                 try:
-                    from blueprints.qr_detection_bp import qr_preprocessing_progress
-                    # Generate cache key to check status (same logic as in blueprint)
-                    import hashlib
-                    roi_str = f"{roi_config['x']}_{roi_config['y']}_{roi_config['w']}_{roi_config['h']}"
-                    cache_input = f"{video_path}_{roi_str}"
-                    cache_key = hashlib.md5(cache_input.encode()).hexdigest()
-                    
-                    if (cache_key in qr_preprocessing_progress and 
-                        qr_preprocessing_progress[cache_key].get('cancelled', False)):
+                    if _is_preprocessing_cancelled(video_path, roi_config, fps):
                         logger.info(f"[QR-PREPROCESS] CANCELLATION DETECTED at frame {i+1}/{total_timestamps} - FORCING SKIP TO END")
                         
                         # Force skip to last frame strategy
@@ -596,21 +668,7 @@ def preprocess_video_qr(video_path: str, roi_config: dict, fps: int = 5, progres
                         
                         for final_timestamp in remaining_timestamps:
                             try:
-                                result = detect_qr_at_time(video_path, final_timestamp, roi_config)
-                                if result['success']:
-                                    detection_entry = {
-                                        'timestamp': final_timestamp,
-                                        'qr_detections': result['qr_detections'],
-                                        'qr_count': result.get('qr_count', 0)
-                                    }
-                                    detections.append(detection_entry)
-                                else:
-                                    detections.append({
-                                        'timestamp': final_timestamp,
-                                        'qr_detections': [],
-                                        'qr_count': 0
-                                    })
-                                processed_count += 1
+                                detections.append(detect_entry(final_timestamp))
                             except Exception:
                                 # Skip any errors during fast finish
                                 detections.append({
@@ -618,80 +676,60 @@ def preprocess_video_qr(video_path: str, roi_config: dict, fps: int = 5, progres
                                     'qr_detections': [],
                                     'qr_count': 0
                                 })
-                                processed_count += 1
+                            processed_count += 1
                         
                         logger.info(f"[QR-PREPROCESS] Fast finish completed - processed {processed_count}/{total_timestamps} frames")
                         break  # Exit the main loop
-                except ImportError:
-                    # Blueprint not available, continue normally
-                    pass
-                except Exception as e:
-                    logger.warning(f"[QR-PREPROCESS] Error checking cancellation: {str(e)}")
-                
-                # Call QR detection for this timestamp
-                result = detect_qr_at_time(video_path, timestamp, roi_config)
-                
-                if result['success']:
-                    # Store detection result
-                    detection_entry = {
-                        'timestamp': timestamp,
-                        'qr_detections': result['qr_detections'],
-                        'qr_count': result.get('qr_count', 0)
-                    }
+                    
+                    detection_entry = detect_entry(timestamp)
                     detections.append(detection_entry)
                     
-                    if result.get('qr_count', 0) > 0:
-                        logger.debug(f"[QR-PREPROCESS] Frame {i+1}/{total_timestamps}: {result['qr_count']} QR codes at {timestamp}s")
-                else:
-                    logger.warning(f"[QR-PREPROCESS] Frame {i+1}/{total_timestamps}: Failed at {timestamp}s - {result.get('error')}")
-                    # Still add entry with empty detections for timeline consistency
-                    detections.append({
-                        'timestamp': timestamp,
-                        'qr_detections': [],
-                        'qr_count': 0
-                    })
-                
-                processed_count += 1
-                
-                # Update progress AFTER processing (with new detections)
-                if progress_callback:
-                    try:
-                        progress_percent = (processed_count / total_timestamps) * 100
-                        elapsed_time = time.time() - start_time
-                        estimated_total_time = elapsed_time * total_timestamps / processed_count
-                        
-                        # Call progress callback with current detections for incremental caching
-                        progress_callback(
-                            progress=progress_percent,
-                            processed_count=processed_count,
-                            total_frames=total_timestamps,
-                            new_detections=[detection_entry] if 'detection_entry' in locals() else []
-                        )
-                    except Exception as callback_error:
-                        if "cancelled" in str(callback_error).lower():
-                            logger.info(f"[QR-PREPROCESS] Processing cancelled after frame {i+1}/{total_timestamps} (timestamp {timestamp}s)")
-                            return {"success": False, "error": f"Processing cancelled after timestamp {timestamp}s"}
-                        else:
-                            raise callback_error
-                
-                # Log progress every 25%
-                if processed_count % max(1, total_timestamps // 4) == 0:
-                    progress_percent = (processed_count / total_timestamps) * 100
-                    logger.info(f"[QR-PREPROCESS] Progress: {processed_count}/{total_timestamps} ({progress_percent:.1f}%)")
+                    if detection_entry['qr_count'] > 0:
+                        logger.debug(f"[QR-PREPROCESS] Frame {i+1}/{total_timestamps}: {detection_entry['qr_count']} QR codes at {timestamp}s")
                     
-            except Exception as e:
-                if "cancelled" in str(e).lower():
-                    logger.info(f"[QR-PREPROCESS] Processing cancelled during timestamp {timestamp}: {str(e)}")
-                    return {"success": False, "error": f"Processing cancelled during timestamp {timestamp}s"}
-                else:
-                    logger.error(f"[QR-PREPROCESS] Error processing timestamp {timestamp}: {str(e)}")
-                    # Add empty entry to maintain timeline
-                    detections.append({
-                        'timestamp': timestamp,
-                        'qr_detections': [],
-                        'qr_count': 0
-                    })
                     processed_count += 1
+                    
+                    # Update progress AFTER processing (with new detections)
+                    if progress_callback:
+                        try:
+                            progress_percent = (processed_count / total_timestamps) * 100
+                            
+                            # Call progress callback with current detections for incremental caching
+                            progress_callback(
+                                progress=progress_percent,
+                                processed_count=processed_count,
+                                total_frames=total_timestamps,
+                                new_detections=[detection_entry]
+                            )
+                        except Exception as callback_error:
+                            if "cancelled" in str(callback_error).lower():
+                                logger.info(f"[QR-PREPROCESS] Processing cancelled after frame {i+1}/{total_timestamps} (timestamp {timestamp}s)")
+                                return {"success": False, "error": f"Processing cancelled after timestamp {timestamp}s"}
+                            else:
+                                raise callback_error
+                    
+                    # Log progress every 25%
+                    if processed_count % max(1, total_timestamps // 4) == 0:
+                        progress_percent = (processed_count / total_timestamps) * 100
+                        logger.info(f"[QR-PREPROCESS] Progress: {processed_count}/{total_timestamps} ({progress_percent:.1f}%)")
+                        
+                except Exception as e:
+                    if "cancelled" in str(e).lower():
+                        logger.info(f"[QR-PREPROCESS] Processing cancelled during timestamp {timestamp}: {str(e)}")
+                        return {"success": False, "error": f"Processing cancelled during timestamp {timestamp}s"}
+                    else:
+                        logger.error(f"[QR-PREPROCESS] Error processing timestamp {timestamp}: {str(e)}")
+                        # Add empty entry to maintain timeline
+                        detections.append({
+                            'timestamp': timestamp,
+                            'qr_detections': [],
+                            'qr_count': 0
+                        })
+                        processed_count += 1
+            
+            decode_stats = dict(source.stats)
+        finally:
+            source.close()
         
         # Final statistics
         processing_time = time.time() - start_time
@@ -706,10 +744,12 @@ def preprocess_video_qr(video_path: str, roi_config: dict, fps: int = 5, progres
             'total_qr_detections': total_qr_detections,
             'processing_time_seconds': round(processing_time, 2),
             'qr_detection_rate': f"{total_qr_detections}/{total_timestamps} frames",
+            'decode_stats': decode_stats,
             'processed_at': datetime.now().isoformat()
         }
         
-        logger.info(f"[QR-PREPROCESS] Completed: {total_qr_detections} QR detections in {processing_time:.2f}s")
+        logger.info(f"[QR-PREPROCESS] Completed: {total_qr_detections} QR detections in {processing_time:.2f}s "
+                    f"(grabbed={decode_stats['grabbed']}, retrieved={decode_stats['retrieved']}, seeks={decode_stats['seeks']})")
         
         return {
             'success': True,
@@ -750,9 +790,9 @@ def detect_qr_from_image(image_content: str) -> dict:
             if not os.path.exists(model_file):
                 return {"success": False, "error": f"Model file not found: {model_file}"}
 
-        # Initialize WeChat QR detector
+        # Make sure a warm WeChat QR detector is available
         try:
-            qr_detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL)  # type: ignore
+            detector_pool.warm()
         except Exception as e:
             return {"success": False, "error": f"Failed to initialize QR detector: {str(e)}"}
 
@@ -770,7 +810,8 @@ def detect_qr_from_image(image_content: str) -> dict:
 
         # Detect QR codes
         try:
-            texts, points = qr_detector.detectAndDecode(image)
+            with detector_pool.borrow() as qr_detector:
+                texts, points = qr_detector.detectAndDecode(image)
 
             qr_detections = []
             if texts and len(texts) > 0:
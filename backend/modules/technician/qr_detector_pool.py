@@ -0,0 +1,183 @@
+"""
+Process-wide WeChat QR detector registry for V_Track.
+
+Loading the WeChat QRCode models (detector + super-resolution CNNs) is the
+most expensive part of a single QR call. Every detection entry point used to
+build its own instance; this registry keeps one warm detector per worker
+thread instead. WeChatQRCode is not thread-safe, so an instance is never used
+by two threads at once: it is bound to the thread that first asks for it and
+handed back to an idle list when that thread ends, where the next new thread
+(e.g. the next Flask request) adopts it without loading the models again.
+
+Usage:
+    from modules.technician.qr_detector_pool import detector_pool
+
+    with detector_pool.borrow() as detector:
+        texts, points = detector.detectAndDecode(roi_frame)
+
+    # Long-lived workers (frame samplers) can resolve their thread's detector directly
+    detector = detector_pool.thread_detector()
+
+    # Same detector CNN without the super-resolution model, for codes that are already large
+    detector = fast_detector_pool.thread_detector()
+"""
+
+import cv2
+import os
+import time
+import logging
+import itertools
+import threading
+import weakref
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Path to WeChat QRCode model (relative)
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models", "wechat_qr")
+DETECT_PROTO = os.path.join(MODEL_DIR, "detect.prototxt")
+DETECT_MODEL = os.path.join(MODEL_DIR, "detect.caffemodel")
+SR_PROTO = os.path.join(MODEL_DIR, "sr.prototxt")
+SR_MODEL = os.path.join(MODEL_DIR, "sr.caffemodel")
+
+# Idle detectors kept warm after their thread ended; extra ones are dropped
+MAX_IDLE_DETECTORS = 4
+
+
+class WeChatDetectorPool:
+    """Registry of WeChat QR detectors, one per worker thread."""
+
+    def __init__(self, max_idle=MAX_IDLE_DETECTORS, use_sr=True):
+        self.max_idle = max_idle
+        self.use_sr = use_sr
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tokens = itertools.count(1)
+        self._idle = []
+        self._bound = {}  # token -> {'detector', 'thread_name', 'bound_at'}
+        self._stats = {
+            'created': 0,
+            'discarded': 0,
+            'adopted_warm': 0,
+            'model_load_seconds': 0.0,
+            'borrows': 0,
+            'active_borrows': 0,
+            'hold_seconds_total': 0.0,
+            'hold_seconds_max': 0.0,
+        }
+
+    def _create_detector(self):
+        model_files = [DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL] if self.use_sr else [DETECT_PROTO, DETECT_MODEL]
+        for model_file in model_files:
+            if not os.path.exists(model_file):
+                raise FileNotFoundError(f"Model file not found: {model_file}")
+
+        load_start = time.time()
+        # Empty SR paths make WeChatQRCode skip the super-resolution CNN
+        sr_proto, sr_model = (SR_PROTO, SR_MODEL) if self.use_sr else ("", "")
+        detector = cv2.wechat_qrcode_WeChatQRCode(DETECT_PROTO, DETECT_MODEL, sr_proto, sr_model)  # type: ignore
+        load_seconds = time.time() - load_start
+
+        with self._lock:
+            self._stats['created'] += 1
+            self._stats['model_load_seconds'] += load_seconds
+        logger.info(f"[QR-POOL] WeChat QRCode detector created in {load_seconds:.2f}s (sr={self.use_sr})")
+        return detector
+
+    def _release_binding(self, token):
+        """Return a finished thread's detector to the idle list."""
+        with self._lock:
+            binding = self._bound.pop(token, None)
+            if binding is None:
+                return
+            if len(self._idle) < self.max_idle:
+                self._idle.append(binding['detector'])
+            else:
+                self._stats['discarded'] += 1
+        logger.debug(f"[QR-POOL] Detector released by thread {binding['thread_name']}")
+
+    def warm(self):
+        """Make sure at least one detector is loaded and ready to be adopted."""
+        if getattr(self._local, 'binding', None) is not None:
+            return
+        with self._lock:
+            if self._idle:
+                return
+        detector = self._create_detector()
+        with self._lock:
+            self._idle.append(detector)
+
+    def thread_detector(self):
+        """Return the calling thread's detector, binding a warm or new one on first use."""
+        binding = getattr(self._local, 'binding', None)
+        if binding is not None:
+            return binding['detector']
+
+        detector = None
+        with self._lock:
+            if self._idle:
+                detector = self._idle.pop()
+                self._stats['adopted_warm'] += 1
+        if detector is None:
+            detector = self._create_detector()
+
+        thread = threading.current_thread()
+        token = next(self._tokens)
+        binding = {'detector': detector, 'thread_name': thread.name, 'bound_at': time.time()}
+        with self._lock:
+            self._bound[token] = binding
+        self._local.binding = binding
+        # Hand the detector back once the thread object goes away
+        weakref.finalize(thread, self._release_binding, token)
+        return detector
+
+    @contextmanager
+    def borrow(self):
+        """Lend the calling thread's detector for the duration of the block."""
+        detector = self.thread_detector()
+        hold_start = time.time()
+        with self._lock:
+            self._stats['borrows'] += 1
+            self._stats['active_borrows'] += 1
+        try:
+            yield detector
+        finally:
+            held = time.time() - hold_start
+            with self._lock:
+                self._stats['active_borrows'] -= 1
+                self._stats['hold_seconds_total'] += held
+                self._stats['hold_seconds_max'] = max(self._stats['hold_seconds_max'], held)
+
+    def stats(self):
+        """Snapshot of pool usage for health endpoints and logs."""
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            bound = [
+                {'thread': b['thread_name'], 'held_seconds': round(now - b['bound_at'], 1)}
+                for b in self._bound.values()
+            ]
+            idle_count = len(self._idle)
+
+        borrows = stats['borrows']
+        return {
+            'use_sr': self.use_sr,
+            'alive': len(bound) + idle_count,
+            'bound': len(bound),
+            'idle': idle_count,
+            'created': stats['created'],
+            'discarded': stats['discarded'],
+            'adopted_warm': stats['adopted_warm'],
+            'model_load_seconds': round(stats['model_load_seconds'], 2),
+            'borrows': borrows,
+            'active_borrows': stats['active_borrows'],
+            'avg_hold_ms': round(stats['hold_seconds_total'] * 1000 / borrows, 2) if borrows else 0.0,
+            'max_hold_ms': round(stats['hold_seconds_max'] * 1000, 2),
+            'bound_threads': bound,
+        }
+
+
+# Global registry shared by all detection entry points in this process
+detector_pool = WeChatDetectorPool()
+# Detectors without super-resolution, used by size-aware decoding for large codes
+fast_detector_pool = WeChatDetectorPool(use_sr=False)
@@ -0,0 +1,126 @@
+"""
+Temporal MVD tracking for the trigger frame sampler.
+
+While a parcel sits under the camera its MVD label is decoded again on every
+sampled frame. After a successful decode, MVDTracker keeps a grayscale
+template of the label and, on the following frames, looks for it with
+cv2.matchTemplate in a small window around its last position. While the
+match stays above TRACKER_CONFIG['min_score'] the decoded MVD is reused
+(bbox and boundary points shifted by the match offset) and the WeChat decode
+is skipped. Tracking ends, and the next frame is decoded normally, when:
+
+- the match score drops (label moved out, covered, replaced),
+- frames are not consecutive samples (gap above max_gap_sec, or backwards),
+- refresh_sec has passed since the last real decode.
+
+Usage:
+    tracked = tracker.match(frame_packing, frame_count)
+    if tracked is None:
+        ... decode ...
+        tracker.update(frame_packing, frame_count, mvd, points)
+"""
+
+import cv2
+import os
+import numpy as np
+
+TRACKER_CONFIG = {
+    'enabled': os.getenv('VTRACK_QR_TRACKING', 'true').lower() in ('1', 'true', 'yes'),
+    'refresh_sec': 2.0,       # Re-decode at least this often while tracking
+    'max_gap_sec': 1.0,       # Samples further apart are not tracked across
+    'min_score': 0.92,        # TM_CCOEFF_NORMED score to accept a match
+    'search_margin': 0.25,    # Search window around the label, fraction of its size
+    'min_template_px': 12,    # Smaller labels are always decoded
+}
+
+
+class MVDTracker:
+    """Follows the last decoded MVD label across sampled frames of one video."""
+
+    def __init__(self, fps, config=None):
+        self.config = dict(TRACKER_CONFIG, **(config or {}))
+        self.fps = fps if fps and fps > 0 else 30
+        self.stats = {'tracked': 0, 'decoded': 0, 'lost': 0, 'refreshed': 0}
+        self.reset()
+
+    def reset(self):
+        """Forget the tracked label (new video, no MVD in frame)."""
+        self.mvd = None
+        self.template = None
+        self.bbox = None          # (x, y, w, h) in packing-crop coordinates
+        self.points = None        # boundary points in packing-crop coordinates
+        self.decoded_frame = None
+        self.last_frame = None
+
+    @property
+    def active(self):
+        return self.template is not None
+
+    def update(self, frame_packing, frame_count, mvd, points):
+        """Start tracking after a real decode of `mvd` with its corner `points`."""
+        self.stats['decoded'] += 1
+        if not self.config['enabled'] or points is None or len(points) < 4:
+            self.reset()
+            return
+
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        height, width = frame_packing.shape[:2]
+        x0, y0 = max(0, int(points[:, 0].min())), max(0, int(points[:, 1].min()))
+        x1, y1 = min(width, int(np.ceil(points[:, 0].max()))), min(height, int(np.ceil(points[:, 1].max())))
+        if min(x1 - x0, y1 - y0) < self.config['min_template_px']:
+            self.reset()
+            return
+
+        self.template = _gray(frame_packing[y0:y1, x0:x1]).copy()
+        self.mvd = mvd
+        self.bbox = (x0, y0, x1 - x0, y1 - y0)
+        self.points = points
+        self.decoded_frame = frame_count
+        self.last_frame = frame_count
+
+    def match(self, frame_packing, frame_count):
+        """
+        Look for the tracked label in this frame.
+
+        Returns:
+            tuple: (mvd, bbox, points) in packing-crop coordinates, or None if the frame must be decoded
+        """
+        if not self.active:
+            return None
+
+        gap = frame_count - self.last_frame
+        if gap <= 0 or gap > self.config['max_gap_sec'] * self.fps:
+            self.reset()
+            return None
+        if frame_count - self.decoded_frame >= self.config['refresh_sec'] * self.fps:
+            self.stats['refreshed'] += 1
+            self.reset()
+            return None
+
+        x, y, w, h = self.bbox
+        height, width = frame_packing.shape[:2]
+        margin = int(max(w, h) * self.config['search_margin']) + 2
+        sx0, sy0 = max(0, x - margin), max(0, y - margin)
+        sx1, sy1 = min(width, x + w + margin), min(height, y + h + margin)
+        if sx1 - sx0 < w or sy1 - sy0 < h:
+            self.stats['lost'] += 1
+            self.reset()
+            return None
+
+        scores = cv2.matchTemplate(_gray(frame_packing[sy0:sy1, sx0:sx1]), self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(scores)
+        if score < self.config['min_score']:
+            self.stats['lost'] += 1
+            self.reset()
+            return None
+
+        dx, dy = sx0 + location[0] - x, sy0 + location[1] - y
+        self.bbox = (x + dx, y + dy, w, h)
+        self.points = self.points + np.array([dx, dy], dtype=np.float32)
+        self.last_frame = frame_count
+        self.stats['tracked'] += 1
+        return self.mvd, self.bbox, self.points
+
+
+def _gray(image):
+    return image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
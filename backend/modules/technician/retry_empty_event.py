@@ -7,14 +7,15 @@ processing events with full frame sampling (1fps) to attempt recovery.
 Processing Strategy:
     1. Wait for system idle signal (file_list all processed)
     2. Query events marked with retry_needed=1
-    3. For each empty event:
-       - Open video file and seek to event midpoint (ts + duration/2)
-       - Scan frames from midpoint to te at full sampling (1fps = every frame)
-       - Optimized: Only scan second half where motion typically occurs
+    3. Group events by source video (and camera), sorted by ts
+    4. For each video: open it once (packing area only) and sweep its events in order:
+       - Scan from event midpoint (ts + duration/2) to te, where motion typically occurs
+       - Coarse pass every RETRY_CONFIG['coarse_interval_sec']
+       - When a QR is located but not decoded, refine with every frame around that hit
        - Detect MVD (no TimeGo check needed for retry)
-       - Stop immediately when MVD found
+       - Stop the event immediately when MVD found
        - Update database with result
-    4. Clear idle signal when retry completes
+    5. Log recovery rate and throughput (events/min), clear idle signal
 
 Threading:
     - Runs as daemon thread (exits when main program exits)
@@ -23,17 +24,28 @@ Threading:
     - Signals completion by clearing system_idle_event
 """
 
-import cv2
 import os
 import logging
 import sqlite3
 import threading
 import json
+import time
+from collections import OrderedDict
 from modules.db_utils.safe_connection import safe_db_connection
 from modules.scheduler.db_sync import db_rwlock, system_idle_event, retry_in_progress_flag
 from modules.technician.frame_sampler_trigger import FrameSamplerTrigger
+from modules.technician.frame_source import create_frame_source
 from modules.config.logging_config import get_logger
 
+# ==================== CONFIGURATION ====================
+
+RETRY_CONFIG = {
+    # Coarse sampling interval inside an event window (0 = every frame, the previous behaviour)
+    'coarse_interval_sec': float(os.getenv('VTRACK_RETRY_COARSE_INTERVAL_SEC', '0.5')),
+    # Every frame is decoded within this many seconds after a located-but-undecoded QR
+    'refine_radius_sec': float(os.getenv('VTRACK_RETRY_REFINE_RADIUS_SEC', '1.0')),
+}
+
 
 class RetryEmptyEventProcessor:
     """Process empty events with full sampling to recover missed tracking codes.
@@ -49,7 +61,9 @@ class RetryEmptyEventProcessor:
     Methods:
         run(): Main processing loop
         query_empty_events(): Fetch events marked for retry
-        process_single_event(): Process one empty event with seeking
+        group_events_by_video(): Group events per (video_file, camera_name), sorted by ts
+        process_video_events(): Sweep all events of one video with a single open
+        process_single_event(): Process one empty event
         detect_mvd_frame(): Detect MVD in a single frame
         update_event_success(): Mark event as recovered
         update_event_failed(): Mark event as unrecoverable
@@ -60,9 +74,13 @@ class RetryEmptyEventProcessor:
         self.logger = get_logger(__name__, {"module": "retry_empty_event"})
         self.logger.info("🔄 RetryEmptyEventProcessor initialized")
 
-        # Reuse FrameSamplerTrigger for MVD detection
+        # Reuse FrameSamplerTrigger for MVD detection (its WeChat detector comes from the
+        # shared per-thread pool, so the retry thread does not load its own models)
         self.sampler = FrameSamplerTrigger()
         self.fps = self.sampler.fps  # Get FPS from sampler config
+        # Refinement re-reads near-identical neighbouring frames on purpose: always decode them
+        self.sampler.roi_gate.config['enabled'] = False
+        self.sampler.trigger_presence.config['enabled'] = False
 
     def run(self):
         """Main loop: wait idle → query empty → process each → complete.
@@ -70,10 +88,10 @@ class RetryEmptyEventProcessor:
         Workflow:
             1. system_idle_event.wait() - Block until system idle
             2. Query events WHERE retry_needed=1
-            3. For each event: process_single_event()
+            3. For each video: process_video_events() (one open, events by ts)
                - Optimized: scan second half only (ts + duration/2 → te)
                - Focus: motion detection zone typically near event end
-            4. Log results and recovery rate
+            4. Log results, recovery rate and throughput
             5. Clear system_idle_event to signal completion
             6. Repeat
         """
@@ -93,27 +111,27 @@ class RetryEmptyEventProcessor:
                     system_idle_event.clear()
                     continue
 
-                self.logger.info(f"🔍 Found {len(retry_events)} events to retry")
+                groups = self.group_events_by_video(retry_events)
+                self.logger.info(f"🔍 Found {len(retry_events)} events to retry in {len(groups)} videos")
 
-                # Process each empty event
+                # Sweep each video once
                 recovered = 0
-                failed = 0
+                started = time.monotonic()
 
-                for event_id, video_file, ts, te, camera_name in retry_events:
+                for (video_file, camera_name), events in groups.items():
                     try:
-                        success = self.process_single_event(
-                            event_id, video_file, ts, te, camera_name
-                        )
-                        if success:
-                            recovered += 1
-                        else:
-                            failed += 1
+                        recovered += self.process_video_events(video_file, camera_name, events)
                     except Exception as e:
-                        self.logger.error(f"❌ Exception processing event {event_id}: {e}")
-                        failed += 1
+                        self.logger.error(f"❌ Exception processing {video_file}: {e}")
 
                 # Log results
-                self.logger.info(f"✅ PASS 3 COMPLETE: {recovered}/{len(retry_events)} recovered, {failed} failed")
+                failed = len(retry_events) - recovered
+                elapsed_min = max(time.monotonic() - started, 1e-6) / 60.0
+                self.logger.info(
+                    f"✅ PASS 3 COMPLETE: {recovered}/{len(retry_events)} recovered, {failed} failed "
+                    f"in {elapsed_min * 60:.1f}s ({recovered / elapsed_min:.1f} recovered/min, "
+                    f"{len(retry_events) / elapsed_min:.1f} events/min)"
+                )
 
                 # Signal completion and clear idle flag
                 system_idle_event.clear()
@@ -147,21 +165,160 @@ class RetryEmptyEventProcessor:
             self.logger.error(f"❌ Error querying empty events: {e}")
             return []
 
-    def process_single_event(self, event_id, video_file, ts, te, camera_name):
-        """Process one empty event: SEEK → SCAN → DETECT → STOP.
+    def group_events_by_video(self, events):
+        """Group retry events by source video so each file is opened once.
+
+        Args:
+            events: Tuples (event_id, video_file, ts, te, camera_name)
+
+        Returns:
+            OrderedDict: (video_file, camera_name) -> events sorted by ts,
+            groups ordered by (video_file, first ts)
+        """
+        grouped = {}
+        for event in events:
+            grouped.setdefault((event[1], event[4]), []).append(event)
+        for group in grouped.values():
+            group.sort(key=lambda event: (event[2], event[0]))
+        return OrderedDict(sorted(
+            grouped.items(), key=lambda item: (item[0][0], item[1][0][2], item[0][1])
+        ))
+
+    def process_video_events(self, video_file, camera_name, events):
+        """Recover all empty events of one video in a single forward sweep.
+
+        The video is opened once (packing area only) and events are visited in
+        ts order, so the frame source reads forward between windows and only
+        repositions across long gaps.
+
+        Args:
+            video_file: Path to video file
+            camera_name: Camera name for packing_area lookup
+            events: Tuples (event_id, video_file, ts, te, camera_name) sorted by ts
+
+        Returns:
+            int: Number of events recovered
+        """
+        # Get packing area for this camera
+        packing_area, _ = self.sampler.get_packing_area(camera_name)
+        if not packing_area:
+            self.logger.error(f"❌ {len(events)} events: No packing_area found for camera {camera_name}")
+            for event in events:
+                self.update_event_failed(event[0])
+            return 0
+
+        # Open video file once, decoding only the packing area
+        video = create_frame_source(video_file, roi=packing_area)
+        if not video.open():
+            self.logger.error(f"❌ {len(events)} events: Cannot open video {video_file}")
+            for event in events:
+                self.update_event_failed(event[0])
+            return 0
+
+        recovered = 0
+        started = time.monotonic()
+        try:
+            for event_id, _, ts, te, _ in events:
+                try:
+                    # OPTIMIZATION: Scan second half of event (where motion typically occurs)
+                    event_duration = te - ts
+                    scan_start = ts + (event_duration / 2)  # Start from midpoint
+                    start_frame = int(scan_start * self.fps)
+                    end_frame = int(te * self.fps)
+
+                    self.logger.info(f"🔄 Event {event_id}: scanning second half from frame {start_frame} ({scan_start:.1f}s) to {end_frame} ({te}s) [total {event_duration}s]")
+
+                    mvd, frame_count = self.scan_event_window(video, start_frame, end_frame, camera_name)
+
+                    if mvd:
+                        self.logger.info(f"✅ Event {event_id}: recovered MVD={mvd} at frame {frame_count}")
+                        self.update_event_success(event_id, mvd)
+                        recovered += 1
+                    else:
+                        self.logger.info(f"❌ Event {event_id}: MVD not found in {end_frame - start_frame} frames")
+                        self.update_event_failed(event_id)
+                except Exception as e:
+                    self.logger.error(f"❌ Event {event_id}: Exception: {e}")
+                    self.update_event_failed(event_id)
+        finally:
+            video.close()
+
+        elapsed_min = max(time.monotonic() - started, 1e-6) / 60.0
+        self.logger.info(
+            f"📼 {os.path.basename(video_file)}: {recovered}/{len(events)} recovered "
+            f"({len(events) / elapsed_min:.1f} events/min, {video.stats['retrieved']} frames decoded, "
+            f"{video.stats['seeks']} seeks)"
+        )
+        return recovered
+
+    def scan_event_window(self, video, start_frame, end_frame, camera_name):
+        """Coarse-to-fine MVD search over frames [start_frame, end_frame].
+
+        Coarse samples are RETRY_CONFIG['coarse_interval_sec'] apart. When a
+        coarse sample locates a non-TimeGo QR that does not decode, every frame
+        from the previous coarse sample to refine_radius_sec after the hit is
+        tried before the coarse sweep continues.
+
+        Args:
+            video: Open frame source cropped to the packing area
+            start_frame: First frame index to scan
+            end_frame: Last frame index to scan (inclusive)
+            camera_name: Camera name (passed to detect_mvd_frame)
 
-        Strategy:
-            1. Open video file
-            2. SEEK: Jump to event midpoint frame (ts + duration/2 * fps)
-            3. SCAN: Read frames from midpoint to te (every frame = 1fps)
-            4. DETECT: Try to detect MVD in each frame (no TimeGo check)
-            5. STOP: Return immediately when MVD found
-            6. UPDATE: Database with result
+        Returns:
+            tuple: (mvd, frame_count) of the first recovered code, or ("", None)
+        """
+        step = max(1, int(RETRY_CONFIG['coarse_interval_sec'] * self.fps))
+        radius = max(0, int(RETRY_CONFIG['refine_radius_sec'] * self.fps))
+        sampled = set()
+
+        def try_frame(index):
+            sampled.add(index)
+            frame = video.read_frame(index)
+            if frame is None:
+                return None, False
+            mvd, located = self._detect_mvd_located(frame, index + 1, video.origin)
+            return mvd, located
+
+        index = start_frame
+        while index <= end_frame:
+            mvd, located = try_frame(index)
+            if mvd:
+                return mvd, index + 1
+            if mvd is None:
+                break
+
+            if located and step > 1:
+                # REFINE: every frame around the located-but-undecoded QR
+                refine_end = min(end_frame, index + radius)
+                for refine_index in range(max(start_frame, index - step + 1), refine_end + 1):
+                    if refine_index in sampled:
+                        continue
+                    mvd, _ = try_frame(refine_index)
+                    if mvd:
+                        return mvd, refine_index + 1
+                index = max(index, refine_end)
+
+            index += step
+
+        return "", None
+
+    def _detect_mvd_located(self, frame_packing, frame_count, packing_area_offset):
+        """Return (mvd, located): the decoded MVD and whether a non-TimeGo QR was located."""
+        try:
+            state, mvd, mvd_bbox, boundary_points = self.sampler.process_frame(
+                frame_packing=frame_packing,
+                frame_trigger=None,
+                frame_count=frame_count,
+                packing_area_offset=packing_area_offset
+            )
+            return mvd, boundary_points is not None
+        except Exception as e:
+            self.logger.debug(f"Error detecting MVD: {e}")
+            return "", False
 
-        Optimization:
-            - Scan second half of event (ts + duration/2 → te)
-            - Reduces processing time by ~50%
-            - Focuses on motion detection zone (typically near end of event)
+    def process_single_event(self, event_id, video_file, ts, te, camera_name):
+        """Process one empty event (a single-event process_video_events() sweep).
 
         Args:
             event_id: Event ID from database
@@ -174,69 +331,11 @@ class RetryEmptyEventProcessor:
             bool: True if MVD found and recovered, False if not found
         """
         try:
-            # Open video file
-            video = cv2.VideoCapture(video_file)
-            if not video.isOpened():
-                self.logger.error(f"❌ Event {event_id}: Cannot open video {video_file}")
-                self.update_event_failed(event_id)
-                return False
-
-            # OPTIMIZATION: Scan second half of event (where motion typically occurs)
-            event_duration = te - ts
-            scan_start = ts + (event_duration / 2)  # Start from midpoint
-            start_frame = int(scan_start * self.fps)
-            end_frame = int(te * self.fps)
-            video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-
-            self.logger.info(f"🔄 Event {event_id}: scanning second half from frame {start_frame} ({scan_start:.1f}s) to {end_frame} ({te}s) [total {event_duration}s]")
-
-            # Get packing area for this camera
-            packing_area, _ = self.sampler.get_packing_area(camera_name)
-            if not packing_area:
-                self.logger.error(f"❌ Event {event_id}: No packing_area found for camera {camera_name}")
-                video.release()
-                self.update_event_failed(event_id)
-                return False
-
-            x, y, w, h = packing_area
-            frame_count = start_frame
-            found = False
-
-            # SCAN: midpoint → te (every frame, optimized second half)
-            while frame_count <= end_frame:
-                ret, frame = video.read()
-                if not ret:
-                    self.logger.debug(f"Event {event_id}: Reached end of video at frame {frame_count}")
-                    break
-
-                frame_count += 1
-
-                # Extract packing area from frame
-                frame_packing = frame[y:y+h, x:x+w]
-
-                # DETECT: MVD only (no TimeGo check, no trigger area)
-                mvd = self.detect_mvd_frame(frame_packing, camera_name)
-
-                # STOP: immediately when found
-                if mvd:
-                    self.logger.info(f"✅ Event {event_id}: recovered MVD={mvd} at frame {frame_count}")
-                    self.update_event_success(event_id, mvd)
-                    found = True
-                    break
-
-            video.release()
-
-            # If not found, mark as failed
-            if not found:
-                self.logger.info(f"❌ Event {event_id}: MVD not found in {end_frame - start_frame} frames")
-                self.update_event_failed(event_id)
-
-            return found
-
+            return self.process_video_events(
+                video_file, camera_name, [(event_id, video_file, ts, te, camera_name)]
+            ) > 0
         except Exception as e:
             self.logger.error(f"❌ Event {event_id}: Exception: {e}")
-            if 'video' in locals():
-                video.release()
             self.update_event_failed(event_id)
             return False
 
@@ -0,0 +1,110 @@
+"""
+Static-scene gate for the trigger frame sampler.
+
+The packing and TimeGo ROIs are often pixel-identical for minutes (between
+orders, short breaks below IdleMonitor's IDLE_GAP), yet every sampled frame
+was decoded twice. ROIChangeGate keeps, per ROI, a small grayscale thumbnail
+of the crop that was last really decoded together with its detection
+result. A new crop whose thumbnail differs from it by less than
+GATE_CONFIG['max_mean_diff'] (mean absolute difference, 0-255) reuses that
+result instead of being decoded.
+
+Comparing against the last *decoded* crop (not the previous frame) means slow
+drift accumulates until it crosses the threshold; max_reuse_sec forces a real
+decode at least that often.
+
+Usage:
+    result = gate.reuse("trigger", frame_trigger, frame_count)
+    if result is None:
+        result = ... decode ...
+        gate.store("trigger", frame_trigger, frame_count, result)
+"""
+
+import cv2
+import os
+import numpy as np
+
+GATE_CONFIG = {
+    'enabled': os.getenv('VTRACK_ROI_CHANGE_GATE', 'true').lower() in ('1', 'true', 'yes'),
+    'thumb_size': 32,         # Crops are compared as thumb_size x thumb_size grayscale
+    'max_mean_diff': 2.0,     # Mean absolute thumbnail difference still considered static
+    'max_reuse_sec': 10.0,    # Decode at least this often even if the ROI looks static
+}
+
+
+class ROIChangeGate:
+    """Per-ROI 'unchanged since the last decode' detector with cached results."""
+
+    def __init__(self, fps, config=None):
+        self.config = dict(GATE_CONFIG, **(config or {}))
+        self.fps = fps if fps and fps > 0 else 30
+        self._entries = {}
+        self.stats = {}
+
+    def reset(self):
+        """Forget all cached results (new video or range)."""
+        self._entries = {}
+
+    def reset_stats(self):
+        self.stats = {}
+
+    def _thumbnail(self, crop):
+        gray = crop if len(crop.shape) == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        size = self.config['thumb_size']
+        return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _count(self, key, field):
+        bucket = self.stats.setdefault(key, {'checked': 0, 'reused': 0})
+        bucket[field] += 1
+
+    def reuse(self, key, crop, frame_count):
+        """
+        Cached result for an ROI crop that has not changed since its last decode.
+
+        Returns:
+            The stored result, or None if the crop must be decoded
+        """
+        if not self.config['enabled'] or crop is None or crop.size == 0:
+            return None
+        self._count(key, 'checked')
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry['pending'] = None
+        age = frame_count - entry['frame_count']
+        if age <= 0 or age > self.config['max_reuse_sec'] * self.fps or crop.shape != entry['shape']:
+            return None
+
+        thumbnail = self._thumbnail(crop)
+        entry['pending'] = thumbnail
+        if float(np.mean(np.abs(thumbnail - entry['thumbnail']))) > self.config['max_mean_diff']:
+            return None
+
+        self._count(key, 'reused')
+        return entry['result']
+
+    def store(self, key, crop, frame_count, result):
+        """Remember the result of a real decode of this ROI crop."""
+        if not self.config['enabled'] or crop is None or crop.size == 0:
+            return
+        entry = self._entries.get(key)
+        # Thumbnail already computed by reuse() for this crop, if any
+        thumbnail = entry.pop('pending', None) if entry else None
+        self._entries[key] = {
+            'thumbnail': thumbnail if thumbnail is not None else self._thumbnail(crop),
+            'frame_count': frame_count,
+            'shape': crop.shape,
+            'result': result,
+        }
+
+    def skip_ratio(self):
+        """Fraction of checked ROI crops that reused a cached result, per ROI and overall."""
+        ratios = {}
+        checked = reused = 0
+        for key, bucket in self.stats.items():
+            ratios[key] = round(bucket['reused'] / bucket['checked'], 4) if bucket['checked'] else 0.0
+            checked += bucket['checked']
+            reused += bucket['reused']
+        ratios['overall'] = round(reused / checked, 4) if checked else 0.0
+        return ratios
@@ -0,0 +1,190 @@
+"""
+Buffered segment log writer shared by the frame samplers.
+
+Both samplers write one small text log per 300s segment that the event
+detector parses later. FrameSamplerTrigger flushed the handle after almost
+every line, and FrameSamplerNoTrigger reopened the file for every single
+entry from its queue thread. SamplerLogWriter keeps one open handle per
+segment and batches lines:
+
+- a segment's buffer is written when it holds max_buffered_lines lines, or
+  on the next write/flusher pass once flush_interval_sec has passed since its
+  oldest buffered line (bounded latency for readers tailing the log)
+- close() always writes and closes; a daemon flusher thread writes stale
+  buffers of idle segments, and an atexit hook closes every open segment so
+  an aborted run still leaves complete logs
+
+Usage:
+    from modules.technician.sampler_log_writer import log_writer
+
+    segment = log_writer.open(log_file, header)
+    segment.write("12,On,\\n")
+    segment.close()
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LOG_WRITER_CONFIG = {
+    'flush_interval_sec': float(os.getenv('VTRACK_LOG_FLUSH_SEC', '1.0')),
+    'max_buffered_lines': 64,
+}
+
+
+class SegmentLog:
+    """Open segment log with a line buffer; same write/flush/close interface as a file."""
+
+    def __init__(self, writer, path, header=None, append=False, lazy=False):
+        self.writer = writer
+        self.path = path
+        self.header = header
+        self.append = append
+        self.closed = False
+        self._handle = None
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        if not lazy:
+            with self._lock:
+                self._open_locked()
+
+    def _open_locked(self):
+        # Appending to an existing segment keeps its header
+        appending = self.append and os.path.exists(self.path)
+        self._handle = open(self.path, 'a' if appending else 'w')
+        self.writer._count(segments=1)
+        if self.header and not appending:
+            self._handle.write(self.header if self.header.endswith("\n") else self.header + "\n")
+            self._handle.flush()
+
+    def write(self, line):
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"Segment log already closed: {self.path}")
+            self._buffer.append(line)
+            if self._oldest is None:
+                self._oldest = time.time()
+            if len(self._buffer) >= self.writer.config['max_buffered_lines'] or self._stale_locked():
+                self._flush_locked()
+
+    def _stale_locked(self):
+        return self._oldest is not None and time.time() - self._oldest >= self.writer.config['flush_interval_sec']
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        if self._handle is None:
+            self._open_locked()
+        data = "".join(self._buffer)
+        write_start = time.time()
+        self._handle.write(data)
+        self._handle.flush()
+        self.writer._count(lines=len(self._buffer), bytes=len(data), flushes=1,
+                           write_seconds=time.time() - write_start)
+        self._buffer = []
+        self._oldest = None
+
+    def flush(self, stale_only=False):
+        """Write buffered lines now (only if older than flush_interval_sec when stale_only)."""
+        with self._lock:
+            if not self.closed and (not stale_only or self._stale_locked()):
+                self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self.closed = True
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+        self.writer._forget(self)
+
+
+class SamplerLogWriter:
+    """Registry of open segment logs with a background flusher and write counters."""
+
+    def __init__(self, config=None):
+        self.config = dict(LOG_WRITER_CONFIG, **(config or {}))
+        self._lock = threading.Lock()
+        self._segments = []
+        self._flusher = None
+        self._stats = {'segments': 0, 'lines': 0, 'bytes': 0, 'flushes': 0, 'write_seconds': 0.0}
+
+    def open(self, path, header=None, append=False, lazy=False):
+        """
+        Open a segment log.
+
+        Args:
+            path: Log file path
+            header: First line written to a new (or truncated) file ("# Start: ..., End: ...")
+            append: Append to an existing file, without a second header, instead of truncating it
+            lazy: Create the file on the first flushed line instead of now
+        """
+        with self._lock:
+            stale = [segment for segment in self._segments if segment.path == path]
+        for segment in stale:
+            # Left open by an aborted run: finish it before the file is reopened
+            segment.close()
+        segment = SegmentLog(self, path, header, append=append, lazy=lazy)
+        with self._lock:
+            self._segments.append(segment)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="SamplerLogFlusher", daemon=True)
+                self._flusher.start()
+        return segment
+
+    def _forget(self, segment):
+        with self._lock:
+            if segment in self._segments:
+                self._segments.remove(segment)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.config['flush_interval_sec'])
+            with self._lock:
+                segments = list(self._segments)
+            for segment in segments:
+                try:
+                    segment.flush(stale_only=True)
+                except Exception as e:
+                    logger.error(f"[LOG-WRITER] Flush failed for {segment.path}: {e}")
+
+    def close_all(self):
+        """Flush and close every open segment (process exit)."""
+        with self._lock:
+            segments = list(self._segments)
+        for segment in segments:
+            try:
+                segment.close()
+            except Exception as e:
+                logger.error(f"[LOG-WRITER] Close failed for {segment.path}: {e}")
+
+    def _count(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def stats(self):
+        """Write throughput counters, for logs."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = len(self._segments)
+        write_seconds = stats['write_seconds']
+        stats['write_seconds'] = round(write_seconds, 4)
+        stats['lines_per_write'] = round(stats['lines'] / stats['flushes'], 1) if stats['flushes'] else 0.0
+        stats['bytes_per_sec'] = round(stats['bytes'] / write_seconds) if write_seconds > 0 else 0
+        return stats
+
+
+# Process-wide writer shared by both frame samplers
+log_writer = SamplerLogWriter()
+atexit.register(log_writer.close_all)
@@ -0,0 +1,122 @@
+"""
+QR-size-aware decoding for the trigger frame sampler.
+
+FrameSamplerTrigger learns the expected MVD and TimeGo QR sizes per camera
+(packing_profiles.expected_mvd_qr_size / expected_trigger_qr_size) but every
+crop was still decoded at full resolution with the super-resolution CNN.
+On high-resolution cameras the codes are often 150-300px wide: far more
+pixels than the detector needs, and SR only costs time on them.
+
+SizeAwareDecoder plans each decode from the expected code size:
+
+- code larger than target_qr_px -> crop downscaled so the code lands at about
+  target_qr_px (never upscaled)
+- code at or above sr_min_qr_px after scaling -> detector without SR
+  (qr_detector_pool.fast_detector_pool)
+- small code or unknown size -> full resolution with SR (previous behaviour)
+
+Points are mapped back to crop coordinates, so callers see the same output
+as before. A planned (scaled or no-SR) decode that decodes nothing is retried
+once at full resolution with SR when tier 1 located a code in the crop, so a
+stale expected size cannot lower the decode success rate; empty crops (the
+common case) are not retried. The retry reuses the tier-1 boxes of the
+planned decode. With tiered decoding "off" there is no tier 1 to gate the
+retry, so planning is disabled and every crop is decoded as before.
+
+Usage:
+    from modules.technician.size_aware_decoder import size_aware_decoder
+
+    texts, points = size_aware_decoder.detect_and_decode(frame_packing, expected_mvd_qr_size, region="packing")
+"""
+
+import cv2
+import os
+import threading
+import numpy as np
+
+from modules.technician.qr_detector_pool import detector_pool, fast_detector_pool
+from modules.technician.tiered_qr_decoder import tiered_decoder
+
+SIZE_AWARE_CONFIG = {
+    'enabled': os.getenv('VTRACK_QR_SIZE_AWARE', 'true').lower() in ('1', 'true', 'yes'),
+    'target_qr_px': int(os.getenv('VTRACK_QR_TARGET_PX', '120')),   # Code side after downscaling
+    'sr_min_qr_px': 60,       # Codes at least this large (after scaling) are decoded without SR
+    'min_scale': 0.25,        # Never shrink a crop below a quarter of its size
+}
+
+_COUNTERS = ('frames', 'downscaled', 'no_sr', 'fallback', 'fallback_decoded')
+
+
+def plan_decode(expected_size, config=SIZE_AWARE_CONFIG):
+    """
+    Scale and SR choice for a code of `expected_size` ({"width", "height"} in pixels).
+
+    Returns:
+        tuple: (scale, use_sr); (1.0, True) when the size is unknown
+    """
+    if not config['enabled'] or not expected_size:
+        return 1.0, True
+    side = max(expected_size.get('width') or 0, expected_size.get('height') or 0)
+    if side <= 0:
+        return 1.0, True
+    scale = max(config['min_scale'], min(1.0, config['target_qr_px'] / float(side)))
+    return scale, side * scale < config['sr_min_qr_px']
+
+
+class SizeAwareDecoder:
+    """Tiered WeChat decode with the crop scale and SR model chosen from the expected QR size."""
+
+    def __init__(self, config=None):
+        self.config = dict(SIZE_AWARE_CONFIG, **(config or {}))
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def detect_and_decode(self, frame, expected_size=None, region="frame"):
+        """
+        Drop-in replacement for tiered_decoder.detect_and_decode(detector, frame, region).
+
+        Returns:
+            tuple: (texts, points) with points in `frame` coordinates
+        """
+        scale, use_sr = plan_decode(expected_size, self.config)
+        if (scale == 1.0 and use_sr) or tiered_decoder.mode == "off":
+            self._count(region, {'frames': 1})
+            return tiered_decoder.detect_and_decode(detector_pool.thread_detector(), frame, region=region)
+
+        counts = {'frames': 1, 'downscaled': int(scale < 1.0), 'no_sr': int(not use_sr)}
+        scaled = frame
+        if scale < 1.0:
+            height, width = frame.shape[:2]
+            scaled = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        detector = detector_pool.thread_detector() if use_sr else fast_detector_pool.thread_detector()
+        texts, points, boxes = tiered_decoder.detect_and_decode_boxes(detector, scaled, region=region)
+
+        if not any(texts) and boxes:
+            # Code seen but not read; expected size may be stale (new label, camera moved)
+            full_boxes = [tuple(int(v / scale) for v in box) for box in boxes]
+            texts, points = tiered_decoder.decode_boxes(detector_pool.thread_detector(), frame, full_boxes, region=region)
+            counts['fallback'] = 1
+            counts['fallback_decoded'] = int(any(texts))
+        elif scale < 1.0:
+            points = tuple(np.asarray(box, dtype=np.float32) / scale for box in points)
+        self._count(region, counts)
+        return texts, points
+
+    def _count(self, region, counts):
+        with self._lock:
+            bucket = self._stats.setdefault(region, dict.fromkeys(_COUNTERS, 0))
+            for key, value in counts.items():
+                bucket[key] += value
+
+    def stats(self):
+        """Per-region counters, for logs."""
+        with self._lock:
+            return {region: dict(bucket) for region, bucket in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+
+# Process-wide decoder used by the trigger frame sampler
+size_aware_decoder = SizeAwareDecoder()
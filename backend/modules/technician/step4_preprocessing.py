@@ -0,0 +1,402 @@
+"""
+Single-pass Step 4 preprocessing (hands + QR + trigger QR + baseline).
+
+The Step 4 ROI page used to start three independent decodes of the same
+sample video: hand preprocessing, QR preprocessing and the baseline capture.
+This module walks the video once at the detection fps and fans every decoded
+frame out to:
+
+    - MediaPipe Hands on the packing ROI        -> "hand" detection cache
+    - WeChat QR on the packing ROI               -> "qr" detection cache
+    - WeChat QR on the trigger ROI (if separate) -> "qr" cache, "<key>_trigger"
+    - baseline metrics, computed from the QR timeline once the first
+      10s + 3s are decoded                       -> "qr_baseline" cache
+
+Both /preprocess-video endpoints start (or join) the same job. The job's
+progress dict is registered in both blueprints' progress registries under
+their cache keys, so /preprocess-status and Step 4 cancellation keep working
+unchanged and report one combined progress value.
+
+Set VTRACK_COMBINED_PREPROCESSING=false to fall back to the separate jobs.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import cv2
+
+from modules.technician.frame_source import OpenCVFrameSource
+from modules.technician.qr_detector_pool import detector_pool
+from modules.technician.qr_detector import _detect_qr_in_frame, DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL
+from modules.technician.hand_detection import mp_hands, clamp_roi_to_frame, build_hand_detection
+from modules.technician.camera_health_baseline import capture_baseline_from_detections, BASELINE_CONFIG
+from modules.technician.detection_cache import get_detection_cache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+COMBINED_PREPROCESSING_ENABLED = os.getenv('VTRACK_COMBINED_PREPROCESSING', 'true').lower() in ('1', 'true', 'yes')
+
+# TimeGo search window of the baseline protocol, plus its sample duration
+BASELINE_SEARCH_SEC = 10.0
+BASELINE_READY_SEC = BASELINE_SEARCH_SEC + BASELINE_CONFIG['sample_duration_sec']
+
+# Running jobs by cache key (same key for the hand and QR caches)
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def _roi_contains(outer: dict, inner: dict) -> bool:
+    return (outer['x'] <= inner['x'] and outer['y'] <= inner['y'] and
+            inner['x'] + inner['w'] <= outer['x'] + outer['w'] and
+            inner['y'] + inner['h'] <= outer['y'] + outer['h'])
+
+
+def preprocess_video_combined(video_path: str, roi_config: dict, fps: int = 5, trigger_roi: Optional[dict] = None,
+                              run_hands: bool = True, run_qr: bool = True,
+                              progress_callback: Optional[Callable] = None,
+                              is_cancelled: Optional[Callable[[], bool]] = None) -> dict:
+    """
+    Decode the video once at `fps` and run hand and QR detection on every sampled frame
+
+    Args:
+        video_path (str): Path to video file
+        roi_config (dict): Packing ROI {'x', 'y', 'w', 'h'} (original video coordinates)
+        fps (int): Detection fps (default 5fps = every 0.2s)
+        trigger_roi (dict): Trigger ROI; decoded separately only if it is not inside roi_config
+        run_hands, run_qr (bool): Skip a detector whose results are already cached
+        progress_callback (callable): progress_callback(progress, processed_count, total_frames, timestamp, new_detections)
+            with new_detections = {'hand': list, 'qr': list, 'trigger': list}
+        is_cancelled (callable): Polled before every frame; True stops the pass
+
+    Returns:
+        dict: {
+            'success': bool,
+            'hand': {'detections': list, 'metadata': dict} | None,
+            'qr': {'detections': list, 'metadata': dict} | None,
+            'trigger': {'detections': list, 'metadata': dict} | None,
+            'total_frames_processed': int,
+            'error': str (if error)
+        }
+    """
+    try:
+        logger.info(f"[STEP4-PREPROCESS] Combined preprocessing at {fps}fps for {video_path} "
+                    f"(hands={run_hands}, qr={run_qr}, trigger={trigger_roi is not None})")
+
+        if not os.path.exists(video_path):
+            return {"success": False, "error": f"Video file not found: {video_path}"}
+        if not roi_config or not all(k in roi_config for k in ['x', 'y', 'w', 'h']):
+            return {"success": False, "error": "Invalid ROI configuration"}
+        if not fps or fps <= 0:
+            return {"success": False, "error": f"Invalid detection fps: {fps}"}
+        if run_qr:
+            for model_file in [DETECT_PROTO, DETECT_MODEL, SR_PROTO, SR_MODEL]:
+                if not os.path.exists(model_file):
+                    return {"success": False, "error": f"Model file not found: {model_file}"}
+
+        if trigger_roi and _roi_contains(roi_config, trigger_roi):
+            trigger_roi = None  # Already covered by the packing ROI decode
+        run_trigger = run_qr and trigger_roi is not None
+
+        source = OpenCVFrameSource(video_path)
+        if not source.open():
+            return {"success": False, "error": f"Cannot open video: {video_path}"}
+
+        hands = None
+        try:
+            duration = source.duration
+            qr_detector = detector_pool.thread_detector() if run_qr else None
+            if run_hands:
+                hands = mp_hands.Hands(
+                    static_image_mode=True,
+                    max_num_hands=2,
+                    min_detection_confidence=0.5,
+                    min_tracking_confidence=0.5
+                )
+
+            timestamps = []
+            index = 0
+            while index / fps <= duration:
+                timestamps.append(round(index / fps, 2))
+                index += 1
+            total_timestamps = len(timestamps)
+            logger.info(f"[STEP4-PREPROCESS] Processing {total_timestamps} timestamps for {duration:.1f}s video")
+
+            hand_detections, qr_detections, trigger_detections = [], [], []
+            processed_count = 0
+            start_time = time.time()
+
+            for timestamp in timestamps:
+                if is_cancelled and is_cancelled():
+                    logger.info(f"[STEP4-PREPROCESS] Cancelled at {timestamp}s ({processed_count}/{total_timestamps})")
+                    return {"success": False, "error": f"Processing cancelled at timestamp {timestamp}s"}
+
+                new = {'hand': [], 'qr': [], 'trigger': []}
+                qr_timestamp = round(timestamp, 1)
+                frame = source.read_at(timestamp)
+                if frame is None:
+                    logger.warning(f"[STEP4-PREPROCESS] Cannot read frame at {timestamp}s")
+                    # Keep the QR timelines contiguous, as preprocess_video_qr does
+                    if run_qr:
+                        new['qr'].append({'timestamp': qr_timestamp, 'qr_detections': [], 'qr_count': 0})
+                    if run_trigger:
+                        new['trigger'].append({'timestamp': qr_timestamp, 'qr_detections': [], 'qr_count': 0})
+                else:
+                    frame_height, frame_width = frame.shape[:2]
+                    if run_hands:
+                        roi_box = clamp_roi_to_frame(roi_config, frame_width, frame_height)
+                        x, y, w, h = roi_box
+                        rgb_frame = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2RGB)
+                        detection = build_hand_detection(hands.process(rgb_frame), timestamp, roi_box, frame_width, frame_height)
+                        if detection:
+                            new['hand'].append(detection)
+                    for name, roi, enabled in (('qr', roi_config, run_qr), ('trigger', trigger_roi, run_trigger)):
+                        if not enabled:
+                            continue
+                        result = _detect_qr_in_frame(qr_detector, frame, roi)
+                        if not result['success']:
+                            logger.warning(f"[STEP4-PREPROCESS] {name} QR failed at {timestamp}s - {result.get('error')}")
+                            result = {'qr_detections': [], 'qr_count': 0}
+                        new[name].append({
+                            'timestamp': qr_timestamp,
+                            'qr_detections': result['qr_detections'],
+                            'qr_count': result['qr_count']
+                        })
+
+                hand_detections.extend(new['hand'])
+                qr_detections.extend(new['qr'])
+                trigger_detections.extend(new['trigger'])
+                processed_count += 1
+
+                if progress_callback:
+                    progress_callback((processed_count / total_timestamps) * 100, processed_count,
+                                      total_timestamps, timestamp, new)
+
+                if processed_count % max(1, total_timestamps // 4) == 0:
+                    logger.info(f"[STEP4-PREPROCESS] Progress: {processed_count}/{total_timestamps} "
+                                f"({processed_count / total_timestamps * 100:.1f}%)")
+
+            decode_stats = dict(source.stats)
+        finally:
+            source.close()
+            if hands is not None:
+                hands.close()
+
+        processing_time = round(time.time() - start_time, 2)
+        logger.info(f"[STEP4-PREPROCESS] Completed {processed_count} frames in {processing_time}s "
+                    f"(grabbed={decode_stats['grabbed']}, retrieved={decode_stats['retrieved']}, seeks={decode_stats['seeks']})")
+
+        def qr_result(detections, roi):
+            total_qr_detections = sum(d.get('qr_count', 0) for d in detections)
+            return {
+                'detections': detections,
+                'metadata': {
+                    'video_path': video_path,
+                    'roi_config': roi,
+                    'detection_fps': fps,
+                    'video_duration': duration,
+                    'total_timestamps': total_timestamps,
+                    'total_qr_detections': total_qr_detections,
+                    'processing_time_seconds': processing_time,
+                    'qr_detection_rate': f"{total_qr_detections}/{total_timestamps} frames",
+                    'decode_stats': decode_stats,
+                    'combined_pass': True,
+                    'processed_at': datetime.now().isoformat()
+                }
+            }
+
+        hand_result = None
+        if run_hands:
+            hand_result = {
+                'detections': hand_detections,
+                'metadata': {
+                    'video_path': video_path,
+                    'duration': duration,
+                    'total_frames': source.frame_count,
+                    'video_fps': source.fps,
+                    'detection_fps': fps,
+                    'roi_config': roi_config,
+                    'frames_processed': processed_count,
+                    'hands_detected_count': len(hand_detections),
+                    'combined_pass': True
+                }
+            }
+
+        return {
+            'success': True,
+            'hand': hand_result,
+            'qr': qr_result(qr_detections, roi_config) if run_qr else None,
+            'trigger': qr_result(trigger_detections, trigger_roi) if run_trigger else None,
+            'total_frames_processed': processed_count
+        }
+
+    except Exception as e:
+        error_msg = f"Error in combined video pre-processing: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg}
+
+
+def _capture_baseline(job: Dict[str, Any], detections: list) -> None:
+    """Compute the baseline for a job from QR timeline entries and cache it under the job key"""
+    job['baseline_done'] = True
+    baseline_result = capture_baseline_from_detections(
+        camera_name=job['camera_name'],
+        video_path=job['video_path'],
+        trigger_roi=job['trigger_roi'] or job['roi_config'],
+        detections=detections,
+        packing_profile_id=job.get('packing_profile_id'),
+        max_search_sec=BASELINE_SEARCH_SEC
+    )
+    if baseline_result.get('success'):
+        get_detection_cache("qr_baseline").put(job['cache_key'], {
+            'baseline_success_rate_pct': baseline_result.get('baseline_success_rate_pct', 0),
+            'detected_frames': baseline_result.get('detected_frames', 0),
+            'total_frames': baseline_result.get('total_frames', 0),
+            'baseline_id': baseline_result.get('baseline_id'),
+            'first_timego_sec': baseline_result.get('first_timego_sec')
+        })
+        logger.info(f"[BASELINE] ✅ Baseline READY: {baseline_result.get('baseline_success_rate_pct', 0):.1f}% for {job['cache_key']}")
+    else:
+        logger.warning(f"[BASELINE] Baseline capture failed: {baseline_result.get('error', 'Unknown error')}")
+
+
+def ensure_baseline(video_path: str, roi_config: dict, fps: int, camera_name: str,
+                    packing_profile_id: Optional[int] = None, trigger_roi: Optional[dict] = None) -> None:
+    """Capture a missing baseline from cached QR detections (no decoding), in the background"""
+    cache_key = make_cache_key(video_path, roi_config, fps)
+    if not camera_name or get_detection_cache("qr_baseline").get(cache_key) is not None:
+        return
+    qr_cache = get_detection_cache("qr")
+    cached = qr_cache.get(f"{cache_key}_trigger") if trigger_roi else None
+    cached = cached or qr_cache.get(cache_key)
+    if cached is None:
+        return
+    job = {'cache_key': cache_key, 'video_path': video_path, 'roi_config': roi_config, 'trigger_roi': trigger_roi,
+           'camera_name': camera_name, 'packing_profile_id': packing_profile_id}
+    threading.Thread(target=_capture_baseline, args=(job, cached['detections']), daemon=True,
+                     name=f"baseline-{cache_key[:8]}").start()
+
+
+def start_step4_preprocessing(video_path: str, roi_config: dict, fps: int = 5, camera_name: Optional[str] = None,
+                              packing_profile_id: Optional[int] = None, trigger_roi: Optional[dict] = None):
+    """
+    Start the combined preprocessing job for video + ROI + fps, or join the running one
+
+    A caller that knows the camera (the QR endpoint) attaches it to a job the
+    hand endpoint started, so the baseline is still captured.
+
+    Returns:
+        tuple: (job progress dict, started: bool)
+    """
+    from blueprints.qr_detection_bp import qr_preprocessing_progress
+    from blueprints.simple_hand_detection_bp import preprocessing_progress as hand_preprocessing_progress
+
+    if trigger_roi and _roi_contains(roi_config, trigger_roi):
+        trigger_roi = None  # Trigger QR codes are already in the packing ROI timeline
+    cache_key = make_cache_key(video_path, roi_config, fps)
+    with _jobs_lock:
+        job = _jobs.get(cache_key)
+        if job is not None:
+            if camera_name and not job.get('camera_name'):
+                job['camera_name'] = camera_name
+                job['packing_profile_id'] = packing_profile_id
+                logger.info(f"[STEP4-PREPROCESS] Attached camera {camera_name} to running job {cache_key}")
+            return job, False
+
+        job = {
+            'progress': 0.0,
+            'started_at': datetime.now(),
+            'estimated_completion': None,
+            'processed_count': 0,
+            'total_frames': 0,
+            'camera_name': camera_name,
+            'packing_profile_id': packing_profile_id,
+            'roi_config': roi_config,
+            'trigger_roi': trigger_roi,
+            'video_path': video_path,
+            'cache_key': cache_key,
+            'combined': True,
+            'baseline_done': False
+        }
+        _jobs[cache_key] = job
+        # One dict in both registries: either status endpoint sees the combined progress,
+        # and Step 4 cancellation (which flags every registry entry) stops the single pass
+        hand_preprocessing_progress[cache_key] = job
+        qr_preprocessing_progress[cache_key] = job
+
+    thread = threading.Thread(target=_run_job, args=(job, fps), daemon=True, name=f"step4-{cache_key[:8]}")
+    thread.start()
+    return job, True
+
+
+def _run_job(job: Dict[str, Any], fps: int) -> None:
+    from blueprints.qr_detection_bp import qr_preprocessing_progress
+    from blueprints.simple_hand_detection_bp import preprocessing_progress as hand_preprocessing_progress
+
+    cache_key = job['cache_key']
+    trigger_key = f"{cache_key}_trigger"
+    hand_cache = get_detection_cache("hand")
+    qr_cache = get_detection_cache("qr")
+    run_hands = hand_cache.get(cache_key) is None
+    run_qr = qr_cache.get(cache_key) is None
+    try:
+        if not run_hands and not run_qr:
+            logger.info(f"[STEP4-PREPROCESS] Hand and QR results already cached for {cache_key}")
+            return
+
+        # Progressive accumulation entries (memory only until completed)
+        for cache, key, enabled in ((hand_cache, cache_key, run_hands), (qr_cache, cache_key, run_qr),
+                                    (qr_cache, trigger_key, run_qr and job['trigger_roi'] is not None)):
+            if enabled:
+                cache.put(key, {
+                    'detections': [],
+                    'metadata': {'partial_results': True, 'progress': 0.0, 'processed_count': 0, 'total_frames': 0}
+                }, persist=False)
+
+        def on_progress(progress, processed_count, total_frames, timestamp, new_detections):
+            job.update({'progress': progress, 'processed_count': processed_count, 'total_frames': total_frames})
+            metadata = {'progress': progress, 'processed_count': processed_count, 'total_frames': total_frames}
+            if new_detections['hand']:
+                hand_cache.extend(cache_key, new_detections['hand'], metadata)
+            if new_detections['qr']:
+                qr_cache.extend(cache_key, new_detections['qr'], metadata)
+            if new_detections['trigger']:
+                qr_cache.extend(trigger_key, new_detections['trigger'], metadata)
+            # Baseline as soon as its window is decoded, not at the end of a long video
+            if run_qr and job.get('camera_name') and not job['baseline_done'] and timestamp >= BASELINE_READY_SEC:
+                baseline_source = qr_cache.get(trigger_key if job['trigger_roi'] else cache_key)
+                if baseline_source is not None:
+                    _capture_baseline(job, list(baseline_source['detections']))
+
+        result = preprocess_video_combined(
+            job['video_path'], job['roi_config'], fps, trigger_roi=job['trigger_roi'],
+            run_hands=run_hands, run_qr=run_qr, progress_callback=on_progress,
+            is_cancelled=lambda: job.get('cancelled', False)
+        )
+
+        if result.get('success'):
+            if result['hand'] is not None:
+                hand_cache.put(cache_key, result['hand'])
+            if result['qr'] is not None:
+                qr_cache.put(cache_key, result['qr'])
+            if result['trigger'] is not None:
+                qr_cache.put(trigger_key, result['trigger'])
+            if run_qr and job.get('camera_name') and not job['baseline_done']:
+                _capture_baseline(job, (result['trigger'] or result['qr'])['detections'])
+            logger.info(f"[STEP4-PREPROCESS] Cached combined results for {cache_key} "
+                        f"({result['total_frames_processed']} frames decoded once)")
+        elif "cancelled" in str(result.get('error', '')).lower():
+            logger.info(f"[STEP4-PREPROCESS] Cancelled for {cache_key}: {result.get('error')}")
+        else:
+            logger.error(f"[STEP4-PREPROCESS] Failed for {cache_key}: {result.get('error')}")
+
+    except Exception as e:
+        logger.error(f"[STEP4-PREPROCESS] Background job error for {cache_key}: {str(e)}")
+    finally:
+        with _jobs_lock:
+            _jobs.pop(cache_key, None)
+            hand_preprocessing_progress.pop(cache_key, None)
+            qr_preprocessing_progress.pop(cache_key, None)
@@ -0,0 +1,226 @@
+"""
+Tiered QR decoding for the V_Track frame samplers.
+
+Most sampled frames contain no QR code, yet every packing and trigger crop
+went through the WeChat detector CNN + super-resolution decode. The tiered
+decoder puts a cheap localisation stage in front of it:
+
+- Tier 1: cv2.QRCodeDetector.detectMulti() on a downscaled grayscale copy.
+  No finder patterns -> the frame is rejected without touching WeChat.
+- Tier 2: WeChat detectAndDecode on a padded crop around each localised code
+  (full frame if the crops decode nothing), points mapped back to frame
+  coordinates so callers see the same output as a full-frame call.
+
+Modes (VTRACK_TIERED_QR):
+    off     WeChat on every frame (previous behaviour)
+    shadow  WeChat on every frame, tier 1 run alongside; frames tier 1 would
+            have rejected but WeChat decoded are counted as shadow_missed, the
+            false-negative count to check on recorded footage before enabling
+    on      Tier 1 gates tier 2
+
+Usage:
+    from modules.technician.tiered_qr_decoder import tiered_decoder
+
+    texts, points = tiered_decoder.detect_and_decode(detector, roi_frame, region="packing")
+    tiered_decoder.stats()
+"""
+
+import cv2
+import os
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIERED_MODES = ("off", "shadow", "on")
+DEFAULT_MODE = os.getenv('VTRACK_TIERED_QR', 'shadow').lower()
+# Tier 1 works on frames scaled to at most this long side (never upscaled)
+TIER1_MAX_SIDE = int(os.getenv('VTRACK_TIERED_QR_MAX_SIDE', '480'))
+# Tier 2 crop padding around a localised code, as a fraction of its size
+CROP_PADDING = 0.5
+
+_COUNTERS = ('frames', 'tier1_rejected', 'tier1_passed', 'tier2_calls', 'tier2_decoded',
+             'tier2_fallback', 'shadow_checked', 'shadow_missed')
+
+
+class TieredQRDecoder:
+    """Cheap QR localisation in front of the WeChat decode, with per-region counters."""
+
+    def __init__(self, mode=DEFAULT_MODE, max_side=TIER1_MAX_SIDE, padding=CROP_PADDING):
+        if mode not in TIERED_MODES:
+            logger.warning(f"[TIERED-QR] Unknown mode '{mode}', using 'off'")
+            mode = "off"
+        self.mode = mode
+        self.max_side = max_side
+        self.padding = padding
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    # ---- tier 1 --------------------------------------------------------
+    def _localizer(self):
+        """cv2.QRCodeDetector bound to the calling thread (not thread-safe)."""
+        localizer = getattr(self._local, 'localizer', None)
+        if localizer is None:
+            localizer = cv2.QRCodeDetector()
+            self._local.localizer = localizer
+        return localizer
+
+    def localize(self, frame):
+        """
+        Finder-pattern localisation on a downscaled grayscale copy.
+
+        Returns:
+            list: (x, y, w, h) boxes in frame coordinates, empty if no QR was found
+        """
+        gray = frame if len(frame.shape) == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.max_side / float(max(height, width)))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+        found, points = self._localizer().detectMulti(gray)
+        if not found or points is None:
+            return []
+
+        boxes = []
+        for quad in points:
+            xs = [pt[0] / scale for pt in quad]
+            ys = [pt[1] / scale for pt in quad]
+            x, y = int(min(xs)), int(min(ys))
+            boxes.append((x, y, int(max(xs)) - x, int(max(ys)) - y))
+        return boxes
+
+    # ---- tier 2 --------------------------------------------------------
+    def _decode_regions(self, detector, frame, boxes):
+        """WeChat decode on padded crops around tier-1 boxes; points in frame coordinates."""
+        height, width = frame.shape[:2]
+        texts, points, seen = [], [], set()
+        for x, y, w, h in boxes:
+            pad = int(max(w, h) * self.padding) + 4
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            crop_texts, crop_points = detector.detectAndDecode(frame[y0:y1, x0:x1])
+            for text, box in zip(crop_texts, crop_points if crop_points is not None else []):
+                if text and text in seen:
+                    continue
+                seen.add(text)
+                texts.append(text)
+                points.append(np.asarray(box, dtype=np.float32) + np.array([x0, y0], dtype=np.float32))
+        return texts, points
+
+    # ---- entry point ---------------------------------------------------
+    def detect_and_decode(self, detector, frame, region="frame"):
+        """
+        Drop-in replacement for detector.detectAndDecode(frame).
+
+        Args:
+            detector: WeChat QR detector of the calling thread
+            frame: BGR crop to decode
+            region: Counter bucket ("packing", "trigger", ...)
+
+        Returns:
+            tuple: (texts, points) like WeChatQRCode.detectAndDecode
+        """
+        texts, points, _ = self.detect_and_decode_boxes(detector, frame, region=region)
+        return texts, points
+
+    def detect_and_decode_boxes(self, detector, frame, region="frame"):
+        """
+        detect_and_decode() that also returns the tier-1 boxes, so a caller can
+        retry the same frame with decode_boxes() without localising it again.
+
+        Returns:
+            tuple: (texts, points, boxes); boxes is None in "off" mode
+        """
+        if self.mode == "off":
+            texts, points = detector.detectAndDecode(frame)
+            return texts, points, None
+
+        boxes = self.localize(frame)
+        counts = {'frames': 1, 'tier1_passed' if boxes else 'tier1_rejected': 1}
+
+        if self.mode == "shadow":
+            texts, points = detector.detectAndDecode(frame)
+            counts['tier2_calls'] = 1
+            decoded = any(texts)
+            counts['tier2_decoded'] = int(decoded)
+            if not boxes:
+                counts['shadow_checked'] = 1
+                counts['shadow_missed'] = int(decoded)
+            self._count(region, counts)
+            return texts, points, boxes
+
+        if not boxes:
+            self._count(region, counts)
+            return (), (), boxes
+
+        texts, points = self._decode_tier2(detector, frame, boxes, counts)
+        self._count(region, counts)
+        return texts, points, boxes
+
+    def decode_boxes(self, detector, frame, boxes, region="frame"):
+        """
+        Tier 2 only, for a frame already localised by detect_and_decode_boxes()
+        (boxes in `frame` coordinates). The frame is not counted again; outside
+        "on" mode the boxes are ignored and the full frame is decoded.
+
+        Returns:
+            tuple: (texts, points) like WeChatQRCode.detectAndDecode
+        """
+        if self.mode == "off":
+            return detector.detectAndDecode(frame)
+
+        counts = {}
+        if self.mode == "on" and boxes:
+            texts, points = self._decode_tier2(detector, frame, boxes, counts)
+        else:
+            texts, points = detector.detectAndDecode(frame)
+            counts['tier2_calls'] = 1
+            counts['tier2_decoded'] = int(any(texts))
+            if self.mode == "shadow" and not boxes:
+                # Already counted as shadow_checked by detect_and_decode_boxes()
+                counts['shadow_missed'] = counts['tier2_decoded']
+        self._count(region, counts)
+        return texts, points
+
+    def _decode_tier2(self, detector, frame, boxes, counts):
+        """Crop decode around `boxes`, full-frame decode if the crops decode nothing."""
+        texts, points = self._decode_regions(detector, frame, boxes)
+        counts['tier2_calls'] = len(boxes)
+        if not any(texts):
+            # Localised but not decoded in the crops -> full-frame decode as before
+            texts, points = detector.detectAndDecode(frame)
+            counts['tier2_fallback'] = 1
+            counts['tier2_calls'] += 1
+        counts['tier2_decoded'] = int(any(texts))
+        return tuple(texts), tuple(points) if points is not None else ()
+
+    # ---- statistics ----------------------------------------------------
+    def _count(self, region, counts):
+        with self._lock:
+            bucket = self._stats.setdefault(region, dict.fromkeys(_COUNTERS, 0))
+            for key, value in counts.items():
+                bucket[key] += value
+
+    def stats(self):
+        """Per-region counters plus reject and shadow miss rates, for logs and health endpoints."""
+        with self._lock:
+            regions = {region: dict(bucket) for region, bucket in self._stats.items()}
+        for bucket in regions.values():
+            frames = bucket['frames']
+            bucket['reject_rate'] = round(bucket['tier1_rejected'] / frames, 4) if frames else 0.0
+            checked = bucket['shadow_checked']
+            bucket['shadow_miss_rate'] = round(bucket['shadow_missed'] / checked, 4) if checked else 0.0
+        return {'mode': self.mode, 'regions': regions}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+
+# Process-wide decoder used by the frame samplers
+tiered_decoder = TieredQRDecoder()
@@ -0,0 +1,292 @@
+"""
+Timeline store: typed frame sampler records for the event detector.
+
+The samplers used to hand their results to the event detector only through
+`log_<video>_<start>_<end>.txt` files: a `# Start: ..., Camera_Name: ...`
+header followed by `second,state,code[,bbox:[x,y,w,h]]` lines, which the
+detector re-read, split and matched with regexes. Segments now go to two
+SQLite tables keyed by the same log_file path that processed_logs uses:
+
+    timeline_segments  one row per segment (the old header)
+    timeline_records   one row per line: second, state, tracking_code, bbox
+
+The text log is still written when VTRACK_TEXT_LOGS is enabled (default) as a
+debug export, and it is what the sharded sampler merges; logs without a store
+segment (written before this change) are read from the text file. A stored
+segment is handed to the event detector through the event pipeline once its
+records are final: when it is closed, or, for segments opened with
+submit=False (a sampler that reopens segments in a later pass), when the
+sampler calls finish_segment(). timeline_segments.closed marks final
+segments; the detector's rescan only picks those up. Once the detector has
+processed a segment, its rows are deleted (delete_segment()).
+
+Usage:
+    segment = open_segment(log_file, meta, text_log=log_writer.open(log_file, header))
+    segment.record(12, "On", "MVD123", bbox=(x, y, w, h))
+    segment.close()
+
+    segment = open_segment(log_file, meta, append=True, submit=False)
+    ...
+    segment.close()
+    finish_segment(log_file, camera_name)      # after the last pass
+
+    timeline = load_segment(cursor, log_file)   # (meta, records) or None
+"""
+
+import os
+import re
+import threading
+
+from modules.db_utils.safe_connection import safe_db_connection
+from modules.scheduler.db_sync import db_rwlock
+from modules.scheduler.event_pipeline import event_pipeline
+
+TIMELINE_CONFIG = {
+    'text_logs': os.getenv('VTRACK_TEXT_LOGS', 'true').lower() in ('1', 'true', 'yes'),
+    'max_pending_records': 256,   # Records buffered before they are written to the store
+}
+
+# second,state,CODE,bbox:[x,y,w,h]  /  second,state,,boundary:[x,y,w,h]
+_BBOX_PATTERN = re.compile(r'^(?:bbox|boundary):\[(\d+),(\d+),(\d+),(\d+)\]')
+
+
+def format_header(meta):
+    """Text log header line for segment `meta` (without newline)."""
+    return (
+        f"# Start: {meta['start_second']}, End: {meta['end_second']}, Start_Time: {meta['start_time']}, "
+        f"Camera_Name: {meta['camera_name']}, Video_File: {meta['video_file']}"
+    )
+
+
+def parse_header(header):
+    """Segment meta from a text log header line."""
+    return {
+        'start_second': int(header.split("Start: ")[1].split(",")[0]),
+        'end_second': int(header.split("End: ")[1].split(",")[0]),
+        'start_time': header.split("Start_Time: ")[1].split(",")[0].strip(),
+        'camera_name': header.split("Camera_Name: ")[1].split(",")[0].strip(),
+        'video_file': header.split("Video_File: ")[1].split(",")[0].strip(),
+    }
+
+
+def format_record(second, state, code="", bbox=None):
+    """Text log line for one record (without newline)."""
+    if bbox is not None:
+        return f"{second},{state},{code},bbox:[{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}]"
+    return f"{second},{state},{code}"
+
+
+def parse_record(line):
+    """
+    Record tuple (second, state, code, bbox) from a text log line.
+
+    Returns:
+        tuple or None: None for blank lines, comments and unparsable lines
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    parts = line.split(",", 3)
+    if len(parts) < 2:
+        return None
+    try:
+        second = float(parts[0])
+    except ValueError:
+        return None
+    code = parts[2] if len(parts) > 2 else ""
+    bbox = None
+    if len(parts) > 3:
+        match = _BBOX_PATTERN.match(parts[3])
+        if match:
+            bbox = tuple(int(value) for value in match.groups())
+    return second, parts[1], code, bbox
+
+
+class TimelineSegment:
+    """One sampler segment being written to the store (and optionally its text log)."""
+
+    def __init__(self, log_file, meta, text_log=None, append=False, store=True, submit=True):
+        self.log_file = log_file
+        self.meta = meta
+        self.text_log = text_log
+        self.store = store
+        self.submit = submit
+        self.closed = False
+        self._pending = []
+        self._lock = threading.Lock()
+        if store:
+            event_pipeline.segment_opened(log_file)
+            self._register(append)
+
+    def _register(self, append):
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                cursor = conn.cursor()
+                if not append:
+                    # Re-sampled segment replaces what an earlier run stored
+                    cursor.execute("DELETE FROM timeline_records WHERE log_file = ?", (self.log_file,))
+                cursor.execute(
+                    """INSERT OR REPLACE INTO timeline_segments
+                       (log_file, video_file, camera_name, start_second, end_second, start_time, closed)
+                       VALUES (?, ?, ?, ?, ?, ?, 0)""",
+                    (self.log_file, self.meta['video_file'], self.meta['camera_name'],
+                     self.meta['start_second'], self.meta['end_second'], self.meta['start_time'])
+                )
+
+    def record(self, second, state, code="", bbox=None):
+        """Append one record; bbox is (x, y, w, h) of the decoded QR, if any."""
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"Timeline segment already closed: {self.log_file}")
+            if self.store:
+                self._pending.append((self.log_file, second, state, code or "") + (tuple(bbox) if bbox is not None else (None,) * 4))
+            if self.text_log is not None:
+                self.text_log.write(format_record(second, state, code or "", bbox) + "\n")
+            if len(self._pending) >= TIMELINE_CONFIG['max_pending_records']:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with db_rwlock.gen_wlock():
+            with safe_db_connection() as conn:
+                conn.cursor().executemany(
+                    """INSERT INTO timeline_records
+                       (log_file, second, state, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    self._pending
+                )
+        self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self.closed = True
+                if self.text_log is not None:
+                    self.text_log.close()
+        if self.store and self.submit:
+            # Outside the segment lock: blocks while the detector queue is full
+            finish_segment(self.log_file, self.meta['camera_name'])
+
+
+def open_segment(log_file, meta, text_log=None, append=False, store=True, submit=True):
+    """
+    Start a store segment for log_file.
+
+    Args:
+        log_file: Segment key (the text log path, also used by processed_logs)
+        meta: {"start_second", "end_second", "start_time", "camera_name", "video_file"}
+        text_log: Open sampler_log_writer segment mirroring the records, or None
+        append: Keep records already stored for log_file instead of replacing them
+        store: False for intermediate text-only logs (shard logs merged later)
+        submit: False if close() does not make the records final; the caller
+            then hands the segment over with finish_segment()
+    """
+    return TimelineSegment(log_file, meta, text_log=text_log, append=append, store=store, submit=submit)
+
+
+def finish_segment(log_file, camera_name=None):
+    """Mark a closed segment's records final and queue it for the event detector."""
+    with db_rwlock.gen_wlock():
+        with safe_db_connection() as conn:
+            conn.cursor().execute("UPDATE timeline_segments SET closed = 1 WHERE log_file = ?", (log_file,))
+    event_pipeline.submit(log_file, camera_name)
+
+
+def discard_segment(log_file):
+    """Drop a segment that will never be final (sampling aborted before it was handed over)."""
+    with db_rwlock.gen_wlock():
+        with safe_db_connection() as conn:
+            delete_segment(conn.cursor(), log_file)
+    event_pipeline.segment_discarded(log_file)
+
+
+def delete_segment(cursor, log_file):
+    """
+    Remove a segment and its records with the caller's cursor.
+
+    The event detector calls this in the transaction that marks the log processed:
+    records are only kept until their events are detected (the text export, if
+    enabled, stays on disk and is what a later re-detection would read).
+    """
+    cursor.execute("DELETE FROM timeline_records WHERE log_file = ?", (log_file,))
+    cursor.execute("DELETE FROM timeline_segments WHERE log_file = ?", (log_file,))
+
+
+def write_segment(log_file, meta, records):
+    """Store a complete segment at once (records: (second, state, code, bbox) tuples)."""
+    segment = TimelineSegment(log_file, meta)
+    for second, state, code, bbox in records:
+        segment.record(second, state, code, bbox)
+    segment.close()
+
+
+def load_segment(cursor, log_file):
+    """
+    Segment meta and records for log_file, read with the caller's cursor.
+
+    Returns:
+        tuple: (meta, records) with records as (second, state, code, bbox) in write order,
+        or None if the segment is not in the store (legacy text-only log)
+    """
+    cursor.execute(
+        "SELECT start_second, end_second, start_time, camera_name, video_file FROM timeline_segments WHERE log_file = ?",
+        (log_file,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    meta = {'start_second': row[0], 'end_second': row[1], 'start_time': row[2], 'camera_name': row[3], 'video_file': row[4]}
+    cursor.execute(
+        """SELECT second, state, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h
+           FROM timeline_records WHERE log_file = ? ORDER BY id""",
+        (log_file,)
+    )
+    records = [
+        (row[0], row[1], row[2] or "", tuple(row[3:7]) if row[3] is not None else None)
+        for row in cursor.fetchall()
+    ]
+    return meta, records
+
+
+def timeline_order(rows):
+    """
+    Logs in timeline order: video start time, then segment start.
+
+    Args:
+        rows: (log_file, camera_name, start_time, start_second) with start_time and
+            start_second from timeline_segments; NULL for logs without a store segment,
+            which are ordered by their text header instead (stable order if unreadable)
+
+    Returns:
+        list: (log_file, camera_name) tuples
+    """
+    keyed = []
+    for log_file, camera_name, start_time, start_second in rows:
+        if start_time is None:
+            try:
+                with open(log_file, "r") as f:
+                    meta = parse_header(f.readline().strip())
+                start_time, start_second = meta['start_time'], meta['start_second']
+                camera_name = camera_name or meta['camera_name']
+            except (OSError, IndexError, ValueError):
+                start_time, start_second = "", 0
+        keyed.append(((start_time, start_second), log_file, camera_name))
+    keyed.sort(key=lambda item: item[0])
+    return [(log_file, camera_name) for _, log_file, camera_name in keyed]
+
+
+def read_text_segment(log_file):
+    """(meta, records) parsed from a text log, for logs written before the store existed."""
+    with open(log_file, "r") as f:
+        meta = parse_header(f.readline().strip())
+        records = [record for record in (parse_record(line) for line in f) if record is not None]
+    return meta, records
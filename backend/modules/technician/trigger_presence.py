@@ -0,0 +1,123 @@
+"""
+Cheap TimeGo presence check for the trigger frame sampler.
+
+The TimeGo QR in the trigger ROI is large and does not move; its On/Off
+state changes a few times per order. Yet the trigger crop went through the
+same WeChat decode as the packing crop on every sampled frame.
+TriggerPresenceCheck keeps a grayscale template of the TimeGo code from the
+last decode that found it and, on the following frames, matches it against
+the trigger crop (cv2.matchTemplate, the crop is small):
+
+- score >= on_score   -> TimeGo present ("On")
+- score <= off_score  -> TimeGo absent ("Off")
+- in between          -> unsure, decode
+
+The predicted state is only trusted when it equals the last decoded state.
+A predicted transition, an unsure score, a sample gap above max_gap_sec or
+decode_interval_sec since the last decode all fall back to the full decode,
+so Ts/Te still come from decoded frames.
+
+Usage:
+    state = presence.predict(frame_trigger, frame_count)
+    if state is None:
+        state, points = ... decode ...
+        presence.update(frame_trigger, frame_count, state, points)
+"""
+
+import cv2
+import os
+import numpy as np
+
+PRESENCE_CONFIG = {
+    'enabled': os.getenv('VTRACK_TRIGGER_PRESENCE', 'true').lower() in ('1', 'true', 'yes'),
+    'decode_interval_sec': 5.0,   # Full decode at least this often
+    'max_gap_sec': 2.0,           # Samples further apart are decoded
+    'on_score': 0.85,             # TM_CCOEFF_NORMED score meaning TimeGo is in place
+    'off_score': 0.5,             # Score below which TimeGo is considered gone
+    'min_template_px': 16,        # Smaller codes are always decoded
+}
+
+
+class TriggerPresenceCheck:
+    """TimeGo On/Off from a template match, with the full decode reserved for suspected transitions."""
+
+    def __init__(self, fps, config=None):
+        self.config = dict(PRESENCE_CONFIG, **(config or {}))
+        self.fps = fps if fps and fps > 0 else 30
+        self.stats = {'checked': 0, 'skipped': 0, 'decoded': 0}
+        self.reset()
+
+    def reset(self):
+        """Forget the template and decoded state (new video or range)."""
+        self.template = None
+        self.state = None
+        self.decoded_frame = None
+        self.last_frame = None
+
+    def reset_stats(self):
+        self.stats = {'checked': 0, 'skipped': 0, 'decoded': 0}
+
+    def update(self, frame_trigger, frame_count, state, points=None):
+        """Record a real decode; `points` are the TimeGo corners when state is "On"."""
+        self.stats['decoded'] += 1
+        self.state = state
+        self.decoded_frame = frame_count
+        self.last_frame = frame_count
+        if not self.config['enabled'] or state != "On" or points is None or len(points) < 4:
+            # Keep an earlier template: it is what an "Off" crop is compared against
+            return
+
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        height, width = frame_trigger.shape[:2]
+        x0, y0 = max(0, int(points[:, 0].min())), max(0, int(points[:, 1].min()))
+        x1, y1 = min(width, int(np.ceil(points[:, 0].max()))), min(height, int(np.ceil(points[:, 1].max())))
+        if min(x1 - x0, y1 - y0) >= self.config['min_template_px']:
+            self.template = _gray(frame_trigger[y0:y1, x0:x1]).copy()
+
+    def score(self, frame_trigger):
+        """Best template match score in the trigger crop, or None if it cannot be matched."""
+        if self.template is None or frame_trigger is None or frame_trigger.size == 0:
+            return None
+        gray = _gray(frame_trigger)
+        if gray.shape[0] < self.template.shape[0] or gray.shape[1] < self.template.shape[1]:
+            return None
+        _, best, _, _ = cv2.minMaxLoc(cv2.matchTemplate(gray, self.template, cv2.TM_CCOEFF_NORMED))
+        return float(best)
+
+    def predict(self, frame_trigger, frame_count):
+        """
+        Trigger state without decoding, when the template agrees with the last decode.
+
+        Returns:
+            str: "On" / "Off", or None if the crop must be decoded
+        """
+        if not self.config['enabled'] or self.template is None or self.state is None:
+            return None
+        self.stats['checked'] += 1
+
+        gap = frame_count - self.last_frame
+        if gap <= 0 or gap > self.config['max_gap_sec'] * self.fps:
+            return None
+        if frame_count - self.decoded_frame >= self.config['decode_interval_sec'] * self.fps:
+            return None
+
+        score = self.score(frame_trigger)
+        if score is None:
+            return None
+        if score >= self.config['on_score']:
+            predicted = "On"
+        elif score <= self.config['off_score']:
+            predicted = "Off"
+        else:
+            return None
+        if predicted != self.state:
+            # Suspected transition: confirm with a decode
+            return None
+
+        self.last_frame = frame_count
+        self.stats['skipped'] += 1
+        return predicted
+
+
+def _gray(image):
+    return image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark IdleMonitor scan strategies on a synthetic long video
+
+Compares the legacy seek-per-second scan ("seek") with the sequential
+grab/retrieve scan ("sequential") on the same H.264 file, and checks that both
+produce identical work blocks.
+
+The synthetic video is generated with ffmpeg's testsrc2 source (libx264, fixed
+GOP) so the keyframe spacing matches typical IP camera recordings.
+
+Usage:
+    python3 scripts/benchmark_idle_monitor_scan.py
+    python3 scripts/benchmark_idle_monitor_scan.py --duration 3600 --gop 50
+    python3 scripts/benchmark_idle_monitor_scan.py --video /path/to/recording.mp4
+    python3 scripts/benchmark_idle_monitor_scan.py --decode-only
+    python3 scripts/benchmark_idle_monitor_scan.py --compare-backends --decode-only
+
+--compare-backends runs the sequential scan once per frame source backend
+(cv2.VideoCapture vs ffmpeg rawvideo pipe) instead of comparing strategies.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from modules.config.logging_config import get_logger
+from modules.technician.IdleMonitor import IdleMonitor
+
+logger = get_logger(__name__, {})
+
+
+class _NoHands:
+    """Stand-in for MediaPipe results when only decode cost is measured (--decode-only)."""
+    multi_hand_landmarks = None
+
+    def process(self, frame):
+        return self
+
+    def close(self):
+        pass
+
+
+def generate_synthetic_video(output_path: str, duration: int, fps: int, gop: int, size: str) -> None:
+    """Render a synthetic H.264 video with a fixed keyframe interval."""
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+        "-t", str(duration),
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", str(gop), "-keyint_min", str(gop),
+        "-pix_fmt", "yuv420p", output_path
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def run_strategy(video_path: str, strategy: str, packing_area, decode_only: bool, backend: str = "opencv") -> dict:
+    """Run IdleMonitor with one scan strategy and frame source backend, collect timing + work blocks."""
+    os.environ['VTRACK_FRAME_SOURCE'] = backend
+    # Motion gate off: every strategy must run the same hand checks to be comparable
+    monitor = IdleMonitor(processing_config={'idle_motion_threshold': 0}, scan_strategy=strategy)
+    if decode_only:
+        monitor.hands.close()
+        monitor.hands = _NoHands()
+
+    start = time.perf_counter()
+    monitor.process_video(video_path, "benchmark", packing_area)
+    elapsed = time.perf_counter() - start
+
+    queue = monitor.get_work_block_queue()
+    blocks = []
+    while not queue.empty():
+        block = queue.get()
+        blocks.append((block['start_time'], block['end_time']))
+
+    return {
+        "strategy": strategy,
+        "backend": backend,
+        "seconds": round(elapsed, 2),
+        "scan_stats": monitor.scan_stats,
+        "work_blocks": blocks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IdleMonitor scan strategies")
+    parser.add_argument("--video", help="Existing video to benchmark (skips synthetic generation)")
+    parser.add_argument("--duration", type=int, default=1800, help="Synthetic video duration in seconds")
+    parser.add_argument("--fps", type=int, default=25, help="Synthetic video fps")
+    parser.add_argument("--gop", type=int, default=50, help="Synthetic video keyframe interval in frames")
+    parser.add_argument("--size", default="1280x720", help="Synthetic video resolution")
+    parser.add_argument("--packing-area", default="0,0,640,360", help="ROI as x,y,w,h")
+    parser.add_argument("--decode-only", action="store_true", help="Skip MediaPipe to isolate decode cost")
+    parser.add_argument("--compare-backends", action="store_true", help="Compare opencv vs ffmpeg frame sources")
+    args = parser.parse_args()
+
+    packing_area = tuple(int(v) for v in args.packing_area.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(tmp_dir, "synthetic_idle.mp4")
+            logger.info(f"Generating {args.duration}s synthetic video (gop={args.gop})")
+            generate_synthetic_video(video_path, args.duration, args.fps, args.gop, args.size)
+
+        if args.compare_backends:
+            runs = [("sequential", backend) for backend in ("opencv", "ffmpeg")]
+        else:
+            runs = [(strategy, "opencv") for strategy in ("seek", "sequential")]
+        results = [
+            run_strategy(video_path, strategy, packing_area, args.decode_only, backend)
+            for strategy, backend in runs
+        ]
+
+    baseline_result, candidate_result = results
+    summary = {
+        "video": args.video or f"synthetic {args.duration}s @ {args.fps}fps, gop={args.gop}",
+        "decode_only": args.decode_only,
+        "results": [{k: v for k, v in r.items() if k != "work_blocks"} for r in results],
+        "speedup": round(baseline_result["seconds"] / candidate_result["seconds"], 2) if candidate_result["seconds"] else None,
+        "work_blocks_identical": baseline_result["work_blocks"] == candidate_result["work_blocks"],
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Unit tests for scheduler modules
+Tests intra-video sharding and log merging
+"""
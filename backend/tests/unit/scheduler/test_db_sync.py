@@ -0,0 +1,53 @@
+"""
+Unit tests for db_sync module
+Tests that database writers are exclusive across processes
+"""
+import multiprocessing
+import os
+
+import pytest
+
+
+def _write_in_child(go, acquired):
+    from modules.scheduler.db_sync import db_rwlock
+
+    go.wait(5)
+    with db_rwlock.gen_wlock():
+        acquired.set()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork to share the patched DB path")
+class TestInterProcessRWLock:
+    """Tests for InterProcessRWLock"""
+
+    def test_writer_in_other_process_waits(self, mocker, tmp_path):
+        """Test a write lock held in this process blocks a writer in another process until released"""
+        from modules import path_utils
+        from modules.scheduler.db_sync import db_rwlock
+
+        mocker.patch.object(path_utils, 'get_paths', return_value={"DB_PATH": str(tmp_path / "events.db")})
+        ctx = multiprocessing.get_context("fork")
+        go, acquired = ctx.Event(), ctx.Event()
+        # Forked before the lock is taken, so the child's in-process lock is free
+        child = ctx.Process(target=_write_in_child, args=(go, acquired))
+        child.start()
+        try:
+            with db_rwlock.gen_wlock():
+                go.set()
+                assert not acquired.wait(0.5)
+            assert acquired.wait(5)
+        finally:
+            child.join(5)
+        assert child.exitcode == 0
+        assert os.path.exists(str(tmp_path / "events.db.lock"))
+
+    def test_readers_do_not_take_file_lock(self, mocker, tmp_path):
+        """Test reads only use the in-process lock (WAL readers never block writers)"""
+        from modules import path_utils
+        from modules.scheduler.db_sync import db_rwlock
+
+        mocker.patch.object(path_utils, 'get_paths', return_value={"DB_PATH": str(tmp_path / "events.db")})
+        with db_rwlock.gen_rlock():
+            pass
+
+        assert not os.path.exists(str(tmp_path / "events.db.lock"))
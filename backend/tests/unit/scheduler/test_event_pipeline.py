@@ -0,0 +1,109 @@
+"""
+Unit tests for event_pipeline module
+Tests FIFO hand-off of completed segments, back-pressure and forwarding
+"""
+import threading
+import time
+
+
+class TestEventPipeline:
+    """Tests for EventPipeline queueing and counters"""
+
+    def test_without_consumer_submit_is_noop(self):
+        """Test segments are left to the rescan when no detector drains the queue"""
+        from modules.scheduler.event_pipeline import EventPipeline
+
+        pipeline = EventPipeline(maxsize=2, put_timeout=0.1)
+        pipeline.segment_opened('/logs/a.txt')
+
+        assert pipeline.is_busy('/logs/a.txt')
+        assert pipeline.submit('/logs/a.txt', 'Cam1') is False
+        assert not pipeline.is_busy('/logs/a.txt')
+        assert pipeline.depth() == 0
+
+    def test_fifo_and_latency_counters(self):
+        """Test segments come out in submit order and are busy until task_done()"""
+        from modules.scheduler.event_pipeline import EventPipeline
+
+        pipeline = EventPipeline(maxsize=4, put_timeout=0.1)
+        pipeline.attach_consumer()
+        for name in ('a', 'b', 'b', 'c'):
+            pipeline.submit(f'/logs/{name}.txt', 'Cam1')
+
+        items = [pipeline.get(timeout=0.1) for _ in range(3)]
+        assert [item['log_file'] for item in items] == ['/logs/a.txt', '/logs/b.txt', '/logs/c.txt']
+        assert pipeline.get(timeout=0.01) is None
+        assert pipeline.is_busy('/logs/a.txt')
+
+        for item in items:
+            pipeline.task_done(item)
+        snapshot = pipeline.snapshot()
+        assert not pipeline.is_busy('/logs/a.txt')
+        assert snapshot['counters']['processed'] == 3
+        assert snapshot['counters']['duplicates'] == 1
+        assert snapshot['counters']['max_depth'] == 3
+
+    def test_full_queue_blocks_until_drained(self):
+        """Test back-pressure: submit() waits for a free slot, then queues the segment"""
+        from modules.scheduler.event_pipeline import EventPipeline
+
+        pipeline = EventPipeline(maxsize=1, put_timeout=5.0)
+        pipeline.attach_consumer()
+        pipeline.submit('/logs/a.txt')
+
+        def drain():
+            time.sleep(0.1)
+            pipeline.task_done(pipeline.get(timeout=1.0))
+
+        drainer = threading.Thread(target=drain)
+        drainer.start()
+        assert pipeline.submit('/logs/b.txt') is True
+        drainer.join()
+
+        counters = pipeline.snapshot()['counters']
+        assert counters['blocked_puts'] == 1
+        assert counters['blocked_seconds'] > 0
+        assert pipeline.get(timeout=0.1)['log_file'] == '/logs/b.txt'
+
+    def test_full_queue_timeout_leaves_segment_to_rescan(self, mocker):
+        """Test a segment that cannot be queued in time is dropped and the rescan is signalled"""
+        from modules.scheduler import event_pipeline as module
+
+        event = mocker.patch.object(module, 'event_detector_event')
+        pipeline = module.EventPipeline(maxsize=1, put_timeout=0.05)
+        pipeline.attach_consumer()
+        pipeline.submit('/logs/a.txt')
+
+        assert pipeline.submit('/logs/b.txt') is False
+        assert not pipeline.is_busy('/logs/b.txt')
+        assert pipeline.snapshot()['counters']['dropped'] == 1
+        event.set.assert_called_once()
+
+    def test_forward_replaces_queue(self):
+        """Test worker processes forward completed segments instead of queueing them"""
+        from modules.scheduler.event_pipeline import EventPipeline
+
+        forwarded = []
+        pipeline = EventPipeline(maxsize=1, put_timeout=0.1)
+        pipeline.forward_to(lambda log_file, camera_name, closed_at: forwarded.append((log_file, camera_name)))
+
+        assert pipeline.submit('/logs/a.txt', 'Cam1') is True
+        assert forwarded == [('/logs/a.txt', 'Cam1')]
+        assert pipeline.depth() == 0
+
+    def test_rescan_claim_keeps_log_busy_until_released(self):
+        """Test rescanned logs are busy while detected and cannot be claimed twice"""
+        from modules.scheduler.event_pipeline import EventPipeline
+
+        pipeline = EventPipeline(maxsize=1, put_timeout=0.1)
+        pipeline.attach_consumer()
+        pipeline.segment_opened('/logs/open.txt')
+
+        assert pipeline.claim('/logs/open.txt', 'Cam1') is False
+        assert pipeline.claim('/logs/a.txt', 'Cam1') is True
+        assert pipeline.claim('/logs/a.txt', 'Cam1') is False
+        assert pipeline.is_busy('/logs/a.txt')
+
+        pipeline.release('/logs/a.txt', ok=True)
+        assert not pipeline.is_busy('/logs/a.txt')
+        assert pipeline.snapshot()['counters']['rescanned'] == 1
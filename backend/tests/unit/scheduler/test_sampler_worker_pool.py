@@ -0,0 +1,90 @@
+"""
+Unit tests for sampler_worker_pool module
+Tests pool sizing, graceful shrinking and crash rescheduling without real processes
+"""
+import pytest
+
+
+@pytest.fixture
+def pool(mocker):
+    """Pool whose worker processes, queues and events are mocks"""
+    from modules.scheduler.sampler_worker_pool import SamplerWorkerPool
+
+    pool = SamplerWorkerPool(max_rss_mb=100)
+    pool._ctx = mocker.MagicMock()
+    pool._ctx.Process.side_effect = lambda **kwargs: mocker.MagicMock(
+        pid=1000 + pool._next_worker_id, exitcode=None, **{"is_alive.return_value": True}
+    )
+    mocker.patch('psutil.Process', return_value=mocker.MagicMock(
+        **{"memory_info.return_value": mocker.MagicMock(rss=10 * 1024 * 1024)}
+    ))
+    return pool
+
+
+class TestSamplerWorkerPool:
+    """Tests for SamplerWorkerPool supervision logic"""
+
+    def test_resize_spawns_workers(self, pool):
+        """Test resize() starts one process per worker"""
+        pool.resize(3)
+
+        assert len(pool._workers) == 3
+        assert pool.counters['started'] == 3
+
+    def test_shrink_retires_idle_workers_first(self, pool):
+        """Test shrinking stops idle workers and leaves the busy one running"""
+        pool.resize(3)
+        busy_id = 1
+        pool._workers[busy_id]['video'] = '/videos/busy.mp4'
+
+        pool.resize(1)
+
+        retiring = {wid for wid, w in pool._workers.items() if w['retiring']}
+        assert retiring == {0, 2}
+        assert not pool._workers[busy_id]['retiring']
+        pool._workers[0]['tasks'].put.assert_called_with(None)
+
+    def test_crashed_worker_video_rescheduled_and_replaced(self, pool, mocker):
+        """Test a dead busy worker gets its video rescheduled and a replacement"""
+        reschedule = mocker.patch.object(pool, '_reschedule')
+        pool.resize(2)
+        crashed = pool._workers[0]
+        crashed['video'] = '/videos/a.mp4'
+        crashed['process'].is_alive.return_value = False
+        crashed['process'].exitcode = -9
+
+        with pool._lock:
+            pool._check_workers()
+            pool._reconcile()
+
+        reschedule.assert_called_once()
+        assert reschedule.call_args[0][0] == '/videos/a.mp4'
+        assert 0 not in pool._workers
+        assert len(pool._workers) == 2
+        assert pool.counters['crashed'] == 1
+
+    def test_memory_growth_retires_worker(self, pool, mocker):
+        """Test a worker above the RSS limit is retired and replaced"""
+        pool.resize(1)
+        mocker.patch('psutil.Process', return_value=mocker.MagicMock(
+            **{"memory_info.return_value": mocker.MagicMock(rss=500 * 1024 * 1024)}
+        ))
+
+        with pool._lock:
+            pool._check_workers()
+            pool._reconcile()
+
+        assert pool._workers[0]['retiring']
+        assert pool.counters['memory_restarts'] == 1
+        assert len([w for w in pool._workers.values() if not w['retiring']]) == 1
+
+    def test_done_result_signals_event_detector(self, pool, mocker):
+        """Test a finished video frees the worker and wakes the event detector"""
+        event = mocker.patch('modules.scheduler.sampler_worker_pool.event_detector_event')
+        pool.resize(1)
+        pool._workers[0]['video'] = '/videos/a.mp4'
+
+        pool._handle_result("done", 0, '/videos/a.mp4', {'log_file': '/logs/a.txt', 'processed': True})
+
+        assert pool._workers[0]['video'] is None
+        event.set.assert_called_once()
@@ -0,0 +1,94 @@
+"""
+Unit tests for video_sharding module
+Tests shard planning and deterministic merging of partial sampler logs
+"""
+import os
+
+
+def _write_shard_log(shard_root, shard_index, name, start, end, lines):
+    """Write one segment log the way FrameSamplerTrigger does"""
+    shard_dir = os.path.join(shard_root, f"shard_{shard_index:04d}")
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(os.path.join(shard_dir, name), 'w') as f:
+        f.write(f"# Start: {start}, End: {end}, Start_Time: 2025-01-01 08:00:00, Camera_Name: Cam1, Video_File: /v.mp4\n")
+        for line in lines:
+            f.write(f"{line}\n")
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [line.strip() for line in f.readlines()[1:]]
+
+
+class TestPlanShards:
+    """Tests for plan_shards()"""
+
+    def test_blocks_split_with_warmup(self):
+        """Test long blocks split into shards whose warm-up stays inside the block"""
+        from modules.scheduler.video_sharding import plan_shards
+
+        shards = plan_shards([{'start_time': 100, 'end_time': 1300}], shard_seconds=600, overlap_seconds=10)
+
+        assert [(s['start'], s['end']) for s in shards] == [(100, 700), (700, 1300)]
+        assert shards[0]['warmup_start'] == 100
+        assert shards[1]['warmup_start'] == 690
+        assert [s['last_in_block'] for s in shards] == [False, True]
+
+    def test_short_tail_folded_into_previous_shard(self):
+        """Test a tail shorter than a quarter shard does not become its own shard"""
+        from modules.scheduler.video_sharding import plan_shards
+
+        shards = plan_shards([{'start_time': 0, 'end_time': 1250}], shard_seconds=600, overlap_seconds=10)
+
+        assert [(s['start'], s['end']) for s in shards] == [(0, 600), (600, 1250)]
+
+
+class TestMergeShardLogs:
+    """Tests for merge_shard_logs()"""
+
+    def test_merge_drops_warmup_and_repeats(self, tmp_path, mocker):
+        """Test overlap lines are dropped and repeated states/MVDs collapse across shards"""
+        from modules.scheduler.video_sharding import merge_shard_logs
+
+        write_segment = mocker.patch('modules.scheduler.video_sharding.write_segment')
+
+        shard_root = str(tmp_path / "shards")
+        output_dir = str(tmp_path / "out")
+        os.makedirs(output_dir)
+        shards = [
+            {'index': 0, 'block': 0, 'start': 0, 'end': 600, 'warmup_start': 0, 'last_in_block': False},
+            {'index': 1, 'block': 0, 'start': 600, 'end': 900, 'warmup_start': 590, 'last_in_block': True},
+        ]
+        _write_shard_log(shard_root, 0, "log_v_0300_0600.txt", 300, 600, ["310,On,", "320,On,MVD1", "400,Off,"])
+        _write_shard_log(shard_root, 0, "log_v_0600_0900.txt", 600, 900, ["600,Off,"])
+        _write_shard_log(shard_root, 1, "log_v_0300_0600.txt", 300, 600, ["592,Off,"])
+        _write_shard_log(shard_root, 1, "log_v_0600_0900.txt", 600, 900, ["600,Off,", "650,On,MVD1", "700,On,", "710,On,MVD2"])
+        registered = []
+
+        merged = merge_shard_logs(shards, shard_root, output_dir, registered.append)
+
+        assert [os.path.basename(p) for p in merged] == ["log_v_0300_0600.txt", "log_v_0600_0900.txt"]
+        assert registered == merged
+        assert _read_lines(merged[0]) == ["310,On,", "320,On,MVD1", "400,Off,"]
+        assert _read_lines(merged[1]) == ["700,On,", "710,On,MVD2"]
+        # Same records go to the timeline store, keyed by the merged log path
+        log_file, meta, records = write_segment.call_args_list[1].args
+        assert log_file == merged[1] and meta['start_second'] == 600
+        assert records == [(700.0, "On", "", None), (710.0, "On", "MVD2", None)]
+
+
+class TestShardPoolSize:
+    """Tests for the per-process shard pool size"""
+
+    def test_pool_created_with_process_share(self, mocker):
+        """Test a sampler worker process's pool uses its share instead of SHARD_MAX_WORKERS"""
+        from modules.scheduler import video_sharding
+
+        executor = mocker.patch.object(video_sharding, 'ProcessPoolExecutor')
+        mocker.patch.object(video_sharding, '_executor', None)
+        mocker.patch.object(video_sharding, '_max_workers', video_sharding._max_workers)
+
+        video_sharding.set_shard_pool_size(2)
+        video_sharding.get_shard_executor()
+
+        assert executor.call_args.kwargs['max_workers'] == 2
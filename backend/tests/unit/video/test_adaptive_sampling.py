@@ -0,0 +1,63 @@
+"""
+Unit tests for adaptive_sampling module
+Tests step growth in stable stretches, dense backfill on a change and grid alignment
+"""
+
+
+class _FakeSource:
+    """Frame source stub returning the frame index as the frame"""
+
+    def __init__(self, frame_count):
+        self.frame_count = frame_count
+
+    def read_frame(self, index):
+        return index if index < self.frame_count else None
+
+
+def _run(schedule, frame_count, change_at=None):
+    """Drive a schedule; the observed state flips to 'On' from frame index change_at"""
+    analysed, last_state = [], "Off"
+    for frame_number, index in schedule.frames(_FakeSource(frame_count)):
+        state = "On" if change_at is not None and index >= change_at else "Off"
+        if not schedule.observe(changed=state != last_state):
+            continue
+        analysed.append(index)
+        last_state = state
+    return analysed
+
+
+class TestAdaptiveSchedule:
+    """Tests for AdaptiveSchedule"""
+
+    def test_stable_stretch_is_sampled_sparsely(self):
+        """Test the step doubles up to max_interval while nothing changes"""
+        from modules.technician.adaptive_sampling import AdaptiveSchedule
+
+        schedule = AdaptiveSchedule(0, 1000, min_interval=5, max_interval=20, stable_samples=5)
+        analysed = _run(schedule, 1000)
+
+        assert analysed[:6] == [4, 9, 14, 19, 24, 34]
+        assert all(index % 5 == 4 for index in analysed)  # same grid as iter_every_nth(0, 1000, 5)
+        assert len(analysed) < 1000 // 5 / 2
+        assert schedule.stats['max_step'] == 20
+
+    def test_change_is_backfilled_densely(self):
+        """Test a change after a sparse step re-samples the gap at the dense rate"""
+        from modules.technician.adaptive_sampling import AdaptiveSchedule
+
+        schedule = AdaptiveSchedule(0, 1000, min_interval=5, max_interval=20, stable_samples=5)
+        analysed = _run(schedule, 1000, change_at=502)
+
+        first_on = next(index for index in analysed if index >= 502)
+        assert first_on == 504                      # first dense-grid frame after the change
+        assert 499 in analysed                      # and the dense frame before it
+        assert schedule.stats['backfills'] == 1
+
+    def test_unobserved_samples_keep_step(self):
+        """Test samples the caller skips without observe() advance by the current step"""
+        from modules.technician.adaptive_sampling import AdaptiveSchedule
+
+        schedule = AdaptiveSchedule(3, 40, min_interval=5)
+        indexes = [index for _, index in schedule.frames(_FakeSource(40))]
+
+        assert indexes == [4, 9, 14, 19, 24, 29, 34, 39]
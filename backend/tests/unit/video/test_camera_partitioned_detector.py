@@ -0,0 +1,92 @@
+"""
+Unit tests for the per-camera event detection lanes of event_detector
+Tests ordering within a camera, parallelism across cameras and lock stats
+"""
+import threading
+
+
+class TestCameraPartitionedDetector:
+    """Test CameraPartitionedDetector lanes"""
+
+    def test_logs_of_one_camera_run_in_order(self, mocker):
+        """Logs submitted for the same camera are processed one at a time, in submit order"""
+        from modules.technician import event_detector
+
+        processed = []
+        running = []
+        overlap = []
+
+        def process(log_file):
+            running.append(log_file)
+            overlap.append(len(running))
+            processed.append(log_file)
+            running.remove(log_file)
+
+        mocker.patch.object(event_detector, 'process_single_log', side_effect=process)
+        detector = event_detector.CameraPartitionedDetector(max_workers=4)
+        results = []
+        for index in range(5):
+            detector.submit("Cam1", f"/logs/cam1_{index}.txt", results.append)
+
+        assert detector.wait_idle(timeout=5)
+        detector.shutdown()
+        assert processed == [f"/logs/cam1_{index}.txt" for index in range(5)]
+        assert max(overlap) == 1
+        assert results == [True] * 5
+
+    def test_cameras_run_in_parallel(self, mocker):
+        """A slow camera does not hold back the logs of another camera"""
+        from modules.technician import event_detector
+
+        release = threading.Event()
+        done = []
+
+        def process(log_file):
+            if log_file.startswith("/logs/slow"):
+                assert release.wait(timeout=5)
+            done.append(log_file)
+
+        mocker.patch.object(event_detector, 'process_single_log', side_effect=process)
+        detector = event_detector.CameraPartitionedDetector(max_workers=2)
+        fast_done = threading.Event()
+        detector.submit("Slow", "/logs/slow_0.txt")
+        detector.submit("Fast", "/logs/fast_0.txt", lambda ok: fast_done.set())
+
+        assert fast_done.wait(timeout=5)
+        assert done == ["/logs/fast_0.txt"]
+        release.set()
+        assert detector.wait_idle(timeout=5)
+        detector.shutdown()
+
+    def test_failure_reported_and_lane_continues(self, mocker):
+        """A failing log is reported to its callback and the camera's next log still runs"""
+        from modules.technician import event_detector
+
+        mocker.patch.object(event_detector, 'process_single_log', side_effect=[RuntimeError("bad log"), None])
+        detector = event_detector.CameraPartitionedDetector(max_workers=1)
+        results = []
+        detector.submit("Cam1", "/logs/a.txt", results.append)
+        detector.submit("Cam1", "/logs/b.txt", results.append)
+
+        assert detector.wait_idle(timeout=5)
+        detector.shutdown()
+        assert results == [False, True]
+
+
+class TestLockStats:
+    """Test write lock statistics"""
+
+    def test_per_camera_totals(self):
+        """Wait/hold times are summed and maxed per camera"""
+        from modules.technician.event_detector import LockStats
+
+        stats = LockStats()
+        stats.record("Cam1", 0.5, 0.1)
+        stats.record("Cam1", 0.1, 0.3)
+        stats.record(None, 0.0, 0.2)
+
+        snapshot = stats.snapshot()
+        assert snapshot["Cam1"]["logs"] == 2
+        assert snapshot["Cam1"]["max_wait_seconds"] == 0.5
+        assert snapshot["Cam1"]["avg_hold_seconds"] == 0.2
+        assert snapshot["unknown"]["hold_seconds"] == 0.2
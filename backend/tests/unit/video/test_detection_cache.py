@@ -0,0 +1,133 @@
+"""
+Unit tests for detection_cache module
+Tests content-identity keys, the memory byte budget and the SQLite spill
+"""
+import os
+import pytest
+
+
+def _entry(count, timestamp=0.0):
+    return {
+        'detections': [{'timestamp': timestamp + i * 0.2, 'qr_detections': [], 'qr_count': 0} for i in range(count)],
+        'metadata': {'fps': 5},
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "detection_cache.db")
+
+
+class TestMakeCacheKey:
+    """Tests for make_cache_key()"""
+
+    def test_key_changes_with_file_content(self, tmp_path):
+        """Test rewriting the video (size/mtime) produces a new key"""
+        from modules.technician.detection_cache import make_cache_key
+
+        video = tmp_path / "cam1.mp4"
+        video.write_bytes(b"a" * 10)
+        roi = {'x': 1, 'y': 2, 'w': 3, 'h': 4}
+        first = make_cache_key(str(video), roi, 5)
+
+        video.write_bytes(b"b" * 20)
+        os.utime(video, ns=(1, 1))
+
+        assert make_cache_key(str(video), roi, 5) != first
+
+    def test_key_includes_roi_and_fps(self, tmp_path):
+        """Test ROI and fps are part of the key"""
+        from modules.technician.detection_cache import make_cache_key
+
+        video = tmp_path / "cam1.mp4"
+        video.write_bytes(b"a")
+        roi = {'x': 1, 'y': 2, 'w': 3, 'h': 4}
+
+        assert make_cache_key(str(video), roi, 5) != make_cache_key(str(video), roi, 10)
+        assert make_cache_key(str(video), roi, 5) != make_cache_key(str(video), dict(roi, w=30), 5)
+
+
+class TestDetectionCache:
+    """Tests for DetectionCache"""
+
+    def test_put_get_and_miss(self, db_path):
+        """Test stored entries are returned and lookups are counted"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("qr", db_path=db_path)
+        cache.put("k1", _entry(3))
+
+        assert len(cache.get("k1")['detections']) == 3
+        assert cache.get("missing") is None
+        assert cache.stats['memory_hits'] == 1
+        assert cache.stats['misses'] == 1
+
+    def test_memory_budget_spills_to_disk(self, db_path):
+        """Test LRU entries over the byte budget are evicted from memory but served from disk"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("qr", memory_budget_bytes=6000, db_path=db_path)
+        for i in range(5):
+            cache.put(f"k{i}", _entry(40, timestamp=i))
+
+        snapshot = cache.snapshot()
+        assert snapshot['memory_bytes'] <= 6000
+        assert snapshot['memory_evictions'] > 0
+        assert snapshot['disk_entries'] == 5
+
+        restored = cache.get("k0")
+        assert restored['detections'] == _entry(40, timestamp=0)['detections']
+        assert cache.stats['disk_hits'] == 1
+
+    def test_survives_restart(self, db_path):
+        """Test a new cache instance (process restart) reads persisted entries"""
+        from datetime import datetime
+        from modules.technician.detection_cache import DetectionCache
+
+        DetectionCache("hand", db_path=db_path).put("k1", _entry(2))
+
+        restored = DetectionCache("hand", db_path=db_path).get("k1")
+        assert len(restored['detections']) == 2
+        assert isinstance(restored['processed_at'], datetime)
+        assert DetectionCache("qr", db_path=db_path).get("k1") is None
+
+    def test_partial_entries_stay_in_memory_until_final_put(self, db_path):
+        """Test progressive accumulation is memory-only and pinned against eviction"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("qr", memory_budget_bytes=100, db_path=db_path)
+        cache.put("k1", {'detections': [], 'metadata': {'partial_results': True}}, persist=False)
+        assert cache.extend("k1", _entry(20)['detections'], {'progress': 50.0}) == 20
+
+        assert cache.get("k1")['metadata']['progress'] == 50.0
+        assert cache.snapshot()['disk_entries'] == 0
+        assert cache.extend("unknown", []) is None
+
+        cache.put("k1", _entry(20))
+        assert cache.snapshot()['disk_entries'] == 1
+
+    def test_disk_budget_evicts_least_recently_used(self, db_path):
+        """Test the on-disk store drops the oldest rows when over its budget"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("qr", disk_budget_bytes=1, db_path=db_path)
+        cache.put("k1", _entry(5))
+        cache.put("k2", _entry(5))
+
+        snapshot = cache.snapshot()
+        assert snapshot['disk_entries'] <= 1
+        assert snapshot['disk_evictions'] >= 1
+
+    def test_delete_and_expiry(self, db_path):
+        """Test delete() clears both tiers and expired entries are not returned"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("qr", db_path=db_path)
+        cache.put("k1", _entry(1))
+        assert cache.delete("k1") is True
+        assert cache.get("k1") is None
+
+        expired = DetectionCache("qr", ttl_seconds=-1, db_path=db_path)
+        expired.put("k2", _entry(1))
+        assert expired.get("k2") is None
+        assert expired.stats['expired'] >= 1
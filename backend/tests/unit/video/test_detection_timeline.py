@@ -0,0 +1,67 @@
+"""
+Unit tests for detection_timeline module
+Tests bisect lookups against the previous linear scan and window queries
+"""
+import random
+
+
+def _linear_closest(detections, timestamp, tolerance=0.15):
+    """The lookup the /get-cached-* endpoints used before DetectionTimeline"""
+    closest, min_diff = None, float('inf')
+    for detection in detections:
+        diff = abs(detection['timestamp'] - timestamp)
+        if diff < tolerance and diff < min_diff:
+            closest, min_diff = detection, diff
+    return closest
+
+
+class TestDetectionTimeline:
+    """Tests for DetectionTimeline"""
+
+    def test_closest_matches_linear_scan(self):
+        """Test bisect lookup returns the same detection as the linear scan"""
+        from modules.technician.detection_timeline import DetectionTimeline
+
+        detections = [{'timestamp': round(i * 0.2, 1), 'id': i} for i in range(500)]
+        timeline = DetectionTimeline(detections)
+        rng = random.Random(7)
+
+        for _ in range(2000):
+            timestamp = rng.uniform(-1.0, 101.0)
+            detection, diff = timeline.closest(timestamp)
+            assert detection is _linear_closest(detections, timestamp)
+            if detection is not None:
+                assert diff == abs(detection['timestamp'] - timestamp)
+
+    def test_out_of_order_extend_stays_sorted(self):
+        """Test progressive accumulation in any order keeps lookups correct"""
+        from modules.technician.detection_timeline import DetectionTimeline
+
+        timeline = DetectionTimeline([{'timestamp': 1.0}, {'timestamp': 2.0}])
+        timeline.extend([{'timestamp': 0.4}, {'timestamp': 1.6}])
+
+        assert list(timeline.timestamps) == [0.4, 1.0, 1.6, 2.0]
+        assert timeline.closest(1.55)[0] == {'timestamp': 1.6}
+
+    def test_window_is_inclusive(self):
+        """Test window() returns detections in [start, end] in order"""
+        from modules.technician.detection_timeline import DetectionTimeline
+
+        timeline = DetectionTimeline([{'timestamp': t / 5} for t in range(50)])
+
+        assert [d['timestamp'] for d in timeline.window(1.0, 1.6)] == [1.0, 1.2, 1.4, 1.6]
+        assert timeline.window(20.0, 30.0) == []
+        assert timeline.window(2.0, 1.0) == []
+
+    def test_cache_timeline_follows_extend(self, tmp_path):
+        """Test DetectionCache.timeline() sees detections added while preprocessing runs"""
+        from modules.technician.detection_cache import DetectionCache
+
+        cache = DetectionCache("hand", db_path=str(tmp_path / "cache.db"))
+        cache.put("k1", {'detections': [{'timestamp': 0.0}], 'metadata': {}}, persist=False)
+        assert len(cache.timeline("k1")) == 1
+
+        cache.extend("k1", [{'timestamp': 0.2}, {'timestamp': 0.4}])
+
+        assert cache.timeline("k1").closest(0.41)[0] == {'timestamp': 0.4}
+        assert cache.timeline("missing") is None
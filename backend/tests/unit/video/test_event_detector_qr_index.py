@@ -0,0 +1,62 @@
+"""
+Unit tests for the per-log QR detection index of event_detector
+Tests that detections are sliced per event and inserted in one batch
+"""
+import sqlite3
+
+
+class TestQrIndex:
+    """Test build_qr_index / slice_qr_detections"""
+
+    def test_slice_matches_per_event_parse(self):
+        """Slicing the index gives the same detections as filtering the records per event"""
+        from modules.technician.event_detector import build_qr_index, slice_qr_detections, qr_detections_from_records
+
+        records = [
+            (12.0, "On", "", None),
+            (15.0, "Off", "MVD123", (1, 2, 3, 4)),
+            (11.0, "On", "", (5, 6, 7, 8)),
+            (20.0, "On", "bad code!", (0, 0, 1, 1)),
+            (30.0, "Off", "MVD456", (9, 9, 9, 9)),
+        ]
+        qr_index = build_qr_index(records)
+
+        assert slice_qr_detections(qr_index, 12) == [
+            (3, "MVD123", 1, 2, 3, 4, 1),
+            (18, "MVD456", 9, 9, 9, 9, 1),
+        ]
+        assert slice_qr_detections(qr_index, 0)[0] == (11, "", 5, 6, 7, 8, 0)
+        assert slice_qr_detections(qr_index, 31) == []
+        assert qr_detections_from_records(records, 12) == slice_qr_detections(qr_index, 12)
+
+
+class TestInsertQrDetections:
+    """Test insert_qr_detections batching"""
+
+    def _cursor(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("""CREATE TABLE qr_detections (
+            event_id INTEGER, timestamp_seconds INTEGER, tracking_code TEXT,
+            bbox_x INTEGER, bbox_y INTEGER, bbox_w INTEGER, bbox_h INTEGER, decode_success INTEGER,
+            UNIQUE(event_id, timestamp_seconds, tracking_code))""")
+        return conn.cursor()
+
+    def test_batch_insert(self, mocker):
+        """All rows go in with one executemany"""
+        from modules.technician.event_detector import insert_qr_detections
+
+        cursor = self._cursor()
+        insert_qr_detections(cursor, [(1, 0, "A", 0, 0, 1, 1, 1), (1, 2, "", 0, 0, 1, 1, 0)], mocker.MagicMock())
+
+        assert cursor.execute("SELECT COUNT(*) FROM qr_detections").fetchone()[0] == 2
+
+    def test_rejected_batch_falls_back_to_rows(self, mocker):
+        """A duplicate row only drops itself, the rest of the batch is kept"""
+        from modules.technician.event_detector import insert_qr_detections
+
+        cursor = self._cursor()
+        logger = mocker.MagicMock()
+        insert_qr_detections(cursor, [(1, 0, "A", 0, 0, 1, 1, 1), (1, 0, "A", 0, 0, 1, 1, 1), (1, 5, "B", 0, 0, 1, 1, 1)], logger)
+
+        assert cursor.execute("SELECT COUNT(*) FROM qr_detections").fetchone()[0] == 2
+        logger.error.assert_called_once()
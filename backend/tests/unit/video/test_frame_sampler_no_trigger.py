@@ -0,0 +1,128 @@
+"""
+Unit tests for frame_sampler_no_trigger module
+Tests the Ts search over hand frames recorded in the single forward pass
+and the hand-over of finished segments to the event detector
+"""
+import os
+
+
+def _sampler(mocker, fps=10, min_packing_time=2):
+    """FrameSamplerNoTrigger without models, MediaPipe or database setup"""
+    from modules.technician.frame_sampler_no_trigger import FrameSamplerNoTrigger
+
+    sampler = object.__new__(FrameSamplerNoTrigger)
+    sampler.fps = fps
+    sampler.min_packing_time = min_packing_time
+    sampler.logger = mocker.MagicMock()
+    return sampler
+
+
+class TestFindHandFrame:
+    """Tests for FrameSamplerNoTrigger._find_hand_frame"""
+
+    def test_first_hand_in_window(self, mocker):
+        """Test the window excludes its start frame and includes its end frame"""
+        sampler = _sampler(mocker)
+        hand_frames = [10, 20, 30, 40, 50]
+
+        assert sampler._find_hand_frame(hand_frames, 20, 50, -20, 0, 100) == 30
+        assert sampler._find_hand_frame(hand_frames, 45, 50, -20, 0, 100) == 50
+        assert sampler._find_hand_frame(hand_frames, 50, 80, -20, 0, 100) is None
+
+    def test_min_packing_time_and_range(self, mocker):
+        """Test hands too close to the previous Te or outside the range are skipped"""
+        sampler = _sampler(mocker)
+        hand_frames = [10, 20, 30, 40, 50]
+
+        # last_te=15 -> Ts must be after frame 15 + 2s * 10fps = 35
+        assert sampler._find_hand_frame(hand_frames, 0, 50, 15, 0, 100) == 40
+        # start_time=4.5s -> frame 40 (3.9s) is before the processed range
+        assert sampler._find_hand_frame(hand_frames, 0, 50, 15, 4.5, 100) == 50
+
+
+class _StillVideo:
+    """Frame source returning the same still frame for every sample"""
+
+    def __init__(self, frame_count):
+        import numpy as np
+
+        self.frame_count = frame_count
+        self.frame = np.zeros((8, 8, 3), np.uint8)
+
+    def open(self):
+        return True
+
+    def iter_every_nth(self, start_frame, end_frame, step):
+        for frame_count in range(start_frame + step, end_frame + 1, step):
+            yield frame_count, self.frame
+
+    def close(self):
+        pass
+
+
+class TestNoTriggerEventPipeline:
+    """Tests for handing no-trigger segments to the event detector"""
+
+    def test_two_segment_video_events_reach_events_table(self, mocker, tmp_path):
+        """Test segments are queued once, with final records, and detected into events"""
+        from datetime import datetime
+        from modules import path_utils
+        from modules.db_utils.safe_connection import safe_db_connection
+        from modules.scheduler.event_pipeline import EventPipeline
+        from modules.technician import event_detector, frame_sampler_no_trigger, timeline_store
+        import database
+
+        video_file = str(tmp_path / "cam1.mp4")
+        open(video_file, "wb").close()
+        db_path = str(tmp_path / "events.db")
+        paths = dict(path_utils.get_paths(), DB_PATH=db_path)
+        mocker.patch.object(path_utils, 'get_paths', return_value=paths)
+        mocker.patch.object(database, 'get_paths', return_value=paths)
+        mocker.patch.object(database, '_paths_initialized', False)
+        database.update_database()
+        with safe_db_connection() as conn:
+            conn.execute("INSERT INTO file_list (file_path, camera_name, program_type, is_processed) VALUES (?, 'Cam1', 'default', 0)",
+                         (video_file,))
+
+        pipeline = EventPipeline(maxsize=8, put_timeout=0.1)
+        pipeline.attach_consumer()
+        mocker.patch.object(timeline_store, 'event_pipeline', pipeline)
+        mocker.patch.object(frame_sampler_no_trigger, 'create_frame_source', return_value=_StillVideo(6000))
+        mocker.patch.object(event_detector, 'get_logger')
+        mocker.patch('modules.utils.simple_timezone.get_system_timezone_from_db', return_value='UTC')
+
+        sampler = _sampler(mocker)
+        sampler.log_segment = None
+        sampler.segment_logs = {}
+        sampler.holding = False
+        sampler.motion_threshold = 0.01
+        sampler.stable_duration_sec = 1
+        sampler.frame_interval = 10
+        sampler.get_video_duration = lambda video_file: 600
+        sampler._get_video_start_time = lambda video_file, camera_name=None: datetime(2025, 1, 1, 8, 0, 0)
+        sampler._get_log_directory = lambda video_file, camera_name: str(tmp_path / "logs")
+        # Hands at 90s and 390s, MVD codes read at 100s (first segment) and 400s (second segment)
+        hands = {900, 3900}
+        codes = {1000: "MVD1", 4000: "MVD2"}
+        sampled = iter(range(10, 6001, 10))
+        sampler.detect_hand = lambda frame: next(sampled) in hands
+
+        sampler.process_video(video_file, mocker.MagicMock(), lambda camera_name: None,
+                              lambda frame, frame_count: codes.get(frame_count, ""), 10)
+
+        # Both segments queued exactly once, in timeline order, after all records were written
+        items = [pipeline.get(timeout=0.1) for _ in range(pipeline.depth())]
+        assert [os.path.basename(item['log_file']) for item in items] == ["log_cam1_0000_0300.txt", "log_cam1_0300_0600.txt"]
+        assert pipeline.snapshot()['counters']['duplicates'] == 0
+        for item in items:
+            event_detector.process_single_log(item['log_file'])
+            pipeline.task_done(item)
+
+        with safe_db_connection() as conn:
+            events = conn.execute("SELECT tracking_codes, te FROM events ORDER BY te").fetchall()
+            unprocessed = conn.execute("SELECT COUNT(*) FROM processed_logs WHERE is_processed = 0").fetchone()[0]
+            stored = conn.execute("SELECT COUNT(*) FROM timeline_records").fetchone()[0]
+        assert [codes for codes, _ in events] == ["['MVD1']", "['MVD2']"]
+        assert unprocessed == 0
+        # Records are dropped once their events are detected
+        assert stored == 0
@@ -0,0 +1,112 @@
+"""
+Unit tests for frame_sampler_trigger module
+Tests the hand-over of segments sampled in several work blocks to the event detector
+"""
+import os
+
+
+class _StillVideo:
+    """Frame source returning the same still frame for every sample"""
+
+    def __init__(self):
+        import numpy as np
+
+        self.frame = np.zeros((8, 8, 3), np.uint8)
+        self.origin = (0, 0)
+        self.stats = {"grabbed": 0, "retrieved": 0, "seeks": 0}
+        self.backend = "still"
+
+    def open(self):
+        return True
+
+    def iter_every_nth(self, start_frame, end_frame, step):
+        for frame_count in range(start_frame + step, end_frame + 1, step):
+            yield frame_count, self.frame
+
+    def close(self):
+        pass
+
+
+def _sampler(mocker, tmp_path):
+    """FrameSamplerTrigger without models, trackers or database setup"""
+    from datetime import datetime
+    from modules.technician.frame_sampler_trigger import FrameSamplerTrigger
+
+    sampler = object.__new__(FrameSamplerTrigger)
+    sampler.fps = 10
+    sampler.logger = mocker.MagicMock()
+    sampler.mvd_tracker = mocker.MagicMock()
+    sampler.roi_gate = mocker.MagicMock()
+    sampler.trigger_presence = mocker.MagicMock()
+    sampler.holding = False
+    sampler.segment_logs = {}
+    sampler.get_video_duration = lambda video_file: 600
+    sampler._get_video_start_time = lambda video_file, camera_name=None: datetime(2025, 1, 1, 8, 0, 0)
+    sampler._get_log_directory = lambda video_file, camera_name: str(tmp_path / "logs")
+    return sampler
+
+
+class TestWorkBlockSegments:
+    """Tests for work blocks of one video sharing a 300s segment"""
+
+    def test_two_blocks_in_one_segment_reach_events_table(self, mocker, tmp_path):
+        """Test a segment sampled in two blocks is queued once, after the last block, with both blocks' events"""
+        from modules import path_utils
+        from modules.db_utils.safe_connection import safe_db_connection
+        from modules.scheduler.event_pipeline import EventPipeline
+        from modules.technician import event_detector, frame_sampler_trigger, timeline_store
+        import database
+
+        video_file = str(tmp_path / "cam1.mp4")
+        open(video_file, "wb").close()
+        db_path = str(tmp_path / "events.db")
+        paths = dict(path_utils.get_paths(), DB_PATH=db_path)
+        mocker.patch.object(path_utils, 'get_paths', return_value=paths)
+        mocker.patch.object(database, 'get_paths', return_value=paths)
+        mocker.patch.object(database, '_paths_initialized', False)
+        database.update_database()
+        with safe_db_connection() as conn:
+            conn.execute("INSERT INTO file_list (file_path, camera_name, program_type, is_processed) VALUES (?, 'Cam1', 'default', 0)",
+                         (video_file,))
+
+        pipeline = EventPipeline(maxsize=8, put_timeout=0.1)
+        pipeline.attach_consumer()
+        mocker.patch.object(timeline_store, 'event_pipeline', pipeline)
+        mocker.patch.object(frame_sampler_trigger, 'create_frame_source', side_effect=lambda *args, **kwargs: _StillVideo())
+        mocker.patch.dict(frame_sampler_trigger.ADAPTIVE_CONFIG, {'enabled': False})
+        mocker.patch.object(event_detector, 'get_logger')
+        mocker.patch('modules.utils.simple_timezone.get_system_timezone_from_db', return_value='UTC')
+
+        # TimeGo off (packing) at 30-50s and 180-200s, MVD codes read at 40s and 190s
+        def process_frame(frame_packing, frame_trigger, frame_count, packing_offset):
+            second = frame_count // 10
+            state = "Off" if 30 <= second < 50 or 180 <= second < 200 else "On"
+            return state, {400: "MVD1", 1900: "MVD2"}.get(frame_count, ""), None, None
+
+        sampler = _sampler(mocker, tmp_path)
+        sample = lambda start, end: sampler.sample_range(video_file, "Cam1", lambda camera_name: ((0, 0, 8, 8), None),
+                                                         process_frame, 10, start, end)
+        sampler.hold_segments()
+        sample(0, 100)
+        # Block 1 is not final yet: nothing queued, and the rescan does not see it either
+        assert pipeline.depth() == 0
+        with safe_db_connection() as conn:
+            assert conn.execute("SELECT closed FROM timeline_segments").fetchall() == [(0,)]
+        sample(150, 250)
+        sampler.release_segments()
+
+        items = [pipeline.get(timeout=0.1) for _ in range(pipeline.depth())]
+        assert [os.path.basename(item['log_file']) for item in items] == ["log_cam1_0000_0300.txt"]
+        event_detector.process_single_log(items[0]['log_file'])
+        pipeline.task_done(items[0])
+
+        with safe_db_connection() as conn:
+            events = conn.execute("SELECT tracking_codes FROM events ORDER BY te").fetchall()
+            unprocessed = conn.execute("SELECT COUNT(*) FROM processed_logs WHERE is_processed = 0").fetchone()[0]
+        assert [codes for codes, in events] == ["['MVD1']", "['MVD2']"]
+        assert unprocessed == 0
+        # The text export holds both blocks under a single header
+        with open(items[0]['log_file']) as log:
+            lines = log.read().splitlines()
+        assert sum(line.startswith("# Start:") for line in lines) == 1
+        assert any(line.endswith(",MVD1") for line in lines) and any(line.endswith(",MVD2") for line in lines)
@@ -0,0 +1,199 @@
+"""
+Unit tests for frame_source module
+Tests sequential grab/retrieve walking, seek fallback, ROI handling and the ffmpeg backend
+"""
+import io
+import json
+import numpy as np
+import pytest
+
+
+def _mock_capture(mocker, fps=10.0, frame_count=100, width=0, height=0, frame="frame"):
+    """Build a VideoCapture mock that reports fps/frame count and yields frames"""
+    import cv2
+
+    mock_cap = mocker.MagicMock()
+    mock_cap.isOpened.return_value = True
+    mock_cap.get.side_effect = lambda prop: {
+        cv2.CAP_PROP_FPS: fps,
+        cv2.CAP_PROP_FRAME_COUNT: frame_count,
+        cv2.CAP_PROP_FRAME_WIDTH: width,
+        cv2.CAP_PROP_FRAME_HEIGHT: height,
+    }.get(prop, 0)
+    mock_cap.grab.return_value = True
+    mock_cap.retrieve.return_value = (True, frame)
+    mocker.patch('cv2.VideoCapture', return_value=mock_cap)
+    return mock_cap
+
+
+class TestOpenCVFrameSource:
+    """Tests for OpenCVFrameSource sequential reading"""
+
+    def test_open_reads_video_properties(self, mocker):
+        """Test fps, frame count and duration are read on open"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        _mock_capture(mocker, fps=10.0, frame_count=100)
+        source = OpenCVFrameSource("/test/video.mp4")
+
+        assert source.open() is True
+        assert source.fps == 10.0
+        assert source.frame_count == 100
+        assert source.duration == pytest.approx(10.0)
+
+    def test_open_failure_returns_false(self, mocker):
+        """Test open returns False when the video cannot be opened"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        mock_cap = mocker.MagicMock()
+        mock_cap.isOpened.return_value = False
+        mocker.patch('cv2.VideoCapture', return_value=mock_cap)
+
+        assert OpenCVFrameSource("/nonexistent/video.mp4").open() is False
+
+    def test_forward_reads_grab_without_seeking(self, mocker):
+        """Test short forward gaps are walked with grab() and never seek"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        mock_cap = _mock_capture(mocker, fps=10.0)
+        source = OpenCVFrameSource("/test/video.mp4")
+        source.open()
+
+        frames = list(source.iter_timestamps([0.0, 0.2, 0.4]))
+
+        assert [t for t, _ in frames] == [0.0, 0.2, 0.4]
+        assert all(frame == "frame" for _, frame in frames)
+        mock_cap.set.assert_not_called()
+        assert source.stats['retrieved'] == 3
+        assert source.stats['grabbed'] == 2  # frames 1 and 3 skipped
+        assert source.stats['seeks'] == 0
+
+    def test_backward_or_long_jump_seeks(self, mocker):
+        """Test reads behind the position or beyond the threshold seek"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        _mock_capture(mocker, fps=10.0)
+        source = OpenCVFrameSource("/test/video.mp4", seek_threshold_sec=1.0)
+        source.open()
+
+        source.read_at(5.0)   # 50 frames ahead -> seek
+        source.read_at(1.0)   # behind -> seek
+        source.read_at(1.5)   # 4 frames ahead -> grab
+
+        assert source.stats['seeks'] == 2
+
+    def test_read_past_end_returns_none(self, mocker):
+        """Test reading past the end of the video returns None"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        mock_cap = _mock_capture(mocker)
+        mock_cap.grab.return_value = False
+        source = OpenCVFrameSource("/test/video.mp4")
+        source.open()
+
+        assert source.read_frame(3) is None
+
+    def test_roi_returns_view_of_frame(self, mocker):
+        """Test frames are cropped to the ROI without copying"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        full = np.zeros((100, 200, 3), dtype=np.uint8)
+        _mock_capture(mocker, width=200, height=100, frame=full)
+        source = OpenCVFrameSource("/test/video.mp4", roi=(10, 20, 50, 30))
+        source.open()
+
+        frame = source.read_frame(0)
+
+        assert frame.shape == (30, 50, 3)
+        assert np.shares_memory(frame, full)
+        assert source.origin == (10, 20)
+
+    def test_invalid_roi_falls_back_to_full_frame(self, mocker):
+        """Test an ROI outside the frame is dropped on open"""
+        from modules.technician.frame_source import OpenCVFrameSource
+
+        _mock_capture(mocker, width=200, height=100)
+        source = OpenCVFrameSource("/test/video.mp4", roi=(150, 0, 100, 50))
+        source.open()
+
+        assert source.roi is None
+        assert source.origin == (0, 0)
+
+
+class TestFFmpegFrameSource:
+    """Tests for FFmpegFrameSource command construction and pipe reading"""
+
+    @pytest.fixture
+    def ffmpeg(self, mocker):
+        """Mock ffprobe (320x240 @ 10fps, 100 frames) and an ffmpeg pipe of numbered gray frames"""
+        probe = {
+            "streams": [{"width": 320, "height": 240, "r_frame_rate": "10/1", "nb_frames": "100"}],
+            "format": {"duration": "10.0"},
+        }
+        mocker.patch('subprocess.run', return_value=mocker.MagicMock(stdout=json.dumps(probe)))
+
+        def popen(cmd, **kwargs):
+            frame_bytes = 40 * 30  # gray ROI of 40x30
+            proc = mocker.MagicMock()
+            proc.stdout = io.BytesIO(b"".join(bytes([n]) * frame_bytes for n in range(50)))
+            return proc
+
+        return mocker.patch('subprocess.Popen', side_effect=popen)
+
+    def test_open_reads_probe(self, ffmpeg):
+        """Test geometry, fps and frame count come from ffprobe"""
+        from modules.technician.frame_source import FFmpegFrameSource
+
+        source = FFmpegFrameSource("/test/video.mp4", roi=(0, 0, 40, 30), pix_fmt="gray")
+
+        assert source.open() is True
+        assert (source.width, source.height, source.fps, source.frame_count) == (320, 240, 10.0, 100)
+
+    def test_crop_and_select_run_in_ffmpeg(self, ffmpeg):
+        """Test iter_every_nth pushes crop and frame selection into the ffmpeg filter graph"""
+        from modules.technician.frame_source import FFmpegFrameSource
+
+        source = FFmpegFrameSource("/test/video.mp4", roi=(8, 4, 40, 30), pix_fmt="gray")
+        source.open()
+
+        frames = list(source.iter_every_nth(0, 20, 5))
+
+        cmd = ffmpeg.call_args[0][0]
+        assert cmd[cmd.index("-vf") + 1] == "crop=40:30:8:4,select=not(mod(n+1\\,5))"
+        assert cmd[cmd.index("-pix_fmt") + 1] == "gray"
+        assert [number for number, _ in frames] == [5, 10, 15, 20]
+        assert frames[-1][1].shape == (30, 40)
+        assert source.stats['retrieved'] == 4
+
+    def test_forward_reads_share_one_process(self, ffmpeg):
+        """Test short forward gaps drain the pipe instead of restarting ffmpeg"""
+        from modules.technician.frame_source import FFmpegFrameSource
+
+        source = FFmpegFrameSource("/test/video.mp4", roi=(0, 0, 40, 30), pix_fmt="gray")
+        source.open()
+
+        assert source.read_frame(0)[0, 0] == 0
+        assert source.read_frame(3)[0, 0] == 3
+        assert ffmpeg.call_count == 1
+        assert source.stats['grabbed'] == 2
+
+
+class TestCreateFrameSource:
+    """Tests for backend selection and ROI helpers"""
+
+    def test_backend_from_environment(self, monkeypatch):
+        """Test VTRACK_FRAME_SOURCE selects the backend"""
+        from modules.technician.frame_source import create_frame_source, FFmpegFrameSource, OpenCVFrameSource
+
+        monkeypatch.setenv('VTRACK_FRAME_SOURCE', 'ffmpeg')
+        assert isinstance(create_frame_source("/test/video.mp4"), FFmpegFrameSource)
+        monkeypatch.delenv('VTRACK_FRAME_SOURCE')
+        assert isinstance(create_frame_source("/test/video.mp4"), OpenCVFrameSource)
+
+    def test_union_roi(self):
+        """Test the union ROI bounds both areas and ignores missing ones"""
+        from modules.technician.frame_source import union_roi
+
+        assert union_roi((10, 10, 20, 20), (50, 0, 10, 5)) == (10, 0, 50, 30)
+        assert union_roi((10, 10, 20, 20), None) == (10, 10, 20, 20)
+        assert union_roi(None, None) is None
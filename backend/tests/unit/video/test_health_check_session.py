@@ -0,0 +1,136 @@
+"""
+Unit tests for health_check_session module
+Tests single-open window sampling, frames fed by the frame sampler and the
+segments the sampler holds back until the health check is decided
+"""
+import numpy as np
+
+
+TRIGGER_ROI = {'x': 10, 'y': 20, 'w': 30, 'h': 30}
+
+
+def _session(mocker, decoded_at=()):
+    """Session over a mocked frame source; the detector decodes TimeGo in frames whose value is in decoded_at"""
+    from modules.technician import health_check_session
+
+    source = mocker.MagicMock()
+    source.open.return_value = True
+    source.roi = (10, 20, 30, 30)
+    source.read_at.side_effect = lambda seconds: np.full((30, 30, 3), int(round(seconds * 10)), dtype=np.uint8)
+    source_cls = mocker.patch.object(health_check_session, 'OpenCVFrameSource', return_value=source)
+
+    detector = mocker.MagicMock()
+
+    def detect(frame):
+        if int(frame[0, 0, 0]) in decoded_at:
+            return ["TimeGo"], [np.array([[0, 0], [8, 0], [8, 8], [0, 8]])]
+        return [], None
+
+    detector.detectAndDecode.side_effect = detect
+    mocker.patch.object(health_check_session.detector_pool, 'thread_detector', return_value=detector)
+    return health_check_session.HealthCheckSession("/test/video.mp4", TRIGGER_ROI), source, source_cls
+
+
+class TestHealthCheckSession:
+    """Tests for HealthCheckSession"""
+
+    def test_window_uses_one_open(self, mocker):
+        """Test all window samples are read from a single frame source"""
+        from modules.technician.health_check_session import find_text_bbox
+
+        session, source, source_cls = _session(mocker, decoded_at={10, 12})
+
+        results = session.collect_window(1.0, total_frames=5)
+        session.close()
+
+        assert source_cls.call_count == 1
+        assert [round(call.args[0], 1) for call in source.read_at.call_args_list] == [1.0, 1.2, 1.4, 1.6, 1.8]
+        assert [find_text_bbox(r, 'TimeGo') is not None for r in results] == [True, True, False, False, False]
+        assert find_text_bbox(results[0], 'TimeGo') == {'x': 10, 'y': 20, 'w': 8, 'h': 8}
+
+    def test_fed_frames_are_not_decoded_again(self, mocker):
+        """Test frames fed by the sampler fill the window and only missing samples are decoded"""
+        session, source, _ = _session(mocker)
+        session.expect_window(1.0, 3)
+        frame = np.zeros((30, 30, 3), dtype=np.uint8)
+
+        assert session.feed(0.5, frame) is False      # before the window
+        assert session.feed(1.03, frame) is True       # nearest sample 1.0
+        assert session.feed(1.0, frame) is False       # already filled
+        assert session.feed(1.37, frame) is True       # nearest sample 1.4
+        assert not session.window_complete
+
+        results = session.collect_window()
+
+        assert len(results) == 3 and all(r['success'] for r in results)
+        assert [round(call.args[0], 1) for call in source.read_at.call_args_list] == [1.2]
+        assert session.stats['fed'] == 2 and session.stats['decoded'] == 1
+
+    def test_find_first_text(self, mocker):
+        """Test the first TimeGo sample time is returned, None when absent"""
+        session, _, _ = _session(mocker, decoded_at={6})
+
+        assert round(session.find_first_text('TimeGo', 0.0, 2.0), 1) == 0.6
+        assert session.find_first_text('TimeGo', 1.0, 2.0) is None
+
+    def test_failed_read_keeps_sample_time(self, mocker):
+        """Test error results carry the sample time for the health check logs"""
+        session, source, _ = _session(mocker)
+        source.read_at.side_effect = lambda seconds: None
+
+        result = session.detect_at(2.4)
+
+        assert result['success'] is False and result['timestamp'] == 2.4
+
+
+class TestDeferredSegments:
+    """Tests for FrameSamplerTrigger._release_segments"""
+
+    def _segments(self, mocker):
+        from modules.technician import frame_sampler_trigger
+
+        sampler = object.__new__(frame_sampler_trigger.FrameSamplerTrigger)
+        sampler._register_log_file = mocker.MagicMock()
+        sampler.holding = False
+        sampler.segment_logs = {}
+        finish = mocker.patch.object(frame_sampler_trigger, 'finish_segment')
+        discard = mocker.patch.object(frame_sampler_trigger, 'discard_segment')
+        closed = mocker.MagicMock(log_file='/logs/a.txt', closed=True, submit=False)
+        open_segment = mocker.MagicMock(log_file='/logs/b.txt', closed=False, submit=False)
+        return sampler, finish, discard, [closed, open_segment]
+
+    def test_passed_health_check_hands_segments_over(self, mocker):
+        """Test closed segments are queued now and the open one when it closes"""
+        sampler, finish, discard, deferred = self._segments(mocker)
+        closed, open_segment = deferred
+
+        sampler._release_segments(deferred, 'Cam1', accepted=True)
+
+        assert [c.args[0] for c in sampler._register_log_file.call_args_list] == ['/logs/a.txt', '/logs/b.txt']
+        finish.assert_called_once_with('/logs/a.txt', 'Cam1')
+        assert open_segment.submit is True
+        discard.assert_not_called()
+        assert deferred == []
+
+    def test_critical_health_check_drops_segments(self, mocker):
+        """Test a CRITICAL result leaves nothing registered for the event detector"""
+        sampler, finish, discard, deferred = self._segments(mocker)
+
+        sampler._release_segments(deferred, 'Cam1', accepted=False)
+
+        sampler._register_log_file.assert_not_called()
+        finish.assert_not_called()
+        assert [c.args[0] for c in discard.call_args_list] == ['/logs/a.txt', '/logs/b.txt']
+
+    def test_held_segments_wait_for_release(self, mocker):
+        """Test segments of a video sampled in work blocks are only queued by release_segments"""
+        sampler, finish, discard, deferred = self._segments(mocker)
+        sampler.hold_segments()
+        sampler.segment_logs = {'/logs/b.txt': (300, 'Cam1'), '/logs/a.txt': (0, 'Cam1')}
+
+        sampler._release_segments(deferred, 'Cam1', accepted=True)
+        finish.assert_not_called()
+
+        sampler.release_segments()
+        assert [c.args for c in finish.call_args_list] == [('/logs/a.txt', 'Cam1'), ('/logs/b.txt', 'Cam1')]
+        assert sampler.holding is False and sampler.segment_logs == {}
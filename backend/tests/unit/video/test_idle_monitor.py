@@ -0,0 +1,108 @@
+"""
+Unit tests for IdleMonitor module
+Tests work-block construction and the motion-gated hand scan
+"""
+import numpy as np
+import pytest
+
+
+class _SyntheticSource:
+    """Frame source stub: static packing table with a bright 'hand' during busy seconds"""
+
+    def __init__(self, busy_seconds, noise_seed=0):
+        self.busy_seconds = set(busy_seconds)
+        self.rng = np.random.default_rng(noise_seed)
+        self.background = np.full((240, 320, 3), 90, dtype=np.uint8)
+
+    def read_at(self, seconds):
+        frame = self.background.copy()
+        # Light sensor noise that the gate must ignore
+        frame += self.rng.integers(0, 4, size=frame.shape, dtype=np.uint8)
+        if int(seconds) in self.busy_seconds:
+            frame[60:180, 100:220] = 250
+        return frame
+
+
+class _BrightPatchHands:
+    """MediaPipe Hands stand-in: reports a hand when the bright patch is present"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, rgb_frame):
+        self.calls += 1
+        found = rgb_frame[120, 160, 0] > 200
+        return type("Results", (), {"multi_hand_landmarks": [object()] if found else None})()
+
+    def close(self):
+        pass
+
+
+def _make_monitor(threshold):
+    from modules.technician.IdleMonitor import IdleMonitor
+
+    monitor = IdleMonitor(processing_config={'min_packing_time': 5, 'idle_motion_threshold': threshold})
+    monitor.hands.close()
+    monitor.hands = _BrightPatchHands()
+    return monitor
+
+
+class TestIdleMonitorWorkBlocks:
+    """Tests for IdleMonitor._build_work_blocks()"""
+
+    def test_idle_gap_splits_work_blocks(self):
+        """Test an idle stretch >= IDLE_GAP splits the timeline into two blocks"""
+        monitor = _make_monitor(0)
+        chunk = monitor.CHUNK_SIZE
+        idle_chunks = monitor.IDLE_GAP // chunk + 1
+        timeline = [True] * 5 + [False] * idle_chunks + [True] * 5
+
+        blocks = monitor._build_work_blocks(timeline)
+
+        assert blocks == [
+            {'start': 0, 'end': 5 * chunk},
+            {'start': (5 + idle_chunks) * chunk, 'end': (10 + idle_chunks) * chunk},
+        ]
+
+    def test_short_idle_does_not_split(self):
+        """Test idle stretches shorter than IDLE_GAP keep one block"""
+        monitor = _make_monitor(0)
+        timeline = [True, False, False, True]
+
+        assert monitor._build_work_blocks(timeline) == [{'start': 0, 'end': 4 * monitor.CHUNK_SIZE}]
+
+
+class TestIdleMonitorMotionGate:
+    """Regression tests: the motion gate must not change work blocks"""
+
+    @pytest.mark.parametrize("busy_ranges", [
+        [(0, 30), (400, 460)],
+        [(200, 260), (600, 610), (900, 1000)],
+    ])
+    def test_gated_scan_matches_ungated(self, busy_ranges):
+        """Test gated and ungated scans produce identical timelines and work blocks"""
+        busy = [s for start, end in busy_ranges for s in range(start, end)]
+        duration = 1200
+
+        ungated = _make_monitor(0)
+        ungated_timeline = ungated._scan_hand_timeline(_SyntheticSource(busy), duration)
+
+        gated = _make_monitor(0.02)
+        gated_timeline = gated._scan_hand_timeline(_SyntheticSource(busy), duration)
+
+        assert gated_timeline == ungated_timeline
+        assert gated._build_work_blocks(gated_timeline) == ungated._build_work_blocks(ungated_timeline)
+
+    def test_gate_skips_static_frames(self):
+        """Test MediaPipe runs far less often on a mostly idle recording"""
+        busy = list(range(0, 20))
+        duration = 1200
+
+        ungated = _make_monitor(0)
+        ungated._scan_hand_timeline(_SyntheticSource(busy), duration)
+
+        gated = _make_monitor(0.02)
+        gated._scan_hand_timeline(_SyntheticSource(busy), duration)
+
+        assert gated.hands.calls * 5 < ungated.hands.calls
+        assert gated.motion_gate.skip_ratio > 0.8
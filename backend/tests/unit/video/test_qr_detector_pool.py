@@ -0,0 +1,82 @@
+"""
+Unit tests for qr_detector_pool module
+Tests per-thread binding, warm reuse and usage statistics
+"""
+import gc
+import threading
+import pytest
+
+
+@pytest.fixture
+def pool(mocker):
+    """Pool whose detector factory returns a fresh mock per model load"""
+    from modules.technician.qr_detector_pool import WeChatDetectorPool
+
+    mocker.patch('os.path.exists', return_value=True)
+    mocker.patch('cv2.wechat_qrcode_WeChatQRCode', side_effect=lambda *args: mocker.MagicMock(), create=True)
+    return WeChatDetectorPool(max_idle=2)
+
+
+class TestWeChatDetectorPool:
+    """Tests for WeChatDetectorPool"""
+
+    def test_same_thread_reuses_detector(self, pool):
+        """Test repeated calls in one thread return the same instance"""
+        first = pool.thread_detector()
+        second = pool.thread_detector()
+
+        assert first is second
+        assert pool.stats()['created'] == 1
+
+    def test_threads_get_separate_detectors(self, pool):
+        """Test a concurrently running thread gets its own instance"""
+        main_detector = pool.thread_detector()
+        other = {}
+
+        def worker():
+            other['detector'] = pool.thread_detector()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert other['detector'] is not main_detector
+
+    def test_finished_thread_detector_is_adopted_warm(self, pool):
+        """Test a new thread adopts a finished thread's detector without a model load"""
+        seen = []
+
+        def worker():
+            seen.append(pool.thread_detector())
+
+        for _ in range(2):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            del thread
+            gc.collect()
+
+        assert seen[0] is seen[1]
+        stats = pool.stats()
+        assert stats['created'] == 1
+        assert stats['adopted_warm'] == 1
+        assert stats['idle'] == 1
+
+    def test_borrow_records_hold_stats(self, pool):
+        """Test borrow() counts borrows and releases the active counter"""
+        with pool.borrow() as detector:
+            assert detector is pool.thread_detector()
+            assert pool.stats()['active_borrows'] == 1
+
+        stats = pool.stats()
+        assert stats['borrows'] == 1
+        assert stats['active_borrows'] == 0
+        assert stats['alive'] == 1
+
+    def test_missing_models_raise(self, mocker):
+        """Test missing model files raise FileNotFoundError"""
+        from modules.technician.qr_detector_pool import WeChatDetectorPool
+
+        mocker.patch('os.path.exists', return_value=False)
+        with pytest.raises(FileNotFoundError):
+            WeChatDetectorPool().thread_detector()
@@ -0,0 +1,61 @@
+"""
+Unit tests for qr_tracker module
+Tests label following, loss on scene change and the refresh interval
+"""
+import numpy as np
+
+
+def _scene(label_x=40, label_y=30, seed=3):
+    """200x160 BGR frame with a random 40x40 'label' pasted at (label_x, label_y)"""
+    rng = np.random.RandomState(seed)
+    frame = np.full((160, 200, 3), 127, dtype=np.uint8)
+    label = (rng.rand(40, 40) > 0.5).astype(np.uint8) * 255
+    frame[label_y:label_y + 40, label_x:label_x + 40] = label[:, :, None]
+    return frame
+
+
+def _points(x, y):
+    return np.array([[x, y], [x + 40, y], [x + 40, y + 40], [x, y + 40]], dtype=np.float32)
+
+
+class TestMVDTracker:
+    """Tests for MVDTracker"""
+
+    def test_follows_label_shift(self):
+        """Test a slightly moved label is matched and its points shifted"""
+        from modules.technician.qr_tracker import MVDTracker
+
+        tracker = MVDTracker(fps=10)
+        tracker.update(_scene(), 1, "MVD1", _points(40, 30))
+
+        tracked = tracker.match(_scene(label_x=44, label_y=28), 6)
+
+        assert tracked is not None
+        mvd, bbox, points = tracked
+        assert mvd == "MVD1" and bbox == (44, 28, 40, 40)
+        assert points[0].tolist() == [44.0, 28.0]
+
+    def test_different_label_is_lost(self):
+        """Test a new label in the same place is decoded, not tracked"""
+        from modules.technician.qr_tracker import MVDTracker
+
+        tracker = MVDTracker(fps=10)
+        tracker.update(_scene(seed=3), 1, "MVD1", _points(40, 30))
+
+        assert tracker.match(_scene(seed=4), 6) is None
+        assert not tracker.active and tracker.stats['lost'] == 1
+
+    def test_refresh_and_gap_force_decode(self):
+        """Test tracking stops after refresh_sec and across non-consecutive samples"""
+        from modules.technician.qr_tracker import MVDTracker
+
+        tracker = MVDTracker(fps=10, config={'refresh_sec': 1.0, 'max_gap_sec': 0.6})
+        tracker.update(_scene(), 1, "MVD1", _points(40, 30))
+        assert tracker.match(_scene(), 6) is not None
+        assert tracker.match(_scene(), 11) is None       # 1.0s since the decode
+        assert tracker.stats['refreshed'] == 1
+
+        tracker.update(_scene(), 20, "MVD1", _points(40, 30))
+        assert tracker.match(_scene(), 30) is None       # 1.0s gap between samples
+        tracker.update(_scene(), 40, "MVD1", _points(40, 30))
+        assert tracker.match(_scene(), 35) is None       # backwards
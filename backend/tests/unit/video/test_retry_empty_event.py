@@ -0,0 +1,95 @@
+"""
+Unit tests for retry_empty_event module
+Tests per-video grouping of retry events and the coarse-to-fine window scan
+"""
+
+
+class _FakeSource:
+    """Frame source stub: frame index -> frame, records every read"""
+
+    def __init__(self, frame_count=1000):
+        self.frame_count = frame_count
+        self.reads = []
+        self.origin = (0, 0)
+        self.stats = {"grabbed": 0, "retrieved": 0, "seeks": 0}
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def close(self):
+        pass
+
+    def read_frame(self, index):
+        self.reads.append(index)
+        return index if index < self.frame_count else None
+
+
+def _processor(mocker, decoded=None, located=()):
+    """RetryEmptyEventProcessor with a stub sampler (fps=10) that decodes/locates at given frame indexes"""
+    from modules.technician import retry_empty_event
+
+    sampler = mocker.MagicMock()
+    sampler.fps = 10
+    sampler.get_packing_area.return_value = ((0, 0, 100, 100), None)
+    decoded = decoded or {}
+
+    def process_frame(frame_packing, frame_trigger, frame_count, packing_area_offset=None):
+        mvd = decoded.get(frame_packing, "")
+        points = [(0, 0)] * 4 if frame_packing in located or mvd else None
+        return "Off", mvd, None, points
+
+    sampler.process_frame.side_effect = process_frame
+    mocker.patch.object(retry_empty_event, 'FrameSamplerTrigger', return_value=sampler)
+    processor = retry_empty_event.RetryEmptyEventProcessor()
+    mocker.patch.object(processor, 'update_event_success')
+    mocker.patch.object(processor, 'update_event_failed')
+    return processor
+
+
+class TestRetryEmptyEventBatching:
+    """Tests for batched empty-event recovery"""
+
+    def test_group_events_by_video_sorted_by_ts(self, mocker):
+        """Test events are grouped per (video, camera) and sorted by ts"""
+        processor = _processor(mocker)
+        events = [
+            (3, "b.mp4", 50.0, 60.0, "cam1"),
+            (1, "a.mp4", 40.0, 50.0, "cam1"),
+            (2, "a.mp4", 10.0, 20.0, "cam1"),
+        ]
+
+        groups = processor.group_events_by_video(events)
+
+        assert list(groups) == [("a.mp4", "cam1"), ("b.mp4", "cam1")]
+        assert [event[0] for event in groups[("a.mp4", "cam1")]] == [2, 1]
+
+    def test_video_opened_once_for_all_events(self, mocker):
+        """Test one frame source serves every event of the same video"""
+        from modules.technician import retry_empty_event
+
+        processor = _processor(mocker, decoded={155: "MVD1"})
+        source = _FakeSource()
+        create = mocker.patch.object(retry_empty_event, 'create_frame_source', return_value=source)
+        events = [(1, "a.mp4", 0.0, 4.0, "cam1"), (2, "a.mp4", 10.0, 20.0, "cam1")]
+
+        recovered = processor.process_video_events("a.mp4", "cam1", events)
+
+        assert recovered == 1
+        assert create.call_count == 1 and source.opened == 1
+        processor.update_event_failed.assert_called_once_with(1)
+        processor.update_event_success.assert_called_once_with(2, "MVD1")
+        assert source.reads == [20, 25, 30, 35, 40, 150, 155]
+
+    def test_refines_around_located_qr(self, mocker):
+        """Test frames between coarse samples are decoded only around a located QR"""
+        mocker.patch.dict('modules.technician.retry_empty_event.RETRY_CONFIG',
+                          {'coarse_interval_sec': 0.5, 'refine_radius_sec': 0.2})
+        processor = _processor(mocker, decoded={13: "MVD2"}, located={15})
+        source = _FakeSource()
+
+        mvd, frame_count = processor.scan_event_window(source, 0, 40, "cam1")
+
+        assert (mvd, frame_count) == ("MVD2", 14)
+        assert source.reads == [0, 5, 10, 15, 11, 12, 13]
@@ -0,0 +1,49 @@
+"""
+Unit tests for roi_change_gate module
+Tests result reuse for static ROIs, change detection, forced refresh and skip ratio
+"""
+import numpy as np
+
+
+def _crop(value=100, noise=0, seed=0):
+    rng = np.random.RandomState(seed)
+    crop = np.full((64, 64, 3), value, dtype=np.int16) + rng.randint(-noise, noise + 1, (64, 64, 1))
+    return np.clip(crop, 0, 255).astype(np.uint8)
+
+
+class TestROIChangeGate:
+    """Tests for ROIChangeGate"""
+
+    def test_static_roi_reuses_result(self):
+        """Test an unchanged crop (sensor noise only) gets the stored result"""
+        from modules.technician.roi_change_gate import ROIChangeGate
+
+        gate = ROIChangeGate(fps=10)
+        assert gate.reuse("trigger", _crop(), 1) is None
+        gate.store("trigger", _crop(), 1, "On")
+
+        assert gate.reuse("trigger", _crop(noise=2, seed=1), 6) == "On"
+        assert gate.skip_ratio() == {'trigger': 0.5, 'overall': 0.5}
+
+    def test_changed_roi_is_decoded(self):
+        """Test a crop that changed beyond the threshold is not reused"""
+        from modules.technician.roi_change_gate import ROIChangeGate
+
+        gate = ROIChangeGate(fps=10)
+        gate.store("packing", _crop(100), 1, ("MVD1", None, None))
+        changed = _crop(100)
+        changed[10:40, 10:40] = 255
+
+        assert gate.reuse("packing", changed, 6) is None
+
+    def test_drift_is_measured_from_last_decode(self):
+        """Test small steps accumulate against the last decoded crop and max_reuse_sec forces a decode"""
+        from modules.technician.roi_change_gate import ROIChangeGate
+
+        gate = ROIChangeGate(fps=10, config={'max_mean_diff': 2.0, 'max_reuse_sec': 2.0})
+        gate.store("trigger", _crop(100), 1, "Off")
+
+        assert gate.reuse("trigger", _crop(101), 6) == "Off"
+        assert gate.reuse("trigger", _crop(103), 11) is None   # 3 levels from the decoded crop
+        gate.store("trigger", _crop(103), 11, "Off")
+        assert gate.reuse("trigger", _crop(103), 32) is None   # over 2s since the decode
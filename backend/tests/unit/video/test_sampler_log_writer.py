@@ -0,0 +1,63 @@
+"""
+Unit tests for sampler_log_writer module
+Tests batching, header handling in truncate/append mode and flush on close
+"""
+
+
+class TestSamplerLogWriter:
+    """Tests for SamplerLogWriter"""
+
+    def test_lines_are_batched_until_close(self, tmp_path):
+        """Test buffered lines reach the file on the batch limit and on close"""
+        from modules.technician.sampler_log_writer import SamplerLogWriter
+
+        writer = SamplerLogWriter(config={'flush_interval_sec': 60, 'max_buffered_lines': 3})
+        path = tmp_path / "log_cam_0000_0300.txt"
+        segment = writer.open(str(path), "# Start: 0, End: 300")
+
+        segment.write("1,On,\n")
+        segment.write("2,Off,\n")
+        assert path.read_text() == "# Start: 0, End: 300\n"
+
+        segment.write("3,On,MVD1\n")
+        segment.write("4,Off,\n")
+        assert path.read_text().count("\n") == 4
+
+        segment.close()
+        assert path.read_text().splitlines()[-1] == "4,Off,"
+        stats = writer.stats()
+        assert stats['lines'] == 4 and stats['flushes'] == 2 and stats['open'] == 0
+
+    def test_append_and_lazy_keep_single_header(self, tmp_path):
+        """Test lazy segments create the file on the first line and appends skip the header"""
+        from modules.technician.sampler_log_writer import SamplerLogWriter
+
+        writer = SamplerLogWriter(config={'flush_interval_sec': 60})
+        path = tmp_path / "log_cam_0300_0600.txt"
+
+        empty = writer.open(str(path), "# Start: 300", append=True, lazy=True)
+        empty.close()
+        assert not path.exists()
+
+        for line in ("301,On,\n", "302,Off,\n"):
+            segment = writer.open(str(path), "# Start: 300", append=True, lazy=True)
+            segment.write(line)
+            segment.close()
+
+        assert path.read_text() == "# Start: 300\n301,On,\n302,Off,\n"
+
+    def test_reopen_closes_abandoned_segment(self, tmp_path):
+        """Test opening a path again first writes out a segment left open for it"""
+        from modules.technician.sampler_log_writer import SamplerLogWriter
+
+        writer = SamplerLogWriter(config={'flush_interval_sec': 60})
+        path = tmp_path / "log_cam_0000_0300.txt"
+        abandoned = writer.open(str(path), "# Start: 0", append=True)
+        abandoned.write("5,On,\n")
+
+        segment = writer.open(str(path), "# Start: 0", append=True)
+        segment.write("6,Off,\n")
+        writer.close_all()
+
+        assert abandoned.closed
+        assert path.read_text() == "# Start: 0\n5,On,\n6,Off,\n"
@@ -0,0 +1,94 @@
+"""
+Unit tests for size_aware_decoder module
+Tests the scale/SR plan, point mapping and the full-resolution fallback
+"""
+import numpy as np
+
+
+class TestPlanDecode:
+    """Tests for plan_decode"""
+
+    def test_plan_from_expected_size(self):
+        """Test large codes are downscaled without SR and small or unknown ones keep SR"""
+        from modules.technician.size_aware_decoder import plan_decode, SIZE_AWARE_CONFIG
+
+        config = dict(SIZE_AWARE_CONFIG, enabled=True, target_qr_px=120, sr_min_qr_px=60)
+
+        assert plan_decode({"width": 240, "height": 230}, config) == (0.5, False)
+        assert plan_decode({"width": 90, "height": 88}, config) == (1.0, False)
+        assert plan_decode({"width": 57, "height": 58}, config) == (1.0, True)
+        assert plan_decode(None, config) == (1.0, True)
+
+
+class TestSizeAwareDecoder:
+    """Tests for SizeAwareDecoder"""
+
+    def _patch(self, mocker, result, boxes=(), retry=((), ()), mode="on"):
+        from modules.technician import size_aware_decoder as module
+
+        decode = mocker.patch.object(module.tiered_decoder, 'detect_and_decode_boxes',
+                                     return_value=result + (list(boxes),))
+        redecode = mocker.patch.object(module.tiered_decoder, 'decode_boxes', return_value=retry)
+        localize = mocker.patch.object(module.tiered_decoder, 'localize')
+        mocker.patch.object(module.tiered_decoder, 'mode', mode)
+        mocker.patch.object(module.detector_pool, 'thread_detector', return_value="sr")
+        mocker.patch.object(module.fast_detector_pool, 'thread_detector', return_value="fast")
+        return decode, redecode, localize
+
+    def test_points_mapped_back_to_crop(self, mocker):
+        """Test a downscaled no-SR decode returns points in full crop coordinates"""
+        from modules.technician.size_aware_decoder import SizeAwareDecoder
+
+        box = np.array([[10, 10], [70, 10], [70, 70], [10, 70]], np.float32)
+        decode, redecode, _ = self._patch(mocker, (("TimeGo",), (box,)))
+        decoder = SizeAwareDecoder(config={'enabled': True, 'target_qr_px': 120})
+
+        texts, points = decoder.detect_and_decode(np.zeros((400, 400, 3), np.uint8), {"width": 240, "height": 240}, region="trigger")
+
+        detector, scaled = decode.call_args.args
+        assert detector == "fast" and scaled.shape[:2] == (200, 200)
+        redecode.assert_not_called()
+        assert list(texts) == ["TimeGo"]
+        assert points[0].tolist()[0] == [20.0, 20.0]
+        assert decoder.stats()['trigger']['downscaled'] == 1
+
+    def test_localised_miss_falls_back_to_full_resolution(self, mocker):
+        """Test a code seen by tier 1 but not decoded is retried at full resolution with SR"""
+        from modules.technician.size_aware_decoder import SizeAwareDecoder
+
+        _, redecode, localize = self._patch(mocker, ((), ()), boxes=[(10, 10, 30, 30)], retry=(("MVD1",), ()))
+        decoder = SizeAwareDecoder(config={'enabled': True, 'target_qr_px': 120})
+        frame = np.zeros((400, 400, 3), np.uint8)
+
+        texts, _ = decoder.detect_and_decode(frame, {"width": 240, "height": 240}, region="packing")
+
+        assert list(texts) == ["MVD1"]
+        detector, decoded_frame, boxes = redecode.call_args.args
+        assert detector == "sr" and decoded_frame is frame
+        assert boxes == [(20, 20, 60, 60)]  # tier-1 boxes reused, mapped to full resolution
+        localize.assert_not_called()
+        assert decoder.stats()['packing']['fallback_decoded'] == 1
+
+    def test_fallback_gated_by_tier1(self, mocker):
+        """Test an empty tier-1 result skips the retry in both "on" and "shadow" mode"""
+        from modules.technician.size_aware_decoder import SizeAwareDecoder
+
+        frame = np.zeros((400, 400, 3), np.uint8)
+        for mode in ("on", "shadow"):
+            _, redecode, _ = self._patch(mocker, ((), ()), mode=mode)
+            decoder = SizeAwareDecoder(config={'enabled': True})
+            decoder.detect_and_decode(frame, {"width": 240, "height": 240}, region="trigger")
+            redecode.assert_not_called()
+            assert decoder.stats()['trigger']['fallback'] == 0
+
+    def test_off_mode_decodes_full_resolution(self, mocker):
+        """Test planning is skipped without tier 1, so a miss is never decoded at a lower scale"""
+        from modules.technician import size_aware_decoder as module
+        from modules.technician.size_aware_decoder import SizeAwareDecoder
+
+        decode, _, _ = self._patch(mocker, ((), ()), mode="off")
+        full = mocker.patch.object(module.tiered_decoder, 'detect_and_decode', return_value=((), ()))
+        SizeAwareDecoder(config={'enabled': True}).detect_and_decode(np.zeros((400, 400, 3), np.uint8), {"width": 240, "height": 240})
+
+        decode.assert_not_called()
+        assert full.call_args.args[0] == "sr" and full.call_args.args[1].shape[:2] == (400, 400)
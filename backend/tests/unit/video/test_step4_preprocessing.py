@@ -0,0 +1,167 @@
+"""
+Unit tests for step4_preprocessing module
+Tests the single decode pass feeding the hand, QR and trigger caches, job
+joining between the two Step 4 endpoints, cancellation and the early baseline
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+PACKING_ROI = {'x': 0, 'y': 0, 'w': 16, 'h': 24}
+TRIGGER_ROI = {'x': 20, 'y': 0, 'w': 12, 'h': 12}
+
+
+def _write_video(path, seconds, fps=5, size=(32, 24)):
+    """Small MJPG video, one distinct grey level per frame"""
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for index in range(int(seconds * fps)):
+        writer.write(np.full((size[1], size[0], 3), (index * 3) % 255, np.uint8))
+    writer.release()
+    return path
+
+
+def _wait_for_job(cache_key, timeout=10.0):
+    from modules.technician import step4_preprocessing
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with step4_preprocessing._jobs_lock:
+            if cache_key not in step4_preprocessing._jobs:
+                return
+        time.sleep(0.01)
+    raise AssertionError(f"Step 4 job {cache_key} did not finish")
+
+
+@pytest.fixture
+def step4(mocker, tmp_path):
+    """Fresh caches, job registries and detectors; QR decode blocks while `gate` is clear"""
+    from blueprints import qr_detection_bp, simple_hand_detection_bp
+    from modules.technician import detection_cache, step4_preprocessing
+    from modules.technician.detection_cache import DetectionCache
+
+    db_path = str(tmp_path / "detection_cache.db")
+    mocker.patch.object(detection_cache, '_caches', {
+        namespace: DetectionCache(namespace, db_path=db_path) for namespace in ("hand", "qr", "qr_baseline")
+    })
+    mocker.patch.object(step4_preprocessing, '_jobs', {})
+    hand_progress = mocker.patch.object(simple_hand_detection_bp, 'preprocessing_progress', {})
+    qr_progress = mocker.patch.object(qr_detection_bp, 'qr_preprocessing_progress', {})
+
+    gate = threading.Event()
+    gate.set()
+
+    def detect_qr(detector, frame, roi):
+        gate.wait(10)
+        code = "TIMEGO" if roi == TRIGGER_ROI else "MVD1"
+        return {'success': True, 'qr_detections': [{'data': code}], 'qr_count': 1}
+
+    mocker.patch.object(step4_preprocessing.detector_pool, 'thread_detector')
+    detect = mocker.patch.object(step4_preprocessing, '_detect_qr_in_frame', side_effect=detect_qr)
+    mocker.patch.object(step4_preprocessing, 'mp_hands')
+    mocker.patch.object(step4_preprocessing, 'build_hand_detection',
+                        side_effect=lambda results, timestamp, roi_box, width, height: {'timestamp': timestamp, 'hands': 1})
+    baseline = mocker.patch.object(step4_preprocessing, 'capture_baseline_from_detections',
+                                   return_value={'success': True, 'baseline_success_rate_pct': 100.0})
+    opened = mocker.spy(step4_preprocessing.OpenCVFrameSource, 'open')
+
+    return SimpleNamespace(
+        module=step4_preprocessing, gate=gate, detect=detect, baseline=baseline, opened=opened,
+        hand_progress=hand_progress, qr_progress=qr_progress,
+        cache=detection_cache.get_detection_cache, video=lambda seconds: _write_video(str(tmp_path / "cam1.avi"), seconds),
+    )
+
+
+class TestStep4Preprocessing:
+    """Tests for start_step4_preprocessing and the combined pass"""
+
+    def test_single_pass_fills_hand_qr_and_trigger_caches(self, step4):
+        """Test one decode of the video fills the hand, QR and _trigger caches"""
+        video = step4.video(2)
+
+        job, started = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5, trigger_roi=TRIGGER_ROI)
+        _wait_for_job(job['cache_key'])
+
+        assert started
+        assert step4.opened.call_count == 1
+        hand = step4.cache("hand").get(job['cache_key'])
+        qr = step4.cache("qr").get(job['cache_key'])
+        trigger = step4.cache("qr").get(f"{job['cache_key']}_trigger")
+        # 0.0s .. 2.0s at 5fps; 2.0s is past the last frame, the QR timelines stay contiguous
+        assert len(hand['detections']) == 10
+        assert len(qr['detections']) == len(trigger['detections']) == 11
+        assert qr['detections'][-1]['qr_count'] == 0
+        assert {d['qr_detections'][0]['data'] for d in qr['detections'][:-1]} == {"MVD1"}
+        assert {d['qr_detections'][0]['data'] for d in trigger['detections'][:-1]} == {"TIMEGO"}
+        assert qr['metadata']['combined_pass'] and not qr['metadata'].get('partial_results')
+        # Job is unregistered from both blueprints once done
+        assert step4.hand_progress == {} and step4.qr_progress == {}
+
+    def test_trigger_inside_packing_roi_not_decoded_again(self, step4):
+        """Test a trigger ROI inside the packing ROI reuses the packing QR timeline"""
+        video = step4.video(1)
+        inner_trigger = {'x': 2, 'y': 2, 'w': 8, 'h': 8}
+
+        job, _ = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5, trigger_roi=inner_trigger)
+        _wait_for_job(job['cache_key'])
+
+        assert job['trigger_roi'] is None
+        assert {call.args[2]['x'] for call in step4.detect.call_args_list} == {PACKING_ROI['x']}
+        assert step4.cache("qr").get(f"{job['cache_key']}_trigger") is None
+
+    def test_second_caller_joins_running_job(self, step4):
+        """Test the QR endpoint joins the job the hand endpoint started and attaches its camera"""
+        video = step4.video(2)
+        step4.gate.clear()
+
+        job, started = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5)
+        joined, joined_started = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5,
+                                                                       camera_name="Cam1", packing_profile_id=7)
+        # One progress dict, registered in both blueprints
+        assert started and not joined_started and joined is job
+        assert step4.hand_progress[job['cache_key']] is job and step4.qr_progress[job['cache_key']] is job
+        assert job['camera_name'] == "Cam1" and job['packing_profile_id'] == 7
+
+        step4.gate.set()
+        _wait_for_job(job['cache_key'])
+
+        assert step4.opened.call_count == 1
+        # Camera attached mid-run: the baseline is still captured
+        assert step4.baseline.call_args.kwargs['camera_name'] == "Cam1"
+        assert step4.cache("qr_baseline").get(job['cache_key'])['baseline_success_rate_pct'] == 100.0
+
+    def test_cancellation_stops_pass(self, step4):
+        """Test flagging the job cancelled stops the pass and caches no final result"""
+        video = step4.video(4)
+        step4.gate.clear()
+
+        job, _ = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5)
+        # Step 4 cancellation flags every registry entry
+        step4.qr_progress[job['cache_key']]['cancelled'] = True
+        step4.gate.set()
+        _wait_for_job(job['cache_key'])
+
+        assert job['processed_count'] <= 1
+        assert step4.detect.call_count <= 2
+        qr = step4.cache("qr").get(job['cache_key'])
+        assert qr['metadata']['partial_results'] is True
+        assert step4.hand_progress == {} and step4.qr_progress == {}
+
+    def test_baseline_captured_once_window_decoded(self, step4):
+        """Test the baseline is computed at BASELINE_READY_SEC, not at the end of the video"""
+        video = step4.video(step4.module.BASELINE_READY_SEC + 3)
+
+        job, _ = step4.module.start_step4_preprocessing(video, PACKING_ROI, fps=5, camera_name="Cam1",
+                                                        trigger_roi=TRIGGER_ROI)
+        _wait_for_job(job['cache_key'])
+
+        step4.baseline.assert_called_once()
+        detections = step4.baseline.call_args.kwargs['detections']
+        assert detections[-1]['timestamp'] == step4.module.BASELINE_READY_SEC
+        # Baseline comes from the trigger ROI timeline
+        assert detections[0]['qr_detections'][0]['data'] == "TIMEGO"
+        assert step4.baseline.call_args.kwargs['trigger_roi'] == TRIGGER_ROI
@@ -0,0 +1,80 @@
+"""
+Unit tests for tiered_qr_decoder module
+Tests tier-1 gating, crop-to-frame point mapping and shadow false-negative counters
+"""
+import numpy as np
+
+
+def _decoder(mocker, mode, boxes):
+    """TieredQRDecoder whose tier-1 localisation returns the given boxes"""
+    from modules.technician.tiered_qr_decoder import TieredQRDecoder
+
+    decoder = TieredQRDecoder(mode=mode)
+    mocker.patch.object(decoder, 'localize', return_value=boxes)
+    return decoder
+
+
+class TestTieredQRDecoder:
+    """Tests for TieredQRDecoder"""
+
+    def test_on_mode_rejects_without_wechat_call(self, mocker):
+        """Test frames without finder patterns never reach the WeChat detector"""
+        decoder = _decoder(mocker, "on", [])
+        detector = mocker.MagicMock()
+
+        texts, points = decoder.detect_and_decode(detector, np.zeros((100, 100, 3), np.uint8), region="packing")
+
+        assert list(texts) == [] and len(points) == 0
+        detector.detectAndDecode.assert_not_called()
+        assert decoder.stats()['regions']['packing']['tier1_rejected'] == 1
+
+    def test_on_mode_decodes_crop_in_frame_coordinates(self, mocker):
+        """Test tier 2 decodes a padded crop and maps points back to the frame"""
+        decoder = _decoder(mocker, "on", [(40, 50, 20, 20)])
+        detector = mocker.MagicMock()
+        detector.detectAndDecode.return_value = (("MVD1",), (np.array([[4, 4], [24, 4], [24, 24], [4, 24]], np.float32),))
+
+        texts, points = decoder.detect_and_decode(detector, np.zeros((200, 200, 3), np.uint8))
+
+        crop = detector.detectAndDecode.call_args.args[0]
+        assert crop.shape[:2] == (48, 48)  # 20px code + (10px padding + 4px margin) each side
+        assert list(texts) == ["MVD1"]
+        assert points[0].tolist()[0] == [30.0, 40.0]
+
+    def test_on_mode_falls_back_to_full_frame(self, mocker):
+        """Test a localised code the crop cannot decode is retried on the full frame"""
+        decoder = _decoder(mocker, "on", [(40, 50, 20, 20)])
+        detector = mocker.MagicMock()
+        detector.detectAndDecode.side_effect = [((), None), (("MVD2",), None)]
+
+        texts, _ = decoder.detect_and_decode(detector, np.zeros((200, 200, 3), np.uint8), region="packing")
+
+        assert list(texts) == ["MVD2"]
+        assert decoder.stats()['regions']['packing']['tier2_fallback'] == 1
+
+    def test_shadow_mode_counts_missed_frames(self, mocker):
+        """Test shadow mode keeps WeChat results and counts tier-1 false negatives"""
+        decoder = _decoder(mocker, "shadow", [])
+        detector = mocker.MagicMock()
+        detector.detectAndDecode.return_value = (("TimeGo",), None)
+
+        texts, _ = decoder.detect_and_decode(detector, np.zeros((50, 50, 3), np.uint8), region="trigger")
+
+        stats = decoder.stats()['regions']['trigger']
+        assert list(texts) == ["TimeGo"]
+        assert stats['shadow_checked'] == 1 and stats['shadow_missed'] == 1
+        assert stats['shadow_miss_rate'] == 1.0
+
+    def test_decode_boxes_does_not_count_frame_again(self, mocker):
+        """Test a retry on known boxes skips tier 1 and leaves the frame counters alone"""
+        decoder = _decoder(mocker, "on", [(40, 50, 20, 20)])
+        detector = mocker.MagicMock()
+        detector.detectAndDecode.return_value = ((), None)
+        frame = np.zeros((200, 200, 3), np.uint8)
+
+        _, _, boxes = decoder.detect_and_decode_boxes(detector, frame, region="packing")
+        decoder.decode_boxes(detector, frame, boxes, region="packing")
+
+        stats = decoder.stats()['regions']['packing']
+        assert decoder.localize.call_count == 1
+        assert stats['frames'] == 1 and stats['tier1_passed'] == 1
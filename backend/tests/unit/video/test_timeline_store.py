@@ -0,0 +1,85 @@
+"""
+Unit tests for timeline_store module
+Tests text log compatibility of records and reading segments back from SQLite
+"""
+import sqlite3
+
+
+def _store_cursor():
+    """In-memory database with the timeline tables from database.py"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE timeline_segments (log_file TEXT PRIMARY KEY, video_file TEXT, camera_name TEXT,
+                    start_second INTEGER NOT NULL, end_second INTEGER NOT NULL, start_time TEXT NOT NULL,
+                    closed INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.execute("""CREATE TABLE timeline_records (id INTEGER PRIMARY KEY AUTOINCREMENT, log_file TEXT NOT NULL,
+                    second REAL NOT NULL, state TEXT NOT NULL, tracking_code TEXT DEFAULT '',
+                    bbox_x INTEGER, bbox_y INTEGER, bbox_w INTEGER, bbox_h INTEGER)""")
+    return conn.cursor()
+
+
+class TestTextFormat:
+    """Tests for format_record / parse_record / parse_header"""
+
+    def test_record_round_trip(self):
+        """Test records format to the existing log lines and parse back"""
+        from modules.technician.timeline_store import format_record, parse_record
+
+        assert format_record(12, "On") == "12,On,"
+        assert format_record(15, "Off", "MVD1", (10, 20, 57, 58)) == "15,Off,MVD1,bbox:[10,20,57,58]"
+        assert parse_record("15,Off,MVD1,bbox:[10,20,57,58]\n") == (15.0, "Off", "MVD1", (10, 20, 57, 58))
+        assert parse_record("16,Off,,boundary:[1,2,3,4]") == (16.0, "Off", "", (1, 2, 3, 4))
+        assert parse_record("# Start: 0, End: 300") is None
+        assert parse_record("garbage") is None
+
+    def test_header_round_trip(self):
+        """Test the segment header keeps every meta field"""
+        from modules.technician.timeline_store import format_header, parse_header
+
+        meta = {'start_second': 300, 'end_second': 600, 'start_time': '2025-01-01 08:05:00',
+                'camera_name': 'Cam1', 'video_file': '/videos/cam1.mp4'}
+
+        assert parse_header(format_header(meta)) == meta
+
+
+class TestLoadSegment:
+    """Tests for load_segment"""
+
+    def test_records_in_write_order(self):
+        """Test stored records come back as (second, state, code, bbox) in insertion order"""
+        from modules.technician.timeline_store import load_segment
+
+        cursor = _store_cursor()
+        cursor.execute("INSERT INTO timeline_segments (log_file, video_file, camera_name, start_second, end_second, start_time) "
+                       "VALUES ('log_a.txt', '/v.mp4', 'Cam1', 0, 300, '2025-01-01 08:00:00')")
+        cursor.executemany("INSERT INTO timeline_records (log_file, second, state, tracking_code, bbox_x, bbox_y, bbox_w, bbox_h) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           [('log_a.txt', 20, 'Off', '', None, None, None, None),
+                            ('log_a.txt', 12, 'On', 'MVD1', 1, 2, 3, 4)])
+
+        meta, records = load_segment(cursor, 'log_a.txt')
+
+        assert meta['camera_name'] == 'Cam1' and meta['start_second'] == 0
+        assert records == [(20.0, 'Off', '', None), (12.0, 'On', 'MVD1', (1, 2, 3, 4))]
+        assert load_segment(cursor, 'log_missing.txt') is None
+
+
+class TestTimelineOrder:
+    """Tests for timeline_order"""
+
+    def test_video_start_then_segment_with_text_header_fallback(self, tmp_path):
+        """Test segments of two videos do not interleave and legacy text logs sort by their header"""
+        from modules.technician.timeline_store import format_header, timeline_order
+
+        legacy = tmp_path / "log_legacy_0300_0600.txt"
+        legacy.write_text(format_header({'start_second': 300, 'end_second': 600, 'start_time': '2025-01-01 08:05:00',
+                                         'camera_name': 'Cam1', 'video_file': '/v1.mp4'}) + "\n")
+        rows = [
+            ('v2_0000', 'Cam1', '2025-01-01 09:00:00', 0),
+            ('v1_0600', 'Cam1', '2025-01-01 08:10:00', 600),
+            (str(legacy), None, None, None),
+            ('v1_0000', 'Cam1', '2025-01-01 08:00:00', 0),
+        ]
+
+        assert timeline_order(rows) == [
+            ('v1_0000', 'Cam1'), (str(legacy), 'Cam1'), ('v1_0600', 'Cam1'), ('v2_0000', 'Cam1'),
+        ]
@@ -0,0 +1,60 @@
+"""
+Unit tests for trigger_presence module
+Tests skipped decodes while TimeGo stays in place and decodes on suspected transitions
+"""
+import numpy as np
+
+
+def _trigger(present=True, seed=5):
+    """120x120 BGR trigger crop, with a random 60x60 'TimeGo' code at (30, 30) when present"""
+    rng = np.random.RandomState(seed)
+    frame = (rng.rand(120, 120, 1) * 40 + 100).astype(np.uint8).repeat(3, axis=2)
+    if present:
+        code = (np.random.RandomState(1).rand(60, 60) > 0.5).astype(np.uint8) * 255
+        frame[30:90, 30:90] = code[:, :, None]
+    return frame
+
+
+_POINTS = np.array([[30, 30], [90, 30], [90, 90], [30, 90]], dtype=np.float32)
+
+
+class TestTriggerPresenceCheck:
+    """Tests for TriggerPresenceCheck"""
+
+    def test_stable_state_skips_decode(self):
+        """Test On and Off are predicted while they match the last decode"""
+        from modules.technician.trigger_presence import TriggerPresenceCheck
+
+        presence = TriggerPresenceCheck(fps=10)
+        assert presence.predict(_trigger(), 1) is None   # no template yet
+        presence.update(_trigger(), 1, "On", _POINTS)
+
+        assert presence.predict(_trigger(seed=6), 3) == "On"
+
+        presence.update(_trigger(present=False), 5, "Off")
+        assert presence.predict(_trigger(present=False, seed=7), 7) == "Off"
+        assert presence.stats['skipped'] == 2
+
+    def test_transition_is_decoded(self):
+        """Test a state that differs from the last decode is left to the decoder"""
+        from modules.technician.trigger_presence import TriggerPresenceCheck
+
+        presence = TriggerPresenceCheck(fps=10)
+        presence.update(_trigger(), 1, "On", _POINTS)
+        assert presence.predict(_trigger(present=False), 3) is None
+
+        presence.update(_trigger(present=False), 3, "Off")
+        assert presence.predict(_trigger(), 5) is None
+
+    def test_gap_and_interval_force_decode(self):
+        """Test decode_interval_sec and non-consecutive samples force a decode"""
+        from modules.technician.trigger_presence import TriggerPresenceCheck
+
+        presence = TriggerPresenceCheck(fps=10, config={'decode_interval_sec': 1.0, 'max_gap_sec': 0.6})
+        presence.update(_trigger(), 1, "On", _POINTS)
+        assert presence.predict(_trigger(), 6) == "On"
+        assert presence.predict(_trigger(), 11) is None   # 1.0s since the decode
+        assert presence.predict(_trigger(), 4) is None    # backwards
+
+        presence.update(_trigger(), 20, "On", _POINTS)
+        assert presence.predict(_trigger(), 30) is None   # 1.0s gap between samples